@@ -13,7 +13,7 @@ from . importers import *
 from . exporters import *
 from . scriptman import *
 from . materialtools import *
-from .main.common import exclusion_cache
+from .main.common import exclusion_cache, image_cache, material_cache, clear_data_caches
 
 bl_info = {
     "name": "Cyberpunk 2077 IO Suite",
@@ -101,6 +101,9 @@ def register():
         if not hasattr(bpy.types, cls.__name__):
             bpy.utils.register_class(cls)
     load_icons()
+    bpy.app.handlers.load_post.append(clear_data_caches)
+    bpy.app.handlers.undo_post.append(clear_data_caches)
+    bpy.app.handlers.redo_post.append(clear_data_caches)
     print('')
     print('-------------------- Cyberpunk IO Suite Has Started--------------------')
     print('')
@@ -119,6 +122,11 @@ def unregister():
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
     unload_icons()
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if clear_data_caches in handlers:
+            handlers.remove(clear_data_caches)
     exclusion_cache.clear_cache()
+    image_cache.clear_cache()
+    material_cache.clear_cache()
 if __name__ == "__main__":
     register()
@@ -360,14 +360,20 @@ class CP77_PT_AnimsPanel(Panel):
                     icon='PAUSE' if active else 'PLAY',
                     depress=active,
                 )
+                panel.prop(props, "partial_solve")
 
                 # Timing readout
                 timing = bpy.app.driver_namespace.get("cp77_facial_last_ms", {})
+                frames = bpy.app.driver_namespace.get("cp77_facial_frames", {})
                 if timing:
                     tcol = panel.column(align=True)
                     tcol.scale_y = 0.85
                     for name, ms in timing.items():
-                        tcol.label(text=f"{name}: {ms:.1f} ms", icon='TIME')
+                        tcol.label(text=f"{name}: {ms:.2f} ms", icon='TIME')
+                        counts = frames.get(name)
+                        if counts:
+                            tcol.label(text=f"{counts['solved']} solved, {counts['partial']} partial, "
+                                            f"{counts['skipped']} skipped")
 
                 row = panel.row()
                 row.operator("cp77_facial.solve_now", text="Solve Now",
@@ -12,6 +12,7 @@ from typing import Tuple
 
 from ..main.common import get_classes, show_message
 from .compat import get_action_fcurves
+from .tracks import _bulk_replace_keyframes
 
 from . import rig_binding
 from . import pose_preview
@@ -154,6 +155,105 @@ def _bind_to_object(context, obj, rig, setup, setup_path, rig_path):
     _CACHE["setup"] = setup
 
 
+# Batch bake helpers — CP77_OT_BakeFacialAnimation
+
+_BAKE_CHANNELS = (("location", 3), ("rotation_quaternion", 4), ("scale", 3))
+
+
+def _bake_needs_frame_set(obj) -> bool:
+    """True when drivers or NLA strips take part in evaluating obj, so its F-curves alone do not give the pose."""
+    adt = obj.animation_data
+    if adt is None:
+        return False
+    return len(adt.drivers) > 0 or any(not t.mute for t in adt.nla_tracks)
+
+
+def _sample_bake_inputs(context, obj, cache, frames):
+    """
+    Input tracks (frames × num_tracks) and pose bone channels ({prop: frames × bones × n})
+    of obj at every frame, as frame_set would leave them.
+
+    Without drivers or NLA this evaluates the action's F-curves directly; otherwise it
+    falls back to frame_set per frame, still without keying or solving in between.
+    """
+    pbones = obj.pose.bones
+    num_bones = len(pbones)
+    track_names = cache.rig.track_names
+    channels = {}
+
+    if _bake_needs_frame_set(obj):
+        tracks = np.empty((len(frames), cache.track_segments.num_tracks), dtype=np.float32)
+        for prop, width in _BAKE_CHANNELS:
+            channels[prop] = np.empty((len(frames), num_bones, width), dtype=np.float32)
+        for f, frame in enumerate(frames):
+            context.scene.frame_set(int(frame))
+            tracks[f] = rig_binding.read_tracks(obj, cache)
+            for prop, data in channels.items():
+                pbones.foreach_get(prop, data[f].reshape(-1))
+        return tracks, channels
+
+    samples = {}
+    fcurves = get_action_fcurves(obj.animation_data.action) if obj.animation_data else None
+    for fc in fcurves or ():
+        if not fc.mute:
+            samples[(fc.data_path, fc.array_index)] = np.array(
+                [fc.evaluate(frame) for frame in frames], dtype=np.float32)
+
+    # unkeyed tracks and channels hold their current value for the whole range
+    static = rig_binding.read_tracks(obj, cache)
+    tracks = np.repeat(static[None], len(frames), axis=0)
+    for i, name in enumerate(track_names):
+        values = samples.get((f'["{name}"]', 0))
+        if values is not None:
+            tracks[:, i] = values
+
+    for prop, width in _BAKE_CHANNELS:
+        current = np.empty(num_bones * width, dtype=np.float32)
+        pbones.foreach_get(prop, current)
+        data = np.repeat(current.reshape(1, num_bones, width), len(frames), axis=0)
+        for b, pb in enumerate(pbones):
+            path = pb.path_from_id(prop)
+            for c in range(width):
+                values = samples.get((path, c))
+                if values is not None:
+                    data[:, b, c] = values
+        channels[prop] = data
+    return tracks, channels
+
+
+def _bake_range(context, obj, cache, frames) -> None:
+    """
+    Solve frames as one batch and key location, rotation_quaternion and scale of every
+    pose bone, each F-curve written once.  Same keys as keyframing after every solve.
+    """
+    pbones = obj.pose.bones
+    tracks, channels = _sample_bake_inputs(context, obj, cache, frames)
+    bone_quats, bone_trans, out_tracks = _solver.facial_solve_range(cache, tracks, lod=0)
+
+    # solved bones, rig order → pose bone order, xyzw → Blender (w, x, y, z)
+    used = np.array([int(b) for b in cache.setup.used_bone_indices], dtype=np.intp)
+    pose_idx = np.array([pbones.find(str(cache.rig.bone_names[b])) for b in used], dtype=np.intp)
+    used, pose_idx = used[pose_idx >= 0], pose_idx[pose_idx >= 0]
+    q = bone_quats[:, used]
+    t = bone_trans[:, used]
+    channels["rotation_quaternion"][:, pose_idx] = q[..., [3, 2, 0, 1]]
+    channels["location"][:, pose_idx] = np.stack((-t[..., 2], t[..., 0], t[..., 1]), axis=-1)
+
+    action = obj.animation_data.action
+    key_frames = np.asarray(frames, dtype=np.float32)
+    for prop, data in channels.items():
+        for b, pb in enumerate(pbones):
+            path = pb.path_from_id(prop)
+            for c in range(data.shape[2]):
+                fc = action.fcurve_ensure_for_datablock(obj, path, index=c, group_name=pb.name)
+                _bulk_replace_keyframes(fc, key_frames, data[:, b, c])
+
+    # leave the scene on the last baked frame, posed and with its output tracks
+    context.scene.frame_set(int(frames[-1]))
+    _solver.write_bones(obj, cache, bone_quats[-1], bone_trans[-1])
+    rig_binding.write_output_tracks(obj, cache, out_tracks[-1])
+
+
 # Operators
 
 class CP77_OT_LoadFacial(Operator):
@@ -374,7 +474,7 @@ class CP77_OT_ResetTracksToDefaults(Operator):
 
 
 class CP77_OT_BakeFacialAnimation(Operator):
-    """Bake facial animation over frame range using facial_solve_numpy."""
+    """Bake facial animation over frame range using the facial solver."""
     bl_idname = "cp77.bake_facial_animation"
     bl_label = "Bake Facial Animation"
     bl_options = {'REGISTER', 'UNDO'}
@@ -382,6 +482,12 @@ class CP77_OT_BakeFacialAnimation(Operator):
     frame_start:   bpy.props.IntProperty(name="Start Frame", default=1, min=0)
     frame_end:     bpy.props.IntProperty(name="End Frame",   default=250, min=0)
     keyframe_step: bpy.props.IntProperty(name="Step", default=1, min=1, max=10)
+    batch:         bpy.props.BoolProperty(
+            name="Batch",
+            description="Solve the whole range at once and write each F-curve in one pass "
+                        "instead of solving and keyframing frame by frame",
+            default=True,
+            )
 
     @classmethod
     def poll(cls, context):
@@ -412,15 +518,32 @@ class CP77_OT_BakeFacialAnimation(Operator):
             self.report({'ERROR'}, 'End frame must be >= start frame.')
             return {'CANCELLED'}
 
+        t0 = time.perf_counter()
+        frames = range(self.frame_start, self.frame_end + 1, self.keyframe_step)
+        if self.batch:
+            _bake_range(context, obj, cache, frames)
+            frame_count = len(frames)
+        else:
+            frame_count = self._bake_frames(context, obj, cache, frames)
+
+        obj.update_tag(refresh={'DATA'})
+        context.view_layer.update()
+        self.report(
+            {'INFO'},
+            f'Baked {frame_count} frames '
+            f'({self.frame_start}-{self.frame_end}) '
+            f'in {time.perf_counter() - t0:.1f}s.')
+        return {'FINISHED'}
+
+    def _bake_frames(self, context, obj, cache, frames) -> int:
+        """Solve and keyframe one frame at a time."""
         frame_count = 0
-        for frame in range(self.frame_start, self.frame_end + 1,
-                           self.keyframe_step):
+        for frame in frames:
             context.scene.frame_set(frame)
 
             in_tracks = rig_binding.read_tracks(obj, cache)
-            bone_quats, bone_trans, out_tracks = _solver.facial_solve_numpy(
-                cache.setup, cache.rig, cache.track_segments,
-                in_tracks, lod=0,
+            bone_quats, bone_trans, out_tracks = _solver.facial_solve(
+                cache, in_tracks, lod=0,
             )
 
             _solver.write_bones(obj, cache, bone_quats, bone_trans)
@@ -433,14 +556,7 @@ class CP77_OT_BakeFacialAnimation(Operator):
                 bone.keyframe_insert(data_path="scale", frame=frame)
 
             frame_count += 1
-
-        obj.update_tag(refresh={'DATA'})
-        context.view_layer.update()
-        self.report(
-            {'INFO'},
-            f'Baked {frame_count} frames '
-            f'({self.frame_start}-{self.frame_end}).')
-        return {'FINISHED'}
+        return frame_count
 
     def invoke(self, context, event):
         self.frame_start = context.scene.frame_start
@@ -452,6 +568,7 @@ class CP77_OT_BakeFacialAnimation(Operator):
         layout.prop(self, "frame_start")
         layout.prop(self, "frame_end")
         layout.prop(self, "keyframe_step")
+        layout.prop(self, "batch")
 
 
 class CP77_OT_ClearFacialAnimation(Operator):
@@ -614,9 +731,8 @@ class CP77_OT_PreviewFacialPose(Operator):
                            tracks_in: np.ndarray) -> bool:
         """Run facial solver and write bone transforms."""
         try:
-            bone_quats, bone_trans, out_tracks = _solver.facial_solve_numpy(
-                cache.setup, cache.rig, cache.track_segments,
-                tracks_in, lod=0,
+            bone_quats, bone_trans, out_tracks = _solver.facial_solve(
+                cache, tracks_in, lod=0,
             )
         except Exception as e:
             self.report({'ERROR'}, f'Solver error: {e}')
@@ -0,0 +1,927 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .facial_setup_loader import (
+    WEIGHT_THRESHOLD,
+    ENV_UPPER_FACE,
+    ENV_LOWER_FACE,
+    ENV_LIPSYNC,
+    ENV_JALI_JAW,
+    ENV_JALI_LIPS,
+    ENV_MUZZLE_LIPS,
+    ENV_MUZZLE_EYES,
+    ENV_MUZZLE_BROWS,
+    ENV_MUZZLE_EYE_DIR,
+    INFL_LINEAR,
+    INFL_EXPONENTIAL,
+    INFL_ORGANIC,
+)
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# Accelerated backend for solver.facial_solve_numpy.
+#
+# compile_setup flattens each facialPartData once (at bind time, see rig_binding.BindingCache) into
+# intp CSR arrays with precomputed row ids, dependency levels for the stages that update tracks one
+# entry at a time, and the highest LOD flag of each corrective. facial_solve_fused then runs every
+# stage as a fixed number of array operations per part: only poses above WEIGHT_THRESHOLD reach the
+# transform blend, and correctives gated off at the current LOD are never evaluated. With numba
+# installed the same arrays feed JIT kernels that run the reference loops as written.
+#
+# Parts solve their tracks first and blend afterwards, so a SolveState can skip a frame whose inputs
+# did not move and replay the parts whose reads did not change (see FusedPart.in_reads).
+
+# working tracks every part reads its envelope scalars from
+_ENVELOPE_SCALARS = np.array([
+    ENV_UPPER_FACE, ENV_LOWER_FACE, ENV_LIPSYNC, ENV_JALI_JAW, ENV_JALI_LIPS,
+    ENV_MUZZLE_LIPS, ENV_MUZZLE_EYES, ENV_MUZZLE_BROWS, ENV_MUZZLE_EYE_DIR,
+], dtype=np.intp)
+
+# other_muzzles lookup index (stage 3), env_type of an envelope mapping
+_MUZZLE_EYES      = 2
+_MUZZLE_BROWS     = 3
+_MUZZLE_EYE_DIR   = 4
+
+# corrective influence flags (stage 14)
+_FLAG_BY_SPEED          = 1
+_FLAG_LINEAR_CORRECTION = 2
+
+
+def _jit(fn):
+    """numba.njit the kernel when numba is installed; without it the kernel stays plain Python."""
+    return njit(cache=True)(fn) if NUMBA_AVAILABLE else fn
+
+
+# Compiled data
+
+@dataclass
+class FusedPart:
+    """One facialPartData as flat solve-ready arrays (intp indices, float64 limits)."""
+
+    part_name: str
+
+    # Stage 3
+    env_tracks: np.ndarray
+    env_lods:   np.ndarray
+    env_types:  np.ndarray
+
+    # Stage 4, levels split repeated tracks so they apply in order
+    limit_tracks:   np.ndarray
+    limit_envelope: np.ndarray
+    limit_min:      np.ndarray
+    limit_mid:      np.ndarray
+    limit_max:      np.ndarray
+    limit_levels:   List[np.ndarray]
+
+    # Stages 5 & 9, CSR as loaded plus (targets, types, reads, rows) per dependency level
+    infl_tracks:  np.ndarray
+    infl_types:   np.ndarray
+    infl_row_ptr: np.ndarray
+    infl_indices: np.ndarray
+    infl_levels:  List[Tuple[np.ndarray, ...]]
+
+    # Stages 6 & 8
+    ulf_tracks: np.ndarray
+    ulf_parts:  np.ndarray
+    lps_tracks: np.ndarray
+    lps_out:    np.ndarray   # lipsync output track of each lps track
+
+    # Stage 10
+    num_ib_poses:   int
+    main_tracks:    np.ndarray
+    ib_row_ptr:     np.ndarray
+    ib_count:       np.ndarray   # inbetweens per main pose
+    ib_rows:        np.ndarray   # main pose of each inbetween
+    ib_thresholds:  np.ndarray
+    sm_row_ptr:     np.ndarray
+    ib_scope_mults: np.ndarray
+
+    # Stages 12 & 13: GCE then ICE entries of each corrective in one CSR. Sources index
+    # [out_tracks, ib_weights, 0.0], ICE references past the inbetweens read the trailing 0.
+    num_correctives: int
+    corr_lod:        np.ndarray   # highest entry flag, the corrective is off above this LOD
+    corr_row_ptr:    np.ndarray
+    corr_src:        np.ndarray
+    gcorr_row_ptr:   np.ndarray
+    gcorr_tracks:    np.ndarray
+    icorr_row_ptr:   np.ndarray
+    icorr_tracks:    np.ndarray
+
+    # Stage 14
+    ci_pose:        np.ndarray
+    ci_types:       np.ndarray
+    ci_row_ptr:     np.ndarray
+    ci_influencers: np.ndarray
+    ci_levels:      List[Tuple[np.ndarray, ...]]
+
+    # Stages 15 & 16
+    main_poses:       Tuple[np.ndarray, ...]   # (row_ptr, bones, quats, trans)
+    corrective_poses: Tuple[np.ndarray, ...]
+
+    # Stage 17
+    wrinkle_src:   np.ndarray
+    wrinkle_start: int
+
+    # What the part reads and writes: input tracks, working tracks it reads before writing them, and
+    # working tracks it writes. Equal reads give equal writes and pose weights (see SolveState).
+    in_reads:  np.ndarray
+    out_reads: np.ndarray
+    writes:    np.ndarray
+
+    # lod → (alive correctives, sources, reduceat starts, alive correctives with entries)
+    _corr_plans: Dict[int, tuple] = field(default_factory=dict, repr=False)
+
+    def corr_plan(self, lod: int) -> tuple:
+        """Correctives that can be non-zero at `lod` and the flat sources of their products."""
+        plan = self._corr_plans.get(lod)
+        if plan is None:
+            alive = np.flatnonzero(self.corr_lod <= lod)
+            counts = self.corr_row_ptr[alive + 1] - self.corr_row_ptr[alive]
+            src = self.corr_src[_csr_positions(self.corr_row_ptr[alive], counts)]
+            nonempty = counts > 0
+            starts = (np.cumsum(counts) - counts)[nonempty]
+            plan = (alive, src, starts, alive[nonempty])
+            self._corr_plans[lod] = plan
+        return plan
+
+    def kernel_args(self) -> tuple:
+        """Arguments of _k_part after the per-solve ones."""
+        return (
+            self.env_tracks, self.env_lods, self.env_types,
+            self.limit_tracks, self.limit_envelope, self.limit_min, self.limit_mid, self.limit_max,
+            self.infl_tracks, self.infl_types, self.infl_row_ptr, self.infl_indices,
+            self.ulf_tracks, self.ulf_parts, self.lps_tracks, self.lps_out,
+            self.main_tracks, self.ib_row_ptr, self.ib_thresholds, self.sm_row_ptr, self.ib_scope_mults,
+            self.corr_lod, self.gcorr_row_ptr, self.gcorr_tracks, self.icorr_row_ptr, self.icorr_tracks,
+            self.ci_pose, self.ci_types, self.ci_row_ptr, self.ci_influencers,
+            self.wrinkle_src, self.wrinkle_start,
+        )
+
+
+@dataclass
+class FusedSetup:
+    """FacialSetupData compiled for facial_solve_fused, parts in solve order (tongue, eyes, face)."""
+
+    parts:       Tuple[FusedPart, ...]
+    num_bones:   int
+    num_tracks:  int
+    ovr_tracks:  np.ndarray   # lipsync override track of each entry of ovr_map
+    ovr_map:     np.ndarray   # main pose track each lipsync override scales
+
+    # Every part's inbetween and corrective pose transforms in solve order. e_pose indexes the
+    # concatenated [ib_weights, corr_weights] of all parts.
+    e_pose:  np.ndarray
+    e_bone:  np.ndarray
+    e_quat:  np.ndarray
+    e_trans: np.ndarray
+
+    _kernel_args: List[tuple] = field(default_factory=list, repr=False)
+
+
+# Compilation
+
+def _csr_positions(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Flat positions of the CSR rows beginning at starts, rows concatenated."""
+    total = int(counts.sum())
+    return np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+
+
+def _schedule(writes: np.ndarray, row_ptr=None, reads=None) -> List[np.ndarray]:
+    """
+    Split entries that update writes[i] from reads[row_ptr[i]:row_ptr[i+1]] (and writes[i] itself),
+    one after another, into levels that can update at once with the same result.
+
+    An entry lands after the last level that wrote anything it reads or writes, and no earlier than
+    the last level that read its target (reads in a level happen before its writes).
+    """
+    last_write: Dict[int, int] = {}
+    last_read: Dict[int, int] = {}
+    levels = np.empty(len(writes), dtype=np.intp)
+    for i, w in enumerate(writes.tolist()):
+        rd = reads[row_ptr[i]:row_ptr[i + 1]].tolist() if reads is not None else []
+        lv = max([last_read.get(w, 0)] + [last_write.get(t, -1) + 1 for t in rd + [w]])
+        levels[i] = lv
+        for t in rd + [w]:
+            last_read[t] = max(last_read.get(t, 0), lv)
+        last_write[w] = lv
+    return [np.flatnonzero(levels == lv) for lv in range(int(levels.max()) + 1 if len(levels) else 0)]
+
+
+def _levels_with_reads(levels, targets, types, row_ptr, reads):
+    """(targets, types, reads, level-local reader row) of each level."""
+    out = []
+    for entries in levels:
+        counts = row_ptr[entries + 1] - row_ptr[entries]
+        out.append((
+            targets[entries],
+            types[entries],
+            reads[_csr_positions(row_ptr[entries], counts)],
+            np.repeat(np.arange(len(entries)), counts),
+        ))
+    return out
+
+
+def _pose_arrays(pa) -> Tuple[np.ndarray, ...]:
+    """
+    (row_ptr, bones, quats, trans) of a PoseArrays, keeping only the last entry of a bone a pose lists twice.
+
+    facial_solve_numpy blends a pose's bones with one fancy-indexed update, so of repeated bones only
+    the last entry lands; the fused blend would apply every entry in turn.
+    """
+    row_ptr = pa.row_ptr.astype(np.intp)
+    bones = pa.pose_bones.astype(np.intp)
+    rows = np.repeat(np.arange(len(row_ptr) - 1), np.diff(row_ptr))
+    key = rows * (int(bones.max()) + 1 if len(bones) else 1) + bones
+    _, last = np.unique(key[::-1], return_index=True)
+    keep = np.sort(len(key) - 1 - last)
+    if len(keep) < len(key):
+        row_ptr = np.zeros_like(row_ptr)
+        np.cumsum(np.bincount(rows[keep], minlength=len(row_ptr) - 1), out=row_ptr[1:])
+    return (
+        row_ptr,
+        bones[keep],
+        np.ascontiguousarray(pa.pose_quats[keep], dtype=np.float32),
+        np.ascontiguousarray(pa.pose_trans[keep], dtype=np.float32),
+    )
+
+
+def _compile_part(part, seg, num_tracks: int, ovr_tracks: np.ndarray, ovr_map: np.ndarray) -> FusedPart:
+    ip = np.intp
+
+    infl_tracks  = part.infl_tracks.astype(ip)
+    infl_types   = part.infl_types.astype(ip)
+    infl_row_ptr = part.infl_row_ptr.astype(ip)
+    infl_indices = part.infl_indices.astype(ip)
+
+    limit_tracks = part.limit_tracks.astype(ip)
+
+    ib_row_ptr = part.ib_row_ptr.astype(ip)
+    ib_count   = np.diff(ib_row_ptr)
+
+    # Stages 12 & 13 as one product per corrective: GCE sources first, then ICE
+    n_corr = part.num_correctives
+    gcorr_row_ptr = part.gcorr_row_ptr.astype(ip)
+    icorr_row_ptr = part.icorr_row_ptr.astype(ip)
+    gcorr_tracks  = part.gcorr_tracks.astype(ip)
+    icorr_tracks  = part.icorr_tracks.astype(ip)
+    g_counts = np.diff(gcorr_row_ptr)
+    i_counts = np.diff(icorr_row_ptr)
+    corr_row_ptr = np.zeros(n_corr + 1, dtype=ip)
+    np.cumsum(g_counts + i_counts, out=corr_row_ptr[1:])
+    corr_src = np.empty(int(corr_row_ptr[-1]), dtype=ip)
+    rows_g = np.repeat(np.arange(n_corr), g_counts)
+    rows_i = np.repeat(np.arange(n_corr), i_counts)
+    corr_src[corr_row_ptr[rows_g] + np.arange(len(rows_g)) - gcorr_row_ptr[rows_g]] = gcorr_tracks
+    corr_src[corr_row_ptr[rows_i] + g_counts[rows_i] + np.arange(len(rows_i)) - icorr_row_ptr[rows_i]] = (
+        num_tracks + np.minimum(icorr_tracks, part.num_ib_poses)
+    )
+    corr_lod = np.full(n_corr, -1, dtype=ip)
+    np.maximum.at(corr_lod, rows_g, part.gcorr_flags.astype(ip))
+    np.maximum.at(corr_lod, rows_i, part.icorr_flags.astype(ip))
+
+    ci_pose        = part.corr_infl_pose_idx.astype(ip)
+    ci_types       = part.corr_infl_types.astype(ip)
+    ci_row_ptr     = part.corr_infl_row_ptr.astype(ip)
+    ci_influencers = part.corr_infl_influencers.astype(ip)
+
+    lps_tracks = part.lps_tracks.astype(ip)
+    lps_out    = lps_tracks - seg.envelope_end + seg.lipsync_out_start
+    env_tracks = part.env_tracks.astype(ip)
+    main_tracks = part.main_tracks.astype(ip)
+    ulf_tracks  = part.ulf_tracks.astype(ip)
+    wrinkle_src = part.wrinkle_source_tracks.astype(ip)
+    wrinkle_start = int(part.wrinkle_start_track)
+
+    # Stage 3 overwrites env_tracks from the inputs before anything reads them
+    out_reads = np.union1d(_ENVELOPE_SCALARS, np.setdiff1d(np.concatenate((
+        limit_tracks, infl_tracks, infl_indices, ulf_tracks, ovr_map, lps_tracks,
+        main_tracks, gcorr_tracks, wrinkle_src,
+    )), env_tracks))
+    writes = np.unique(np.concatenate((
+        env_tracks, limit_tracks, infl_tracks, ulf_tracks, ovr_map, lps_tracks,
+        wrinkle_start + np.arange(len(wrinkle_src)),
+    )))
+
+    return FusedPart(
+        part_name      = part.part_name,
+        env_tracks     = env_tracks,
+        env_lods       = part.env_lods.astype(ip),
+        env_types      = part.env_types.astype(ip),
+        limit_tracks   = limit_tracks,
+        limit_envelope = part.limit_envelope.astype(ip),
+        limit_min      = part.limit_min.astype(np.float64),
+        limit_mid      = part.limit_mid.astype(np.float64),
+        limit_max      = part.limit_max.astype(np.float64),
+        limit_levels   = _schedule(limit_tracks),
+        infl_tracks    = infl_tracks,
+        infl_types     = infl_types,
+        infl_row_ptr   = infl_row_ptr,
+        infl_indices   = infl_indices,
+        infl_levels    = _levels_with_reads(
+            _schedule(infl_tracks, infl_row_ptr, infl_indices),
+            infl_tracks, infl_types, infl_row_ptr, infl_indices,
+        ),
+        ulf_tracks     = ulf_tracks,
+        ulf_parts      = part.ulf_parts.astype(ip),
+        lps_tracks     = lps_tracks,
+        lps_out        = lps_out,
+        num_ib_poses   = part.num_ib_poses,
+        main_tracks    = main_tracks,
+        ib_row_ptr     = ib_row_ptr,
+        ib_count       = ib_count,
+        ib_rows        = np.repeat(np.arange(part.num_main_poses), ib_count),
+        ib_thresholds  = part.ib_thresholds.astype(np.float32),
+        sm_row_ptr     = part.sm_row_ptr.astype(ip),
+        ib_scope_mults = part.ib_scope_mults.astype(np.float32),
+        num_correctives = n_corr,
+        corr_lod       = corr_lod,
+        corr_row_ptr   = corr_row_ptr,
+        corr_src       = corr_src,
+        gcorr_row_ptr  = gcorr_row_ptr,
+        gcorr_tracks   = gcorr_tracks,
+        icorr_row_ptr  = icorr_row_ptr,
+        icorr_tracks   = icorr_tracks,
+        ci_pose        = ci_pose,
+        ci_types       = ci_types,
+        ci_row_ptr     = ci_row_ptr,
+        ci_influencers = ci_influencers,
+        ci_levels      = _levels_with_reads(
+            _schedule(ci_pose, ci_row_ptr, ci_influencers),
+            ci_pose, ci_types, ci_row_ptr, ci_influencers,
+        ),
+        main_poses       = _pose_arrays(part.main_poses),
+        corrective_poses = _pose_arrays(part.corrective_poses),
+        wrinkle_src    = wrinkle_src,
+        wrinkle_start  = wrinkle_start,
+        in_reads       = np.unique(np.concatenate((env_tracks, ovr_tracks, lps_out))),
+        out_reads      = out_reads,
+        writes         = writes,
+    )
+
+
+def compile_setup(setup, rig, seg) -> FusedSetup:
+    """
+    Compile a FacialSetupData for facial_solve_fused.  Runs once per bind.
+
+    A bone listed twice in one pose keeps only its last entry, the one facial_solve_numpy applies.
+    """
+    ovr_map = setup.lipsync_override_idx_map.astype(np.intp)
+    ovr_tracks = seg.lipsync_ovr_start + np.arange(len(ovr_map))
+    parts = tuple(
+        _compile_part(part, seg, rig.num_tracks, ovr_tracks, ovr_map)
+        for part in (setup.tongue, setup.eyes, setup.face)
+    )
+
+    e_pose, e_bone, e_quat, e_trans = [], [], [], []
+    offset = 0
+    for part in parts:
+        for row_ptr, bones, quats, trans in (part.main_poses, part.corrective_poses):
+            e_pose.append(offset + np.repeat(np.arange(len(row_ptr) - 1), np.diff(row_ptr)))
+            e_bone.append(bones)
+            e_quat.append(quats)
+            e_trans.append(trans)
+            offset += len(row_ptr) - 1
+
+    return FusedSetup(
+        parts      = parts,
+        num_bones  = rig.num_bones,
+        num_tracks = rig.num_tracks,
+        ovr_tracks = ovr_tracks,
+        ovr_map    = ovr_map,
+        e_pose     = np.concatenate(e_pose),
+        e_bone     = np.concatenate(e_bone),
+        e_quat     = np.concatenate(e_quat),
+        e_trans    = np.concatenate(e_trans),
+    )
+
+
+# NumPy stages
+
+def _quat_mul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """a[N,4] * b[N,4], xyzw."""
+    ax, ay, az, aw = a[:, 0], a[:, 1], a[:, 2], a[:, 3]
+    bx, by, bz, bw = b[:, 0], b[:, 1], b[:, 2], b[:, 3]
+    return np.stack([
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    ], axis=1)
+
+
+def _envelope_weights(p: FusedPart, in_tracks, out_tracks, lod, lod_weight, muzzles) -> None:
+    """Stage 3."""
+    weights = np.clip(in_tracks[p.env_tracks], 0.0, 1.0)
+    weights *= muzzles[p.env_types]
+    weights = np.where(p.env_lods > lod, weights,
+                       np.where(p.env_lods == lod, weights * np.float32(1.0 - lod_weight), np.float32(0.0)))
+    weights[weights <= WEIGHT_THRESHOLD] = 0.0
+    out_tracks[p.env_tracks] = weights
+
+
+def _global_limits(p: FusedPart, out_tracks, jali_jaw, jali_lips, muzzle_lips) -> None:
+    """Stage 4, callers skip it when the lipsync envelope is 0."""
+    if not len(p.limit_tracks):
+        return
+    env = p.limit_envelope
+    slider = np.where(env == 0, jali_jaw, np.where(env == 1, jali_lips, 1.0))
+    mn, mid, mx = p.limit_min, p.limit_mid, p.limit_max
+    low = slider <= 1.0
+    v = np.where(low, mn + slider * (mid - mn), mid + (slider - 1.0) * (mx - mid))
+    a = np.where(low, mn, mid)
+    b = np.where(low, mid, mx)
+    max_w = np.clip(v, np.minimum(a, b), np.maximum(a, b))
+    for entries in p.limit_levels:
+        tracks = p.limit_tracks[entries]
+        cur = out_tracks[tracks].astype(np.float64)
+        mw = max_w[entries]
+        out_tracks[tracks] = np.where(cur > mw, cur + muzzle_lips * (mw - cur), cur)
+
+
+def _influences(p: FusedPart, out_tracks) -> None:
+    """Stages 5 & 9."""
+    for targets, types, reads, rows in p.infl_levels:
+        w = out_tracks[targets].astype(np.float64)
+        if not (w > 0.0).any():
+            continue
+        inf_sum = np.bincount(rows, weights=out_tracks[reads], minlength=len(targets))
+        opp = 1.0 - inf_sum
+        new = np.where(types == INFL_LINEAR, np.minimum(w, opp),
+              np.where(types == INFL_EXPONENTIAL, w * (1.0 - inf_sum * inf_sum),
+              np.where(types == INFL_ORGANIC, w * opp * opp, w)))
+        new = np.where(inf_sum >= 1.0, 0.0, new)
+        out_tracks[targets] = np.where(w > 0.0, new, w)
+
+
+def _inbetween_weights(p: FusedPart, out_tracks) -> np.ndarray:
+    """Stage 10."""
+    ib_weights = np.zeros(p.num_ib_poses, dtype=np.float32)
+    w = out_tracks[p.main_tracks].astype(np.float64)
+    on = w >= WEIGHT_THRESHOLD
+    single = on & (p.ib_count == 1)
+    ib_weights[p.ib_row_ptr[:-1][single]] = w[single]
+
+    m = np.flatnonzero(on & (p.ib_count > 1))
+    if not len(m):
+        return ib_weights
+    wm  = w[m]
+    s   = p.ib_row_ptr[m]
+    n   = p.ib_count[m]
+    sm  = p.sm_row_ptr[m]
+    th  = p.ib_thresholds
+    below = wm <= th[s]
+    above = ~below & (wm >= th[s + n - 1])
+    mid   = ~below & ~above
+    ib_weights[s[below]] = wm[below] * p.ib_scope_mults[sm[below]]
+    ib_weights[s[above] + n[above] - 1] = 1.0
+    if mid.any():
+        # thresholds are sorted per pose, so the bracketing end is the count of thresholds <= w
+        at_or_below = th <= w[p.ib_rows]
+        end = np.bincount(p.ib_rows, weights=at_or_below, minlength=len(w)).astype(np.intp)[m[mid]]
+        s_mid = s[mid]
+        end_w = (wm[mid] - th[s_mid + end - 1]) * p.ib_scope_mults[sm[mid] + end - 1]
+        ib_weights[s_mid + end - 1] = 1.0 - end_w
+        ib_weights[s_mid + end] = end_w
+    return ib_weights
+
+
+def _corrective_weights(p: FusedPart, out_tracks, ib_weights, lod) -> np.ndarray:
+    """Stages 12 & 13, only correctives whose entries are all enabled at `lod`."""
+    corr_weights = np.zeros(p.num_correctives, dtype=np.float32)
+    alive, src, starts, alive_nonempty = p.corr_plan(lod)
+    corr_weights[alive] = 1.0
+    if len(src):
+        sources = np.concatenate((out_tracks, ib_weights, np.zeros(1, dtype=np.float32)))
+        values = np.clip(sources[src], 0.0, 1.0)
+        corr_weights[alive_nonempty] = np.multiply.reduceat(values, starts)
+    return corr_weights
+
+
+def _corrective_influences(p: FusedPart, corr_weights) -> None:
+    """Stage 14."""
+    for targets, flags, reads, rows in p.ci_levels:
+        current = corr_weights[targets].astype(np.float64)
+        if not (current > WEIGHT_THRESHOLD).any():
+            continue
+        inf_sum = np.bincount(rows, weights=corr_weights[reads], minlength=len(targets))
+        opp = 1.0 - inf_sum
+        by_speed = (flags & _FLAG_BY_SPEED) != 0
+        new = np.where(
+            (flags & _FLAG_LINEAR_CORRECTION) != 0,
+            current * opp * np.where(by_speed, opp, 1.0),
+            np.where(inf_sum >= 1.0, 0.0,
+                     np.where(by_speed, current * (1.0 - inf_sum * inf_sum), np.minimum(current, opp))),
+        )
+        corr_weights[targets] = np.where(current > WEIGHT_THRESHOLD, np.maximum(new, 0.0), current)
+
+
+def _blend_transforms(fs: FusedSetup, weights, bone_quats, bone_trans) -> None:
+    """
+    Stages 15 & 16 for every part at once.
+
+    nlerp(q, q * dq, w) is q * normalize(lerp(1, +-dq, w)) with the sign taken from dq's w alone, so
+    each active transform is a rotation factor independent of the bone's current rotation. A bone's
+    result is the product of its factors in solve order, reduced pairwise in log2(depth) rounds.
+    """
+    w = weights[fs.e_pose]
+    sel = np.flatnonzero(w > WEIGHT_THRESHOLD)
+    if not len(sel):
+        return
+    w = w[sel]
+    bones = fs.e_bone[sel]
+    dq = fs.e_quat[sel]
+
+    # Translation: always linear, add.at keeps the per-bone order
+    np.add.at(bone_trans, bones, fs.e_trans[sel] * w[:, np.newaxis])
+
+    factors = np.where(dq[:, 3:] < 0.0, -dq, dq) * w[:, np.newaxis]
+    factors[:, 3] += 1.0 - w
+    norms = np.linalg.norm(factors, axis=1, keepdims=True)
+    factors = np.where(norms < 1e-8, np.array([0.0, 0.0, 0.0, 1.0], dtype=np.float32),
+                       factors / np.where(norms < 1e-8, 1.0, norms))
+    factors = np.where((w >= 1.0 - 1e-5)[:, np.newaxis], dq, factors)
+
+    order = np.argsort(bones, kind="stable")
+    bones = bones[order]
+    factors = factors[order]
+    index = np.arange(len(bones))
+    first = np.ones(len(bones), dtype=bool)
+    first[1:] = bones[1:] != bones[:-1]
+    rank = index - np.maximum.accumulate(np.where(first, index, 0))
+    while True:
+        # each even-ranked factor absorbs the next one of its bone, ranks halve
+        has_next = np.zeros(len(bones), dtype=bool)
+        has_next[:-1] = bones[1:] == bones[:-1]
+        pair = np.flatnonzero(has_next & (rank % 2 == 0))
+        if not len(pair):
+            break
+        factors[pair] = _quat_mul(factors[pair], factors[pair + 1])
+        keep = np.ones(len(bones), dtype=bool)
+        keep[pair + 1] = False
+        bones = bones[keep]
+        factors = factors[keep]
+        rank = rank[keep] // 2
+    bone_quats[bones] = _quat_mul(bone_quats[bones], factors)
+
+
+def _part_numpy(fs: FusedSetup, i: int, in_tracks, out_tracks, lod, lod_weight):
+    """Stages 3-14 and 17 of part i on out_tracks, returns its (ib_weights, corr_weights)."""
+    p = fs.parts[i]
+    upper_face     = min(max(float(out_tracks[ENV_UPPER_FACE]), 0.0), 2.0)
+    lower_face     = min(max(float(out_tracks[ENV_LOWER_FACE]), 0.0), 2.0)
+    lipsync_env    = min(max(float(out_tracks[ENV_LIPSYNC]), 0.0), 1.0)
+    jali_jaw       = min(max(float(out_tracks[ENV_JALI_JAW]), 0.0), 2.0)
+    jali_lips      = min(max(float(out_tracks[ENV_JALI_LIPS]), 0.0), 2.0)
+    muzzle_lips    = min(max(float(out_tracks[ENV_MUZZLE_LIPS]), 0.0), 1.0)
+    muzzle_eyes    = min(max(float(out_tracks[ENV_MUZZLE_EYES]), 0.0), 1.0)
+    muzzle_brows   = min(max(float(out_tracks[ENV_MUZZLE_BROWS]), 0.0), 1.0)
+    muzzle_eye_dir = min(max(float(out_tracks[ENV_MUZZLE_EYE_DIR]), 0.0), 1.0)
+
+    muzzles = np.ones(6, dtype=np.float32)
+    muzzles[_MUZZLE_EYES]    = 1.0 - muzzle_eyes
+    muzzles[_MUZZLE_BROWS]   = 1.0 - muzzle_brows
+    muzzles[_MUZZLE_EYE_DIR] = 1.0 - muzzle_eye_dir
+    _envelope_weights(p, in_tracks, out_tracks, lod, lod_weight, muzzles)
+
+    if lipsync_env != 0.0:
+        _global_limits(p, out_tracks, jali_jaw, jali_lips, muzzle_lips)
+    _influences(p, out_tracks)
+
+    fw = np.array([1.0, upper_face, lower_face], dtype=np.float32)
+    out_tracks[p.ulf_tracks] = np.clip(out_tracks[p.ulf_tracks] * fw[p.ulf_parts], 0.0, 1.0)
+
+    if lipsync_env != 0.0:
+        scale = 1.0 + lipsync_env * (in_tracks[fs.ovr_tracks].astype(np.float64) - 1.0)
+        np.multiply.at(out_tracks, fs.ovr_map, scale.astype(np.float32))
+
+    out_tracks[p.lps_tracks] = np.clip(out_tracks[p.lps_tracks] + in_tracks[p.lps_out], 0.0, 1.0)
+    _influences(p, out_tracks)
+
+    ib_weights = _inbetween_weights(p, out_tracks)
+    corr_weights = _corrective_weights(p, out_tracks, ib_weights, lod)
+    _corrective_influences(p, corr_weights)
+
+    if len(p.wrinkle_src):
+        u = 1.0 - out_tracks[p.wrinkle_src]
+        out_tracks[p.wrinkle_start:p.wrinkle_start + len(p.wrinkle_src)] = np.clip(1.0 - u * u, 0.0, 1.0)
+    return ib_weights, corr_weights
+
+
+def _blend_numpy(fs: FusedSetup, weights, bone_quats, bone_trans) -> None:
+    _blend_transforms(fs, np.concatenate([w for pair in weights for w in pair]), bone_quats, bone_trans)
+
+
+# JIT kernels (numba), the reference loops over the compiled arrays
+
+@_jit
+def _k_influences(out_tracks, tracks, types, row_ptr, indices):
+    for i in range(len(tracks)):
+        t_idx = tracks[i]
+        w = float(out_tracks[t_idx])
+        if w <= 0.0:
+            continue
+        inf_sum = 0.0
+        for k in range(row_ptr[i], row_ptr[i + 1]):
+            inf_sum += out_tracks[indices[k]]
+        itype = types[i]
+        if inf_sum >= 1.0:
+            w = 0.0
+        elif itype == INFL_LINEAR:
+            w = min(w, 1.0 - inf_sum)
+        elif itype == INFL_EXPONENTIAL:
+            w *= 1.0 - inf_sum * inf_sum
+        elif itype == INFL_ORGANIC:
+            opp = 1.0 - inf_sum
+            w *= opp * opp
+        out_tracks[t_idx] = w
+
+
+@_jit
+def _k_blend(weights, row_ptr, pose_bones, pose_quats, pose_trans, bone_quats, bone_trans):
+    for ib in range(len(row_ptr) - 1):
+        w = float(weights[ib])
+        if w <= WEIGHT_THRESHOLD:
+            continue
+        for k in range(row_ptr[ib], row_ptr[ib + 1]):
+            b = pose_bones[k]
+            for j in range(3):
+                bone_trans[b, j] += pose_trans[k, j] * w
+            ax, ay, az, aw = bone_quats[b, 0], bone_quats[b, 1], bone_quats[b, 2], bone_quats[b, 3]
+            bx, by, bz, bw = pose_quats[k, 0], pose_quats[k, 1], pose_quats[k, 2], pose_quats[k, 3]
+            fx = aw * bx + ax * bw + ay * bz - az * by
+            fy = aw * by - ax * bz + ay * bw + az * bx
+            fz = aw * bz + ax * by - ay * bx + az * bw
+            fw = aw * bw - ax * bx - ay * by - az * bz
+            if w < 1.0 - 1e-5:
+                if ax * fx + ay * fy + az * fz + aw * fw < 0.0:
+                    fx, fy, fz, fw = -fx, -fy, -fz, -fw
+                fx = ax + w * (fx - ax)
+                fy = ay + w * (fy - ay)
+                fz = az + w * (fz - az)
+                fw = aw + w * (fw - aw)
+                n = np.sqrt(fx * fx + fy * fy + fz * fz + fw * fw)
+                if n < 1e-8:
+                    continue
+                fx, fy, fz, fw = fx / n, fy / n, fz / n, fw / n
+            bone_quats[b, 0] = fx
+            bone_quats[b, 1] = fy
+            bone_quats[b, 2] = fz
+            bone_quats[b, 3] = fw
+
+
+@_jit
+def _k_part(
+    in_tracks, out_tracks, lod, lod_weight, ovr_tracks, ovr_map,
+    env_tracks, env_lods, env_types,
+    limit_tracks, limit_envelope, limit_min, limit_mid, limit_max,
+    infl_tracks, infl_types, infl_row_ptr, infl_indices,
+    ulf_tracks, ulf_parts, lps_tracks, lps_out,
+    main_tracks, ib_row_ptr, ib_thresholds, sm_row_ptr, ib_scope_mults,
+    corr_lod, gcorr_row_ptr, gcorr_tracks, icorr_row_ptr, icorr_tracks,
+    ci_pose, ci_types, ci_row_ptr, ci_influencers,
+    wrinkle_src, wrinkle_start,
+):
+    upper_face     = min(max(float(out_tracks[ENV_UPPER_FACE]), 0.0), 2.0)
+    lower_face     = min(max(float(out_tracks[ENV_LOWER_FACE]), 0.0), 2.0)
+    lipsync_env    = min(max(float(out_tracks[ENV_LIPSYNC]), 0.0), 1.0)
+    jali_jaw       = min(max(float(out_tracks[ENV_JALI_JAW]), 0.0), 2.0)
+    jali_lips      = min(max(float(out_tracks[ENV_JALI_LIPS]), 0.0), 2.0)
+    muzzle_lips    = min(max(float(out_tracks[ENV_MUZZLE_LIPS]), 0.0), 1.0)
+    muzzle_eyes    = min(max(float(out_tracks[ENV_MUZZLE_EYES]), 0.0), 1.0)
+    muzzle_brows   = min(max(float(out_tracks[ENV_MUZZLE_BROWS]), 0.0), 1.0)
+    muzzle_eye_dir = min(max(float(out_tracks[ENV_MUZZLE_EYE_DIR]), 0.0), 1.0)
+
+    # Stage 3
+    for i in range(len(env_tracks)):
+        w = min(max(float(in_tracks[env_tracks[i]]), 0.0), 1.0)
+        et = env_types[i]
+        if et == _MUZZLE_EYES:
+            w *= 1.0 - muzzle_eyes
+        elif et == _MUZZLE_BROWS:
+            w *= 1.0 - muzzle_brows
+        elif et == _MUZZLE_EYE_DIR:
+            w *= 1.0 - muzzle_eye_dir
+        if env_lods[i] == lod:
+            w *= 1.0 - lod_weight
+        elif env_lods[i] < lod:
+            w = 0.0
+        out_tracks[env_tracks[i]] = w if w > WEIGHT_THRESHOLD else 0.0
+
+    # Stage 4
+    if lipsync_env != 0.0:
+        for i in range(len(limit_tracks)):
+            env_id = limit_envelope[i]
+            slider = jali_jaw if env_id == 0 else (jali_lips if env_id == 1 else 1.0)
+            mn, mid, mx = limit_min[i], limit_mid[i], limit_max[i]
+            if slider <= 1.0:
+                v = mn + slider * (mid - mn)
+                lo, hi = min(mn, mid), max(mn, mid)
+            else:
+                v = mid + (slider - 1.0) * (mx - mid)
+                lo, hi = min(mid, mx), max(mid, mx)
+            max_w = max(lo, min(hi, v))
+            current = float(out_tracks[limit_tracks[i]])
+            if current > max_w:
+                out_tracks[limit_tracks[i]] = current + muzzle_lips * (max_w - current)
+
+    # Stage 5
+    _k_influences(out_tracks, infl_tracks, infl_types, infl_row_ptr, infl_indices)
+
+    # Stage 6
+    scaled = np.empty(len(ulf_tracks), dtype=np.float32)
+    for i in range(len(ulf_tracks)):
+        part = ulf_parts[i]
+        mult = 1.0 if part == 0 else (upper_face if part == 1 else lower_face)
+        scaled[i] = min(max(float(out_tracks[ulf_tracks[i]]) * mult, 0.0), 1.0)
+    for i in range(len(ulf_tracks)):
+        out_tracks[ulf_tracks[i]] = scaled[i]
+
+    # Stage 7
+    if lipsync_env != 0.0:
+        for j in range(len(ovr_map)):
+            out_tracks[ovr_map[j]] *= 1.0 + lipsync_env * (float(in_tracks[ovr_tracks[j]]) - 1.0)
+
+    # Stage 8
+    summed = np.empty(len(lps_tracks), dtype=np.float32)
+    for i in range(len(lps_tracks)):
+        summed[i] = min(max(float(out_tracks[lps_tracks[i]]) + float(in_tracks[lps_out[i]]), 0.0), 1.0)
+    for i in range(len(lps_tracks)):
+        out_tracks[lps_tracks[i]] = summed[i]
+
+    # Stage 9
+    _k_influences(out_tracks, infl_tracks, infl_types, infl_row_ptr, infl_indices)
+
+    # Stage 10
+    ib_weights = np.zeros(len(ib_thresholds), dtype=np.float32)
+    for m in range(len(main_tracks)):
+        w = float(out_tracks[main_tracks[m]])
+        ib_s = ib_row_ptr[m]
+        ib_e = ib_row_ptr[m + 1]
+        n = ib_e - ib_s
+        if w < WEIGHT_THRESHOLD:
+            continue
+        if n == 1:
+            ib_weights[ib_s] = w
+            continue
+        sm_s = sm_row_ptr[m]
+        if w <= ib_thresholds[ib_s]:
+            ib_weights[ib_s] = w * ib_scope_mults[sm_s]
+        elif w >= ib_thresholds[ib_e - 1]:
+            ib_weights[ib_e - 1] = 1.0
+        else:
+            end = np.searchsorted(ib_thresholds[ib_s:ib_e], w, side="right")
+            end_w = (w - ib_thresholds[ib_s + end - 1]) * ib_scope_mults[sm_s + end - 1]
+            ib_weights[ib_s + end - 1] = 1.0 - end_w
+            ib_weights[ib_s + end] = end_w
+
+    # Stages 12 & 13, correctives gated off at this LOD stay 0
+    n_corr = len(corr_lod)
+    corr_weights = np.zeros(n_corr, dtype=np.float32)
+    for c in range(n_corr):
+        if corr_lod[c] > lod:
+            continue
+        cw = 1.0
+        for k in range(gcorr_row_ptr[c], gcorr_row_ptr[c + 1]):
+            cw *= min(max(float(out_tracks[gcorr_tracks[k]]), 0.0), 1.0)
+        if cw > 0.0:
+            for k in range(icorr_row_ptr[c], icorr_row_ptr[c + 1]):
+                ib_ref = icorr_tracks[k]
+                parent_w = float(ib_weights[ib_ref]) if ib_ref < len(ib_weights) else 0.0
+                cw *= min(max(parent_w, 0.0), 1.0)
+        corr_weights[c] = cw
+
+    # Stage 14
+    for i in range(len(ci_pose)):
+        c = ci_pose[i]
+        current = float(corr_weights[c])
+        if current <= WEIGHT_THRESHOLD:
+            continue
+        inf_sum = 0.0
+        for k in range(ci_row_ptr[i], ci_row_ptr[i + 1]):
+            inf_sum += corr_weights[ci_influencers[k]]
+        flags = ci_types[i]
+        by_speed = (flags & _FLAG_BY_SPEED) != 0
+        if (flags & _FLAG_LINEAR_CORRECTION) != 0:
+            opp = 1.0 - inf_sum
+            current *= opp
+            if by_speed:
+                current *= opp
+        elif inf_sum >= 1.0:
+            current = 0.0
+        elif not by_speed:
+            current = min(current, 1.0 - inf_sum)
+        else:
+            current *= 1.0 - inf_sum * inf_sum
+        corr_weights[c] = max(0.0, current)
+
+    # Stage 17
+    for i in range(len(wrinkle_src)):
+        u = 1.0 - float(out_tracks[wrinkle_src[i]])
+        out_tracks[wrinkle_start + i] = min(max(1.0 - u * u, 0.0), 1.0)
+
+    # Stages 15 & 16 run in _blend_jit once every part has its weights
+    return ib_weights, corr_weights
+
+
+def _part_jit(fs: FusedSetup, i: int, in_tracks, out_tracks, lod, lod_weight):
+    if not fs._kernel_args:
+        fs._kernel_args = [p.kernel_args() for p in fs.parts]
+    return _k_part(in_tracks, out_tracks, lod, float(lod_weight), fs.ovr_tracks, fs.ovr_map, *fs._kernel_args[i])
+
+
+def _blend_jit(fs: FusedSetup, weights, bone_quats, bone_trans) -> None:
+    for p, (ib_weights, corr_weights) in zip(fs.parts, weights):
+        _k_blend(ib_weights, *p.main_poses, bone_quats, bone_trans)
+        _k_blend(corr_weights, *p.corrective_poses, bone_quats, bone_trans)
+
+
+class SolveState:
+    """
+    The previous facial_solve_fused call on one binding, for skipping work that would repeat it.
+
+    A solve with the same LOD and input tracks as the last one returns the last result untouched. With
+    partial set, a part whose reads (FusedPart.in_reads / out_reads) match its last solve replays the
+    track values it wrote and reuses its pose weights instead of re-solving; the blend runs only when
+    some part re-solved. Results are shared with the state, callers must not modify them in place.
+    """
+
+    def __init__(self, partial: bool = True):
+        self.partial = partial
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the last solve, the next one runs in full."""
+        self.key = None
+        self.in_tracks = None
+        self.parts = {}       # part index → (in_key, out_key, written values, weights)
+        self.result = None
+        self.status = ''      # 'skipped', 'partial' or 'solved', for the last call
+
+
+# Public solver
+
+def facial_solve_fused(
+    fs:         FusedSetup,
+    in_tracks:  np.ndarray,
+    lod:        int   = 0,
+    lod_weight: float = 0.0,
+    use_jit:    bool  = NUMBA_AVAILABLE,
+    state:      SolveState = None,
+):
+    """
+    facial_solve_numpy on a compiled setup.  Returns (bone_quats, bone_trans, out_tracks).
+
+    use_jit runs the numba kernels (the default when numba is installed), otherwise the
+    vectorized NumPy stages. With a SolveState, unchanged frames and parts are not re-solved
+    and state.status reports what ran.
+    """
+    in_tracks = np.asarray(in_tracks, dtype=np.float32)
+    key = (int(lod), float(lod_weight))
+    same_key = state is not None and state.result is not None and state.key == key
+    if same_key and np.array_equal(state.in_tracks, in_tracks):
+        state.status = 'skipped'
+        return state.result
+
+    solve_part, blend = (_part_jit, _blend_jit) if use_jit else (_part_numpy, _blend_numpy)
+    reuse = same_key and state.partial
+    out_tracks = in_tracks.copy()
+    weights = []
+    solved = 0
+    for i, p in enumerate(fs.parts):
+        in_key = in_tracks[p.in_reads]
+        out_key = out_tracks[p.out_reads]
+        cached = state.parts.get(i) if reuse else None
+        if cached is not None and np.array_equal(cached[0], in_key) and np.array_equal(cached[1], out_key):
+            out_tracks[p.writes] = cached[2]
+            weights.append(cached[3])
+            continue
+        part_weights = solve_part(fs, i, in_tracks, out_tracks, key[0], key[1])
+        weights.append(part_weights)
+        solved += 1
+        if state is not None:
+            state.parts[i] = (in_key, out_key, out_tracks[p.writes], part_weights)
+
+    if solved == 0:
+        # every part replayed, so the weights and the blend match the last solve
+        bone_quats, bone_trans = state.result[:2]
+    else:
+        bone_quats = np.zeros((fs.num_bones, 4), dtype=np.float32)
+        bone_quats[:, 3] = 1.0
+        bone_trans = np.zeros((fs.num_bones, 3), dtype=np.float32)
+        blend(fs, weights, bone_quats, bone_trans)
+
+    if state is not None:
+        state.key = key
+        state.in_tracks = in_tracks.copy()
+        state.result = (bone_quats, bone_trans, out_tracks)
+        state.status = 'solved' if solved == len(fs.parts) else 'partial'
+    return bone_quats, bone_trans, out_tracks
@@ -695,7 +695,6 @@ class JALIAnimationPipeline:
         Matches the old JALICurveGenerator approach: amplitude drives jaw
         opening, pitch deviation drives lip shape.
         """
-        import math
         print("[JALI] Mode: Acoustic-only (amplitude/pitch)")
 
         num_frames = int(duration * self.fps) + 1
@@ -716,54 +715,35 @@ class JALIAnimationPipeline:
             ja[sounding] = 0.4
             return ja, li
 
-        from .jali_core import PARSELMOUTH_AVAILABLE
+        from .jali_core import PARSELMOUTH_AVAILABLE, AudioFeatures
         if not PARSELMOUTH_AVAILABLE:
             print("[JALI]   No parselmouth — uniform fallback")
             ja[sounding] = 0.4
             return ja, li
 
-        import parselmouth
-        from parselmouth.praat import call
-
-        sound = parselmouth.Sound(audio_path)
-        intensity = sound.to_intensity(time_step=0.01)
-        pitch = sound.to_pitch(time_step=0.01)
+        # Intensity and pitch of every frame at 10 ms analysis steps, analysed once per audio file
+        features = AudioFeatures.load(audio_path)
+        iv = features.intensity(times, time_step=0.01)
+        pv = features.pitch(times, time_step=0.01)
 
         # Global stats for normalization
-        int_vals, pitch_vals = [], []
-        for t in times[sounding]:
-            iv = intensity.get_value(float(t))
-            pv = pitch.get_value_at_time(float(t))
-            if not math.isnan(iv):
-                int_vals.append(iv)
-            if not math.isnan(pv) and pv > 0:
-                pitch_vals.append(pv)
-
-        int_mean = np.mean(int_vals) if int_vals else 60.0
-        int_std = max(np.std(int_vals), 1.0) if int_vals else 10.0
-        pitch_mean = np.mean(pitch_vals) if pitch_vals else 150.0
-        pitch_std = max(np.std(pitch_vals), 10.0) if pitch_vals else 50.0
+        int_vals = iv[sounding & ~np.isnan(iv)]
+        pitch_vals = pv[sounding & ~np.isnan(pv) & (pv > 0)]
+
+        int_mean = np.mean(int_vals) if len(int_vals) else 60.0
+        int_std = max(np.std(int_vals), 1.0) if len(int_vals) else 10.0
+        pitch_mean = np.mean(pitch_vals) if len(pitch_vals) else 150.0
+        pitch_std = max(np.std(pitch_vals), 10.0) if len(pitch_vals) else 50.0
 
         print(f"[JALI]   Intensity: mean={int_mean:.1f} std={int_std:.1f}")
         print(f"[JALI]   Pitch: mean={pitch_mean:.1f} std={pitch_std:.1f}")
 
         # Per-frame: amplitude  -> JA, pitch deviation  -> LI
-        for i, t in enumerate(times):
-            if not sounding[i]:
-                continue
-            iv = intensity.get_value(float(t))
-            pv = pitch.get_value_at_time(float(t))
-
-            if not math.isnan(iv):
-                z = (iv - int_mean) / int_std
-                # Map: mean intensity  -> JA=0.3, loud  -> 0.65, quiet  -> 0.1
-                ja[i] = float(np.clip(0.3 + 0.35 * z, 0.05, 1.0))
-            else:
-                ja[i] = 0.3
-
-            if not math.isnan(pv) and pv > 0:
-                z = (pv - pitch_mean) / pitch_std
-                li[i] = float(np.clip(0.3 * z, -0.8, 0.8))
+        # Map: mean intensity  -> JA=0.3, loud  -> 0.65, quiet  -> 0.1
+        ja_all = np.where(np.isnan(iv), 0.3, np.clip(0.3 + 0.35 * (iv - int_mean) / int_std, 0.05, 1.0))
+        li_all = np.where(np.isnan(pv) | ~(pv > 0), 0.0, np.clip(0.3 * (pv - pitch_mean) / pitch_std, -0.8, 0.8))
+        ja[sounding] = ja_all[sounding]
+        li[sounding] = li_all[sounding]
 
         # Smooth (5-frame moving average, preserves timing)
         kernel = np.ones(5) / 5.0
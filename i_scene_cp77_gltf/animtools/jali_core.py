@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 import math
+import os
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
@@ -236,10 +238,64 @@ PHONEME_TO_VISEME = {
 }
 
 
+# Viseme ids of PhonemeTimeline.viseme, -1 for phonemes without a viseme (pauses)
+VISEMES: Tuple[str, ...] = tuple(sorted(set(PHONEME_TO_VISEME.values())))
+_VISEME_ID = {v: i for i, v in enumerate(VISEMES)}
+
+
 def _get_viseme(phoneme: str) -> str:
     """Map phoneme to viseme group (paper Figure 4)."""
     return PHONEME_TO_VISEME.get(phoneme.rstrip('012'), phoneme)
 
+
+@dataclass
+class PhonemeTimeline:
+    """Columnar form of a PhonemeEvent list, one entry per event in order.
+
+    Holds the speech motion curve breakpoints of each event as
+    DominanceBlender.compute_dominance_curve derives them (onset start,
+    apex, sustain end and decay end, after pause clamping) together with
+    its JALI values, so every curve can be evaluated in one pass.
+    """
+    onset: np.ndarray        # curve start (s)
+    apex: np.ndarray         # sustain start (s)
+    sustain_end: np.ndarray  # decay start (s)
+    decay_end: np.ndarray    # curve end (s)
+    viseme: np.ndarray       # index into VISEMES, -1 if none
+    jaw: np.ndarray
+    lip: np.ndarray
+    dominance: np.ndarray
+
+    @classmethod
+    def from_events(cls, events: List[PhonemeEvent]) -> "PhonemeTimeline":
+        def column(values, dtype=np.float64):
+            return np.fromiter(values, dtype=dtype, count=len(events))
+
+        lip_heavy = column((getattr(e, 'is_lip_heavy', False) for e in events), bool)
+        natural = np.where(lip_heavy, 0.150, 0.120)
+        apex = column(e.apex for e in events)
+        sustain_end = column(e.sustain_end for e in events)
+
+        # Extended start/end widen the curve, pause boundaries clip it
+        onset = np.minimum(apex - natural, column(e.start for e in events))
+        decay_end = np.maximum(sustain_end + natural, column(e.end for e in events))
+        onset = np.maximum(onset, column(getattr(e, 'prev_pause_end', float('-inf')) for e in events))
+        decay_end = np.minimum(decay_end, column(getattr(e, 'next_pause_start', float('inf')) for e in events))
+
+        return cls(
+            onset=onset,
+            apex=apex,
+            sustain_end=sustain_end,
+            decay_end=decay_end,
+            viseme=column((_VISEME_ID.get(_get_viseme(e.phoneme), -1) for e in events), np.int32),
+            jaw=column(e.jaw for e in events),
+            lip=column(e.lip for e in events),
+            dominance=column(e.dominance for e in events),
+        )
+
+    def __len__(self) -> int:
+        return len(self.apex)
+
 # DOMINANCE BLENDER (Paper §4.2)
 
 class DominanceBlender:
@@ -325,6 +381,46 @@ class DominanceBlender:
         # Scale by dominance
         return envelope * event.dominance
 
+    @staticmethod
+    def compute_dominance_curves(
+            timeline: PhonemeTimeline,
+            times: np.ndarray,
+            ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """compute_dominance_curve of every event at once.
+
+        Curves are only non-zero between their onset and decay end, so
+        they are returned sparse: (event, frame, value) entries ordered
+        by event then frame.  Values match compute_dominance_curve for
+        the float32 time grids blend_jali_parameters uses.
+        """
+        f32 = np.float32
+        onset = timeline.onset.astype(f32)
+        decay_end = timeline.decay_end.astype(f32)
+        # pause clamping can pull onset past the apex or decay end before the
+        # sustain end, the sustain plateau still holds there
+        first = np.searchsorted(times, np.minimum(timeline.onset, timeline.apex).astype(f32), side='left')
+        last = np.searchsorted(times, np.maximum(timeline.decay_end, timeline.sustain_end).astype(f32), side='right')
+        count = np.maximum(last - first, 0)
+
+        event = np.repeat(np.arange(len(timeline)), count)
+        frame = np.arange(len(event)) - np.repeat(np.cumsum(count) - count, count) + first[event]
+        t = times[frame]
+
+        apex = timeline.apex.astype(f32)[event]
+        sustain_end = timeline.sustain_end.astype(f32)[event]
+        onset_dur = np.maximum(timeline.apex - timeline.onset, 0.001).astype(f32)[event]
+        decay_dur = np.maximum(timeline.decay_end - timeline.sustain_end, 0.001).astype(f32)[event]
+
+        # sin² onset, 1.0 sustain, cos² decay, later segments win as in compute_dominance_curve
+        half_pi = f32(0.5 * np.pi)
+        rise = np.sin(half_pi * np.clip((t - onset[event]) / onset_dur, 0, 1)) ** 2
+        fall = np.cos(half_pi * np.clip((t - sustain_end) / decay_dur, 0, 1)) ** 2
+        envelope = np.where((t >= onset[event]) & (t < apex), rise, f32(0.0))
+        envelope = np.where((t >= apex) & (t <= sustain_end), f32(1.0), envelope)
+        envelope = np.where((t > sustain_end) & (t <= decay_end[event]), fall, envelope)
+
+        return event, frame, envelope * timeline.dominance.astype(f32)[event]
+
     def blend_jali_parameters(
             self,
             events: List[PhonemeEvent],
@@ -338,15 +434,13 @@ class DominanceBlender:
         num_frames = int(duration * self.fps) + 1
         times = np.linspace(0, duration, num_frames, dtype=np.float32)
 
-        jaw_weighted = np.zeros(num_frames, dtype=np.float64)
-        lip_weighted = np.zeros(num_frames, dtype=np.float64)
-        dominance_sum = np.zeros(num_frames, dtype=np.float64)
-
-        for event in events:
-            D = self.compute_dominance_curve(event, times)
-            jaw_weighted += event.jaw * D
-            lip_weighted += event.lip * D
-            dominance_sum += D
+        # One pass over every event's curve entries; bincount sums each
+        # frame in event order like accumulating the curves one by one
+        timeline = PhonemeTimeline.from_events(events)
+        event, frame, D = self.compute_dominance_curves(timeline, times)
+        jaw_weighted = np.bincount(frame, timeline.jaw.astype(np.float32)[event] * D, num_frames)
+        lip_weighted = np.bincount(frame, timeline.lip.astype(np.float32)[event] * D, num_frames)
+        dominance_sum = np.bincount(frame, D, num_frames)
 
         eps = 1e-8
         jaw_curve = jaw_weighted / (dominance_sum + eps)
@@ -481,15 +575,14 @@ class CoarticulationEngine:
         indefinitely after the sentence ends.
         """
         n = len(events)
+        speech = [i for i, event in enumerate(events) if event.phoneme not in PAUSES]
+        first_speech = speech[0] if speech else n
+        last_speech = speech[-1] if speech else -1
         for i, event in enumerate(events):
             if event.phoneme not in PAUSES:
                 continue
 
-            has_prev_speech = any(
-                events[j].phoneme not in PAUSES for j in range(i))
-            has_next_speech = any(
-                events[j].phoneme not in PAUSES for j in range(i + 1, n))
-            is_interior = has_prev_speech and has_next_speech
+            is_interior = first_speech < i < last_speech
 
             if is_interior:
                 # Inherit jaw from previous non-pause neighbour
@@ -516,14 +609,17 @@ class CoarticulationEngine:
         Both `end` and `original_end` are extended so the merged
         viseme's natural sustain region covers the full combined span.
         """
-        i = 0
-        while i < len(events) - 1:
-            if _get_viseme(events[i].phoneme) == _get_viseme(events[i + 1].phoneme):
-                events[i].end = events[i + 1].end
-                events[i].original_end = events[i + 1].original_end
-                events.pop(i + 1)
+        if not events:
+            return
+        merged = [events[0]]
+        for event in events[1:]:
+            kept = merged[-1]
+            if _get_viseme(kept.phoneme) == _get_viseme(event.phoneme):
+                kept.end = event.end
+                kept.original_end = event.original_end
             else:
-                i += 1
+                merged.append(event)
+        events[:] = merged
 
     @staticmethod
     def _extend_lip_heavy(events: List[PhonemeEvent]):
@@ -812,6 +908,286 @@ class CoarticulationEngine:
                 event.jaw *= 0.7
 
 
+# ACOUSTIC FEATURES (Praat analyses, once per audio file)
+
+def default_feature_cache_dir() -> Optional[str]:
+    """Blender's user datafiles folder when running inside Blender, otherwise no disk cache."""
+    try:
+        import bpy
+        return bpy.utils.user_resource('DATAFILES', path='cp77_jali_cache')
+    except Exception:
+        return None
+
+
+def _frame_values(obj, xs) -> np.ndarray:
+    """Values of a single-channel Praat object at its frame times."""
+    return np.asarray(obj.values, dtype=np.float64).ravel()[:len(xs)]
+
+
+def _frame_grid(obj) -> np.ndarray:
+    """[x1, dx] of a Praat Sampled object, the exact frame grid its own queries use."""
+    return np.array([obj.x1, obj.dx], dtype=np.float64)
+
+
+def _analyse_intensity(sound, name, time_step=0.0) -> Dict[str, np.ndarray]:
+    intensity = sound.to_intensity(time_step=time_step or None)
+    xs = np.asarray(intensity.xs(), dtype=np.float64)
+    textgrid = call(intensity, "To TextGrid (silences)", -25, 0.1, 0.05, "silent", "sounding")
+    count = call(textgrid, "Get number of intervals", 1)
+    intervals = [
+        (call(textgrid, "Get start time of interval", 1, i),
+         call(textgrid, "Get end time of interval", 1, i),
+         call(textgrid, "Get label of interval", 1, i) == "sounding")
+        for i in range(1, count + 1)
+    ]
+    starts, ends, sounding = zip(*intervals) if intervals else ((), (), ())
+    return {
+        name + '_t': xs,
+        name + '_grid': _frame_grid(intensity),
+        name: _frame_values(intensity, xs),
+        name + '_silence_start': np.asarray(starts, dtype=np.float64),
+        name + '_silence_end': np.asarray(ends, dtype=np.float64),
+        name + '_silence_sounding': np.asarray(sounding, dtype=bool),
+    }
+
+
+def _analyse_pitch(sound, name, time_step=0.0) -> Dict[str, np.ndarray]:
+    pitch = sound.to_pitch(time_step=time_step or None)
+    frequency = np.asarray(pitch.selected_array['frequency'], dtype=np.float64)
+    frequency[frequency <= 0] = np.nan   # unvoiced
+    return {name + '_t': np.asarray(pitch.xs(), dtype=np.float64), name + '_grid': _frame_grid(pitch),
+            name: frequency}
+
+
+def _analyse_band(sound, name, low, minimum_pitch=100.0, time_step=0.0) -> Dict[str, np.ndarray]:
+    try:
+        band = call(sound, "Filter (pass Hann band)", low, 20000, 100)
+        intensity = band.to_intensity(minimum_pitch=minimum_pitch, time_step=time_step or None)
+        xs = np.asarray(intensity.xs(), dtype=np.float64)
+        values = _frame_values(intensity, xs)
+        grid = _frame_grid(intensity)
+    except Exception:
+        xs = values = np.empty(0)
+        grid = np.array([0.0, 1.0])
+    return {name + '_t': xs, name + '_grid': grid, name: values}
+
+
+def _analyse_formants(sound, name, time_step=0.0) -> Dict[str, np.ndarray]:
+    formant = sound.to_formant_burg(time_step=time_step or None)
+    arrays = {name + '_t': np.asarray(formant.xs(), dtype=np.float64), name + '_grid': _frame_grid(formant)}
+    for number in (1, 2):
+        # the stored frame values, sampling get_value_at_time at frame times is off in the last bits
+        values = np.asarray(call(formant, "To Matrix", number).values, dtype=np.float64).ravel()
+        values[~(values > 0)] = np.nan   # frames with fewer formants
+        arrays[f'{name}_f{number}'] = values
+    return arrays
+
+
+def _praat_value(grid, values, times, cubic=False, domain=None) -> np.ndarray:
+    """
+    Value of a Praat analysis at times, computed the way Praat's own "Get value at time" does.
+
+    cubic follows Vector_getValueAtX with cubic interpolation (intensities): NaN outside
+    the outer frames' edges, linear in the first and last frame intervals, no undefined
+    frames.  Otherwise Sampled_getValueAtX with linear interpolation (pitch, formants): NaN
+    outside domain or when the nearest frame is undefined, the nearest frame's value when
+    the other neighbour is undefined or missing.
+    """
+    x1, dx = grid
+    values = np.asarray(values, dtype=np.float64)
+    times = np.asarray(times, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return np.full(times.shape, np.nan)
+    ireal = (times - x1) / dx + 1.0     # Praat's 1-based frame index
+    y = np.concatenate(([np.nan], values, [np.nan]))
+
+    if cubic:
+        left_edge = x1 - 0.5 * dx
+        inside = (times >= left_edge) & (times <= left_edge + n * dx)
+        x = np.clip(ireal, 1, n)
+        midleft = np.floor(x).astype(np.intp)
+        midright = np.minimum(midleft + 1, n)
+        fil = x - midleft
+        fir = midleft + 1 - x
+        yl, yr = y[midleft], y[midright]
+        out = yl + fil * (yr - yl)
+        inner = (midleft >= 2) & (midleft <= n - 2)
+        if inner.any():
+            dyl = 0.5 * (yr - y[np.maximum(midleft - 1, 1)])
+            dyr = 0.5 * (y[np.minimum(midleft + 2, n)] - yl)
+            out = np.where(inner, yl * fir + yr * fil - fil * fir * (
+                0.5 * (dyr - dyl) + (fil - 0.5) * (dyl + dyr - 2 * (yr - yl))), out)
+        out = np.where(fil == 0, yl, out)
+        return np.where(inside, out, np.nan)
+
+    ileft = np.floor(ireal).astype(np.intp)
+    phase = ireal - ileft
+    upper = phase >= 0.5
+    inear = np.where(upper, ileft + 1, ileft)
+    ifar = np.where(upper, ileft, ileft + 1)
+    phase = np.where(upper, 1.0 - phase, phase)
+    fnear = y[np.clip(inear, 0, n + 1)]
+    ffar = y[np.clip(ifar, 0, n + 1)]
+    out = np.where(np.isnan(ffar), fnear, fnear + phase * (ffar - fnear))
+    outside = (inear < 1) | (inear > n)
+    if domain is not None:
+        outside |= (times < domain[0]) | (times > domain[1])
+    return np.where(outside, np.nan, out)
+
+
+class AudioFeatures:
+    """Praat analyses of one audio file as frame arrays, computed once and cached.
+
+    Each analysis runs the first time one of its lookups is used and is
+    saved, with the file's other analyses, in an .npz named after the
+    SHA-1 of the audio bytes, so generating lip-sync for the same audio
+    again (from any path, in any session) reads the arrays back without
+    analysing anything.  Lookups take a time or an array of times and
+    return what Praat's own "Get value at time" would (cubic for
+    intensities, linear for pitch and formants); undefined values
+    (unvoiced pitch, outside the analysis) are NaN.  Intensity and pitch
+    can be analysed at a fixed time step instead of Praat's default.
+    """
+    FORMAT_VERSION = 2
+    EXTENSION = '.jalifeatures.npz'
+    MAX_LOADED = 8
+
+    # analysis → function of the parselmouth Sound, array name prefix and time step returning its arrays
+    _ANALYSES = {
+        'intensity': _analyse_intensity,
+        'pitch': _analyse_pitch,
+        'hf_intensity': lambda sound, name, time_step: _analyse_band(sound, name, 8000, time_step=time_step),
+        'fricative_intensity': lambda sound, name, time_step: _analyse_band(
+            sound, name, 4000, minimum_pitch=50, time_step=time_step or 0.001),
+        'formants': _analyse_formants,
+    }
+
+    _loaded: Dict[str, "AudioFeatures"] = {}           # digest → features of this session
+    _digests: Dict[Tuple[str, int, int], str] = {}     # (path, mtime_ns, size) → digest
+
+    def __init__(self, audio_path: str, digest: str, cache_dir: Optional[str]):
+        self.audio_path = audio_path
+        self.digest = digest
+        self.cache_path = os.path.join(cache_dir, digest + self.EXTENSION) if cache_dir else None
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._sound = None
+        if self.cache_path and os.path.isfile(self.cache_path):
+            try:
+                with np.load(self.cache_path, allow_pickle=False) as data:
+                    if int(data['version']) == self.FORMAT_VERSION:
+                        self._arrays = {k: data[k] for k in data.files if k != 'version'}
+            except (OSError, KeyError, ValueError) as e:
+                print(f"[JALI] Ignoring unreadable feature cache {self.cache_path}: {e}")
+
+    @classmethod
+    def load(cls, audio_path: str, cache_dir: Optional[str] = None) -> "AudioFeatures":
+        """Features of audio_path, from this session, the disk cache or (lazily) Praat."""
+        if cache_dir is None:
+            cache_dir = default_feature_cache_dir()
+        digest = cls._file_digest(audio_path)
+        features = cls._loaded.pop(digest, None)
+        if features is None:
+            features = cls(audio_path, digest, cache_dir)
+        features.audio_path = audio_path
+        cls._loaded[digest] = features
+        while len(cls._loaded) > cls.MAX_LOADED:
+            cls._loaded.pop(next(iter(cls._loaded)))
+        return features
+
+    @classmethod
+    def _file_digest(cls, path: str) -> str:
+        st = os.stat(path)
+        stamp = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        digest = cls._digests.get(stamp)
+        if digest is None:
+            sha = hashlib.sha1()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(chunk)
+            digest = cls._digests[stamp] = sha.hexdigest()
+        return digest
+
+    @staticmethod
+    def _name(analysis: str, time_step: float) -> str:
+        """Array name prefix of analysis at time_step (0 = Praat's default step)."""
+        return analysis if not time_step else f"{analysis}_{time_step * 1000:g}ms"
+
+    def _require(self, analysis: str, time_step: float = 0.0) -> str:
+        """Run analysis (and record the sound's time domain) unless it is cached, returns its name."""
+        name = self._name(analysis, time_step)
+        if 'done_' + name in self._arrays:
+            return name
+        if not PARSELMOUTH_AVAILABLE:
+            raise ImportError("Install parselmouth: pip install praat-parselmouth")
+        if self._sound is None:
+            self._sound = parselmouth.Sound(self.audio_path)
+        self._arrays['domain'] = np.array([self._sound.xmin, self._sound.xmax])
+        self._arrays.update(self._ANALYSES[analysis](self._sound, name, time_step))
+        self._arrays['done_' + name] = np.ones(1, dtype=bool)
+        self._save()
+        return name
+
+    def _save(self) -> None:
+        if not self.cache_path:
+            return
+        tmp = self.cache_path + '.tmp.npz'
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            np.savez(tmp, version=np.int64(self.FORMAT_VERSION), **self._arrays)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            print(f"[JALI] Could not write feature cache {self.cache_path}: {e}")
+
+    def _lookup(self, analysis: str, times, values: str = '', cubic: bool = False,
+                time_step: float = 0.0) -> np.ndarray:
+        name = self._require(analysis, time_step)
+        a = self._arrays
+        return _praat_value(a[name + '_grid'], a[name + values], times, cubic=cubic,
+                            domain=None if cubic else a['domain'])
+
+    @property
+    def duration(self) -> float:
+        self._require('intensity')
+        lo, hi = self._arrays['domain']
+        return float(hi - lo)
+
+    def intensity(self, times, time_step: float = 0.0) -> np.ndarray:
+        """Intensity (dB) at times, cubic like Intensity "Get value at time"."""
+        return self._lookup('intensity', times, cubic=True, time_step=time_step)
+
+    def intensity_frames(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(times, dB) of every intensity analysis frame."""
+        self._require('intensity')
+        return self._arrays['intensity_t'], self._arrays['intensity']
+
+    def silences(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Praat "To TextGrid (silences)" intervals: (start, end, sounding)."""
+        self._require('intensity')
+        a = self._arrays
+        return a['intensity_silence_start'], a['intensity_silence_end'], a['intensity_silence_sounding']
+
+    def pitch(self, times, time_step: float = 0.0) -> np.ndarray:
+        """F0 (Hz) at times, NaN where unvoiced."""
+        return self._lookup('pitch', times, time_step=time_step)
+
+    def voicing(self, times) -> np.ndarray:
+        """True where the pitch track is voiced."""
+        return ~np.isnan(self.pitch(times))
+
+    def hf_intensity(self, times) -> np.ndarray:
+        """Intensity of the 8-20 kHz band (fricative/plosive energy)."""
+        return self._lookup('hf_intensity', times, cubic=True)
+
+    def fricative_intensity(self, times) -> np.ndarray:
+        """Intensity of the 4-20 kHz band at 1 ms steps (sibilant detection)."""
+        return self._lookup('fricative_intensity', times, cubic=True)
+
+    def formants(self, times) -> Tuple[np.ndarray, np.ndarray]:
+        """(F1, F2) in Hz at times."""
+        return self._lookup('formants', times, '_f1'), self._lookup('formants', times, '_f2')
+
+
 class AcousticAnalyzer:
     """Paper §4.3: Audio-driven JALI modulation.
 
@@ -828,17 +1204,9 @@ class AcousticAnalyzer:
         if not PARSELMOUTH_AVAILABLE:
             raise ImportError("Install parselmouth: pip install praat-parselmouth")
 
-        self.sound = parselmouth.Sound(audio_path)
-        self.duration = self.sound.get_total_duration()
-        self.pitch = self.sound.to_pitch()
-        self.intensity = self.sound.to_intensity()
-
-        # HF intensity (8-20kHz) for fricatives/plosives
-        try:
-            self.hf_sound = call(self.sound, "Filter (pass Hann band)", 8000, 20000, 100)
-            self.hf_intensity = self.hf_sound.to_intensity()
-        except Exception:
-            self.hf_intensity = None
+        # intensity, pitch and HF (8-20kHz, fricatives/plosives) intensity
+        self.features = AudioFeatures.load(audio_path)
+        self.duration = self.features.duration
 
     @staticmethod
     def _bucket(z: float, low: Tuple[float, float], mid: Tuple[float, float],
@@ -862,24 +1230,29 @@ class AcousticAnalyzer:
         PLOSIVES = frozenset({'P', 'B', 'D', 'T', 'G', 'K'})
         FRICATIVES = frozenset({'S', 'Z', 'SH', 'ZH', 'F', 'V', 'TH', 'DH'})
 
+        # Every event's features in one lookup each, at the event midpoints
+        t_mids = np.array([(ev.start + ev.end) * 0.5 for ev in events], dtype=np.float64)
+        vols = self.features.intensity(t_mids)
+        f0s = self.features.pitch(t_mids)
+        hfs = self.features.hf_intensity(t_mids)
+
         # Compute per-class statistics from aligned events
         vowel_intensities, vowel_pitches = [], []
         fric_plos_hf = []
 
-        for ev in events:
+        for i, ev in enumerate(events):
             p = ev.phoneme.rstrip('012')
-            t_mid = (ev.start + ev.end) * 0.5
 
             if ev.is_vowel and ev.lexically_stressed:
-                vol = self.intensity.get_value(t_mid)
-                f0 = self.pitch.get_value_at_time(t_mid)
+                vol = float(vols[i])
+                f0 = float(f0s[i])
                 if not math.isnan(vol):
                     vowel_intensities.append(vol)
                 if not math.isnan(f0) and f0 > 0:
                     vowel_pitches.append(f0)
 
-            elif (p in FRICATIVES or p in PLOSIVES) and self.hf_intensity is not None:
-                hf = self.hf_intensity.get_value(t_mid)
+            elif p in FRICATIVES or p in PLOSIVES:
+                hf = float(hfs[i])
                 if not math.isnan(hf):
                     fric_plos_hf.append(hf)
 
@@ -907,12 +1280,11 @@ class AcousticAnalyzer:
         MID_INTENSITY = 0.45  # center of mid bucket (0.3, 0.6)
 
         for i, event in enumerate(events):
-            t_mid = (event.start + event.end) * 0.5
             p = event.phoneme.rstrip('012')
 
             if event.is_vowel and event.lexically_stressed:
-                vol = self.intensity.get_value(t_mid)
-                f0 = self.pitch.get_value_at_time(t_mid)
+                vol = float(vols[i])
+                f0 = float(f0s[i])
 
                 z_int = 0.0
                 if not math.isnan(vol):
@@ -933,38 +1305,30 @@ class AcousticAnalyzer:
                     event.lip = max(-1.0, min(1.0, event.lip))
 
             elif (p in FRICATIVES or p in PLOSIVES) and i in adjacent_to_stressed:
-                if self.hf_intensity is not None:
-                    hf = self.hf_intensity.get_value(t_mid)
-                    if not math.isnan(hf):
-                        z_hf = (hf - hf_mean) / (hf_std + 1e-6)
-                        # Table 3: LI intensity from HF — scale lip magnitude
-                        hf_intensity = self._bucket(z_hf, (0.1, 0.2), (0.3, 0.6), (0.7, 0.9))
-                        scale = hf_intensity / MID_INTENSITY
-                        event.lip *= scale
-                        event.lip = max(-1.0, min(1.0, event.lip))
+                hf = float(hfs[i])
+                if not math.isnan(hf):
+                    z_hf = (hf - hf_mean) / (hf_std + 1e-6)
+                    # Table 3: LI intensity from HF — scale lip magnitude
+                    hf_intensity = self._bucket(z_hf, (0.1, 0.2), (0.3, 0.6), (0.7, 0.9))
+                    scale = hf_intensity / MID_INTENSITY
+                    event.lip *= scale
+                    event.lip = max(-1.0, min(1.0, event.lip))
 
         return events
 
-    # Keep simple accessors for acoustic-only fallback path
-    def get_amplitude_factor(self, time: float) -> float:
+    # Keep simple accessors for acoustic-only fallback path.  Both take a
+    # time or an array of times and return a float or an array to match.
+    def get_amplitude_factor(self, time):
         """Simple amplitude factor for acoustic-only mode."""
-        try:
-            intensity = self.intensity.get_value(time)
-            if math.isnan(intensity):
-                return 0.5
-            return float(np.clip((intensity - 50.0) / 40.0, 0.0, 1.5))
-        except Exception:
-            return 0.5
+        intensity = self.features.intensity(time)
+        factor = np.where(np.isnan(intensity), 0.5, np.clip((intensity - 50.0) / 40.0, 0.0, 1.5))
+        return float(factor) if factor.ndim == 0 else factor
 
-    def get_pitch_factor(self, time: float) -> float:
+    def get_pitch_factor(self, time):
         """Simple pitch deviation for acoustic-only mode."""
-        try:
-            p = self.pitch.get_value_at_time(time)
-            if math.isnan(p) or p <= 0:
-                return 0.0
-            return float(np.clip((p - 150) / 200, -0.5, 0.5))
-        except Exception:
-            return 0.0
+        p = self.features.pitch(time)
+        factor = np.where(np.isnan(p), 0.0, np.clip((p - 150) / 200, -0.5, 0.5))
+        return float(factor) if factor.ndim == 0 else factor
 
 
 class MotionCurveGenerator:
@@ -1074,26 +1438,16 @@ class AcousticPhonemeDetector:
             raise ImportError("Install parselmouth: pip install praat-parselmouth")
 
         self.audio_path = audio_path
-        self.sound = parselmouth.Sound(audio_path)
-        self.duration = self.sound.get_total_duration()
+        self.features = AudioFeatures.load(audio_path)
+        self.duration = self.features.duration
 
     def detect_phonemes(self) -> List[PhonemeEvent]:
         """Detect phonemes from audio using acoustic features."""
-        intensity = self.sound.to_intensity()
-        textgrid = call(
-            intensity, "To TextGrid (silences)",
-            -25, 0.1, 0.05, "silent", "sounding"
-            )
-
         events: List[PhonemeEvent] = []
-        num_intervals = call(textgrid, "Get number of intervals", 1)
-
-        for i in range(1, num_intervals + 1):
-            label = call(textgrid, "Get label of interval", 1, i)
-            start = call(textgrid, "Get start time of interval", 1, i)
-            end = call(textgrid, "Get end time of interval", 1, i)
+        for start, end, sounding in zip(*self.features.silences()):
+            start, end = float(start), float(end)
 
-            if label == "silent":
+            if not sounding:
                 # Preserve silence as pause event
                 if (end - start) > 0.05:
                     events.append(create_phoneme_event('SIL', start, end))
@@ -1112,9 +1466,7 @@ class AcousticPhonemeDetector:
         """Classify vowel from F1/F2 formant space."""
         t = (start + end) * 0.5
         try:
-            formant = self.sound.to_formant_burg()
-            f1 = call(formant, "Get value at time", 1, t, 'Hertz', 'Linear')
-            f2 = call(formant, "Get value at time", 2, t, 'Hertz', 'Linear')
+            f1, f2 = (float(f) for f in self.features.formants(t))
 
             if f1 > 700:  # Low vowels
                 return 'AA' if f2 < 1200 else 'AE'
@@ -1133,17 +1485,12 @@ class AcousticPhonemeDetector:
         - Bilabials/Stops (M, P): Deep intensity valley (near-silence)
         - Default (T): Moderate burst — tongue-only, neutral lip shape
         """
-        import math
         t_mid = (start + end) * 0.5
 
         try:
             # High-frequency energy for frication detection
-            hf_sound = call(self.sound, "Filter (pass Hann band)", 4000, 20000, 100)
-            hf_intensity = hf_sound.to_intensity(minimum_pitch=50, time_step=0.001)
-            hf_val = call(hf_intensity, "Get value at time", t_mid, "Cubic")
-
-            overall = self.sound.to_intensity()
-            overall_val = call(overall, "Get value at time", t_mid, "Cubic")
+            hf_val = float(self.features.fricative_intensity(t_mid))
+            overall_val = float(self.features.intensity(t_mid))
 
             if math.isnan(hf_val):
                 hf_val = 0.0
@@ -1188,24 +1535,15 @@ class TranscriptAligner:
         }
 
     def align_phonemes(self) -> List[PhonemeEvent]:
-        sound = parselmouth.Sound(self.audio_path)
-        self.duration = sound.get_total_duration()
+        features = AudioFeatures.load(self.audio_path)
+        self.duration = features.duration
 
         # Praat speech-interval detection
-        intensity = sound.to_intensity()
-        textgrid = call(
-            intensity, "To TextGrid (silences)",
-            -25, 0.1, 0.05, "silent", "sounding",
-        )
-
         intervals: List[Tuple[float, float]] = []       # sounding
         silent_intervals: List[Tuple[float, float]] = [] # silent
-        num_intervals = call(textgrid, "Get number of intervals", 1)
-        for i in range(1, num_intervals + 1):
-            label = call(textgrid, "Get label of interval", 1, i)
-            start = call(textgrid, "Get start time of interval", 1, i)
-            end = call(textgrid, "Get end time of interval", 1, i)
-            if label == "sounding":
+        for start, end, sounding in zip(*features.silences()):
+            start, end = float(start), float(end)
+            if sounding:
                 intervals.append((start, end))
             elif (end - start) > 0.05:
                 silent_intervals.append((start, end))
@@ -1245,7 +1583,7 @@ class TranscriptAligner:
 
         # For each phrase, find N intensity peaks (N = vowels in phrase),
         # snap each vowel to its peak, then redistribute consonants in the gaps.
-        self._anchor_per_phrase(events, intensity, intervals)
+        self._anchor_per_phrase(events, features.intensity_frames(), intervals)
 
         # Inject SIL events for silent intervals between speech
         for s_start, s_end in silent_intervals:
@@ -1278,19 +1616,15 @@ class TranscriptAligner:
     def _find_n_peaks(self, intensity, t_start: float, t_end: float, n: int) -> List[float]:
         """Find n intensity peaks in [t_start, t_end], sorted by time.
 
-        Uses parselmouth's intensity contour as a numpy array, finds local
-        maxima, picks the strongest n by value, and returns their times in
-        chronological order.  Falls back to evenly-spaced positions if
-        peak detection fails or returns fewer peaks than requested.
+        Takes the intensity contour as (times, values) frame arrays, finds
+        local maxima, picks the strongest n by value, and returns their
+        times in chronological order.  Falls back to evenly-spaced positions
+        if peak detection returns fewer peaks than requested.
         """
         if n <= 0:
             return []
 
-        try:
-            times = np.asarray(intensity.xs(), dtype=np.float64)
-            values = np.asarray(intensity.values, dtype=np.float64).ravel()
-        except Exception:
-            return [t_start + (i + 0.5) * (t_end - t_start) / n for i in range(n)]
+        times, values = intensity
 
         mask = (times >= t_start) & (times <= t_end)
         sub_t = times[mask]
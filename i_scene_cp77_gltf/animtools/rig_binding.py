@@ -4,7 +4,7 @@ import json
 import os
 import sys
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
 import bpy
@@ -123,6 +123,13 @@ class BindingCache:
     setup_path:       str
     rig_path:         str
     bind_time:        float          # time.time() at bind
+    fused:            object = field(init=False, repr=False)  # FusedSetup, compiled from setup
+    solve_state:      object = field(init=False, repr=False)  # SolveState of the frame handler
+
+    def __post_init__(self):
+        from .fused_solver import SolveState, compile_setup
+        self.fused = compile_setup(self.setup, self.rig, self.track_segments)
+        self.solve_state = SolveState()
 
 
 def _get_ns() -> dict:
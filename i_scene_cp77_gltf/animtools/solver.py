@@ -10,6 +10,7 @@ from bpy.props import BoolProperty, IntProperty
 from bpy.types import Operator
 
 from . import rig_binding
+from .fused_solver import SolveState, facial_solve_fused
 
 
 # Constants
@@ -618,15 +619,60 @@ def facial_solve_numpy(
     return bone_quats, bone_trans, out_tracks
 
 
+def facial_solve(
+    cache:      rig_binding.BindingCache,
+    in_tracks:  np.ndarray,
+    lod:        int   = 0,
+    lod_weight: float = 0.0,
+):
+    """
+    Full facial solve of a bound rig on its compiled setup (numba kernels when available).
+    Same results as facial_solve_numpy.
+
+    For callers that pose the bones themselves: the frame handler's next solve runs in full.
+    """
+    cache.solve_state.reset()
+    return facial_solve_fused(cache.fused, in_tracks, lod=lod, lod_weight=lod_weight)
+
+
+def facial_solve_range(
+    cache:      rig_binding.BindingCache,
+    tracks:     np.ndarray,
+    lod:        int   = 0,
+    lod_weight: float = 0.0,
+):
+    """
+    facial_solve for every row of a (frames × num_tracks) track array.
+
+    Returns (frames × bones × 4) quats (xyzw), (frames × bones × 3) translations
+    and (frames × num_tracks) output tracks.  Frames that repeat the previous
+    frame's tracks reuse its solve, and parts whose tracks did not change are
+    replayed rather than re-solved.
+    """
+    cache.solve_state.reset()
+    fs         = cache.fused
+    num_frames = len(tracks)
+    quats      = np.empty((num_frames, fs.num_bones, 4), dtype=np.float32)
+    trans      = np.empty((num_frames, fs.num_bones, 3), dtype=np.float32)
+    out        = np.empty((num_frames, fs.num_tracks), dtype=np.float32)
+    state      = SolveState()
+    for f in range(num_frames):
+        quats[f], trans[f], out[f] = facial_solve_fused(
+            fs, tracks[f], lod=lod, lod_weight=lod_weight, state=state)
+    return quats, trans, out
+
+
 def write_bones(
     arm_obj:    bpy.types.Object,
     cache:      rig_binding.BindingCache,
     bone_quats: np.ndarray,
     bone_trans: np.ndarray,
+    changed:    np.ndarray = None,
 ) -> int:
     """
     Write solver output transforms back to Blender pose bones.
     Only writes used_bone_indices — all other bones are untouched.
+    changed is an optional bool mask over rig bones; bones it leaves out are skipped too.
     Returns the number of bones successfully written.
     """
     pb          = arm_obj.pose.bones
@@ -635,6 +681,8 @@ def write_bones(
 
     written = 0
     for i, bone_idx in enumerate(used_idx):
+        if changed is not None and not changed[int(bone_idx)]:
+            continue
         name = str(bone_names[int(bone_idx)])
         if name not in pb:
             continue
@@ -650,16 +698,86 @@ def write_bones(
     return written
 
 
+def pose_changed(
+    arm_obj:    bpy.types.Object,
+    cache:      rig_binding.BindingCache,
+    bone_quats: np.ndarray,
+    bone_trans: np.ndarray,
+) -> np.ndarray:
+    """
+    Bool mask over rig bones whose pose bone does not hold the solver output right now.
+
+    Reads the current rotation_quaternion and location of every pose bone in two
+    foreach_get calls, so bones set by undo/redo, keyed F-curves or manual edits
+    since the last write are caught even when the solve itself was skipped.
+    Used bones no longer in quaternion rotation mode are marked too, their
+    quaternion values can still match while Blender poses them from Euler.
+    Used bones missing from the armature are never marked.
+    """
+    pb       = arm_obj.pose.bones
+    num_pose = len(pb)
+    names    = pb.keys()
+    index    = {name: i for i, name in enumerate(names)}
+    used_idx = np.asarray(cache.setup.used_bone_indices, dtype=np.int64)
+    pose_idx = np.fromiter((index.get(str(cache.rig.bone_names[int(b)]), -1) for b in used_idx),
+                           dtype=np.int64, count=len(used_idx))
+    present  = pose_idx >= 0
+    used_idx = used_idx[present]
+    pose_idx = pose_idx[present]
+
+    cur_quats = np.empty(num_pose * 4, dtype=np.float32)
+    cur_trans = np.empty(num_pose * 3, dtype=np.float32)
+    pb.foreach_get("rotation_quaternion", cur_quats)
+    pb.foreach_get("location", cur_trans)
+
+    # same conversions as write_bones: xyzw → (w, z, x, y), (x, y, z) → (-z, x, y)
+    q = bone_quats[used_idx]
+    t = bone_trans[used_idx]
+    want_quats = q[:, [3, 2, 0, 1]]
+    want_trans = np.stack((-t[:, 2], t[:, 0], t[:, 1]), axis=1)
+
+    not_quat = np.fromiter((pb[names[i]].rotation_mode != "QUATERNION" for i in pose_idx.tolist()),
+                           dtype=bool, count=len(pose_idx))
+
+    differs = (np.any(cur_quats.reshape(-1, 4)[pose_idx] != want_quats, axis=1) |
+               np.any(cur_trans.reshape(-1, 3)[pose_idx] != want_trans, axis=1) |
+               not_quat)
+    changed = np.zeros(len(bone_quats), dtype=bool)
+    changed[used_idx[differs]] = True
+    return changed
+
+
+def output_tracks_changed(
+    cache:      rig_binding.BindingCache,
+    in_tracks:  np.ndarray,
+    out_tracks: np.ndarray,
+) -> bool:
+    """True if the output tracks differ from the custom property values read into in_tracks."""
+    seg = cache.track_segments
+    return bool(np.any(in_tracks[seg.lipsync_out_start:seg.lipsync_out_end] !=
+                       out_tracks[seg.lipsync_out_start:seg.lipsync_out_end]) or
+                np.any(in_tracks[seg.wrinkle_start:seg.wrinkle_end] !=
+                       out_tracks[seg.wrinkle_start:seg.wrinkle_end]))
+
 
 # frame_change_post handler
 
 @persistent
-def solve_frame(scene, depsgraph=None):
+def solve_frame(scene, depsgraph=None, force=False):
     """
-    frame_change_post handler.  Runs the full facial solve for every bound
+    frame_change_post handler.  Runs the facial solve for every bound
     armature in the scene.
 
-    Timing is stored in bpy.app.driver_namespace["cp77_facial_last_ms"]
+    Frames whose tracks did not change since the last solve reuse its
+    result; otherwise only the parts whose tracks changed are re-solved
+    (scene.cp77_facial.partial_solve).  Either way only bones and output
+    tracks that do not already hold the result are written, checked
+    against their current values so undo/redo, keyed F-curves and manual
+    edits are overwritten as before.  force runs every solve in full and
+    writes every bone, resetting their rotation mode to quaternion.
+
+    Timing is stored in bpy.app.driver_namespace["cp77_facial_last_ms"],
+    solved / partial / skipped frame counts in ["cp77_facial_frames"],
     for display in the UI panel.
     """
     global _solving
@@ -670,6 +788,9 @@ def solve_frame(scene, depsgraph=None):
     try:
         ns     = rig_binding._get_ns()
         timing = {}
+        frames = bpy.app.driver_namespace.setdefault("cp77_facial_frames", {})
+        props  = getattr(scene, "cp77_facial", None)
+        partial = bool(getattr(props, "partial_solve", True))
 
         for arm_name, cache in list(ns.items()):
             # Skip non-cache entries (ns may contain other objects)
@@ -687,21 +808,29 @@ def solve_frame(scene, depsgraph=None):
             # Read track values from custom properties
             in_tracks = rig_binding.read_tracks(arm_obj, cache)
 
-            # Solve
-            bone_quats, bone_trans, out_tracks = facial_solve_numpy(
-                cache.setup,
-                cache.rig,
-                cache.track_segments,
+            # Solve, skipping what did not change since the last frame
+            state = cache.solve_state
+            if force:
+                state.reset()
+            state.partial = partial
+            bone_quats, bone_trans, out_tracks = facial_solve_fused(
+                cache.fused,
                 in_tracks,
                 lod        = _get_lod(scene),
                 lod_weight = 0.0,
+                state      = state,
             )
 
-            # Write transforms to pose bones
-            write_bones(arm_obj, cache, bone_quats, bone_trans)
+            # Write transforms to pose bones that don't hold them already
+            changed = None if force else pose_changed(arm_obj, cache, bone_quats, bone_trans)
+            write_bones(arm_obj, cache, bone_quats, bone_trans, changed)
 
             # Write output tracks (wrinkles, lipsync outputs) back to custom props
-            rig_binding.write_output_tracks(arm_obj, cache, out_tracks)
+            if force or output_tracks_changed(cache, in_tracks, out_tracks):
+                rig_binding.write_output_tracks(arm_obj, cache, out_tracks)
+
+            counts = frames.setdefault(arm_name, {"solved": 0, "partial": 0, "skipped": 0})
+            counts[state.status] += 1
 
             elapsed_ms = (time.perf_counter() - t0) * 1000.0
             timing[arm_name] = elapsed_ms
@@ -735,6 +864,7 @@ def enable_solver(context) -> None:
     """Register the frame_change_post handler (idempotent)."""
     if not is_solver_active():
         bpy.app.handlers.frame_change_post.append(solve_frame)
+    bpy.app.driver_namespace["cp77_facial_frames"] = {}
 
     props = getattr(context.scene, "cp77_facial", None)
     if props is not None:
@@ -805,11 +935,11 @@ class FACIAL_OT_SolveNow(Operator):
         return False
 
     def execute(self, context):
-        solve_frame(context.scene)
+        solve_frame(context.scene, force=True)
 
         timing = bpy.app.driver_namespace.get("cp77_facial_last_ms", {})
         if timing:
-            msgs = [f"'{n}': {ms:.1f} ms" for n, ms in timing.items()]
+            msgs = [f"'{n}': {ms:.2f} ms" for n, ms in timing.items()]
             self.report({"INFO"}, "Solved — " + ", ".join(msgs))
         else:
             self.report({"INFO"}, "Solve complete (no timing data)")
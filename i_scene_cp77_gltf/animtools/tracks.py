@@ -1,5 +1,6 @@
 import bpy
 import math
+import numpy as np
 from math import ceil, floor
 from collections import Counter, defaultdict
 from .compat import get_action_fcurves
@@ -88,10 +89,9 @@ def _bulk_set_keyframes(fc, frames, values, interpolation=None):
     if n == 0:
         return
     fc.keyframe_points.add(n)
-    coords = [0.0] * (n * 2)
-    for i in range(n):
-        coords[i * 2] = frames[i]
-        coords[i * 2 + 1] = values[i]
+    coords = np.empty(n * 2, dtype=np.float32)
+    coords[0::2] = frames
+    coords[1::2] = values
     fc.keyframe_points.foreach_set('co', coords)
     if interpolation is not None:
         for kp in fc.keyframe_points:
@@ -99,6 +99,31 @@ def _bulk_set_keyframes(fc, frames, values, interpolation=None):
     fc.update()
 
 
+def _bulk_replace_keyframes(fc, frames, values):
+    """Like :func:`_bulk_set_keyframes` for an FCurve that may already have keys.
+
+    Existing keys on one of *frames* are replaced, the others are kept, as
+    ``keyframe_insert`` at each frame would leave them.
+    """
+    kps = fc.keyframe_points
+    if len(kps):
+        old = np.empty(len(kps) * 2, dtype=np.float32)
+        kps.foreach_get('co', old)
+        for i in np.flatnonzero(np.isin(old[0::2], frames))[::-1]:
+            kps.remove(kps[int(i)], fast=True)
+
+    n_old = len(kps)
+    n = len(frames)
+    coords = np.empty((n_old + n) * 2, dtype=np.float32)
+    if n_old:
+        kps.foreach_get('co', coords[:n_old * 2])
+    coords[n_old * 2::2] = frames
+    coords[n_old * 2 + 1::2] = values
+    kps.add(n)
+    kps.foreach_set('co', coords)
+    fc.update()
+
+
 #  Export – Transfer (& Remove) Track FCurves to Action Extras
 
 def export_anim_tracks(action, armature=None):
@@ -236,6 +236,7 @@ class CP77_PT_PhysicsTools(bpy.types.Panel):
                 row.operator("dangle.preview_stop", icon='PAUSE', text="Stop Simulation")
             else:
                 row.operator("dangle.preview_play", icon='PLAY', text="Play Simulation")
+                row.operator("dangle.preview_play", icon='OUTLINER_OB_ARMATURE', text="All Rigs").all_rigs = True
             row.operator("dangle.bake_to_keyframes", icon='KEYINGSET', text="Bake")
 
             # Global visibility toggles
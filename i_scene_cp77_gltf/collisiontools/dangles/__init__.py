@@ -13,16 +13,20 @@ if "bpy" in locals():
     importlib.reload(props)
     importlib.reload(draw)
     importlib.reload(io)
+    importlib.reload(bake)
     importlib.reload(ops)
     importlib.reload(ui)
-    from .sim import collision, constraints, core, solvers
-    importlib.reload(collision)
+    from .sim import transforms, collision, constraints, kernel, core, batch, solvers
+    importlib.reload(transforms)
     importlib.reload(constraints)
+    importlib.reload(collision)
+    importlib.reload(kernel)
     importlib.reload(core)
+    importlib.reload(batch)
     importlib.reload(solvers)
 else:
     from . import props
-    from .sim import collision, constraints, core, solvers
+    from .sim import collision, constraints, core, batch, solvers
     from . import draw
     from . import ops
     from . import ui
@@ -0,0 +1,113 @@
+import numpy as np
+
+
+def reduce_keys(frames, values, tolerance):
+    """
+    Indices of the keys to keep so that linear interpolation between kept keys stays within
+    tolerance of every dropped value (Ramer-Douglas-Peucker on the value axis).
+    """
+    n = len(frames)
+    if n <= 2 or tolerance <= 0.0:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        t = (frames[a + 1:b] - frames[a]) / (frames[b] - frames[a])
+        err = np.abs(values[a + 1:b] - (values[a] + (values[b] - values[a]) * t))
+        worst = int(np.argmax(err))
+        if err[worst] > tolerance:
+            mid = a + 1 + worst
+            keep[mid] = True
+            stack.append((a, mid))
+            stack.append((mid, b))
+    return np.flatnonzero(keep)
+
+
+def write_fcurve(fc, frames, values, linear=False):
+    """Replace the keys of fc in [frames[0], frames[-1]] with frames/values in one foreach_set."""
+    kps = fc.keyframe_points
+    if len(kps):
+        lo, hi = frames[0], frames[-1]
+        for kp in reversed(kps.values()):
+            if lo <= kp.co[0] <= hi:
+                kps.remove(kp, fast=True)
+
+    n_old = len(kps)
+    n = len(frames)
+    co = np.empty((n_old + n) * 2, dtype=np.float32)
+    if n_old:
+        kps.foreach_get('co', co[:n_old * 2])
+    co[n_old * 2::2] = frames
+    co[n_old * 2 + 1::2] = values
+    kps.add(n)
+    kps.foreach_set('co', co)
+    if linear:
+        for kp in kps.values()[n_old:]:
+            kp.interpolation = 'LINEAR'
+    fc.update()
+
+
+class BakeRecorder:
+    """
+    Records pose bone location and rotation_quaternion for a frame range into preallocated arrays,
+    then writes every channel as one F-curve.
+
+    Each frame costs one foreach_get per property over all pose bones, keys are only written for
+    the frames a bone was flagged in.
+    """
+
+    def __init__(self, rig, loc_bones, rot_bones, frame_start, frame_end):
+        self.rig = rig
+        self.frames = np.arange(frame_start, frame_end + 1, dtype=np.float32)
+        num_frames = len(self.frames)
+        num_pose_bones = len(rig.pose.bones)
+
+        self.loc_bones = list(loc_bones)
+        self.rot_bones = list(rot_bones)
+        self._loc_idx = np.array([rig.pose.bones.find(bn) for bn in self.loc_bones], dtype=np.int64)
+        self._rot_idx = np.array([rig.pose.bones.find(bn) for bn in self.rot_bones], dtype=np.int64)
+
+        self._loc_buf = np.empty(num_pose_bones * 3, dtype=np.float32)
+        self._rot_buf = np.empty(num_pose_bones * 4, dtype=np.float32)
+        self.loc = np.zeros((num_frames, len(self.loc_bones), 3), dtype=np.float32)
+        self.rot = np.zeros((num_frames, len(self.rot_bones), 4), dtype=np.float32)
+        self.loc_mask = np.zeros((num_frames, len(self.loc_bones)), dtype=bool)
+        self.rot_mask = np.zeros((num_frames, len(self.rot_bones)), dtype=bool)
+
+    def record(self, frame_index, loc_mask, rot_mask):
+        """Store the current pose for the bones flagged in loc_mask / rot_mask."""
+        bones = self.rig.pose.bones
+        if len(self.loc_bones):
+            bones.foreach_get('location', self._loc_buf)
+            self.loc[frame_index] = self._loc_buf.reshape(-1, 3)[self._loc_idx]
+            self.loc_mask[frame_index] = loc_mask
+        if len(self.rot_bones):
+            bones.foreach_get('rotation_quaternion', self._rot_buf)
+            self.rot[frame_index] = self._rot_buf.reshape(-1, 4)[self._rot_idx]
+            self.rot_mask[frame_index] = rot_mask
+
+    def write(self, action, tolerance=0.0):
+        """Write the recorded channels to action, reducing keys to tolerance when it is above 0. Returns the key count."""
+        num_keys = 0
+        channels = (
+            ('location', self.loc_bones, self.loc, self.loc_mask),
+            ('rotation_quaternion', self.rot_bones, self.rot, self.rot_mask),
+        )
+        for prop, bone_names, data, mask in channels:
+            for bi, bn in enumerate(bone_names):
+                rows = np.flatnonzero(mask[:, bi])
+                if not len(rows):
+                    continue
+                data_path = self.rig.pose.bones[bn].path_from_id(prop)
+                frames = self.frames[rows]
+                for ci in range(data.shape[2]):
+                    values = data[rows, bi, ci]
+                    keep = reduce_keys(frames, values, tolerance)
+                    fc = action.fcurve_ensure_for_datablock(self.rig, data_path, index=ci, group_name=bn)
+                    write_fcurve(fc, frames[keep], values[keep], linear=tolerance > 0.0)
+                    num_keys += len(keep)
+        return num_keys
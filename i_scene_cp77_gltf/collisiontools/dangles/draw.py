@@ -17,10 +17,11 @@ import math
 import numpy as np
 from mathutils import Vector, Matrix, Quaternion
 from gpu_extras.batch import batch_for_shader
-from .sim.constraints import RE_BONE_CONV
+from .sim import constraints
 
 _GLOBAL_HANDLER = None
 _DRAW_CACHES = {}
+RE_BONE_CONV = Matrix(constraints.RE_BONE_CONV.tolist())
 conv_3x3 = RE_BONE_CONV.to_3x3()
 
 
@@ -186,12 +187,12 @@ class DangleDrawCache:
             from .sim import collision
             collision.update_collision_transforms(sim, 1.0)
             b_verts, b_indices, b_offset = [], [], 0
-            for shape in sim.col_shapes:
+            for si in range(len(sim.shape_radius)):
                 v_loc, i_loc = _get_capsule_geometry(
-                    float(shape['radius']), float(shape['height'])
+                    float(sim.shape_radius[si]), float(sim.shape_height[si])
                 )
                 # axis_ms valid — computed from bone × RE_BONE_CONV × shape rotation
-                axis_ms = Vector(shape['axis_ms']).normalized()
+                axis_ms = Vector(sim.shape_axis_ms[si]).normalized()
                 rot_to_axis = (
                     Vector((0, 0, 1))
                     .rotation_difference(axis_ms)
@@ -199,7 +200,7 @@ class DangleDrawCache:
                     .to_4x4()
                 )
                 final_mat = (
-                    Matrix.Translation(Vector(shape['pos_ms']))
+                    Matrix.Translation(Vector(sim.shape_pos_ms[si]))
                     @ rot_to_axis
                 )
                 for v in v_loc:
@@ -221,7 +222,7 @@ class DangleDrawCache:
 
                 attach_xform = sim._interp_bone_xform[a_idx]
                 cone_xform_ls = sim.cone_xform_ls[ci]
-                cone_xform_ms = attach_xform @ cone_xform_ls
+                cone_xform_ms = Matrix((attach_xform @ cone_xform_ls).tolist())
 
                 cone_origin = Vector(cone_xform_ms.translation)
                 cone_rot = cone_xform_ms.to_quaternion()
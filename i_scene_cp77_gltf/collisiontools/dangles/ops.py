@@ -1,9 +1,12 @@
 import bpy
 import time
-from bpy.props import StringProperty, IntProperty
+import numpy as np
+from bpy.props import StringProperty, IntProperty, FloatProperty, BoolProperty
 from bpy_extras.io_utils import ExportHelper, ImportHelper
 from .sim import core, solvers
+from .sim.batch import build_batches
 from . import draw, io
+from .bake import BakeRecorder
 from .ui import get_active_rig, get_active_dangle_node, get_active_chain
 
 class DANGLE_OT_enable_rig(bpy.types.Operator):
@@ -51,17 +54,37 @@ class DANGLE_OT_disable_rig(bpy.types.Operator):
                 area.tag_redraw()
         return {'FINISHED'}
 
+def _scene_dangle_rigs(context):
+    return [
+        obj for obj in context.scene.objects
+        if obj.type == 'ARMATURE' and obj.dangle_state.is_dangle_rig and obj.dangle_state.dangle_nodes
+    ]
+
 class DANGLE_OT_preview_play(bpy.types.Operator):
     bl_idname = "dangle.preview_play"
     bl_label = "Play Dangle Simulation"
+    bl_description = "Preview the active dangle rig, or every dangle rig in the scene stepped together"
+
+    all_rigs: BoolProperty(
+        name="All Rigs", default=False,
+        description="Simulate every dangle rig in the scene, not just the active one"
+    )
 
     _timer = None
-    _simulator = None
+    _batches = None
+    _rigs = None
     _last_time = 0.0
 
+    def _all_playing(self):
+        try:
+            return all(rig.dangle_state.is_playing for rig in self._rigs)
+        except ReferenceError:
+            # a rig was deleted while playing
+            return False
+
     def modal(self, context, event):
         rig = get_active_rig(context)
-        if not rig or event.type == 'ESC' or not rig.dangle_state.is_playing:
+        if not rig or event.type == 'ESC' or not self._all_playing():
             return self.cancel(context)
 
         if event.type == 'TIMER':
@@ -69,8 +92,10 @@ class DANGLE_OT_preview_play(bpy.types.Operator):
             dt = min(current_time - self._last_time, 0.1)
             self._last_time = current_time
 
-            solvers.update_simulation(self._simulator, dt, time_dilation=1.0)
-            draw.update_draw_cache(f"{rig.name}", self._simulator)
+            for batch in self._batches:
+                solvers.update_batch(batch, dt, time_dilation=1.0)
+                for sim in batch.sims:
+                    draw.update_draw_cache(f"{sim.arm_obj.name}", sim)
 
             for area in context.screen.areas:
                 if area.type == 'VIEW_3D':
@@ -87,21 +112,27 @@ class DANGLE_OT_preview_play(bpy.types.Operator):
             self.report({'WARNING'}, "No dangle nodes imported.")
             return {'CANCELLED'}
 
-        self._simulator = core.DyngSimulator(rig)
+        self._rigs = _scene_dangle_rigs(context) if self.all_rigs else [rig]
+        if rig not in self._rigs:
+            self._rigs.append(rig)
+        self._batches = build_batches(self._rigs)
         self._last_time = time.time()
 
         wm = context.window_manager
         self._timer = wm.event_timer_add(1.0 / 60.0, window=context.window)
         wm.modal_handler_add(self)
-        st.is_playing = True
+        for r in self._rigs:
+            r.dangle_state.is_playing = True
 
         return {'RUNNING_MODAL'}
 
     def cancel(self, context):
-        rig = get_active_rig(context)
-        if rig:
-            rig.dangle_state.is_playing = False
-            rig_id = f"{rig.name}"
+        for rig in self._rigs or ():
+            try:
+                rig.dangle_state.is_playing = False
+                rig_id = f"{rig.name}"
+            except ReferenceError:
+                continue
             if rig_id in draw._DRAW_CACHES:
                 del draw._DRAW_CACHES[rig_id]
 
@@ -111,7 +142,8 @@ class DANGLE_OT_preview_play(bpy.types.Operator):
             if area.type == 'VIEW_3D':
                 area.tag_redraw()
 
-        self._simulator = None
+        self._batches = None
+        self._rigs = None
         return {'CANCELLED'}
 
 class DANGLE_OT_preview_stop(bpy.types.Operator):
@@ -128,6 +160,14 @@ class DANGLE_OT_bake_to_keyframes(bpy.types.Operator):
     bl_idname = "dangle.bake_to_keyframes"
     bl_label = "Bake to Keyframes"
 
+    key_tolerance: FloatProperty(
+        name="Key Reduction Tolerance", default=0.0, min=0.0, precision=4,
+        description="Drop keys that linear interpolation reproduces within this error (0 = key every frame)",
+    )
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
     def execute(self, context):
         rig = get_active_rig(context)
         if not rig:
@@ -153,25 +193,46 @@ class DANGLE_OT_bake_to_keyframes(bpy.types.Operator):
             action = bpy.data.actions.new(name=f"{rig.name}_DangleBake")
             rig.animation_data.action = action
 
+        # free particle bones get location and rotation keys, their parents rotation keys
+        loc_bones, rot_bones = {}, {}
+        key_particles, loc_of, rot_of, parent_of = [], [], [], []
+        for i, p in enumerate(simulator.particles):
+            if not simulator.is_free[i]:
+                continue
+            pb = rig.pose.bones.get(p.bone_name)
+            if not pb:
+                continue
+            key_particles.append(i)
+            loc_of.append(loc_bones.setdefault(pb.name, len(loc_bones)))
+            rot_of.append(rot_bones.setdefault(pb.name, len(rot_bones)))
+            dnode = simulator.particle_dnode_map[i]
+            if getattr(dnode, 'rotate_parent_to_look_at', True) and pb.parent:
+                parent_of.append(rot_bones.setdefault(pb.parent.name, len(rot_bones)))
+            else:
+                parent_of.append(-1)
+        key_particles = np.array(key_particles, dtype=np.int64)
+        loc_of = np.array(loc_of, dtype=np.int64)
+        rot_of = np.array(rot_of, dtype=np.int64)
+        parent_of = np.array(parent_of, dtype=np.int64)
+
+        recorder = BakeRecorder(rig, loc_bones, rot_bones, scene.frame_start, scene.frame_end)
+
         for frame in range(scene.frame_start, scene.frame_end + 1):
             scene.frame_set(frame)
             solvers.update_simulation(simulator, dt)
 
-            for i, p in enumerate(simulator.particles):
-                if simulator.is_free[i] and simulator.active_mask[i]:
-                    pb = rig.pose.bones.get(p.bone_name)
-                    if pb:
-                        pb.keyframe_insert(data_path="location", frame=frame)
-                        pb.keyframe_insert(
-                            data_path="rotation_quaternion", frame=frame
-                        )
-                        dnode = simulator.particle_dnode_map[i]
-                        if getattr(dnode, 'rotate_parent_to_look_at', True) and pb.parent:
-                            pb.parent.keyframe_insert(
-                                data_path="rotation_quaternion", frame=frame
-                            )
-
-        self.report({'INFO'}, f"Baked frames {scene.frame_start}-{scene.frame_end}.")
+            active = simulator.active_mask[key_particles] if len(key_particles) else np.zeros(0, dtype=bool)
+            loc_mask = np.zeros(len(loc_bones), dtype=bool)
+            loc_mask[loc_of[active]] = True
+            rot_mask = np.zeros(len(rot_bones), dtype=bool)
+            rot_mask[rot_of[active]] = True
+            parents = parent_of[active]
+            rot_mask[parents[parents >= 0]] = True
+            recorder.record(frame - scene.frame_start, loc_mask, rot_mask)
+
+        num_keys = recorder.write(rig.animation_data.action, self.key_tolerance)
+
+        self.report({'INFO'}, f"Baked frames {scene.frame_start}-{scene.frame_end}, {num_keys} keys.")
         return {'FINISHED'}
 
 class DANGLE_OT_import_json(bpy.types.Operator, ImportHelper):
@@ -0,0 +1,143 @@
+import numpy as np
+import bpy
+from . import collision
+from .constraints import ConstraintSet
+from .core import DyngSimulator
+from .kernel import DyngKernel, MIN_TIME_DILATION
+
+
+def build_batches(rig_objs):
+    """
+    Simulators for every rig in rig_objs that has particles, batched by substep time.
+
+    Rigs in one batch share the substep clock, so rigs with different substep times get batches of their own.
+    """
+    groups = {}
+    for rig in rig_objs:
+        sim = DyngSimulator(rig)
+        if sim.num_particles:
+            groups.setdefault(round(sim.state.substep_time, 6), []).append(sim)
+    return [DyngBatch(sims) for sims in groups.values()]
+
+
+class DyngBatch(DyngKernel):
+    """
+    Several rigs' DyngSimulators stepped as one kernel.
+
+    Every rig's particle, constraint and collision arrays are concatenated with per-rig offsets: all
+    rigs' particles first, then all rigs' extra (collision-only) bones, so the kernel's particle slice
+    stays contiguous. Each step gathers every rig's pose, runs one vectorized step and scatters the
+    results back to the member simulators, which the solvers and the draw cache read as before.
+    """
+
+    def __init__(self, sims):
+        self.sims = [sim for sim in sims if sim.num_particles]
+        num_particles = [sim.num_particles for sim in self.sims]
+        num_extra = [sim.num_tracked - sim.num_particles for sim in self.sims]
+        total_particles = sum(num_particles)
+        super().__init__(total_particles, total_particles + sum(num_extra), len(self.sims))
+        if not self.sims:
+            return
+
+        # batch index of each member's tracked bones
+        self._tracked_idx = []
+        p_off = np.cumsum([0] + num_particles)
+        e_off = total_particles + np.cumsum([0] + num_extra)
+        for r, sim in enumerate(self.sims):
+            idx = np.concatenate((
+                p_off[r] + np.arange(num_particles[r]),
+                e_off[r] + np.arange(num_extra[r]),
+            ))
+            self._tracked_idx.append(idx)
+            self.tracked_rig[idx] = r
+            for f in self.TRACKED_FIELDS:
+                getattr(self, f)[idx] = getattr(sim, f)
+            self.prev_matrix_world[r] = sim.prev_matrix_world[0]
+            self.prev_ext_force_ms[r] = sim.prev_ext_force_ms[0]
+            self.cur_ext_force_ms[r] = sim.cur_ext_force_ms[0]
+            self.prev_grav_ms[r] = sim.prev_grav_ms[0]
+            self.cur_grav_ms[r] = sim.cur_grav_ms[0]
+
+        self.substep_time = self.sims[0].state.substep_time
+        self.time_remainder = self.sims[0].time_remainder
+        self.damped_physics_steps = self.sims[0].damped_physics_steps
+
+        self.set_nodes(
+            [(s + p_off[r], e + p_off[r]) for r, sim in enumerate(self.sims) for s, e in sim._node_ranges],
+            [it for sim in self.sims for it in sim._node_iters],
+            [r for r, sim in enumerate(self.sims) for _ in sim._node_ranges],
+        )
+
+        for fields, head in ((ConstraintSet.LINK_FIELDS, 'link_idx_a'),
+                             (ConstraintSet.ELL_FIELDS, 'ell_idx'),
+                             (ConstraintSet.CONE_FIELDS, 'cone_idx')):
+            self._concatenate(fields, head)
+        self._concatenate(collision.SHAPE_FIELDS, 'shape_bone')
+        self.shape_rig = np.concatenate(
+            [np.full(len(sim.shape_bone), r, dtype=np.int32) for r, sim in enumerate(self.sims)]
+        )
+
+    def _concatenate(self, fields, head):
+        """Concatenate the members' fields, for members that have any, remapping tracked bone indices."""
+        members = [(r, sim) for r, sim in enumerate(self.sims) if getattr(sim, head, None) is not None]
+        if not members:
+            return
+        for f in fields:
+            parts = []
+            for r, sim in members:
+                arr = getattr(sim, f)
+                if f in self.INDEX_FIELDS:
+                    # -1 (shape without a bone) stays -1
+                    arr = np.where(arr >= 0, self._tracked_idx[r][np.maximum(arr, 0)], -1).astype(arr.dtype)
+                parts.append(arr)
+            setattr(self, f, np.concatenate(parts))
+
+    def _scatter(self):
+        """Copy the batch state back to the member simulators."""
+        shape_start = 0
+        for r, sim in enumerate(self.sims):
+            idx = self._tracked_idx[r]
+            for f in self.TRACKED_FIELDS:
+                setattr(sim, f, getattr(self, f)[idx])
+            shape_end = shape_start + len(sim.shape_bone)
+            for f in collision.SHAPE_STATE_FIELDS:
+                setattr(sim, f, getattr(self, f)[shape_start:shape_end])
+            shape_start = shape_end
+
+    def step_simulation(self, raw_dt, time_dilation=1.0):
+        if self.num_particles == 0:
+            return
+
+        bone_mats = np.empty((self.num_tracked, 4, 4))
+        present = np.empty(self.num_tracked, dtype=bool)
+        active = np.empty(self.num_tracked, dtype=bool)
+        matrix_world = np.empty((self.num_rigs, 4, 4))
+        external_force_ws = np.empty((self.num_rigs, 3))
+        for r, sim in enumerate(self.sims):
+            idx = self._tracked_idx[r]
+            bone_mats[idx], present[idx], active[idx] = sim._gather_bones()
+            matrix_world[r] = sim.arm_obj.matrix_world
+            external_force_ws[r] = sim.state.external_force_ws
+
+        physx_grav = bpy.context.scene.physx.gravity if bpy.context else (0.0, 0.0, -9.81)
+        self.step(
+            raw_dt,
+            self.substep_time,
+            bone_mats,
+            active,
+            present=present,
+            matrix_world=matrix_world,
+            gravity_ws=tuple(physx_grav),
+            external_force_ws=external_force_ws,
+            time_dilation=time_dilation,
+        )
+        self._scatter()
+        if time_dilation < MIN_TIME_DILATION:
+            return
+
+        for r, sim in enumerate(self.sims):
+            drag = sim.drag_post
+            if drag is not None and drag.num_drags > 0:
+                drag.step(raw_dt)
+                # drags write the member's pos_ms, carry that into the next batch step
+                self.pos_ms[self._tracked_idx[r][drag.drag_indices]] = sim.pos_ms[drag.drag_indices]
@@ -1,80 +1,94 @@
-
 import numpy as np
-import bpy
-from mathutils import Vector, Quaternion, Matrix
 from .constraints import RE_BONE_CONV
+from .transforms import (
+    Y_AXIS, Z_AXIS, cross, dot, matrix_from_wxyz, norm, quat_conjugate, quat_from_matrix, quat_rotate, quat_slerp,
+)
+
+
+# Pairs are culled with a sweep over shape AABBs before the exact tests, False tests every pair of a
+# rig (the brute-force reference the broad phase has to match)
+BROAD_PHASE = True
+# widens shape AABBs so rounding in the exact tests can't reach a culled pair
+BROAD_PHASE_MARGIN = 1e-4
+
+SHAPE_FIELDS = ('shape_bone', 'shape_rig', 'shape_is_capsule', 'shape_radius', 'shape_height', 'shape_ls_mat',
+                'shape_prev_xform', 'shape_cur_xform', 'shape_pos_ms', 'shape_rot_ms', 'shape_axis_ms')
+# fields updated while stepping
+SHAPE_STATE_FIELDS = ('shape_prev_xform', 'shape_cur_xform', 'shape_pos_ms', 'shape_rot_ms', 'shape_axis_ms')
 
 
 def compile_collision_shapes(sim):
     """Build runtime collision shape data from addon properties."""
-    sim.col_shapes = []
-    for shape in sim.state.collision_shapes:
-        # Build local-space transform matrix from offset + rotation
-        rot_wxyz = shape.rotation_ls_quat
-        ls_quat = Quaternion(rot_wxyz)
-        ls_mat = ls_quat.to_matrix().to_4x4()
-        ls_mat.translation = Vector(shape.offset_ls)
-
-        # Pre-multiply RE_BONE_CONV, same convention as constraints.py
-        adjusted_ls = RE_BONE_CONV @ ls_mat
-
-        sim.col_shapes.append({
-            'bone_name':  shape.bone_name,
-            'is_capsule': shape.shape_type == 'CAPSULE',
-            'radius':     shape.radius,
-            'height':     shape.height_extent,
-            'ls_mat':     adjusted_ls,
-            # Runtime transforms: full QsTransform (prev + current)
-            'prev_xform_ms': Matrix.Identity(4),
-            'cur_xform_ms':  Matrix.Identity(4),
-            # Interpolated for substep
-            'pos_ms':      np.zeros(3, dtype=np.float32),
-            'rot_ms':      Quaternion(),  # identity
-            'axis_ms':     np.array([0, 0, 1], dtype=np.float32),
-        })
-
-
-def update_collision_transforms_begin(sim):
+    shapes = list(sim.state.collision_shapes)
+    sim.set_collision_shapes(
+        bone_idx=[sim.bone_idx_map.get(s.bone_name, -1) if s.bone_name else -1 for s in shapes],
+        is_capsule=[s.shape_type == 'CAPSULE' for s in shapes],
+        radius=[s.radius for s in shapes],
+        height=[s.height_extent for s in shapes],
+        # Local-space transform from offset + rotation (wxyz)
+        ls_mat=[matrix_from_wxyz(s.rotation_ls_quat, s.offset_ls) for s in shapes],
+    )
+
+
+def init_collision_shapes(sim, bone_idx, is_capsule, radius, height, ls_mat, rig=0):
+    """Store shape arrays on sim, ls_mat is the authored local-space transform of each shape, rig its owner."""
+    num_shapes = len(bone_idx)
+    sim.shape_bone       = np.asarray(bone_idx, dtype=np.int32).reshape(num_shapes)
+    sim.shape_rig        = np.broadcast_to(np.asarray(rig, dtype=np.int32), num_shapes).copy()
+    sim.shape_is_capsule = np.asarray(is_capsule, dtype=bool).reshape(num_shapes)
+    sim.shape_radius     = np.asarray(radius, dtype=np.float32).reshape(num_shapes)
+    sim.shape_height     = np.asarray(height, dtype=np.float32).reshape(num_shapes)
+    # Pre-multiply RE_BONE_CONV, same convention as constraints.py
+    sim.shape_ls_mat     = RE_BONE_CONV @ np.asarray(ls_mat, dtype=np.float64).reshape(num_shapes, 4, 4)
+    # Runtime transforms: full QsTransform (prev + current)
+    sim.shape_prev_xform = np.tile(np.eye(4), (num_shapes, 1, 1))
+    sim.shape_cur_xform  = np.tile(np.eye(4), (num_shapes, 1, 1))
+    # Interpolated for substep
+    sim.shape_pos_ms  = np.zeros((num_shapes, 3), dtype=np.float32)
+    sim.shape_rot_ms  = np.tile(np.array([1.0, 0.0, 0.0, 0.0]), (num_shapes, 1))
+    sim.shape_axis_ms = np.tile(np.array([0.0, 0.0, 1.0], dtype=np.float32), (num_shapes, 1))
+
+
+def update_collision_transforms_begin(sim, bone_mats, present):
     """
     Called once per frame before the substep loop.
+
+    bone_mats are the tracked bones' model-space matrices, shapes on bones missing from present keep
+    their last transform.
     """
-    for shape in sim.col_shapes:
-        shape['prev_xform_ms'] = shape['cur_xform_ms'].copy()
+    sim.shape_prev_xform[:] = sim.shape_cur_xform
+    bones = sim.shape_bone
+    ok = bones >= 0
+    ok[ok] = present[bones[ok]]
+    # Full composition: shape_ms = bone_ms @ shape_ls
+    sim.shape_cur_xform[ok] = bone_mats[bones[ok]] @ sim.shape_ls_mat[ok]
 
-        pb = sim.arm_obj.pose.bones.get(shape['bone_name'])
-        if not pb:
-            continue
 
-        # pb.matrix is in armature space (= model space)
-        bone_mat_ms = pb.matrix
-        # Full composition: shape_ms = bone_ms @ shape_ls
-        shape_ms = bone_mat_ms @ shape['ls_mat']
-        shape['cur_xform_ms'] = shape_ms
+def update_directed_axes(sim):
+    """Capsule axes of Directed particles in model space, from _interp_bone_xform, once per step."""
+    axis_ls = sim.col_axis_ls.astype(np.float64)
+    axis_ls[dot(axis_ls, axis_ls) < 1e-8] = (0.5, 0.0, 0.0)
+    axis_ls /= norm(axis_ls)[:, np.newaxis]
+    sim.col_axis_ms = quat_rotate(quat_from_matrix(sim._interp_bone_xform), axis_ls).astype(np.float32)
 
 
 def update_collision_transforms(sim, frame_progress):
     """Interpolate collision shapes for the current substep (lerp + slerp)."""
     t = frame_progress
-    for shape in sim.col_shapes:
-        prev = shape['prev_xform_ms']
-        cur = shape['cur_xform_ms']
+    prev = sim.shape_prev_xform
+    cur = sim.shape_cur_xform
 
-        # Lerp translation
-        t_prev = prev.translation
-        t_cur = cur.translation
-        interp_t = t_prev.lerp(t_cur, t)
-        shape['pos_ms'] = np.array(interp_t, dtype=np.float32)
+    # Lerp translation
+    t_prev = prev[:, :3, 3]
+    sim.shape_pos_ms = (t_prev + (cur[:, :3, 3] - t_prev) * t).astype(np.float32)
 
-        # Slerp rotation
-        q_prev = prev.to_quaternion()
-        q_cur = cur.to_quaternion()
-        interp_q = q_prev.slerp(q_cur, t)
-        shape['rot_ms'] = interp_q
+    # Slerp rotation
+    interp_q = quat_slerp(quat_from_matrix(prev), quat_from_matrix(cur), t)
+    sim.shape_rot_ms = interp_q
 
-        if shape['is_capsule']:
-            # Capsule Z-axis in model space from the interpolated shape rotation
-            axis_ms = interp_q @ Vector((0.0, 0.0, 1.0))
-            shape['axis_ms'] = np.array(axis_ms, dtype=np.float32)
+    # Capsule Z-axis in model space from the interpolated shape rotation
+    axis_ms = quat_rotate(interp_q, Z_AXIS).astype(np.float32)
+    sim.shape_axis_ms = np.where(sim.shape_is_capsule[:, np.newaxis], axis_ms, sim.shape_axis_ms)
 
 
 def _closest_point_on_segment(p, a, b):
@@ -87,25 +101,100 @@ def _closest_point_on_segment(p, a, b):
     return a + t[:, np.newaxis] * ab
 
 
-def _closest_point_on_segment_single(p, a, b):
-    """Closest point on segment a→b to single point p (Vector or np)."""
+def _closest_point_on_segment_rows(p, a, b):
+    """Closest point on segment a→b to each point in p, degenerate segments return a."""
     ab = b - a
     ap = p - a
-    ab_sq = np.dot(ab, ab)
-    if ab_sq < 1e-6:
-        return a.copy()
-    t = max(0.0, min(1.0, np.dot(ap, ab) / ab_sq))
-    return a + ab * t
+    ab_sq = np.sum(ab * ab, axis=-1)
+    degenerate = ab_sq < 1e-6
+    t = np.clip(np.sum(ap * ab, axis=-1) / np.where(degenerate, 1.0, ab_sq), 0.0, 1.0)
+    return np.where(degenerate[..., np.newaxis], a, a + ab * t[..., np.newaxis])
 
 
-def respond_to_collisions_vectorized(sim, frame_progress):
-    """Particle-level collision: ShortestPath and Directed projection types."""
-    if not sim.col_shapes:
-        return
+def _rig_pairs(sim, row_rigs):
+    """
+    (rows, shapes) pairing every row with each shape of its own rig.
+
+    Pairs are shape-major, so anything applied in pair order reaches a row one shape after another
+    in shape order, as a loop over the shapes would.
+    """
+    num_shapes = len(sim.shape_radius)
+    if sim.num_rigs == 1:
+        num_rows = len(row_rigs)
+        return np.tile(np.arange(num_rows), num_shapes), np.repeat(np.arange(num_shapes), num_rows)
+    row_order = np.argsort(row_rigs, kind='stable')
+    row_count = np.bincount(row_rigs, minlength=sim.num_rigs)
+    row_start = np.cumsum(row_count) - row_count
+    per_shape = row_count[sim.shape_rig]
+    shapes = np.repeat(np.arange(num_shapes), per_shape)
+    offsets = np.arange(len(shapes)) - np.repeat(np.cumsum(per_shape) - per_shape, per_shape)
+    rows = row_order[np.repeat(row_start[sim.shape_rig], per_shape) + offsets]
+    return rows, shapes
+
+
+def _candidate_pairs(sim, row_rigs, row_lo, row_hi, shape_lo, shape_hi):
+    """
+    (rows, shapes) pairs of the same rig whose AABBs overlap, in the order _rig_pairs gives them.
 
-    update_collision_transforms(sim, frame_progress)
+    Sweep and prune: shapes are sorted by rig, then by their lower bound on the axis the shapes are
+    most spread along. A row can only overlap the shapes of its rig whose lower bound lies in
+    [row_lo - widest shape of the rig, row_hi], one contiguous run of the sorted shapes, and those are
+    checked on all three axes.
+    """
+    if not BROAD_PHASE:
+        return _rig_pairs(sim, row_rigs)
+    num_rows = len(row_rigs)
+    if not num_rows or not len(shape_lo):
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+
+    axis = int(np.argmax(np.ptp(shape_lo + shape_hi, axis=0)))
+    # complex keys sort by real part (rig) first, then imaginary part (lower bound)
+    key = sim.shape_rig + 1j * shape_lo[:, axis]
+    order = np.argsort(key)
+    sorted_key = key[order]
+    widest = np.zeros(sim.num_rigs)
+    np.maximum.at(widest, sim.shape_rig, shape_hi[:, axis] - shape_lo[:, axis])
+
+    first = np.searchsorted(sorted_key, row_rigs + 1j * (row_lo[:, axis] - widest[row_rigs]), side='left')
+    last = np.searchsorted(sorted_key, row_rigs + 1j * row_hi[:, axis], side='right')
+    counts = np.maximum(last - first, 0)
+    rows = np.repeat(np.arange(num_rows), counts)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    shapes = order[np.repeat(first, counts) + offsets]
+
+    keep = (
+        (shape_lo[shapes] <= row_hi[rows]).all(axis=1)
+        & (row_lo[rows] <= shape_hi[shapes]).all(axis=1)
+    )
+    rows, shapes = rows[keep], shapes[keep]
+    pair_order = np.lexsort((rows, shapes))
+    return rows[pair_order], shapes[pair_order]
+
+
+def _shape_segments(sim, shapes):
+    """Model-space end points of the shapes' axis segments, spheres collapse to their centre."""
+    c_pos = sim.shape_pos_ms[shapes]
+    height = np.where(sim.shape_is_capsule[shapes], sim.shape_height[shapes], np.float32(0.0))
+    c_half_vec = sim.shape_axis_ms[shapes] * height[:, np.newaxis]
+    return c_pos - c_half_vec, c_pos + c_half_vec
+
+
+def respond_to_collisions_vectorized(sim, frame_progress, rig_mask=None):
+    """
+    Particle-level collision: ShortestPath and Directed projection types.
+
+    Shapes are read as interpolated by the last update_collision_transforms call. Particles only
+    collide with their own rig's shapes, rig_mask limits the pass to some rigs.
+
+    Every push is measured from the particle positions at the start of the pass, so the pushes of
+    all (particle, shape) pairs are computed at once and summed in shape order.
+    """
+    if not len(sim.shape_radius):
+        return
 
     active_mask = sim.is_free & sim.active_mask & (sim.proj_type > 0)
+    if rig_mask is not None:
+        active_mask &= rig_mask[sim.tracked_rig]
     if not np.any(active_mask):
         return
 
@@ -114,258 +203,355 @@ def respond_to_collisions_vectorized(sim, frame_progress):
     p_types = sim.proj_type[idx]
     p_radii = sim.col_radius[idx]
 
-    for shape in sim.col_shapes:
-        c_pos    = shape['pos_ms']
-        c_radius = shape['radius']
-
-        if shape['is_capsule']:
-            c_half_vec = shape['axis_ms'] * shape['height']
-            c_a = c_pos - c_half_vec
-            c_b = c_pos + c_half_vec
-        else:
-            c_a = c_pos
-            c_b = c_pos
-
-        # ShortestPath projection (sphere test)
-        sp_mask = p_types == 1
-        if np.any(sp_mask):
-            sp_pos   = p_pos[sp_mask]
-            sp_radii = p_radii[sp_mask]
-
-            closest_on_c = _closest_point_on_segment(sp_pos, c_a, c_b)
-            diff = sp_pos - closest_on_c
-            dist = np.linalg.norm(diff, axis=-1)
-            min_dist = sp_radii + c_radius
-
-            pen_mask = dist < min_dist
-            if np.any(pen_mask):
-                pen_idx   = idx[sp_mask][pen_mask]
-                push_dist = min_dist[pen_mask] - dist[pen_mask]
-                safe_dist = np.where(
-                    dist[pen_mask] < 1e-6, 1e-6, dist[pen_mask]
-                )
-                push_dir = diff[pen_mask] / safe_dist[:, np.newaxis]
-                sim.pos_ms[pen_idx] += push_dir * push_dist[:, np.newaxis]
-
-        # Directed projection (capsule-axis aligned push)
-        dir_mask = p_types == 2
-        if np.any(dir_mask):
-            dir_pos   = p_pos[dir_mask]
-            dir_radii = p_radii[dir_mask]
-            dir_heights = sim.col_height[idx[dir_mask]]
-            dir_idx_global = idx[dir_mask]
-
-            # Compute capsule axes in model space from bone transforms
-            dir_axes = np.zeros_like(dir_pos)
-            for li, b_idx in enumerate(dir_idx_global):
-                xform = sim._interp_bone_xform[b_idx]
-                axis_ls = Vector(sim.col_axis_ls[b_idx])
-                if axis_ls.length_squared < 1e-8:
-                    axis_ls = Vector((0.5, 0, 0))
-                axis_ms = xform.to_quaternion() @ axis_ls.normalized()
-                dir_axes[li] = np.array(axis_ms, dtype=np.float32)
-
-            # Test 3 points along the particle capsule
-            p_half_vec = dir_axes * dir_heights[:, np.newaxis]
-            test_points = np.stack(
-                [dir_pos - p_half_vec, dir_pos, dir_pos + p_half_vec], axis=1
+    # 3 test points along the capsule of Directed particles
+    dir_rows = np.flatnonzero(p_types == 2)
+    if len(dir_rows):
+        dir_idx_global = idx[dir_rows]
+        # Capsule axes in model space from bone transforms
+        dir_axes = sim.col_axis_ms[dir_idx_global]
+        p_half_vec = dir_axes * sim.col_height[dir_idx_global][:, np.newaxis]
+        dir_pos = p_pos[dir_rows]
+        test_points = np.stack(
+            [dir_pos - p_half_vec, dir_pos, dir_pos + p_half_vec], axis=1
+        )
+
+    # Broad phase on the particles' test points and the shapes' axis segments
+    all_a, all_b = _shape_segments(sim, np.arange(len(sim.shape_radius)))
+    reach = (sim.shape_radius + BROAD_PHASE_MARGIN)[:, np.newaxis]
+    shape_lo = np.minimum(all_a, all_b) - reach
+    shape_hi = np.maximum(all_a, all_b) + reach
+    row_lo = p_pos.astype(np.float64)
+    row_hi = row_lo.copy()
+    if len(dir_rows):
+        row_lo[dir_rows] = test_points.min(axis=1)
+        row_hi[dir_rows] = test_points.max(axis=1)
+    row_lo -= p_radii[:, np.newaxis]
+    row_hi += p_radii[:, np.newaxis]
+
+    rows, shapes = _candidate_pairs(sim, sim.tracked_rig[idx], row_lo, row_hi, shape_lo, shape_hi)
+    c_a, c_b = all_a[shapes], all_b[shapes]
+    c_radius = sim.shape_radius[shapes]
+
+    # ShortestPath projection (sphere test)
+    sp = p_types[rows] == 1
+    if np.any(sp):
+        sp_rows = rows[sp]
+        sp_pos = p_pos[sp_rows]
+
+        closest_on_c = _closest_point_on_segment(sp_pos, c_a[sp], c_b[sp])
+        diff = sp_pos - closest_on_c
+        dist = np.linalg.norm(diff, axis=-1)
+        min_dist = p_radii[sp_rows] + c_radius[sp]
+
+        pen_mask = dist < min_dist
+        if np.any(pen_mask):
+            pen_idx   = idx[sp_rows[pen_mask]]
+            push_dist = min_dist[pen_mask] - dist[pen_mask]
+            safe_dist = np.where(
+                dist[pen_mask] < 1e-6, 1e-6, dist[pen_mask]
             )
+            push_dir = diff[pen_mask] / safe_dist[:, np.newaxis]
+            np.add.at(sim.pos_ms, pen_idx, push_dir * push_dist[:, np.newaxis])
+
+    # Directed projection (capsule-axis aligned push)
+    dr = p_types[rows] == 2
+    if np.any(dr):
+        # row of each Directed pair in the test point arrays
+        dir_pair_rows = np.searchsorted(dir_rows, rows[dr])
+        pair_idx_global = dir_idx_global[dir_pair_rows]
+        pair_axes = dir_axes[dir_pair_rows]
+
+        # pair-major, so each pair's 3 points apply in order
+        pts = test_points[dir_pair_rows].reshape(-1, 3)
+        closest_on_c = _closest_point_on_segment(
+            pts, np.repeat(c_a[dr], 3, axis=0), np.repeat(c_b[dr], 3, axis=0)
+        )
+        diff = pts - closest_on_c
+        dist = np.linalg.norm(diff, axis=-1)
+        min_dist = np.repeat(p_radii[rows[dr]] + c_radius[dr], 3)
+
+        pen_mask = dist < min_dist
+        if np.any(pen_mask):
+            pen_idx_global = np.repeat(pair_idx_global, 3)[pen_mask]
+            safe_dist = np.where(
+                dist[pen_mask] < 1e-6, 1e-6, dist[pen_mask]
+            )
+            radial_dir = diff[pen_mask] / safe_dist[:, np.newaxis]
+            radial_push = min_dist[pen_mask] - dist[pen_mask]
+            optimal_push = radial_dir * radial_push[:, np.newaxis]
+            axis_vec = np.repeat(pair_axes, 3, axis=0)[pen_mask]
+            push_along = np.sum(optimal_push * axis_vec, axis=-1)
+            np.add.at(sim.pos_ms, pen_idx_global, axis_vec * push_along[:, np.newaxis])
+
 
-            for pt_idx in range(3):
-                pts = test_points[:, pt_idx, :]
-                closest_on_c = _closest_point_on_segment(pts, c_a, c_b)
-                diff = pts - closest_on_c
-                dist = np.linalg.norm(diff, axis=-1)
-                min_dist = dir_radii + c_radius
-
-                pen_mask = dist < min_dist
-                if np.any(pen_mask):
-                    pen_idx_global = dir_idx_global[pen_mask]
-                    safe_dist = np.where(
-                        dist[pen_mask] < 1e-6, 1e-6, dist[pen_mask]
-                    )
-                    radial_dir = diff[pen_mask] / safe_dist[:, np.newaxis]
-                    radial_push = min_dist[pen_mask] - dist[pen_mask]
-                    optimal_push = radial_dir * radial_push[:, np.newaxis]
-                    axis_vec = dir_axes[pen_mask]
-                    push_along = np.sum(optimal_push * axis_vec, axis=-1)
-                    sim.pos_ms[pen_idx_global] += (
-                        axis_vec * push_along[:, np.newaxis]
-                    )
-
-
-
-def respond_to_cone_collisions(sim, frame_progress):
+def respond_to_cone_collisions(sim, frame_progress, cs=None, rig_mask=None):
     """
     For each cone constraint with collision enabled, test the capsule segment
     (attachment → constrained) against body shapes and rotate to resolve.
+
+    Cones are solved together per level of the constraint set's schedule, shapes one after another.
+    As with particles, cones only collide with their own rig's shapes and rig_mask limits the rigs.
     """
-    if not hasattr(sim, 'cone_idx') or sim.cone_idx is None:
+    if cs is None:
+        cs = sim
+    if getattr(cs, 'cone_idx', None) is None:
         return
-    if not sim.col_shapes:
+    if not len(sim.shape_radius):
         return
 
-    for ci in range(len(sim.cone_idx)):
-        p_idx = sim.cone_idx[ci]
-        a_idx = sim.cone_attach[ci]
+    near = _cone_shape_overlaps(sim, cs, rig_mask)
+    candidates = near.any(axis=1)
+    # anything downstream of a moved particle may overlap once it has moved
+    enabled = _cone_collision_enabled(sim, cs, rig_mask)
+    while candidates.any():
+        written = cs.cone_idx[candidates]
+        grown = enabled & (candidates | np.isin(cs.cone_idx, written) | np.isin(cs.cone_attach, written))
+        if (grown == candidates).all():
+            break
+        candidates = grown
+    if not candidates.any():
+        return
 
-        proj_type = sim.cone_proj_type[ci]
-        if proj_type == 0:  # Disabled
-            continue
+    moved = np.zeros(len(sim.pos_ms), dtype=bool)
+    slots = _shape_slots(sim)
+    for level in cs.cone_levels:
+        ci = level[candidates[level]]
+        if len(ci):
+            _respond_to_cone_collisions_level(sim, cs, ci, near[ci], moved, slots)
 
-        cap_radius = sim.cone_col_radius[ci]
-        cap_height = sim.cone_col_height[ci]
 
-        if cap_radius <= 0.0 and cap_height <= 0.0:
-            continue
+def _cone_collision_enabled(sim, cs, rig_mask=None):
+    """Cones with a projection type and a capsule, on a free and active particle of a rig in rig_mask."""
+    p_idx = cs.cone_idx
+    enabled = (
+        (cs.cone_proj_type != 0)
+        & ~((cs.cone_col_radius <= 0.0) & (cs.cone_col_height <= 0.0))
+        & sim.is_free[p_idx] & sim.active_mask[p_idx]
+    )
+    if rig_mask is not None:
+        enabled &= rig_mask[sim.tracked_rig[p_idx]]
+    return enabled
 
-        if not (sim.is_free[p_idx] and sim.active_mask[p_idx]):
-            continue
 
-        constrained_pos = sim.pos_ms[p_idx].copy()
-        attachment_pos = sim.pos_ms[a_idx].copy()
+def _cone_shape_overlaps(sim, cs, rig_mask=None):
+    """
+    (cones, shapes) mask of enabled cones whose segment overlaps a shape of their rig at the current positions.
 
-        parent_to_bob = constrained_pos - attachment_pos
-        seg_len = np.linalg.norm(parent_to_bob)
-        if seg_len < 1e-6:
-            continue
-        parent_to_bob_dir = parent_to_bob / seg_len
+    Same test as the solve but in model space: the shape-space capsule segment +-inv_rot @ (0, 0, h)
+    maps back to +-(0, 0, h) around the shape position. A small margin keeps it conservative, a cone
+    that fails it for a shape is skipped for that shape until one of its particles moves.
+    """
+    enabled = np.flatnonzero(_cone_collision_enabled(sim, cs, rig_mask))
+    near = np.zeros((len(cs.cone_idx), len(sim.shape_radius)), dtype=bool)
+    if not len(enabled):
+        return near
+
+    all_half, shape_lo, shape_hi = _cone_shape_bounds(sim)
+    ends = (sim.pos_ms[cs.cone_attach[enabled]], sim.pos_ms[cs.cone_idx[enabled]])
+    cap = cs.cone_col_radius[enabled][:, np.newaxis]
+    row_lo = np.minimum(*ends) - cap
+    row_hi = np.maximum(*ends) + cap
+
+    rows, shapes = _candidate_pairs(sim, sim.tracked_rig[cs.cone_idx[enabled]], row_lo, row_hi, shape_lo, shape_hi)
+    rows = enabled[rows]
+    attach = sim.pos_ms[cs.cone_attach[rows]]
+    seg = sim.pos_ms[cs.cone_idx[rows]] - attach
+    c_pos = sim.shape_pos_ms[shapes]
+    half = all_half[shapes]
+    reach = cs.cone_col_radius[rows] + sim.shape_radius[shapes] + 1e-4
+    hit = np.zeros(len(rows), dtype=bool)
+    for t_frac in (0.0, 0.5, 1.0):
+        test_pt = attach + seg * t_frac
+        closest = _closest_point_on_segment_rows(test_pt, c_pos - half, c_pos + half)
+        hit |= norm(test_pt - closest) < reach
+    near[rows[hit], shapes[hit]] = True
+    return near
+
+
+def _cone_shape_bounds(sim):
+    """Model-space half segment of every shape and its AABB as the cone tests see it, (half, lo, hi)."""
+    half = np.zeros((len(sim.shape_radius), 3))
+    half[:, 2] = np.where(sim.shape_is_capsule, sim.shape_height, 0.0)
+    reach = np.abs(half) + (sim.shape_radius + 1e-4 + BROAD_PHASE_MARGIN)[:, np.newaxis]
+    return half, sim.shape_pos_ms - reach, sim.shape_pos_ms + reach
+
+
+def _shape_slots(sim):
+    """
+    Shapes grouped by rig, (order, start, count, slot): a rig's k-th shape is order[start[rig] + k],
+    slot[shape] is its k.
+    """
+    order = np.argsort(sim.shape_rig, kind='stable')
+    count = np.bincount(sim.shape_rig, minlength=sim.num_rigs)
+    start = np.cumsum(count) - count
+    slot = np.empty(len(order), dtype=np.intp)
+    slot[order] = np.arange(len(order)) - start[sim.shape_rig[order]]
+    return order, start, count, slot
 
-        for shape in sim.col_shapes:
-            c_pos = shape['pos_ms']
-            c_rot = shape['rot_ms']
-            c_radius = shape['radius']
 
-            # Transform positions to shape-local space
-            inv_rot = c_rot.conjugated()
-            attach_ss = np.array(
-                inv_rot @ Vector(attachment_pos - c_pos), dtype=np.float32
-            )
-            dir_ss = np.array(
-                inv_rot @ Vector(parent_to_bob_dir), dtype=np.float32
-            )
+def _respond_to_cone_collisions_level(sim, cs, ci, near, moved, slots):
+    """
+    Solve one schedule level, near is _cone_shape_overlaps for ci, moved the particles moved so far this pass.
 
-            # Check attachment isn't already inside the shape
-            attach_dist = _shape_distance_simplified(
-                shape, attach_ss, cap_radius
-            )
-            if attach_dist < 0.001:
-                continue  # Attachment inside shape — can't resolve
-
-            # Test capsule overlap: sample along the segment
-            # Simplified overlap test for sphere/capsule body shapes
-            if shape['is_capsule']:
-                c_half_vec = np.array(
-                    inv_rot @ Vector((0, 0, shape['height'])), dtype=np.float32
-                )
-                c_a_ss = -c_half_vec
-                c_b_ss = c_half_vec
-            else:
-                c_a_ss = np.zeros(3, dtype=np.float32)
-                c_b_ss = np.zeros(3, dtype=np.float32)
-
-            # Test multiple points along the cone capsule segment
-            n_test = 3
-            any_overlap = False
-            for ti in range(n_test):
-                t_frac = ti / max(1, n_test - 1)
-                test_pt = attach_ss + dir_ss * (seg_len * t_frac)
-                closest = _closest_point_on_segment_single(
-                    test_pt, c_a_ss, c_b_ss
-                )
-                diff = test_pt - closest
-                dist = np.linalg.norm(diff)
-                if dist < cap_radius + c_radius:
-                    any_overlap = True
-                    break
-
-            if not any_overlap:
-                continue
-
-            #  Resolve via ShortestPathRotational 
-            # Find the direction that moves the segment out of the shape.
-            # Strategy: push the midpoint of the capsule segment away from
-            # the closest point on the body shape, then re-derive direction.
-            mid_ss = attach_ss + dir_ss * (seg_len * 0.5)
-            closest_mid = _closest_point_on_segment_single(
-                mid_ss, c_a_ss, c_b_ss
-            )
-            push_vec_ss = mid_ss - closest_mid
-            push_len = np.linalg.norm(push_vec_ss)
-
-            if push_len < 1e-6:
-                # Degenerate — push along arbitrary perpendicular
-                push_vec_ss = _perpendicular(dir_ss)
-                push_len = 1.0
-
-            push_dir_ss = push_vec_ss / push_len
-            needed_push = (cap_radius + c_radius) - push_len
-            if needed_push <= 0:
-                continue
-
-            # Rotate the direction in shape-space: project the push onto
-            # the plane perpendicular to the attachment→bob direction
-            radial_component = push_dir_ss - dir_ss * np.dot(push_dir_ss, dir_ss)
-            radial_len = np.linalg.norm(radial_component)
-            if radial_len < 1e-6:
-                radial_component = _perpendicular(dir_ss)
-                radial_len = np.linalg.norm(radial_component)
-            radial_component /= radial_len
-
-            # Compute rotation angle needed
-            rotation_angle = np.arcsin(
-                min(1.0, needed_push / max(seg_len * 0.5, 1e-6))
-            )
+    Each cone meets its rig's shapes one after another, so the loop runs over shape slots (every rig's
+    k-th shape at once) and only over the rows that can touch the slot's shape. A row that moved
+    swings about its attachment, so it can only reach the shapes overlapping that sphere's bounds.
+    """
+    p_idx = cs.cone_idx[ci]
+    a_idx = cs.cone_attach[ci]
+    cap_radius = cs.cone_col_radius[ci]
+
+    constrained_pos = sim.pos_ms[p_idx]
+    attachment_pos = sim.pos_ms[a_idx]
+
+    parent_to_bob = constrained_pos - attachment_pos
+    seg_len = norm(parent_to_bob)
+    ok = seg_len >= 1e-6
+    if not ok.all():
+        if not ok.any():
+            return
+        p_idx, a_idx, near = p_idx[ok], a_idx[ok], near[ok]
+        cap_radius = cap_radius[ok]
+        attachment_pos = attachment_pos[ok]
+        parent_to_bob = parent_to_bob[ok]
+        seg_len = seg_len[ok]
+    parent_to_bob_dir = parent_to_bob / seg_len[:, np.newaxis]
+
+    # rows whose inputs changed since the overlap test are tested against every shape they can reach
+    changed = moved[p_idx] | moved[a_idx]
+
+    order, start, count, shape_slot = slots
+    row_rigs = sim.tracked_rig[p_idx]
+    row_start = start[row_rigs]
+    row_count = count[row_rigs]
+    all_rows = np.arange(len(p_idx))
+
+    _, shape_lo, shape_hi = _cone_shape_bounds(sim)
+    swing = (seg_len + cap_radius)[:, np.newaxis]
+    rows, shapes = _candidate_pairs(sim, row_rigs, attachment_pos - swing, attachment_pos + swing, shape_lo, shape_hi)
+    reachable = np.zeros(near.shape, dtype=bool)
+    reachable[rows, shapes] = True
+
+    for slot in np.unique(shape_slot[np.flatnonzero((near | reachable).any(axis=0))]):
+        has_slot = slot < row_count
+        row_shape = order[np.where(has_slot, row_start + slot, 0)]
+        r = np.flatnonzero(has_slot & (near[all_rows, row_shape] | changed & reachable[all_rows, row_shape]))
+        if not len(r):
+            continue
+        si = row_shape[r]
+        if (si == si[0]).all():
+            # one shape for every row (always the case for a single rig), broadcast its parameters
+            si = si[0]
+        c_pos = sim.shape_pos_ms[si]
+        c_rot = sim.shape_rot_ms[si]
+        c_radius = sim.shape_radius[si]
+        # spheres are capsules of height 0
+        c_height = np.where(sim.shape_is_capsule[si], sim.shape_height[si], np.float32(0.0))
+        r_cap_radius = cap_radius[r]
+        r_seg_len = seg_len[r]
+        r_attachment_pos = attachment_pos[r]
+
+        # Transform positions to shape-local space
+        inv_rot = quat_conjugate(c_rot)
+        attach_ss = quat_rotate(inv_rot, r_attachment_pos - c_pos).astype(np.float32)
+        dir_ss = quat_rotate(inv_rot, parent_to_bob_dir[r]).astype(np.float32)
+
+        # Attachment inside the shape can't be resolved
+        attach_dist = _shape_distance_simplified(c_height, c_radius, attach_ss, r_cap_radius)
+        act = attach_dist >= 0.001
+
+        # Simplified overlap test for sphere/capsule body shapes
+        c_half_ls = np.zeros(np.shape(c_height) + (3,))
+        c_half_ls[..., 2] = c_height
+        c_half_vec = quat_rotate(inv_rot, c_half_ls).astype(np.float32)
+        c_a_ss = -c_half_vec
+        c_b_ss = c_half_vec
+
+        # Test multiple points along the cone capsule segment
+        n_test = 3
+        any_overlap = np.zeros(len(r), dtype=bool)
+        for ti in range(n_test):
+            t_frac = ti / max(1, n_test - 1)
+            test_pt = attach_ss + dir_ss * (r_seg_len * t_frac)[:, np.newaxis]
+            closest = _closest_point_on_segment_rows(test_pt, c_a_ss, c_b_ss)
+            dist = norm(test_pt - closest)
+            any_overlap |= dist < r_cap_radius + c_radius
+        act &= any_overlap
+        if not np.any(act):
+            continue
 
-            # Build rotation: rotate dir_ss toward radial_component
-            new_dir_ss = (
-                dir_ss * np.cos(rotation_angle)
-                + radial_component * np.sin(rotation_angle)
-            )
-            new_dir_len = np.linalg.norm(new_dir_ss)
-            if new_dir_len > 1e-6:
-                new_dir_ss /= new_dir_len
+        #  Resolve via ShortestPathRotational 
+        # Push the midpoint of the capsule segment away from the closest
+        # point on the body shape, then re-derive direction.
+        mid_ss = attach_ss + dir_ss * (r_seg_len * 0.5)[:, np.newaxis]
+        closest_mid = _closest_point_on_segment_rows(mid_ss, c_a_ss, c_b_ss)
+        push_vec_ss = mid_ss - closest_mid
+        push_len = norm(push_vec_ss)
+
+        # Degenerate — push along arbitrary perpendicular
+        degenerate = push_len < 1e-6
+        push_vec_ss = np.where(degenerate[:, np.newaxis], _perpendicular(dir_ss), push_vec_ss)
+        push_len = np.where(degenerate, 1.0, push_len)
+
+        push_dir_ss = push_vec_ss / push_len[:, np.newaxis]
+        needed_push = (r_cap_radius + c_radius) - push_len
+        act &= needed_push > 0
+        if not np.any(act):
+            continue
 
-            # Transform back to model space
-            new_dir_ms = np.array(
-                c_rot @ Vector(new_dir_ss), dtype=np.float32
+        # Project the push onto the plane perpendicular to the attachment→bob direction
+        radial_component = push_dir_ss - dir_ss * dot(push_dir_ss, dir_ss)[:, np.newaxis]
+        radial_len = norm(radial_component)
+        small = radial_len < 1e-6
+        if np.any(small):
+            perp = _perpendicular(dir_ss)
+            radial_component = np.where(small[:, np.newaxis], perp, radial_component)
+            radial_len = np.where(small, norm(perp), radial_len)
+        radial_component /= radial_len[:, np.newaxis]
+
+        # Rotation angle needed, rotate dir_ss toward radial_component
+        with np.errstate(invalid='ignore'):
+            rotation_angle = np.arcsin(
+                np.minimum(1.0, needed_push / np.maximum(r_seg_len * 0.5, 1e-6))
             )
-
-            # New position: preserve distance from attachment
-            new_pos = attachment_pos + new_dir_ms * seg_len
-            sim.pos_ms[p_idx] = new_pos
-
-            # Update local state for subsequent shapes
-            constrained_pos = new_pos
-            parent_to_bob = constrained_pos - attachment_pos
-            seg_len_check = np.linalg.norm(parent_to_bob)
-            if seg_len_check > 1e-6:
-                parent_to_bob_dir = parent_to_bob / seg_len_check
-
-
-def _shape_distance_simplified(shape, point_ss, particle_radius):
+        new_dir_ss = (
+            dir_ss * np.cos(rotation_angle)[:, np.newaxis]
+            + radial_component * np.sin(rotation_angle)[:, np.newaxis]
+        )
+        new_dir_len = norm(new_dir_ss)
+        new_dir_ss /= np.where(new_dir_len > 1e-6, new_dir_len, 1.0)[:, np.newaxis]
+
+        # Back to model space, preserving distance from attachment
+        new_dir_ms = quat_rotate(c_rot, new_dir_ss).astype(np.float32)
+        new_pos = r_attachment_pos + new_dir_ms * r_seg_len[:, np.newaxis]
+        sim.pos_ms[p_idx[r[act]]] = new_pos[act]
+        moved[p_idx[r[act]]] = True
+        changed[r[act]] = True
+
+        # Update local state for subsequent shapes
+        parent_to_bob = new_pos - r_attachment_pos
+        seg_len_check = norm(parent_to_bob)
+        update = act & (seg_len_check > 1e-6)
+        parent_to_bob_dir[r[update]] = parent_to_bob[update] / seg_len_check[update][:, np.newaxis]
+
+
+def _shape_distance_simplified(c_height, c_radius, point_ss, particle_radius):
     """
-    Simplified distance from point (in shape space) to the body shape surface.
-    Returns positive if outside, negative if inside.
+    Simplified distance from points (in shape space) to the body shape surface, per row.
+    Spheres have c_height 0. Returns positive if outside, negative if inside.
     """
-    c_radius = shape['radius']
-    if shape['is_capsule']:
-        c_height = shape['height']
-        # Closest point on capsule axis segment
-        c_a = np.array([0, 0, -c_height], dtype=np.float32)
-        c_b = np.array([0, 0, c_height], dtype=np.float32)
-        closest = _closest_point_on_segment_single(point_ss, c_a, c_b)
-        dist = np.linalg.norm(point_ss - closest)
-    else:
-        dist = np.linalg.norm(point_ss)
+    # Closest point on capsule axis segment
+    zeros = np.zeros_like(c_height, dtype=np.float32)
+    c_a = np.stack([zeros, zeros, -c_height], axis=-1).astype(np.float32)
+    c_b = np.stack([zeros, zeros, c_height], axis=-1).astype(np.float32)
+    closest = _closest_point_on_segment_rows(point_ss, c_a, c_b)
+    dist = norm(point_ss - closest)
     return dist - c_radius - particle_radius
 
 
 def _perpendicular(v):
-    """Return a vector perpendicular to v."""
-    if abs(v[0]) < 0.9:
-        cross = np.cross(v, np.array([1, 0, 0], dtype=np.float32))
-    else:
-        cross = np.cross(v, np.array([0, 1, 0], dtype=np.float32))
-    n = np.linalg.norm(cross)
-    return cross / n if n > 1e-6 else np.array([0, 1, 0], dtype=np.float32)
+    """Return vectors perpendicular to each row of v."""
+    ref = np.where((np.abs(v[:, 0]) < 0.9)[:, np.newaxis], (1.0, 0.0, 0.0), Y_AXIS)
+    perp = cross(v, ref)
+    n = norm(perp)
+    return np.where((n > 1e-6)[:, np.newaxis], perp / np.where(n > 1e-6, n, 1.0)[:, np.newaxis], Y_AXIS)
@@ -1,15 +1,17 @@
 
 import math
 import numpy as np
-import bpy
-from mathutils import Vector, Quaternion, Matrix
+from .transforms import (
+    X_AXIS, Y_AXIS, Z_AXIS, dot, matrix_from_wxyz, norm, normalized, quat_from_matrix, quat_rotate,
+    rotation_z,
+)
 
 
 # Bone-space conversion constant
 # Rotation(+90deg, Z) applied as:  bone_re_compat = bone_blender @ RE_BONE_CONV
 # This makes column-0 (X) of the result = bone forward direction.
 # For axis vectors:  bl_axis = RE_BONE_CONV @ re_axis   maps (1,0,0)->(0,1,0)
-RE_BONE_CONV = Quaternion((0, 0, 1), math.radians(90)).to_matrix().to_4x4()
+RE_BONE_CONV = rotation_z(math.radians(90))
 
 
 def _resolve_bone(sim, particle_idx, bone_name):
@@ -61,11 +63,11 @@ def _compile_links(sim):
 
             # Per-link look-at axis:
             # Stored in Blender bone-local space (Y=forward) since v3.6.
-            bl_axis = Vector(getattr(c, 'look_at_axis', (0.0, 1.0, 0.0)))
-            if bl_axis.length_squared > 1e-8:
-                bl_axis.normalize()
+            bl_axis = np.array(getattr(c, 'look_at_axis', (0.0, 1.0, 0.0)), dtype=np.float64)
+            if np.dot(bl_axis, bl_axis) > 1e-8:
+                bl_axis /= np.linalg.norm(bl_axis)
             else:
-                bl_axis = Vector((0, 1, 0))  # Blender bone-forward fallback
+                bl_axis = Y_AXIS  # Blender bone-forward fallback
             look_axes.append(list(bl_axis))
 
     if idx_a:
@@ -98,11 +100,9 @@ def _compile_ellipsoids(sim):
                 # Build local-space transform from authored quat + offset
                 xf = getattr(c, 'ellipsoid_transform_ls_quat',
                              (1.0, 0.0, 0.0, 0.0))
-                q = Quaternion(xf)  # already wxyz
-                off = Vector(getattr(c, 'ellipsoid_transform_ls_offset',
-                                     (0.0, 0.0, 0.0)))
-                ls_mat = q.to_matrix().to_4x4()
-                ls_mat.translation = off
+                off = getattr(c, 'ellipsoid_transform_ls_offset',
+                              (0.0, 0.0, 0.0))
+                ls_mat = matrix_from_wxyz(xf, off)  # already wxyz
                 # Pre-multiply by RE_BONE_CONV (same convention as cones):
                 # ellipsoidTransformMS = bone_BL @ RE_BONE_CONV @ ellipsoidTransformLS
                 ell_xform_ls.append(RE_BONE_CONV @ ls_mat)
@@ -113,10 +113,10 @@ def _compile_ellipsoids(sim):
         sim.ell_radii    = np.array(ell_radii, dtype=np.float32)
         sim.ell_s1       = np.array(ell_s1, dtype=np.float32)
         sim.ell_s2       = np.array(ell_s2, dtype=np.float32)
-        sim.ell_xform_ls = ell_xform_ls
+        sim.ell_xform_ls = np.array(ell_xform_ls)
     else:
         sim.ell_idx = None
-        sim.ell_xform_ls = []
+        sim.ell_xform_ls = np.zeros((0, 4, 4))
 
 
 #  Cones (Pendulums) 
@@ -127,7 +127,7 @@ def _compile_cones(sim):
     c_idx, c_attach, c_type, c_cos, c_sin_hh, c_cos_hh = (
         [], [], [], [], [], []
     )
-    c_cone_xform_adjusted = []  # list of 4x4 Matrices (already converted)
+    c_cone_xform_adjusted = []  # list of 4x4 matrices (already converted)
     c_proj_type = []   # pendulum projection type (0=disabled)
     c_col_radius = []  # cone collision capsule radius
     c_col_height = []  # cone collision capsule height extent
@@ -163,8 +163,7 @@ def _compile_cones(sim):
 
             # Parse coneTransformLS from authored quaternion (wxyz order)
             xf = getattr(c, 'cone_transform_ls_quat', (1.0, 0.0, 0.0, 0.0))
-            q = Quaternion(xf)  # already wxyz
-            raw_ls = q.to_matrix().to_4x4()
+            raw_ls = matrix_from_wxyz(xf)  # already wxyz
 
             adjusted_ls = RE_BONE_CONV @ raw_ls
             c_cone_xform_adjusted.append(adjusted_ls)
@@ -176,7 +175,7 @@ def _compile_cones(sim):
         sim.cone_cos        = np.array(c_cos, dtype=np.float32)
         sim.cone_sin_hh     = np.array(c_sin_hh, dtype=np.float32)
         sim.cone_cos_hh     = np.array(c_cos_hh, dtype=np.float32)
-        sim.cone_xform_ls   = c_cone_xform_adjusted  # already includes RE_BONE_CONV
+        sim.cone_xform_ls   = np.array(c_cone_xform_adjusted)  # already includes RE_BONE_CONV
         sim.cone_proj_type  = np.array(c_proj_type, dtype=np.int32)
         sim.cone_col_radius = np.array(c_col_radius, dtype=np.float32)
         sim.cone_col_height = np.array(c_col_height, dtype=np.float32)
@@ -190,15 +189,131 @@ def _compile_cones(sim):
     sim.pen_idx = sim.cone_idx if hasattr(sim, 'cone_idx') else None
 
 
+# Scheduling
+
+def schedule_cone_levels(cone_idx, cone_attach):
+    """
+    Group cones into levels that can be solved as one batch with the same result as solving them one by one.
+
+    A cone writes its constrained particle and reads its attachment, so it goes one level after every earlier
+    cone it reads from, writes over, or whose read it would overwrite. Chains end up with one level per
+    link and parallel chains share levels.
+    """
+    if cone_idx is None or len(cone_idx) == 0:
+        return []
+    last_write, last_read = {}, {}
+    levels = np.empty(len(cone_idx), dtype=np.int32)
+    for j, (p, a) in enumerate(zip(cone_idx.tolist(), cone_attach.tolist())):
+        lvl = max(last_write.get(p, -1), last_write.get(a, -1), last_read.get(p, -1)) + 1
+        levels[j] = lvl
+        last_write[p] = lvl
+        last_read[p] = max(last_read.get(p, -1), lvl)
+        last_read[a] = max(last_read.get(a, -1), lvl)
+    order = np.argsort(levels, kind='stable')
+    return np.split(order, np.flatnonzero(np.diff(levels[order])) + 1)
+
+
+class ConstraintSet:
+    """
+    Link, ellipsoid and cone arrays for a subset of the compiled constraints, with the cone solve schedule.
+
+    ell_sel / cone_sel index the subset's rows in the full arrays, where the per-step frames from
+    update_constraint_frames live.
+    """
+
+    LINK_FIELDS = ('link_idx_a', 'link_idx_b', 'link_types', 'link_lower', 'link_upper', 'link_rest', 'link_look_axes')
+    ELL_FIELDS = ('ell_idx', 'ell_centers', 'ell_radii', 'ell_s1', 'ell_s2', 'ell_xform_ls')
+    CONE_FIELDS = ('cone_idx', 'cone_attach', 'cone_type', 'cone_cos', 'cone_sin_hh', 'cone_cos_hh',
+                   'cone_xform_ls', 'cone_proj_type', 'cone_col_radius', 'cone_col_height')
+
+    def __init__(self, source, link_sel=None, ell_sel=None, cone_sel=None):
+        for fields, head, sel in ((self.LINK_FIELDS, 'link_idx_a', link_sel),
+                                  (self.ELL_FIELDS, 'ell_idx', ell_sel),
+                                  (self.CONE_FIELDS, 'cone_idx', cone_sel)):
+            full = getattr(source, head, None)
+            for f in fields:
+                arr = None
+                if full is not None and (sel is None or len(sel)):
+                    arr = getattr(source, f)
+                    if sel is not None:
+                        arr = arr[sel]
+                setattr(self, f, arr)
+
+        self.ell_sel = None
+        if self.ell_idx is not None:
+            self.ell_sel = np.arange(len(source.ell_idx)) if ell_sel is None else ell_sel
+        self.cone_sel = None
+        self.cone_levels = []
+        if self.cone_idx is not None:
+            self.cone_sel = np.arange(len(source.cone_idx)) if cone_sel is None else cone_sel
+            self.cone_levels = schedule_cone_levels(self.cone_idx, self.cone_attach)
+        # per level: rows in this set, constrained and attachment particles, rows in the full arrays
+        self.cone_batches = [
+            (level, self.cone_idx[level], self.cone_attach[level], self.cone_sel[level])
+            for level in self.cone_levels
+        ]
+        # sin of the half aperture, cone_cos_hh/cone_sin_hh are kept for the authored quaternion form
+        self.cone_sin = None
+        if self.cone_idx is not None:
+            self.cone_sin = 2.0 * self.cone_sin_hh.astype(np.float64) * self.cone_cos_hh
+
+    @classmethod
+    def for_particles(cls, source, ranges):
+        """Constraints whose constrained particle lies in one of the [start, end) ranges, dangle nodes' share."""
+        def sel(idx):
+            if idx is None:
+                return None
+            mask = np.zeros(len(idx), dtype=bool)
+            for start, end in ranges:
+                mask |= (idx >= start) & (idx < end)
+            return np.flatnonzero(mask)
+        return cls(source,
+                   sel(getattr(source, 'link_idx_a', None)),
+                   sel(getattr(source, 'ell_idx', None)),
+                   sel(getattr(source, 'cone_idx', None)))
+
+    def particles_written(self):
+        """Particles any solver of this set may move."""
+        parts = [arr for arr in (self.link_idx_a, self.link_idx_b, self.ell_idx, self.cone_idx) if arr is not None]
+        return set(np.concatenate(parts).tolist()) if parts else set()
+
+    def particles_read(self):
+        parts = [arr for arr in (self.link_idx_a, self.link_idx_b, self.ell_idx, self.cone_idx, self.cone_attach)
+                 if arr is not None]
+        return set(np.concatenate(parts).tolist()) if parts else set()
+
+
+def update_constraint_frames(sim):
+    """
+    Model-space ellipsoid and cone frames from _interp_bone_xform.
+
+    The bone transforms only change once per step, so the solvers read these instead of
+    recomposing the matrices on every iteration.
+    """
+    if getattr(sim, 'ell_idx', None) is not None:
+        # ellipsoidTransformMS = bone_BL @ RE_BONE_CONV @ ellipsoidTransformLS
+        ell_ms = sim._interp_bone_xform[sim.ell_centers] @ sim.ell_xform_ls
+        sim.ell_center_ms = ell_ms[:, :3, 3].astype(np.float32)
+        sim.ell_z_axis_ms = quat_rotate(quat_from_matrix(ell_ms), Z_AXIS).astype(np.float32)
+    if getattr(sim, 'cone_idx', None) is not None:
+        # coneTransformMS = attachBone_BL @ (RE_BONE_CONV @ coneTransformLS)
+        cone_ms = sim._interp_bone_xform[sim.cone_attach] @ sim.cone_xform_ls
+        cone_rot = quat_from_matrix(cone_ms)
+        sim.cone_origin_ms = cone_ms[:, :3, 3]
+        # Cone axis = X-axis of coneTransformMS (along the bone chain), ortho axis = Z
+        sim.cone_axis_ms = normalized(quat_rotate(cone_rot, X_AXIS))
+        sim.cone_ortho_ms = normalized(quat_rotate(cone_rot, Z_AXIS))
+
+
 # Link Solver
 
-def satisfy_dyng_links_vectorized(sim):
+def satisfy_dyng_links_vectorized(sim, cs):
     """Satisfy Distance Links"""
-    if sim.link_idx_a is None:
+    if cs.link_idx_a is None:
         return
 
-    p1 = sim.pos_ms[sim.link_idx_a]
-    p2 = sim.pos_ms[sim.link_idx_b]
+    p1 = sim.pos_ms[cs.link_idx_a]
+    p2 = sim.pos_ms[cs.link_idx_b]
     diff = p2 - p1
 
     cur_len = np.linalg.norm(diff, axis=1)
@@ -207,34 +322,34 @@ def satisfy_dyng_links_vectorized(sim):
     cur_len[zero_mask] = 1.0
 
     norm_diff = diff / cur_len[:, np.newaxis]
-    desired_len = np.copy(sim.link_rest)
+    desired_len = np.copy(cs.link_rest)
 
     # KeepFixedDistance: target = lower_ratio * rest
-    fixed_mask = sim.link_types == 0
+    fixed_mask = cs.link_types == 0
     desired_len[fixed_mask] = (
-        sim.link_lower[fixed_mask] * sim.link_rest[fixed_mask]
+        cs.link_lower[fixed_mask] * cs.link_rest[fixed_mask]
     )
 
     # KeepVariableDistance: clamp current length to [lower*rest, upper*rest]
-    var_mask = sim.link_types == 1
+    var_mask = cs.link_types == 1
     desired_len[var_mask] = np.clip(
         cur_len[var_mask],
-        sim.link_lower[var_mask] * sim.link_rest[var_mask],
-        sim.link_upper[var_mask] * sim.link_rest[var_mask],
+        cs.link_lower[var_mask] * cs.link_rest[var_mask],
+        cs.link_upper[var_mask] * cs.link_rest[var_mask],
     )
 
     # Greater: enforce minimum
-    grt_mask = sim.link_types == 2
+    grt_mask = cs.link_types == 2
     desired_len[grt_mask] = np.maximum(
         cur_len[grt_mask],
-        sim.link_lower[grt_mask] * sim.link_rest[grt_mask],
+        cs.link_lower[grt_mask] * cs.link_rest[grt_mask],
     )
 
     # Closer: enforce maximum
-    cls_mask = sim.link_types == 3
+    cls_mask = cs.link_types == 3
     desired_len[cls_mask] = np.minimum(
         cur_len[cls_mask],
-        sim.link_upper[cls_mask] * sim.link_rest[cls_mask],
+        cs.link_upper[cls_mask] * cs.link_rest[cls_mask],
     )
 
     error = cur_len - desired_len
@@ -243,10 +358,10 @@ def satisfy_dyng_links_vectorized(sim):
         return
 
     # Mass-weighted bilateral correction
-    m1 = sim.mass[sim.link_idx_a]
-    m2 = sim.mass[sim.link_idx_b]
-    free1 = sim.is_free[sim.link_idx_a] & sim.active_mask[sim.link_idx_a]
-    free2 = sim.is_free[sim.link_idx_b] & sim.active_mask[sim.link_idx_b]
+    m1 = sim.mass[cs.link_idx_a]
+    m2 = sim.mass[cs.link_idx_b]
+    free1 = sim.is_free[cs.link_idx_a] & sim.active_mask[cs.link_idx_a]
+    free2 = sim.is_free[cs.link_idx_b] & sim.active_mask[cs.link_idx_b]
 
     m_total = m1 + m2
     f1 = np.where(
@@ -260,47 +375,31 @@ def satisfy_dyng_links_vectorized(sim):
     corr_1 = (active_error * f1)[:, np.newaxis]
     corr_2 = (active_error * f2)[:, np.newaxis]
 
-    np.add.at(sim.pos_ms, sim.link_idx_a,  norm_diff * corr_1)
-    np.add.at(sim.pos_ms, sim.link_idx_b, -norm_diff * corr_2)
+    np.add.at(sim.pos_ms, cs.link_idx_a,  norm_diff * corr_1)
+    np.add.at(sim.pos_ms, cs.link_idx_b, -norm_diff * corr_2)
 
 
 # Ellipsoid Solver
 
-def satisfy_dyng_ellipsoids_vectorized(sim):
+def satisfy_dyng_ellipsoids_vectorized(sim, cs):
     """Satisfy Ellipsoid Constraints"""
-    if sim.ell_idx is None:
+    if cs.ell_idx is None:
         return
 
-    active_free = sim.is_free[sim.ell_idx] & sim.active_mask[sim.ell_idx]
+    active_free = sim.is_free[cs.ell_idx] & sim.active_mask[cs.ell_idx]
     if not np.any(active_free):
         return
 
-    #  Compute per-ellipsoid model-space center + Z-axis 
-    n_active = int(np.sum(active_free))
-    af_indices = np.where(active_free)[0]
-    center_ms_all = np.zeros((n_active, 3), dtype=np.float32)
-    z_axis_all = np.zeros((n_active, 3), dtype=np.float32)
-
-    has_xforms = hasattr(sim, 'ell_xform_ls') and len(sim.ell_xform_ls) > 0
-
-    for li, ai in enumerate(af_indices):
-        ci = sim.ell_centers[ai]
-        if has_xforms and ai < len(sim.ell_xform_ls):
-            bone_xf = sim._interp_bone_xform[ci]
-            ell_ms = bone_xf @ sim.ell_xform_ls[ai]
-            center_ms_all[li] = np.array(ell_ms.translation, dtype=np.float32)
-            z_axis_all[li] = np.array(
-                ell_ms.to_quaternion() @ Vector((0, 0, 1)), dtype=np.float32
-            )
-        else:
-            center_ms_all[li] = sim.interp_bone_ms[ci]
-            z_axis_all[li] = np.array([0, 0, 1], dtype=np.float32)
+    #  Per-ellipsoid model-space center + Z-axis 
+    ell_rows = cs.ell_sel[active_free]
+    center_ms_all = sim.ell_center_ms[ell_rows]
+    z_axis_all = sim.ell_z_axis_ms[ell_rows]
 
-    idx   = sim.ell_idx[active_free]
+    idx   = cs.ell_idx[active_free]
     pos   = sim.pos_ms[idx]
-    radii = sim.ell_radii[active_free]
-    s1    = sim.ell_s1[active_free]
-    s2    = sim.ell_s2[active_free]
+    radii = cs.ell_radii[active_free]
+    s1    = cs.ell_s1[active_free]
+    s2    = cs.ell_s2[active_free]
 
     center_to_p = pos - center_ms_all
     dist = np.linalg.norm(center_to_p, axis=1)
@@ -347,102 +446,144 @@ def satisfy_dyng_ellipsoids_vectorized(sim):
 
 # Cone (Pendulum) Solver
 
-def satisfy_pendulums_vectorized(sim):
-    """Satisfy Cone (Pendulum) Constraints"""
-    if sim.cone_idx is None:
-        return
+# Levels with at most this many cones are solved one cone at a time in plain Python, a single chain has one
+# cone per level and the fixed cost of the NumPy calls below is several times the math itself there.
+SMALL_CONE_LEVEL = 4
 
-    for ci in range(len(sim.cone_idx)):
-        p_idx     = sim.cone_idx[ci]
-        a_idx     = sim.cone_attach[ci]
-        c_type    = sim.cone_type[ci]
-        cos_half  = sim.cone_cos[ci]
-        sin_hh    = sim.cone_sin_hh[ci]
-        cos_hh    = sim.cone_cos_hh[ci]
-        xform_ls  = sim.cone_xform_ls[ci]   # already RE_BONE_CONV @ raw_ls
 
-        if not (sim.is_free[p_idx] and sim.active_mask[p_idx]):
-            continue
+def _satisfy_pendulum(sim, cs, ci, p_idx, a_idx, row):
+    """satisfy_pendulums_vectorized for one cone, on Python floats."""
+    ox, oy, oz = sim.cone_origin_ms[row].tolist()
+    ax, ay, az = sim.cone_axis_ms[row].tolist()
+    px, py, pz = sim.pos_ms[p_idx].tolist()
+    qx, qy, qz = sim.pos_ms[a_idx].tolist()
 
-        # coneTransformMS = attachBone_BL @ (RE_BONE_CONV @ coneTransformLS)
-        attach_xform = sim._interp_bone_xform[a_idx]
-        cone_xform_ms = attach_xform @ xform_ls
+    dx, dy, dz = px - ox, py - oy, pz - oz
+    c_type = int(cs.cone_type[ci])
+    if c_type:
+        zx, zy, zz = sim.cone_ortho_ms[row].tolist()
+        dot_z = dx * zx + dy * zy + dz * zz
+        if c_type == 1 or (c_type == 2 and dot_z > 0):
+            dx, dy, dz = dx - zx * dot_z, dy - zy * dot_z, dz - zz * dot_z
 
-        cone_origin_ms = Vector(cone_xform_ms.translation)
-        cone_rot       = cone_xform_ms.to_quaternion()
+    len_sq = dx * dx + dy * dy + dz * dz
+    if len_sq < 1e-12:
+        return
+    inv = 1.0 / math.sqrt(len_sq)
+    dx, dy, dz = dx * inv, dy * inv, dz * inv
+
+    cone_cos = float(cs.cone_cos[ci])
+    dot_val = ax * dx + ay * dy + az * dz
+    if dot_val < cone_cos:
+        rx, ry, rz = dx - ax * dot_val, dy - ay * dot_val, dz - az * dot_val
+        radial_len = math.sqrt(rx * rx + ry * ry + rz * rz)
+        if radial_len > 1e-6:
+            k = float(cs.cone_sin[ci]) / radial_len
+            dx, dy, dz = ax * cone_cos + rx * k, ay * cone_cos + ry * k, az * cone_cos + rz * k
+
+    ex, ey, ez = qx - px, qy - py, qz - pz
+    original_dist = math.sqrt(ex * ex + ey * ey + ez * ez)
+    if original_dist < 1e-6:
+        return
 
-        # Cone axis = X-axis of coneTransformMS (now correctly along bone chain)
-        initial_axis = Vector(cone_rot @ Vector((1, 0, 0)))
-        initial_axis.normalize()
+    cx, cy, cz = ox - qx, oy - qy, oz - qz
+    b_coeff = 2.0 * (cx * dx + cy * dy + cz * dz)
+    c_coeff = (cx * cx + cy * cy + cz * cz) - original_dist * original_dist
+    discriminant = b_coeff * b_coeff - 4.0 * c_coeff
+
+    sqrt_disc = math.sqrt(max(discriminant, 0.0))
+    t1 = (-b_coeff + sqrt_disc) * 0.5
+    t2 = (-b_coeff - sqrt_disc) * 0.5
+    if discriminant >= 0 and t1 >= 0:
+        t = t2 if t2 >= 0 else t1
+        sim.pos_ms[p_idx] = (ox + dx * t, oy + dy * t, oz + dz * t)
+    else:
+        t = max(0.0, -b_coeff * 0.5)
+        tx, ty, tz = ox + dx * t - qx, oy + dy * t - qy, oz + dz * t - qz
+        closest_len = math.sqrt(tx * tx + ty * ty + tz * tz)
+        k = original_dist / closest_len if closest_len > 1e-6 else original_dist
+        sim.pos_ms[p_idx] = (qx + tx * k, qy + ty * k, qz + tz * k)
 
-        constrained_pos = Vector(sim.pos_ms[p_idx])
-        attachment_pos  = Vector(sim.pos_ms[a_idx])
 
-        cone_to_particle = constrained_pos - cone_origin_ms
+def satisfy_pendulums_vectorized(sim, cs):
+    """Satisfy Cone (Pendulum) Constraints, one batch per schedule level"""
+    if cs.cone_idx is None:
+        return
 
-        #  HingePlane / HalfCone: project out the Z-axis component 
-        if c_type != 0:  # not pure Cone
-            ortho_axis = Vector(cone_rot @ Vector((0, 0, 1)))
-            ortho_axis.normalize()
+    solvable = sim.is_free & sim.active_mask
+    for ci, p_idx, a_idx, rows in cs.cone_batches:
+        if len(p_idx) <= SMALL_CONE_LEVEL:
+            for c, p, a, r in zip(ci.tolist(), p_idx.tolist(), a_idx.tolist(), rows.tolist()):
+                if solvable[p]:
+                    _satisfy_pendulum(sim, cs, c, p, a, r)
+            continue
 
-            if c_type == 1:  # HingePlane: remove all Z-component
-                dot_z = cone_to_particle.dot(ortho_axis)
-                cone_to_particle -= ortho_axis * dot_z
-            elif c_type == 2:  # HalfCone: remove positive Z only
-                dot_z = cone_to_particle.dot(ortho_axis)
-                if dot_z > 0:
-                    cone_to_particle -= ortho_axis * dot_z
+        free = solvable[p_idx]
+        if not free.all():
+            if not free.any():
+                continue
+            ci, p_idx, a_idx, rows = ci[free], p_idx[free], a_idx[free], rows[free]
 
-        if cone_to_particle.length_squared < 1e-12:
-            continue
+        cone_origin_ms = sim.cone_origin_ms[rows]
+        initial_axis = sim.cone_axis_ms[rows]
+        constrained_pos = sim.pos_ms[p_idx]
+        attachment_pos  = sim.pos_ms[a_idx]
 
-        cone_to_particle.normalize()
-
-        #  Check if outside cone aperture 
-        dot_val = initial_axis.dot(cone_to_particle)
-        if dot_val < cos_half:
-            # Rotate initial_axis to the cone boundary using Rodrigues
-            perp = initial_axis.cross(cone_to_particle)
-            perp_len = perp.length
-            if perp_len > 1e-6:
-                perp.normalize()
-                q_rot = Quaternion(
-                    (cos_hh, perp.x * sin_hh, perp.y * sin_hh, perp.z * sin_hh)
-                )
-                cone_to_particle = q_rot @ initial_axis
-                cone_to_particle.normalize()
+        cone_to_particle = constrained_pos - cone_origin_ms
+
+        #  HingePlane removes all of the Z-component, HalfCone only positive Z 
+        c_type = cs.cone_type[ci]
+        if c_type.any():
+            ortho_axis = sim.cone_ortho_ms[rows]
+            dot_z = dot(cone_to_particle, ortho_axis)
+            remove_z = (c_type == 1) | ((c_type == 2) & (dot_z > 0))
+            cone_to_particle -= ortho_axis * np.where(remove_z, dot_z, 0.0)[:, np.newaxis]
+
+        len_sq = dot(cone_to_particle, cone_to_particle)
+        solve = len_sq >= 1e-12
+        cone_to_particle /= np.sqrt(np.where(solve, len_sq, 1.0))[:, np.newaxis]
+
+        #  Outside the cone aperture: rotate initial_axis to the cone boundary 
+        # (Rodrigues about perp = axis x dir, which reduces to a blend with dir's part perpendicular to the axis)
+        dot_val = dot(initial_axis, cone_to_particle)
+        outside = dot_val < cs.cone_cos[ci]
+        if outside.any():
+            radial = cone_to_particle - initial_axis * dot_val[:, np.newaxis]
+            radial_len = norm(radial)
+            outside &= radial_len > 1e-6
+            boundary = (
+                initial_axis * cs.cone_cos[ci][:, np.newaxis]
+                + radial * (cs.cone_sin[ci] / np.where(radial_len > 1e-6, radial_len, 1.0))[:, np.newaxis]
+            )
+            cone_to_particle = np.where(outside[:, np.newaxis], boundary, cone_to_particle)
 
         #  Distance preservation via sphere-ray intersection 
-        original_dist = (attachment_pos - constrained_pos).length
-        if original_dist < 1e-6:
-            continue
+        original_dist = norm(attachment_pos - constrained_pos)
+        solve &= original_dist >= 1e-6
 
         oc = cone_origin_ms - attachment_pos
-        b_coeff = 2.0 * oc.dot(cone_to_particle)
-        c_coeff = oc.length_squared - original_dist * original_dist
+        b_coeff = 2.0 * dot(oc, cone_to_particle)
+        c_coeff = dot(oc, oc) - original_dist * original_dist
         discriminant = b_coeff * b_coeff - 4.0 * c_coeff
 
-        if discriminant >= 0:
-            sqrt_disc = discriminant ** 0.5
-            t1 = (-b_coeff + sqrt_disc) * 0.5
-            t2 = (-b_coeff - sqrt_disc) * 0.5
+        sqrt_disc = np.sqrt(np.maximum(discriminant, 0.0))
+        t1 = (-b_coeff + sqrt_disc) * 0.5
+        t2 = (-b_coeff - sqrt_disc) * 0.5
+        # smallest non-negative root, t2 <= t1
+        hit = (discriminant >= 0) & (t1 >= 0)
+        new_pos = cone_origin_ms + cone_to_particle * np.where(t2 >= 0, t2, t1)[:, np.newaxis]
+
+        if not hit.all():
+            # no intersection: closest point on the ray, pushed out to the original distance
+            t_closest = np.maximum(0.0, -b_coeff * 0.5)
+            to_closest = cone_origin_ms + cone_to_particle * t_closest[:, np.newaxis] - attachment_pos
+            closest_len = norm(to_closest)
+            to_closest /= np.where(closest_len > 1e-6, closest_len, 1.0)[:, np.newaxis]
+            new_pos = np.where(
+                hit[:, np.newaxis], new_pos, attachment_pos + to_closest * original_dist[:, np.newaxis]
+            )
 
-            candidates = sorted([t for t in [t1, t2] if t >= 0])
-            if candidates:
-                new_pos = cone_origin_ms + cone_to_particle * candidates[0]
-            else:
-                t_closest = max(0.0, -b_coeff * 0.5)
-                closest = cone_origin_ms + cone_to_particle * t_closest
-                to_closest = closest - attachment_pos
-                if to_closest.length > 1e-6:
-                    to_closest.normalize()
-                new_pos = attachment_pos + to_closest * original_dist
+        if solve.all():
+            sim.pos_ms[p_idx] = new_pos
         else:
-            t_closest = max(0.0, -b_coeff * 0.5)
-            closest = cone_origin_ms + cone_to_particle * t_closest
-            to_closest = closest - attachment_pos
-            if to_closest.length > 1e-6:
-                to_closest.normalize()
-            new_pos = attachment_pos + to_closest * original_dist
-
-        sim.pos_ms[p_idx] = np.array(new_pos, dtype=np.float32)
\ No newline at end of file
+            sim.pos_ms[p_idx[solve]] = new_pos[solve]
@@ -0,0 +1,455 @@
+import numpy as np
+from . import constraints, collision
+from .transforms import quat_conjugate, quat_from_matrix, quat_rotate, quat_to_matrix
+
+DAMPING_ACCEL_LIMIT = 50.0
+MIN_TIME_DILATION   = 0.05
+MAX_TIME_DILATION   = 1.0
+MAX_PHYSICS_STEPS   = 3.0
+LP_FILTER_RC        = 1.0
+
+TELEPORT_KEEP_SQ  = 1.0
+TELEPORT_RESET_SQ = 25.0
+
+
+class DyngKernel:
+    """
+    Dangle simulation on plain arrays, no Blender access.
+
+    Tracked bones are the num_particles particle bones followed by any extra bones that only carry
+    collision shapes. Every step takes the tracked bones' model-space 4x4 matrices (mathutils layout,
+    translation in the last column) and writes the solved particle positions to pos_ms.
+
+    Constraints and collision shapes are set with the set_* methods or written to the same attributes
+    directly (as the Blender layer's compile step does), the per-node solve schedule is rebuilt on the
+    next step after any set_* call.
+
+    One kernel can carry several rigs (see DyngBatch): tracked_rig and shape_rig say which rig each
+    bone and shape belongs to, the world matrix, gravity, external force and teleport state are kept
+    per rig and particles only collide with their own rig's shapes.
+    """
+
+    # per tracked bone arrays, the particle state and settings a DyngBatch concatenates and scatters back
+    TRACKED_FIELDS = ('pos_ms', 'vel_ms', 'prev_pos_ms', 'prev_bone_ms', 'cur_bone_ms', 'interp_bone_ms',
+                      'is_free', 'active_mask', 'mass', 'inv_mass', 'damping', 'pull_force',
+                      'col_radius', 'col_height', 'col_axis_ls', 'proj_type', '_interp_bone_xform')
+    # constraint and shape fields that hold tracked bone indices
+    INDEX_FIELDS = ('link_idx_a', 'link_idx_b', 'ell_idx', 'ell_centers', 'cone_idx', 'cone_attach', 'shape_bone')
+
+    def __init__(self, num_particles, num_tracked=None, num_rigs=1):
+        n = num_particles
+        total_tracked = n if num_tracked is None else num_tracked
+        self.num_particles = n
+        self.num_tracked = total_tracked
+        self.num_rigs = num_rigs
+        self.tracked_rig = np.zeros(total_tracked, dtype=np.int32)
+
+        self.pos_ms = np.zeros((total_tracked, 3), dtype=np.float32)
+        self.vel_ms = np.zeros((total_tracked, 3), dtype=np.float32)
+        self.prev_pos_ms = np.zeros((total_tracked, 3), dtype=np.float32)
+
+        self.prev_bone_ms = np.zeros((total_tracked, 3), dtype=np.float32)
+        self.cur_bone_ms = np.zeros((total_tracked, 3), dtype=np.float32)
+        self.interp_bone_ms = np.zeros((total_tracked, 3), dtype=np.float32)
+
+        self.is_free = np.zeros(total_tracked, dtype=bool)
+        self.active_mask = np.ones(total_tracked, dtype=bool)
+        self.mass = np.ones(total_tracked, dtype=np.float32)
+        self.inv_mass = np.ones(total_tracked, dtype=np.float32)
+        self.damping = np.zeros(total_tracked, dtype=np.float32)
+        self.pull_force = np.zeros(total_tracked, dtype=np.float32)
+
+        self.col_radius = np.zeros(total_tracked, dtype=np.float32)
+        self.col_height = np.zeros(total_tracked, dtype=np.float32)
+        self.col_axis_ls = np.zeros((total_tracked, 3), dtype=np.float32)
+        self.proj_type = np.zeros(total_tracked, dtype=np.int32)
+
+        self.prev_ext_force_ms = np.zeros((num_rigs, 3), dtype=np.float32)
+        self.cur_ext_force_ms = np.zeros((num_rigs, 3), dtype=np.float32)
+        self.prev_grav_ms = np.zeros((num_rigs, 3), dtype=np.float32)
+        self.cur_grav_ms = np.zeros((num_rigs, 3), dtype=np.float32)
+
+        self._interp_bone_xform = np.tile(np.eye(4), (total_tracked, 1, 1))
+
+        self.time_remainder = 0.0
+        self.damped_physics_steps = 1.0
+        self.prev_matrix_world = np.tile(np.eye(4), (num_rigs, 1, 1))
+
+        self._node_ranges = [(0, n)]
+        self._node_iters = [1]
+        self._node_rigs = [0]
+
+        self.link_idx_a = None
+        self.ell_idx = None
+        self.ell_xform_ls = np.zeros((0, 4, 4))
+        self.cone_idx = None
+        self.cone_proj_type = None
+        self.cone_col_radius = None
+        self.cone_col_height = None
+        collision.init_collision_shapes(self, [], [], [], [], np.zeros((0, 4, 4)))
+
+        self.drag_post = None
+        self._constraint_sets = None
+
+    #  Setup
+
+    def set_nodes(self, ranges, iterations, rigs=None):
+        """Split particles into dangle nodes, (start, end) particle ranges with their solver iteration counts and rigs."""
+        self._node_ranges = [(int(s), int(e)) for s, e in ranges]
+        self._node_iters = [int(it) for it in iterations]
+        self._node_rigs = [0] * len(self._node_ranges) if rigs is None else [int(r) for r in rigs]
+        self._constraint_sets = None
+
+    def set_particles(self, is_pinned, mass, damping=0.0, pull_force=0.0,
+                      col_radius=0.0, col_height=0.0, col_axis_ls=(0.0, 0.0, 0.0), proj_type=0):
+        """Per-particle settings, scalars are broadcast. proj_type is 0 off, 1 shortest path, 2 directed."""
+        n = self.num_particles
+        pinned = np.broadcast_to(np.asarray(is_pinned, dtype=bool), n)
+        self.is_free[:n] = ~pinned
+        self.mass[:n] = np.maximum(0.001, mass)
+        self.inv_mass[:n] = np.where(pinned, 0.0, 1.0 / self.mass[:n])
+        self.damping[:n] = damping
+        self.pull_force[:n] = pull_force
+        self.col_radius[:n] = col_radius
+        self.col_height[:n] = col_height
+        self.col_axis_ls[:n] = col_axis_ls
+        self.proj_type[:n] = proj_type
+
+    def reset_bones(self, bone_mats, present=None):
+        """Snap particles and bone history to the heads of bone_mats, (num_tracked, 4, 4)."""
+        if present is None:
+            present = np.ones(self.num_tracked, dtype=bool)
+        heads = np.asarray(bone_mats)[:, :3, 3].astype(np.float32)
+        n = self.num_particles
+        particle_present = present.copy()
+        particle_present[n:] = False
+        self.pos_ms[particle_present] = heads[particle_present]
+        self.prev_bone_ms[present] = heads[present]
+        self.cur_bone_ms[present] = heads[present]
+
+    def set_links(self, idx_a, idx_b, link_types, lower, upper, rest=None, look_axes=None):
+        """
+        Distance links from particle idx_a to tracked bone idx_b.
+
+        link_types are 0 fixed, 1 variable, 2 greater, 3 closer, lower/upper are ratios of rest
+        (1.0 = 100%). Rest lengths of 0 or less are measured from the current positions.
+        """
+        k = len(idx_a)
+        if k == 0:
+            self.link_idx_a = None
+            self._constraint_sets = None
+            return
+        self.link_idx_a = np.asarray(idx_a, dtype=np.int32)
+        self.link_idx_b = np.asarray(idx_b, dtype=np.int32)
+        self.link_types = np.broadcast_to(np.asarray(link_types, dtype=np.int32), k).copy()
+        self.link_lower = np.broadcast_to(np.asarray(lower, dtype=np.float32), k).copy()
+        self.link_upper = np.broadcast_to(np.asarray(upper, dtype=np.float32), k).copy()
+        measured = np.linalg.norm(self.pos_ms[self.link_idx_a] - self.pos_ms[self.link_idx_b], axis=1)
+        rest = measured if rest is None else np.broadcast_to(np.asarray(rest, dtype=np.float32), k)
+        self.link_rest = np.where(rest > 0.0, rest, measured).astype(np.float32)
+        if look_axes is None:
+            look_axes = (0.0, 1.0, 0.0)
+        self.link_look_axes = np.broadcast_to(np.asarray(look_axes, dtype=np.float32), (k, 3)).copy()
+        self._constraint_sets = None
+
+    def set_ellipsoids(self, idx, centers, radii, scale1=1.0, scale2=1.0, xform_ls=None):
+        """Keep particles idx inside ellipsoids on tracked bones centers, xform_ls is the authored local transform."""
+        k = len(idx)
+        if k == 0:
+            self.ell_idx = None
+            self.ell_xform_ls = np.zeros((0, 4, 4))
+            self._constraint_sets = None
+            return
+        self.ell_idx = np.asarray(idx, dtype=np.int32)
+        self.ell_centers = np.asarray(centers, dtype=np.int32)
+        self.ell_radii = np.broadcast_to(np.asarray(radii, dtype=np.float32), k).copy()
+        self.ell_s1 = np.broadcast_to(np.asarray(scale1, dtype=np.float32), k).copy()
+        self.ell_s2 = np.broadcast_to(np.asarray(scale2, dtype=np.float32), k).copy()
+        if xform_ls is None:
+            xform_ls = np.eye(4)
+        self.ell_xform_ls = constraints.RE_BONE_CONV @ np.broadcast_to(np.asarray(xform_ls, dtype=np.float64), (k, 4, 4))
+        self._constraint_sets = None
+
+    def set_cones(self, idx, attach, cone_types, half_angle, xform_ls=None,
+                  proj_type=0, col_radius=0.0, col_height=0.0):
+        """
+        Cone (pendulum) limits for particles idx around tracked bones attach.
+
+        cone_types are 0 cone, 1 hinge plane, 2 half cone, half_angle is the half aperture in degrees.
+        proj_type, col_radius and col_height describe the cone's collision capsule (proj_type 0 = off).
+        """
+        k = len(idx)
+        if k == 0:
+            self.cone_idx = None
+            self.cone_proj_type = None
+            self.cone_col_radius = None
+            self.cone_col_height = None
+            self._constraint_sets = None
+            return
+        half_rad = np.radians(np.broadcast_to(np.asarray(half_angle, dtype=np.float64), k))
+        self.cone_idx = np.asarray(idx, dtype=np.int32)
+        self.cone_attach = np.asarray(attach, dtype=np.int32)
+        self.cone_type = np.broadcast_to(np.asarray(cone_types, dtype=np.int32), k).copy()
+        self.cone_cos = np.cos(half_rad).astype(np.float32)
+        self.cone_sin_hh = np.sin(half_rad * 0.5).astype(np.float32)
+        self.cone_cos_hh = np.cos(half_rad * 0.5).astype(np.float32)
+        if xform_ls is None:
+            xform_ls = np.eye(4)
+        self.cone_xform_ls = constraints.RE_BONE_CONV @ np.broadcast_to(np.asarray(xform_ls, dtype=np.float64), (k, 4, 4))
+        self.cone_proj_type = np.broadcast_to(np.asarray(proj_type, dtype=np.int32), k).copy()
+        self.cone_col_radius = np.broadcast_to(np.asarray(col_radius, dtype=np.float32), k).copy()
+        self.cone_col_height = np.broadcast_to(np.asarray(col_height, dtype=np.float32), k).copy()
+        self._constraint_sets = None
+
+    def set_collision_shapes(self, bone_idx, is_capsule, radius, height, ls_mat=None, rig=0):
+        """
+        Body spheres/capsules on tracked bones bone_idx (-1 = never moves), ls_mat is the authored local transform.
+
+        rig is the rig (scalar or per shape) whose particles collide with the shape.
+        """
+        if ls_mat is None:
+            ls_mat = np.tile(np.eye(4), (len(bone_idx), 1, 1))
+        collision.init_collision_shapes(self, bone_idx, is_capsule, radius, height, ls_mat, rig)
+
+    def _build_constraint_sets(self):
+        """
+        Constraint sets to solve in each solver iteration.
+
+        Nodes of a rig run one after another, each with its own iteration count. When no node moves a
+        particle another node of the rig reads or moves, that order makes no difference and the rig's
+        nodes running in an iteration are solved as one set, which gives the cone schedule wider levels.
+        Rigs never share particles, so the k-th set of every rig in an iteration is solved together.
+        """
+        rig_nodes = [[] for _ in range(self.num_rigs)]
+        for ni, rig in enumerate(self._node_rigs):
+            rig_nodes[rig].append(ni)
+
+        independent = []
+        for nodes in rig_nodes:
+            node_sets = [constraints.ConstraintSet.for_particles(self, [self._node_ranges[ni]]) for ni in nodes]
+            written = [cs.particles_written() for cs in node_sets]
+            touched = [w | cs.particles_read() for w, cs in zip(written, node_sets)]
+            independent.append(all(
+                not (written[a] & touched[b])
+                for a in range(len(node_sets)) for b in range(len(node_sets)) if a != b
+            ))
+
+        # solver iterations of each rig, a rig without nodes runs one like a single kernel does
+        self.rig_iters = np.array(
+            [max((self._node_iters[ni] for ni in nodes), default=1) for nodes in rig_nodes], dtype=np.int32
+        )
+
+        self._iteration_sets = []
+        max_solver_iters = max(self._node_iters) if self._node_iters else 1
+        merged = {}
+        for iteration in range(max_solver_iters):
+            layers = []
+            for nodes, indep in zip(rig_nodes, independent):
+                running = tuple(ni for ni in nodes if iteration < self._node_iters[ni])
+                if not running:
+                    continue
+                groups = [running] if indep else [(ni,) for ni in running]
+                for k, group in enumerate(groups):
+                    if k == len(layers):
+                        layers.append(())
+                    layers[k] += group
+            sets = []
+            for layer in layers:
+                if layer not in merged:
+                    merged[layer] = constraints.ConstraintSet.for_particles(
+                        self, [self._node_ranges[ni] for ni in layer]
+                    )
+                sets.append(merged[layer])
+            self._iteration_sets.append(sets)
+
+        self._all_set = constraints.ConstraintSet(self)
+        self.cone_levels = self._all_set.cone_levels
+        self._constraint_sets = True
+
+    #  Step
+
+    def _resolve_teleportation(self, cur_mw):
+        """Per-rig teleport handling against last step's world matrices, returns the rigs whose physics is skipped."""
+        diff = cur_mw[:, :3, 3] - self.prev_matrix_world[:, :3, 3]
+        diff_sq = np.einsum('ri,ri->r', diff, diff)
+        n = self.num_particles
+        particle_rig = self.tracked_rig[:n]
+
+        skip_physics = diff_sq > TELEPORT_RESET_SQ
+        if skip_physics.any():
+            reset = skip_physics[particle_rig]
+            self.pos_ms[:n][reset] = self.cur_bone_ms[:n][reset]
+            self.vel_ms[skip_physics[self.tracked_rig]] = 0.0
+
+        keep = ~skip_physics & (diff_sq > TELEPORT_KEEP_SQ)
+        if keep.any():
+            diff_transform = np.linalg.inv(self.prev_matrix_world[keep]) @ cur_mw[keep]
+            diff_rot_mat = quat_to_matrix(quat_from_matrix(diff_transform)).astype(np.float32)
+            diff_trans = diff_transform[:, :3, 3].astype(np.float32)
+            moved = keep[particle_rig]
+            # row of each moved particle's rig in the keep-only arrays
+            rows = (np.cumsum(keep) - 1)[particle_rig[moved]]
+            self.pos_ms[:n][moved] = (
+                np.einsum('nij,nj->ni', diff_rot_mat[rows], self.pos_ms[:n][moved])
+                + diff_trans[rows]
+            )
+            self.vel_ms[:n][moved] = np.einsum(
+                'nij,nj->ni', diff_rot_mat[rows], self.vel_ms[:n][moved]
+            )
+
+        self.prev_matrix_world = cur_mw.copy()
+        return skip_physics
+
+    def _compute_accelerations(self, grav_ms, ext_ms):
+        """grav_ms and ext_ms are per-rig model-space accelerations / forces, (num_rigs, 3)."""
+        n = self.num_particles
+        particle_rig = self.tracked_rig[:n]
+        ext_accel = ext_ms[particle_rig] * self.inv_mass[:n, np.newaxis]
+        damp_accel = (
+            self.vel_ms[:n]
+            * (-self.damping[:n, np.newaxis] * self.inv_mass[:n, np.newaxis])
+        )
+        damp_norm = np.linalg.norm(damp_accel, axis=1, keepdims=True)
+        safe_norm = np.where(damp_norm < 1e-6, 1.0, damp_norm)
+        exceeds = damp_norm > DAMPING_ACCEL_LIMIT
+        damp_accel = np.where(
+            exceeds, (damp_accel / safe_norm) * DAMPING_ACCEL_LIMIT, damp_accel
+        )
+        pull_accel = (
+            (self.interp_bone_ms[:n] - self.pos_ms[:n])
+            * (self.pull_force[:n, np.newaxis] * self.inv_mass[:n, np.newaxis])
+        )
+        accel = grav_ms[particle_rig] + damp_accel + ext_accel + pull_accel
+        valid_mask = self.is_free[:n] & self.active_mask[:n]
+        return np.where(valid_mask[:, np.newaxis], accel, 0.0)
+
+    def step(self, raw_dt, substep_time, bone_mats, active, present=None, matrix_world=None,
+             gravity_ws=(0.0, 0.0, -9.81), external_force_ws=(0.0, 0.0, 0.0), time_dilation=1.0):
+        """
+        Advance the simulation by raw_dt seconds.
+
+        bone_mats are the tracked bones' current model-space matrices, active flags the bones that
+        exist and are visible, present the bones that exist at all (collision shapes follow hidden
+        bones too, defaults to active). matrix_world is the rig's world matrix, used for teleport
+        detection and to bring gravity and the external force into model space. matrix_world and
+        external_force_ws can also be given per rig, (num_rigs, 4, 4) and (num_rigs, 3).
+        """
+        if self.num_particles == 0:
+            return
+        if self._constraint_sets is None:
+            self._build_constraint_sets()
+
+        n = self.num_particles
+        bone_mats = np.asarray(bone_mats, dtype=np.float64)
+        self.active_mask[:] = active
+        if present is None:
+            present = self.active_mask
+        cur_mw = np.eye(4) if matrix_world is None else np.asarray(matrix_world, dtype=np.float64)
+        cur_mw = np.broadcast_to(cur_mw, (self.num_rigs, 4, 4))
+        skip_physics = self._resolve_teleportation(cur_mw)
+
+        substep_time = max(0.001, substep_time)
+
+        self.time_remainder += raw_dt
+        raw_physics_steps = int(self.time_remainder / substep_time)
+        self.time_remainder -= raw_physics_steps * substep_time
+
+        lp_alpha = raw_dt / (LP_FILTER_RC + raw_dt)
+        self.damped_physics_steps += lp_alpha * (
+            raw_physics_steps - self.damped_physics_steps
+        )
+        physics_steps = int(round(self.damped_physics_steps))
+        physics_steps = max(1, min(physics_steps, int(MAX_PHYSICS_STEPS)))
+
+        if time_dilation < MIN_TIME_DILATION:
+            return
+
+        substep_time_dilated = (
+            min(MAX_TIME_DILATION, time_dilation) * substep_time
+        )
+
+        mw_inv_rot = quat_conjugate(quat_from_matrix(cur_mw))
+        self.prev_ext_force_ms[:] = self.cur_ext_force_ms
+        self.cur_ext_force_ms[:] = quat_rotate(mw_inv_rot, np.asarray(external_force_ws, dtype=np.float64))
+        self.prev_grav_ms[:] = self.cur_grav_ms
+        self.cur_grav_ms[:] = quat_rotate(mw_inv_rot, np.asarray(gravity_ws, dtype=np.float64))
+
+        act = self.active_mask
+        self.prev_bone_ms[act] = self.cur_bone_ms[act]
+        self.cur_bone_ms[act] = bone_mats[act, :3, 3]
+
+        valid_mask = self.is_free[:n] & self.active_mask[:n]
+        particle_skip = skip_physics[self.tracked_rig[:n]]
+        integrate_mask = valid_mask & ~particle_skip
+
+        # a rig whose nodes all run 0 iterations still gets one collision pass when it teleported
+        rig_iters = np.where(self.rig_iters > 0, self.rig_iters, skip_physics.astype(np.int32))
+        num_iterations = int(rig_iters.max())
+
+        collision.update_collision_transforms_begin(self, bone_mats, present)
+        self._interp_bone_xform[act] = bone_mats[act]
+        constraints.update_constraint_frames(self)
+        collision.update_directed_axes(self)
+
+        for step in range(physics_steps):
+            frame_progress = (step + 1.0) / physics_steps
+
+            interp_ext = (
+                self.prev_ext_force_ms
+                + (self.cur_ext_force_ms - self.prev_ext_force_ms)
+                * frame_progress
+            )
+            interp_grav = (
+                self.prev_grav_ms
+                + (self.cur_grav_ms - self.prev_grav_ms) * frame_progress
+            )
+            self.interp_bone_ms = (
+                self.prev_bone_ms
+                + (self.cur_bone_ms - self.prev_bone_ms) * frame_progress
+            )
+            self.prev_pos_ms[:n] = self.pos_ms[:n]
+            collision.update_collision_transforms(self, frame_progress)
+
+            held_pos = np.where(
+                valid_mask[:, np.newaxis],
+                self.pos_ms[:n],
+                self.interp_bone_ms[:n],
+            )
+            if not skip_physics.all():
+                accel = self._compute_accelerations(interp_grav, interp_ext)
+                vel_half = (
+                    self.vel_ms[:n] + accel * (substep_time_dilated * 0.5)
+                )
+                pred_pos = self.pos_ms[:n] + vel_half * substep_time_dilated
+                held_pos = np.where(integrate_mask[:, np.newaxis], pred_pos, held_pos)
+            self.pos_ms[:n] = held_pos
+
+            for iteration in range(num_iterations):
+                if iteration < len(self._iteration_sets):
+                    for cs in self._iteration_sets[iteration]:
+                        constraints.satisfy_dyng_links_vectorized(self, cs)
+                        constraints.satisfy_dyng_ellipsoids_vectorized(self, cs)
+                        constraints.satisfy_pendulums_vectorized(self, cs)
+
+                # rigs that ran out of iterations are not collided again
+                colliding = rig_iters > iteration
+                rig_mask = None if colliding.all() else colliding
+                collision.respond_to_collisions_vectorized(self, frame_progress, rig_mask)
+                collision.respond_to_cone_collisions(self, frame_progress, self._all_set, rig_mask)
+
+            if not skip_physics.all() and substep_time_dilated > 0.0:
+                accel = self._compute_accelerations(interp_grav, interp_ext)
+                derived_vel = (
+                    (self.pos_ms[:n] - self.prev_pos_ms[:n])
+                    / substep_time_dilated
+                    + accel * (0.5 * substep_time_dilated)
+                )
+                self.vel_ms[:n] = np.where(
+                    integrate_mask[:, np.newaxis], derived_vel, 0.0
+                )
+
+        if skip_physics.any():
+            self.vel_ms[skip_physics[self.tracked_rig]] = 0.0
+
+        if self.drag_post is not None and self.drag_post.num_drags > 0:
+            self.drag_post.step(raw_dt)
@@ -10,6 +10,13 @@ def update_simulation(sim, raw_dt, time_dilation=1.0):
     _apply_transforms_to_armature(sim)
 
 
+def update_batch(batch, raw_dt, time_dilation=1.0):
+    """Step a DyngBatch once and pose every member rig."""
+    batch.step_simulation(raw_dt, time_dilation)
+    for sim in batch.sims:
+        _apply_transforms_to_armature(sim)
+
+
 def _build_lookat_map(sim):
     """Build a map of which bone should look at each particle, and with what axis."""
     lookat_map = {}
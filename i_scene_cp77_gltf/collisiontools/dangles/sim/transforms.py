@@ -0,0 +1,121 @@
+"""
+Batched NumPy stand-ins for the mathutils operations the dangle solver uses.
+
+Matrices are (..., 4, 4) in the same row/column layout as mathutils (translation in the last column),
+quaternions are (..., 4) in w, x, y, z order.
+"""
+
+import math
+import numpy as np
+
+X_AXIS = np.array([1.0, 0.0, 0.0])
+Y_AXIS = np.array([0.0, 1.0, 0.0])
+Z_AXIS = np.array([0.0, 0.0, 1.0])
+
+
+def dot(a, b):
+    """Dot product over the last axis, broadcast."""
+    return np.einsum('...i,...i->...', a, b)
+
+
+def norm(v):
+    return np.sqrt(dot(v, v))
+
+
+def cross(a, b):
+    """np.cross for 3-vectors without its axis bookkeeping, which dominates on small batches."""
+    a0, a1, a2 = a[..., 0], a[..., 1], a[..., 2]
+    b0, b1, b2 = b[..., 0], b[..., 1], b[..., 2]
+    return np.stack((a1 * b2 - a2 * b1, a2 * b0 - a0 * b2, a0 * b1 - a1 * b0), axis=-1)
+
+
+def quat_from_matrix(m):
+    """Like Matrix.to_quaternion(): columns of the 3x3 part are normalized before conversion."""
+    r = np.asarray(m, dtype=np.float64)[..., :3, :3]
+    r = r / np.maximum(np.linalg.norm(r, axis=-2, keepdims=True), 1e-12)
+    m00, m01, m02 = r[..., 0, 0], r[..., 0, 1], r[..., 0, 2]
+    m10, m11, m12 = r[..., 1, 0], r[..., 1, 1], r[..., 1, 2]
+    m20, m21, m22 = r[..., 2, 0], r[..., 2, 1], r[..., 2, 2]
+    trace = m00 + m11 + m22
+
+    # Shepperd's method, every branch is evaluated and the stable one picked per matrix
+    s0 = np.sqrt(np.maximum(1.0 + trace, 1e-12)) * 2.0
+    s1 = np.sqrt(np.maximum(1.0 + m00 - m11 - m22, 1e-12)) * 2.0
+    s2 = np.sqrt(np.maximum(1.0 + m11 - m00 - m22, 1e-12)) * 2.0
+    s3 = np.sqrt(np.maximum(1.0 + m22 - m00 - m11, 1e-12)) * 2.0
+    cands = np.stack([
+        np.stack([0.25 * s0, (m21 - m12) / s0, (m02 - m20) / s0, (m10 - m01) / s0], axis=-1),
+        np.stack([(m21 - m12) / s1, 0.25 * s1, (m01 + m10) / s1, (m02 + m20) / s1], axis=-1),
+        np.stack([(m02 - m20) / s2, (m01 + m10) / s2, 0.25 * s2, (m12 + m21) / s2], axis=-1),
+        np.stack([(m10 - m01) / s3, (m02 + m20) / s3, (m12 + m21) / s3, 0.25 * s3], axis=-1),
+    ], axis=-2)
+    branch = np.argmax(np.stack([trace, m00, m11, m22], axis=-1), axis=-1)
+    q = np.take_along_axis(cands, branch[..., None, None], axis=-2)[..., 0, :]
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def quat_to_matrix(q):
+    """3x3 rotation matrices of unit quaternions q."""
+    q = np.asarray(q, dtype=np.float64)
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)], axis=-1),
+        np.stack([2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)], axis=-1),
+        np.stack([2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)], axis=-1),
+    ], axis=-2)
+
+
+def matrix_from_wxyz(wxyz, offset=(0.0, 0.0, 0.0)):
+    """4x4 matrix from an authored (w, x, y, z) rotation and a translation, as the property groups store them."""
+    m = np.eye(4)
+    q = np.asarray(wxyz, dtype=np.float64)
+    m[:3, :3] = quat_to_matrix(q / max(np.linalg.norm(q), 1e-12))
+    m[:3, 3] = offset
+    return m
+
+
+def quat_rotate(q, v):
+    """Rotate vectors v by quaternions q (Quaternion @ Vector), both broadcast."""
+    q = np.asarray(q, dtype=np.float64)
+    v = np.asarray(v)
+    w = q[..., :1]
+    u = q[..., 1:]
+    t = 2.0 * cross(u, v)
+    return v + w * t + cross(u, t)
+
+
+def quat_conjugate(q):
+    return np.asarray(q) * np.array([1.0, -1.0, -1.0, -1.0])
+
+
+def quat_slerp(q0, q1, t):
+    """Quaternion.slerp: shortest path, linear blend when the rotations are nearly equal."""
+    q0 = np.asarray(q0, dtype=np.float64)
+    q1 = np.asarray(q1, dtype=np.float64)
+    cosom = np.sum(q0 * q1, axis=-1, keepdims=True)
+    q0 = np.where(cosom < 0.0, -q0, q0)
+    cosom = np.abs(cosom)
+    near = (1.0 - cosom) <= 0.0001
+    omega = np.arccos(np.minimum(cosom, 1.0))
+    sinom = np.where(near, 1.0, np.sin(omega))
+    sc1 = np.where(near, 1.0 - t, np.sin((1.0 - t) * omega) / sinom)
+    sc2 = np.where(near, t, np.sin(t * omega) / sinom)
+    return sc1 * q0 + sc2 * q1
+
+
+def rotation_z(angle):
+    """4x4 rotation about Z, Quaternion((0, 0, 1), angle).to_matrix().to_4x4()."""
+    m = np.eye(4)
+    c, s = math.cos(angle), math.sin(angle)
+    m[0, 0], m[0, 1], m[1, 0], m[1, 1] = c, -s, s, c
+    return m
+
+
+def normalized(v, fallback=None):
+    """Normalize the last axis, rows shorter than 1e-8 get fallback (or stay as they are)."""
+    v = np.asarray(v, dtype=np.float64)
+    n = norm(v)[..., np.newaxis]
+    out = v / np.where(n > 1e-8, n, 1.0)
+    if fallback is not None:
+        out = np.where(n > 1e-8, out, fallback)
+    return out
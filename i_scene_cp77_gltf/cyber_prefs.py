@@ -1,6 +1,6 @@
 import bpy
 from bpy.types import AddonPreferences
-from bpy.props import (StringProperty, EnumProperty, BoolProperty, CollectionProperty)
+from bpy.props import (StringProperty, EnumProperty, BoolProperty, CollectionProperty, IntProperty)
 
 
 class CP77IOSuitePreferences(AddonPreferences):
@@ -73,6 +73,33 @@ class CP77IOSuitePreferences(AddonPreferences):
         description="Turns off useful print statements to avoid clutter in the console",
         default=False,
     )
+    json_cache_size: IntProperty(
+        name= "JSON Cache Size (MB)",
+        description="Estimated memory for parsed WolvenKit json files kept during an import, and between imports if enabled. Least recently used files are dropped first",
+        default=256,
+        min=0,
+    )
+    json_cache_keep: BoolProperty(
+        name= "Keep Parsed JSON Between Imports",
+        description="Keep a copy of the parsed json files after an import so the next import of the same files skips parsing. Each import gets its own copy. Entries are refreshed when a file is re-exported",
+        default=False,
+    )
+    node_group_library: BoolProperty(
+        name= "Node Group Library",
+        description="Save the shader node groups the addon builds to a library blend and append them from it in later sessions instead of rebuilding them",
+        default=True,
+    )
+    json_disk_cache: BoolProperty(
+        name= "Cache Parsed JSON on Disk",
+        description="Store parsed WolvenKit json files on disk so re-importing the same files skips parsing. Entries are refreshed when a file is re-exported",
+        default=False,
+    )
+    json_disk_cache_dir: StringProperty(
+        name="JSON Cache Folder",
+        description="Folder for the on-disk json cache. Leave empty to use the Blender user datafiles folder",
+        subtype='DIR_PATH',
+        default=""
+    )
 
     def draw(self, context):           
         layout = self.layout
@@ -88,6 +115,18 @@ class CP77IOSuitePreferences(AddonPreferences):
         row.prop(self, "show_modtools",toggle=1) 
         row.prop(self, "experimental_features",toggle=1)
         row.prop(self, "non_verbose",toggle=1)
+        row = box.row()
+        row.prop(self, "json_cache_size")
+        row.prop(self, "json_cache_keep",toggle=1)
+        row = box.row()
+        row.prop(self, "json_disk_cache",toggle=1)
+        row.operator("cp77.purge_json_cache")
+        if self.json_disk_cache:
+            row = box.row()
+            row.prop(self, "json_disk_cache_dir")
+        row = box.row()
+        row.prop(self, "node_group_library",toggle=1)
+        row.operator("cp77.clear_node_group_library")
         if self.experimental_features:
             # Toggle for temperance bone heuristic
             box = layout.box()
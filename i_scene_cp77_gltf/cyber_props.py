@@ -486,6 +486,12 @@ class CP77_FacialProps(PropertyGroup):
             default=False,
             )
 
+    partial_solve: BoolProperty(
+            name="Partial Solve",
+            description="Re-solve only the facial parts (tongue, eyes, face) whose tracks changed since the last frame",
+            default=True,
+            )
+
 
 class RootMotionData(PropertyGroup):
     """Maintains property state bindings for transferring transform configurations to root motion tracks."""
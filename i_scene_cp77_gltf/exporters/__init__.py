@@ -84,6 +84,12 @@ class CP77CollectionExport(Operator, ExportHelper):
         description="Check this to export only collections that are currently visible in view port"
     )
 
+    force_export: BoolProperty(  # pyright: ignore[reportInvalidTypeForm]
+        name="Force Export",
+        default=False,
+        description="Export every collection, even ones unchanged since their last export to this folder"
+    )
+
     is_skinned: BoolProperty( # pyright: ignore[reportInvalidTypeForm]
         name="Skinned Mesh",
         default=True,
@@ -124,6 +130,7 @@ class CP77CollectionExport(Operator, ExportHelper):
         box.label(text='Export Options')
         row = box.row(align=True)
         row.prop(self, "only_visible")
+        row.prop(self, "force_export")
         row = box.row(align=True)
         row.prop(self, "export_poses")
         if  self.export_poses:
@@ -140,10 +147,13 @@ class CP77CollectionExport(Operator, ExportHelper):
 
     def format_export_results_detailed(self, export_status, directory):
         exported = []
+        unchanged = []
         export_skipped = []
 
         for name, error in export_status:
-            if error:
+            if error == EXPORT_UNCHANGED:
+                unchanged.append(name)
+            elif error:
                 export_skipped.append((name, error))
             else:
                 exported.append(name)
@@ -158,6 +168,11 @@ class CP77CollectionExport(Operator, ExportHelper):
         else:
             parts.append("  (no successful exports)")
 
+        # Unchanged section (only if needed)
+        if unchanged:
+            parts.append(f"{EXPORT_UNCHANGED}, not exported again (use Force Export to override):")
+            parts.append("  " + "\n  ".join([f"= {name}" for name in unchanged]))
+
         # Failed/skipped section (only if needed)
         if export_skipped:
             parts.append("export skipped or failed:")
@@ -177,6 +192,7 @@ class CP77CollectionExport(Operator, ExportHelper):
             apply_modifiers=self.apply_transform,
             export_tracks=self.export_tracks,
             only_visible=self.only_visible,
+            force=self.force_export,
         )
 
         self.report({'INFO'}, self.format_export_results_detailed(export_status, self.filepath))
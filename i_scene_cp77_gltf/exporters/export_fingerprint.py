@@ -0,0 +1,204 @@
+import bpy
+import os
+import json
+import hashlib
+import numpy as np
+
+# bump when what goes into a fingerprint changes so every target is exported again once
+FINGERPRINT_VERSION = 1
+
+# attribute data_type -> (foreach property, components, dtype)
+_ATTRIBUTE_LAYOUT = {
+    'FLOAT': ('value', 1, np.float32),
+    'INT': ('value', 1, np.int32),
+    'INT8': ('value', 1, np.int32),
+    'BOOLEAN': ('value', 1, bool),
+    'INT32_2D': ('value', 2, np.int32),
+    'FLOAT2': ('vector', 2, np.float32),
+    'FLOAT_VECTOR': ('vector', 3, np.float32),
+    'QUATERNION': ('value', 4, np.float32),
+    'FLOAT_COLOR': ('color', 4, np.float32),
+    'BYTE_COLOR': ('color', 4, np.float32),
+}
+
+
+def _hash_array(h, collection, prop, components, dtype):
+    buf = np.empty(len(collection) * components, dtype=dtype)
+    collection.foreach_get(prop, buf)
+    h.update(buf.tobytes())
+
+
+def _hash_value(h, value):
+    # ID properties and RNA arrays repr to addresses, flatten them first
+    if hasattr(value, 'to_dict'):
+        value = value.to_dict()
+    elif hasattr(value, 'to_list'):
+        value = value.to_list()
+    elif isinstance(value, bpy.types.ID):
+        value = value.name
+    elif not isinstance(value, (str, int, float, bool, type(None))):
+        try:
+            value = tuple(value)
+        except TypeError:
+            value = str(type(value))
+    h.update(repr(value).encode('utf-8'))
+
+
+def _hash_custom_props(h, id_data):
+    # custom properties go out as glTF extras
+    for key in sorted(id_data.keys()):
+        h.update(key.encode('utf-8'))
+        _hash_value(h, id_data[key])
+
+
+def _hash_mesh(h, me):
+    _hash_array(h, me.vertices, 'co', 3, np.float32)
+    _hash_array(h, me.edges, 'vertices', 2, np.int32)
+    _hash_array(h, me.loops, 'vertex_index', 1, np.int32)
+    _hash_array(h, me.loops, 'normal', 3, np.float32)
+    _hash_array(h, me.polygons, 'loop_start', 1, np.int32)
+    _hash_array(h, me.polygons, 'loop_total', 1, np.int32)
+    _hash_array(h, me.polygons, 'material_index', 1, np.int32)
+
+    for uvl in me.uv_layers:
+        h.update(uvl.name.encode('utf-8'))
+        _hash_array(h, uvl.data, 'uv', 2, np.float32)
+
+    # colours, custom attributes and whatever else the exporter writes as attributes, but not selection or hide state
+    for attr in me.attributes:
+        if attr.name.startswith('.'):
+            continue
+        h.update(f"{attr.name}:{attr.domain}:{attr.data_type}".encode('utf-8'))
+        layout = _ATTRIBUTE_LAYOUT.get(attr.data_type)
+        if layout:
+            _hash_array(h, attr.data, *layout)
+
+    if me.shape_keys:
+        for key in me.shape_keys.key_blocks:
+            h.update(f"{key.name}:{key.relative_key.name}:{key.value}:{key.mute}".encode('utf-8'))
+            _hash_array(h, key.data, 'co', 3, np.float32)
+
+    h.update(repr([ma.name if ma else None for ma in me.materials]).encode('utf-8'))
+    _hash_custom_props(h, me)
+
+
+def _hash_weights(h, ob):
+    h.update(repr([vg.name for vg in ob.vertex_groups]).encode('utf-8'))
+    if not ob.vertex_groups:
+        return
+    vert_groups = [v.groups for v in ob.data.vertices]
+    counts = np.fromiter(map(len, vert_groups), dtype=np.int32, count=len(vert_groups))
+    elems = [ge for groups in vert_groups for ge in groups]
+    h.update(counts.tobytes())
+    h.update(np.fromiter((ge.group for ge in elems), dtype=np.int32, count=len(elems)).tobytes())
+    h.update(np.fromiter((ge.weight for ge in elems), dtype=np.float32, count=len(elems)).tobytes())
+
+
+def _hash_modifier(h, mod):
+    for prop in mod.bl_rna.properties:
+        if prop.identifier == 'rna_type' or prop.type == 'COLLECTION':
+            continue
+        h.update(prop.identifier.encode('utf-8'))
+        _hash_value(h, getattr(mod, prop.identifier, None))
+    # geometry nodes inputs live in the modifier's ID properties
+    try:
+        _hash_custom_props(h, mod)
+    except TypeError:
+        pass
+
+
+def _hash_armature(h, arm):
+    bones = arm.data.bones
+    h.update(repr([(b.name, b.parent.name if b.parent else None) for b in bones]).encode('utf-8'))
+    _hash_array(h, bones, 'matrix_local', 16, np.float32)
+    _hash_custom_props(h, arm.data)
+
+
+def object_fingerprint(ob):
+    """Digest of everything about ob that ends up in an exported glb."""
+    h = hashlib.sha1()
+    h.update(f"{ob.name}:{ob.type}:{ob.parent.name if ob.parent else None}".encode('utf-8'))
+    h.update(np.array(ob.matrix_world, dtype=np.float32).tobytes())
+    h.update(repr([slot.material.name if slot.material else None for slot in ob.material_slots]).encode('utf-8'))
+    _hash_custom_props(h, ob)
+
+    for mod in ob.modifiers:
+        _hash_modifier(h, mod)
+
+    if ob.type == 'MESH':
+        _hash_mesh(h, ob.data)
+        _hash_weights(h, ob)
+    elif ob.type == 'ARMATURE':
+        _hash_armature(h, ob)
+    return h.hexdigest()
+
+
+def export_fingerprint(objects, options=None):
+    """
+    Digest of one export target: its objects, the armatures their modifiers deform them with, and the export options.
+    """
+    targets = {ob.name: ob for ob in objects}
+    for ob in objects:
+        for mod in getattr(ob, 'modifiers', ()):
+            if mod.type == 'ARMATURE' and getattr(mod, 'object', None):
+                targets.setdefault(mod.object.name, mod.object)
+
+    h = hashlib.sha1(f"{FINGERPRINT_VERSION}:{sorted((options or {}).items())!r}".encode('utf-8'))
+    for name in sorted(targets):
+        h.update(object_fingerprint(targets[name]).encode('ascii'))
+    return h.hexdigest()
+
+
+class ExportRecords:
+    """
+    Fingerprint of the last successful export to each glb path, kept in the user datafiles folder.
+
+    The glb's (mtime, size) is stored with it, so a file exported from another .blend, or changed
+    on disk, no longer counts as up to date.
+    """
+    FILENAME = 'glb_exports.json'
+
+    def __init__(self):
+        self.path = os.path.join(bpy.utils.user_resource('DATAFILES', path='cp77_export_cache'), self.FILENAME)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            self._records = data['exports'] if data.get('version') == FINGERPRINT_VERSION else {}
+        except (OSError, ValueError, KeyError, AttributeError):
+            self._records = {}
+
+    @staticmethod
+    def _key(filepath):
+        return os.path.normcase(os.path.abspath(bpy.path.abspath(filepath)))
+
+    @staticmethod
+    def _stamp(filepath):
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_size]
+
+    def unchanged(self, filepath, fingerprint):
+        """True if filepath was last exported from content with this fingerprint and hasn't changed since."""
+        record = self._records.get(self._key(filepath))
+        if not record or record['fingerprint'] != fingerprint:
+            return False
+        return record['stamp'] == self._stamp(bpy.path.abspath(filepath))
+
+    def record(self, filepath, fingerprint):
+        stamp = self._stamp(bpy.path.abspath(filepath))
+        if stamp is None:
+            return
+        self._records[self._key(filepath)] = {'fingerprint': fingerprint, 'stamp': stamp}
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as file:
+                json.dump({'version': FINGERPRINT_VERSION, 'exports': self._records}, file)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Could not save export records: {e}")
@@ -1,11 +1,14 @@
 import os
+import time
 import bpy
 import bmesh
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from ..animtools.animtools import reset_armature
 from ..main.common import show_message, exclusion_cache
 from ..animtools.tracks import export_anim_tracks
 from ..animtools.compat import get_action_fcurves
+from .export_fingerprint import export_fingerprint, ExportRecords
 from ..main.bartmoss_functions import (
     store_current_context, restore_previous_context,
     get_safe_mode, safe_mode_switch, select_objects,
@@ -34,6 +37,9 @@ EXPORT_DEFAULTS = {
     'use_separate': False,
     }
 
+# Export status of a target whose fingerprint matches its last successful export
+EXPORT_UNCHANGED = "unchanged since last export"
+
 # Vertex count limit
 VERT_LIMIT = 65535
 
@@ -170,6 +176,71 @@ def _loop_verts(tempshit):
 def _quantize(arr_f32, scale=_Q):
     return np.round(arr_f32 * scale).astype(np.int64, copy=False)
 
+class MeshArrays:
+    """
+    Flat copies of everything export validation reads from a mesh.
+
+    Read with foreach_get from the object-mode mesh, so validation needs neither edit mode nor a bmesh.
+    Vertex weights have no bulk accessor, they're flattened in a single pass and only when asked for.
+    """
+
+    def __init__(self, me, weights=False):
+        me.calc_loop_triangles()
+        self.n_verts = len(me.vertices)
+        self.n_loops = len(me.loops)
+        self.n_polys = len(me.polygons)
+        self.n_tris = len(me.loop_triangles)
+
+        co = np.empty(self.n_verts * 3, dtype=np.float64)
+        me.vertices.foreach_get("co", co)
+        self.co = co.reshape(-1, 3)
+
+        self.loop_verts = _loop_verts(me)
+
+        tri_verts = np.empty(self.n_tris * 3, dtype=np.int32)
+        me.loop_triangles.foreach_get("vertices", tri_verts)
+        self.tri_verts = tri_verts.reshape(-1, 3)
+        tri_loops = np.empty(self.n_tris * 3, dtype=np.int32)
+        me.loop_triangles.foreach_get("loops", tri_loops)
+        self.tri_loops = tri_loops.reshape(-1, 3)
+        self.tri_poly = np.empty(self.n_tris, dtype=np.int32)
+        me.loop_triangles.foreach_get("polygon_index", self.tri_poly)
+
+        # All UV layers, not just active
+        self.uvs = []
+        for uvl in me.uv_layers:
+            uv = np.empty(self.n_loops * 2, dtype=np.float32)
+            uvl.data.foreach_get("uv", uv)
+            self.uvs.append(uv.reshape(-1, 2))
+        self.active_uv = me.uv_layers.active_index if me.uv_layers.active is not None else -1
+
+        # Loop normals only split verts with custom normals or flat faces
+        smooth = np.empty(self.n_polys, dtype=bool)
+        me.polygons.foreach_get("use_smooth", smooth)
+        self.loop_normals = None
+        if getattr(me, "has_custom_normals", False) or not smooth.all():
+            ln = np.empty(self.n_loops * 3, dtype=np.float32)
+            me.loops.foreach_get("normal", ln)
+            self.loop_normals = ln.reshape(-1, 3)
+
+        self.colors = []
+        for ca in getattr(me, "color_attributes", []):
+            if ca.domain == 'CORNER':
+                c = np.empty(self.n_loops * 4, dtype=np.float32)
+                ca.data.foreach_get("color", c)
+                self.colors.append(c.reshape(-1, 4)[:, :3])
+
+        # Vertex group elements of every vertex, back to back
+        self.weight_counts = None
+        self.weight_groups = None
+        self.weight_values = None
+        if weights:
+            vert_groups = [v.groups for v in me.vertices]
+            self.weight_counts = np.fromiter(map(len, vert_groups), dtype=np.int32, count=self.n_verts)
+            elems = [ge for groups in vert_groups for ge in groups]
+            self.weight_groups = np.fromiter((ge.group for ge in elems), dtype=np.int32, count=len(elems))
+            self.weight_values = np.fromiter((ge.weight for ge in elems), dtype=np.float32, count=len(elems))
+
 def count_per_vertex(vertex_col, attr_cols, n_verts):
     """
     Count how many unique attr tuples each vertex has across its loops.
@@ -184,70 +255,74 @@ def count_per_vertex(vertex_col, attr_cols, n_verts):
     counts = np.bincount(U[:, 0].astype(np.int32, copy=False), minlength=n_verts)
     return counts
 
-def calc_vert_splits(tempshit):
+def _mix64(h):
+    """splitmix64 finaliser, in place on a uint64 array."""
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(27)
+    h *= np.uint64(0x94D049BB133111EB)
+    h ^= h >> np.uint64(31)
+    return h
+
+def count_per_vertex_hashed(vertex_col, attr_cols, n_verts):
+    """
+    Same counts as count_per_vertex without stacking the (n_loops, k) matrix.
+    Each loop's (vertex, attrs...) tuple is folded into one uint64 key and distinct keys are found with a
+    single argsort. attr_cols can be a generator, so callers only hold one column at a time.
+    Two different tuples sharing a key would undercount a vertex by one; for 1M loops the odds are ~1e-8.
+    vertex_col: (n_loops,) int64/int32 with vertex indices
+    attr_cols: iterable of 1D int64 arrays (same length as vertex_col)
+    returns: (n_verts,) int counts
+    """
+    vertex_col = np.asarray(vertex_col)
+    keys = _mix64(vertex_col.astype(np.uint64))
+    n_cols = 0
+    for col in attr_cols:
+        keys ^= col.view(np.uint64)
+        _mix64(keys)
+        n_cols += 1
+    if not n_cols or not len(keys):
+        return np.zeros(n_verts, dtype=np.int32)
+
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    first = np.empty(len(keys), dtype=bool)
+    first[0] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=first[1:])
+    return np.bincount(vertex_col[order[first]], minlength=n_verts)
+
+def calc_vert_splits(arrays):
     """
     glTF splits per-corner attribute: UVs, loop normals, and corner colours
     We can measure and predict these splits efficiently and accurately and save confusing problems
 
     Returns:
-      stats: dict of used/export/split/new vert counts
-      reasons: dict mapping reason name -> bool array (per vertex) where True means it causes a split
-      split_count: np.ndarray (n_verts,) total splits per vertex (how many verts it will become on export)
+      (used, export, split, new) vert counts: verts used by faces, verts after export,
+      verts that get split and verts the splits add
     """
-
-    n_loops = len(tempshit.loops)
-    n_verts = len(tempshit.vertices)
-
+    n_verts = arrays.n_verts
 
     # Stop Early if not needed
-    if not tempshit.loop_triangles:
-
+    if not arrays.n_tris:
         return n_verts, n_verts, 0, 0
-    # Column 0: loop -> vertex indices
-    loop_verts = _loop_verts(tempshit).astype(np.int64, copy=False)
-
-    # UV sets (all layers, not just active)
-    uv_layers = list(getattr(tempshit, "uv_layers", []))
-    uv_cols = []          # combined per-vertex signature including all uvs
-    uv_reason_cols = {}   # per-layer columns for reason isolation - not used currently
-
-    for i, uvl in enumerate(uv_layers):
-        uv = np.empty(n_loops * 2, dtype=np.float32)
-        uvl.data.foreach_get("uv", uv)
-        uv = uv.reshape(-1, 2)
-        uv_q = _quantize(uv)  # (n_loops, 2)
-        # store separately for reason breakdown if we want it later
-        uv_reason_cols[f"uv{i}"] = [uv_q[:, 0], uv_q[:, 1]]
-        uv_cols.extend([uv_q[:, 0], uv_q[:, 1]])
-
-    # Loop normals if needed
-    normals_cols = []
-    has_custom_normals = getattr(tempshit, "has_custom_normals", False) or any(not p.use_smooth for p in tempshit.polygons)
-    if has_custom_normals:
-        ln = np.empty(n_loops * 3, dtype=np.float32)
-        tempshit.loops.foreach_get("normal", ln)
-        ln = ln.reshape(-1, 3)
-        ln_q = _quantize(ln)
-        normals_cols = [ln_q[:, 0], ln_q[:, 1], ln_q[:, 2]]
-
-    color_layers = [ca for ca in getattr(tempshit, "color_attributes", []) if ca.domain == 'CORNER']
-    color_reason_cols = {}
-    color_cols = []
-    for i, ca in enumerate(color_layers):
-        c = np.empty(n_loops * 4, dtype=np.float32)
-        ca.data.foreach_get("color", c)
-        c = c.reshape(-1, 4)[:, :3]
-        c_q = _quantize(c)
-        color_reason_cols[f"color{i}"] = [c_q[:, 0], c_q[:, 1], c_q[:, 2]]
-        color_cols.extend([c_q[:, 0], c_q[:, 1], c_q[:, 2]])
-
-
-    all_cols = []
-    all_cols.extend(uv_cols)
-    all_cols.extend(normals_cols)
-    all_cols.extend(color_cols)
-
-    total_counts = count_per_vertex(loop_verts, all_cols, n_verts)  # per-vertex split count
+    # Quantized per-corner columns, one layer at a time
+    def attr_cols():
+        for uv in arrays.uvs:
+            uv_q = _quantize(uv)  # (n_loops, 2)
+            yield uv_q[:, 0]
+            yield uv_q[:, 1]
+        if arrays.loop_normals is not None:
+            ln_q = _quantize(arrays.loop_normals)
+            yield ln_q[:, 0]
+            yield ln_q[:, 1]
+            yield ln_q[:, 2]
+        for c in arrays.colors:
+            c_q = _quantize(c)
+            yield c_q[:, 0]
+            yield c_q[:, 1]
+            yield c_q[:, 2]
+
+    total_counts = count_per_vertex_hashed(arrays.loop_verts, attr_cols(), n_verts)  # per-vertex split count
     used = int((total_counts > 0).sum())
     export = int(total_counts.sum())
     split = int((total_counts > 1).sum())
@@ -255,32 +330,18 @@ def calc_vert_splits(tempshit):
 
     return used, export, split, new
 
-def find_3d_degenerates(tempshit, eps=1e-10):
+def find_3d_degenerates(arrays, eps=1e-10):
     """
     Check for degenerates (area = 1e-10 or less)
 
     Returns:
         np.array: Indices of polygons with degenerate triangles
     """
-    if not tempshit.loop_triangles:
+    if not arrays.n_tris:
         return np.array([], dtype=np.int32)
 
-    n_verts = len(tempshit.vertices)
-    n_tris = len(tempshit.loop_triangles)
-
-    # Get vertex coordinates
-    vco = np.empty(n_verts * 3, dtype=np.float64)
-    tempshit.vertices.foreach_get("co", vco)
-    vco = vco.reshape(-1, 3)
-
-    # Get triangle vertex indices
-    tri_idx = np.empty(n_tris * 3, dtype=np.int32)
-    tempshit.loop_triangles.foreach_get("vertices", tri_idx)
-    tri_idx = tri_idx.reshape(-1, 3)
-
-    # Get triangle polygon mapping
-    tri_poly = np.empty(n_tris, dtype=np.int32)
-    tempshit.loop_triangles.foreach_get("polygon_index", tri_poly)
+    vco = arrays.co
+    tri_idx = arrays.tri_verts
 
     # Calculate triangle areas using cross product
     a = vco[tri_idx[:, 1]] - vco[tri_idx[:, 0]]
@@ -294,16 +355,15 @@ def find_3d_degenerates(tempshit, eps=1e-10):
         return np.array([], dtype=np.int32)
 
     # Map to unique polygon indices
-    n_polys = len(tempshit.polygons)
     hits = np.bincount(
-        tri_poly,
+        arrays.tri_poly,
         weights=degenerate_mask.astype(np.int32),
-        minlength=n_polys
+        minlength=arrays.n_polys
     )
 
     return np.flatnonzero(hits > 0)
 
-def check_uv_degenerates(tempshit, uv_eps=1e-17):
+def check_uv_degenerates(arrays, uv_eps=1e-17):
     """
     Check for UV degenerate triangles using vectorized operations.
 
@@ -312,29 +372,12 @@ def check_uv_degenerates(tempshit, uv_eps=1e-17):
     """
     # Not sure if we need this one, but it's probably worthwhile
 
-    if not tempshit.uv_layers.active or not tempshit.loop_triangles:
+    if arrays.active_uv < 0 or not arrays.n_tris:
         return np.array([], dtype=np.int32)
 
-    uv_layer = tempshit.uv_layers.active
-    n_loops = len(tempshit.loops)
-    n_tris = len(tempshit.loop_triangles)
-
-    # Get all UV data
-    uv = np.empty(n_loops * 2, dtype=np.float64)
-    uv_layer.data.foreach_get("uv", uv)
-    uv = uv.reshape(-1, 2)
-
-    # Get triangle loop indices
-    tri_loops = np.empty(n_tris * 3, dtype=np.int32)
-    tempshit.loop_triangles.foreach_get("loops", tri_loops)
-    tri_loops = tri_loops.reshape(-1, 3)
-
-    # Get triangle polygon mapping
-    tri_poly = np.empty(n_tris, dtype=np.int32)
-    tempshit.loop_triangles.foreach_get("polygon_index", tri_poly)
-
     # Get triangle UVs
-    tri_uvs = uv[tri_loops]
+    uv = arrays.uvs[arrays.active_uv].astype(np.float64)
+    tri_uvs = uv[arrays.tri_loops]
 
     # Calculate UV areas
     uv_a = tri_uvs[:, 1] - tri_uvs[:, 0]
@@ -348,15 +391,26 @@ def check_uv_degenerates(tempshit, uv_eps=1e-17):
         return np.array([], dtype=np.int32)
 
     # Map to unique polygon indices
-    n_polys = len(tempshit.polygons)
     hits = np.bincount(
-        tri_poly,
+        arrays.tri_poly,
         weights=degenerate_mask.astype(np.int32),
-        minlength=n_polys
+        minlength=arrays.n_polys
     )
 
     return np.flatnonzero(hits > 0)
 
+def find_weighted_verts(arrays, eps=WEIGHT_EPSILON):
+    """
+    Check which vertices have a weight above eps in any vertex group.
+
+    Returns:
+        np.array: (n_verts,) bool mask of weighted vertices
+    """
+    owner = np.repeat(np.arange(arrays.n_verts), arrays.weight_counts)
+    weighted = np.zeros(arrays.n_verts, dtype=bool)
+    weighted[owner[arrays.weight_values > eps]] = True
+    return weighted
+
 class ValidationIssue:
     """Represents a validation issue with context and remediation."""
 
@@ -369,42 +423,79 @@ class ValidationIssue:
     def __str__(self):
         return f"[{self.severity}] {self.message}"
 
-def select_bmesh_problems(bm, me, face_indices=None, vertex_indices=None):
-    """Select problematic elements in BMesh for visual feedback."""
-    # Clear selection
-    for v in bm.verts:
-        v.select = False
-    for e in bm.edges:
-        e.select = False
-    for f in bm.faces:
-        f.select = False
-
-    # Select faces
+def select_mesh_problems(ob, face_indices=None, vertex_indices=None):
+    """Select problematic elements of an object-mode mesh for visual feedback."""
+    me = ob.data
+    n_polys = len(me.polygons)
+    n_verts = len(me.vertices)
+
+    face_sel = np.zeros(n_polys, dtype=bool)
     if face_indices is not None and len(face_indices) > 0:
-        bm.faces.ensure_lookup_table()
-        for idx in face_indices:
-            if 0 <= idx < len(bm.faces):
-                bm.faces[idx].select = True
+        idx = np.asarray(face_indices, dtype=np.int64)
+        face_sel[idx[(idx >= 0) & (idx < n_polys)]] = True
 
-    # Select vertices
+    vert_sel = np.zeros(n_verts, dtype=bool)
     if vertex_indices is not None and len(vertex_indices) > 0:
-        bm.verts.ensure_lookup_table()
-        for idx in vertex_indices:
-            if 0 <= idx < len(bm.verts):
-                bm.verts[idx].select = True
+        idx = np.asarray(vertex_indices, dtype=np.int64)
+        vert_sel[idx[(idx >= 0) & (idx < n_verts)]] = True
+
+    # Selected faces need their verts selected to show up in edit mode
+    if face_sel.any():
+        loop_start = np.empty(n_polys, dtype=np.int32)
+        loop_total = np.empty(n_polys, dtype=np.int32)
+        me.polygons.foreach_get("loop_start", loop_start)
+        me.polygons.foreach_get("loop_total", loop_total)
+        order = np.argsort(loop_start, kind='stable')
+        loop_face_sel = np.repeat(face_sel[order], loop_total[order])
+        vert_sel[_loop_verts(me)[loop_face_sel]] = True
+
+    edge_verts = np.empty(len(me.edges) * 2, dtype=np.int32)
+    me.edges.foreach_get("vertices", edge_verts)
+    edge_sel = vert_sel[edge_verts.reshape(-1, 2)].all(axis=1)
+
+    me.vertices.foreach_set("select", vert_sel)
+    me.edges.foreach_set("select", edge_sel)
+    me.polygons.foreach_set("select", face_sel)
+    me.update()
+
+def show_validation_problems(ob, general_result, skinned_result):
+    """Select the problem areas of ob and enter edit mode to show them. Only switches modes if there's something to select."""
+    bad_faces = np.union1d(
+        general_result.get('bad_3d_faces', np.array([], dtype=np.int32)),
+        general_result.get('bad_uv_faces', np.array([], dtype=np.int32)),
+    )
+    ungrouped_verts = None
+    if skinned_result:
+        ungrouped_verts = skinned_result.get('ungrouped_verts')
+
+    if not len(bad_faces) and (ungrouped_verts is None or not len(ungrouped_verts)):
+        return
 
-    # Update mesh
-    bmesh.update_edit_mesh(me, loop_triangles=False, destructive=False)
+    select_mesh_problems(ob, bad_faces, ungrouped_verts)
+    select_objects([ob], make_first_active=True)
+    safe_mode_switch('EDIT')
+    bpy.context.tool_settings.mesh_select_mode = (True, False, True)
 
-def validate_skinned_mesh(ob, me, bm):
+def skinning_info(ob):
+    """Armature and bone/vertex group names of a skinned mesh, for validate_skinned_mesh."""
+    arm_mod = next((m for m in ob.modifiers
+                    if m.type == 'ARMATURE' and getattr(m, "object", None)), None)
+    arm = arm_mod.object if arm_mod else None
+    return {
+        'armature': arm,
+        'bone_names': {b.name for b in arm.data.bones} if arm else set(),
+        'group_names': {g.name for g in ob.vertex_groups},
+    }
+
+def validate_skinned_mesh(name, skin, arrays):
     """
-    Validate skinned meshes.
+    Validate skinned meshes. Only touches the arrays and skinning_info, so it's safe off the main thread.
 
     Returns:
         dict: {
             'valid': bool,
             'issues': list[ValidationIssue],
-            'ungrouped_verts': set,
+            'ungrouped_verts': np.array,
             'unassigned_groups': set,
             'armature': Object or None
         }
@@ -412,64 +503,56 @@ def validate_skinned_mesh(ob, me, bm):
     issues = []
 
     # Check for armature modifier
-    arm_mod = next((m for m in ob.modifiers
-                    if m.type == 'ARMATURE' and getattr(m, "object", None)), None)
+    arm = skin['armature']
 
-    if not arm_mod:
+    if not arm:
         issues.append(ValidationIssue(
             'missing_armature',
-            f"Missing armature modifier on '{ob.name}'. Armatures are required for skinned meshes.",
+            f"Missing armature modifier on '{name}'. Armatures are required for skinned meshes.",
             "https://tinyurl.com/armature-missing"
         ))
         return {
             'valid': False,
             'issues': issues,
-            'ungrouped_verts': set(),
+            'ungrouped_verts': np.array([], dtype=np.int64),
             'unassigned_groups': set(),
             'armature': None
         }
 
-    arm = arm_mod.object
-
     # Check for weighted vertices
-    grouped = set()
-    for v in me.vertices:
-        if any(ge.weight > WEIGHT_EPSILON for ge in v.groups):
-            grouped.add(v.index)
+    grouped = find_weighted_verts(arrays)
 
-    if not grouped:
+    if not grouped.any():
         issues.append(ValidationIssue(
             'no_weights',
-            f"No weighted vertices in '{ob.name}'. Skinned meshes require weight painting.",
+            f"No weighted vertices in '{name}'. Skinned meshes require weight painting.",
             "https://tinyurl.com/assign-vertex-weights"
         ))
         return {
             'valid': False,
             'issues': issues,
-            'ungrouped_verts': set(range(len(me.vertices))),
+            'ungrouped_verts': np.arange(arrays.n_verts),
             'unassigned_groups': set(),
             'armature': arm
         }
 
     # Check for ungrouped vertices
-    ungrouped = set(range(len(me.vertices))) - grouped
+    ungrouped = np.flatnonzero(~grouped)
 
-    if ungrouped:
+    if len(ungrouped):
         issues.append(ValidationIssue(
             'ungrouped_vertices',
-            f"{len(ungrouped)} vertices in '{ob.name}' lack weights. All vertices must be weighted.",
+            f"{len(ungrouped)} vertices in '{name}' lack weights. All vertices must be weighted.",
             "https://tinyurl.com/ungrouped-vertices"
         ))
 
     # Check for vertex groups without bones
-    bone_names = {b.name for b in arm.data.bones}
-    group_names = {g.name for g in ob.vertex_groups}
-    missing = group_names - bone_names
+    missing = skin['group_names'] - skin['bone_names']
 
     if missing:
         issues.append(ValidationIssue(
             'unassigned_groups',
-            f"Vertex groups without bones in '{ob.name}': {', '.join(sorted(missing))}. "
+            f"Vertex groups without bones in '{name}': {', '.join(sorted(missing))}. "
             f"This creates neutral_bone and breaks WolvenKit import.",
             "https://tinyurl.com/unassigned-bone"
         ))
@@ -482,7 +565,7 @@ def validate_skinned_mesh(ob, me, bm):
         'armature': arm
     }
 
-def validate_mesh(ob, tempshit, eps=1e-10, uv_eps=1e-12):
+def validate_mesh(name, arrays, eps=1e-10, uv_eps=1e-12):
 #I've renamed this function three times because I can't read "General Mesh" without thinking the mesh has an army
     """
     Validate general mesh requirements (UV, vertex count, degenerates).
@@ -497,16 +580,16 @@ def validate_mesh(ob, tempshit, eps=1e-10, uv_eps=1e-12):
     issues = []
 
     # Check for UV layer
-    missing_uv = len(tempshit.uv_layers) == 0 or tempshit.uv_layers.active is None
+    missing_uv = arrays.active_uv < 0
     if missing_uv:
         issues.append(ValidationIssue(
             'missing_uv',
-            f"'{ob.name}' has no UV layer. A UV layer is required for glTF export.",
+            f"'{name}' has no UV layer. A UV layer is required for glTF export.",
             "https://tinyurl.com/uv-layers"
         ))
 
     # Calculate vertex counts with splits - this accounts for verts which will be added in the gltf on export
-    used_vert_count, export_vert_count, split_verts, new_verts = calc_vert_splits(tempshit)
+    used_vert_count, export_vert_count, split_verts, new_verts = calc_vert_splits(arrays)
 
     vertex_stats = {
         'used': used_vert_count,
@@ -519,18 +602,18 @@ def validate_mesh(ob, tempshit, eps=1e-10, uv_eps=1e-12):
     if export_vert_count > VERT_LIMIT:
         issues.append(ValidationIssue(
             'vertex_count',
-            f"'{ob.name}' will have {export_vert_count} vertices after export "
+            f"'{name}' will have {export_vert_count} vertices after export "
             f"(base: {used_vert_count}, splits: {new_verts}). "
             f"glTF requires < {VERT_LIMIT}. Reduce UV seams or split the mesh.",
             "https://tinyurl.com/vertex-count"
         ))
 
     # Check for degenerates
-    bad_3d_faces = find_3d_degenerates(tempshit, eps)
+    bad_3d_faces = find_3d_degenerates(arrays, eps)
     if len(bad_3d_faces) > 0:
         issues.append(ValidationIssue(
             'degenerate_3d',
-            f"{len(bad_3d_faces)} zero-area faces detected in '{ob.name}'. "
+            f"{len(bad_3d_faces)} zero-area faces detected in '{name}'. "
             f"Remove or fix these faces before export.",
             "https://tinyurl.com/wkit-io-degen-geometry"
         ))
@@ -539,11 +622,11 @@ def validate_mesh(ob, tempshit, eps=1e-10, uv_eps=1e-12):
     bad_uv_faces = np.array([], dtype=np.int32)
     if not missing_uv:
         pass
-        # bad_uv_faces = check_uv_degenerates(tempshit, uv_eps)
+        # bad_uv_faces = check_uv_degenerates(arrays, uv_eps)
         # if len(bad_uv_faces) > 0:
         #     issues.append(ValidationIssue(
         #         'degenerate_uv',
-        #         f"{len(bad_uv_faces)} UV degenerate faces detected in '{ob.name}'. "
+        #         f"{len(bad_uv_faces)} UV degenerate faces detected in '{name}'. "
         #         f"Fix UV mapping to ensure proper texture coordinates.",
         #         "https://tinyurl.com/uv-degenerate"
         #     ))
@@ -556,6 +639,8 @@ def validate_mesh(ob, tempshit, eps=1e-10, uv_eps=1e-12):
         'vertex_stats': vertex_stats
     }
 
+
+
 def create_fixed_mesh_copy(ob, skinned_result, general_result):
     """
     Creates a copy of the mesh for export. Fixes it, doesn't modify the original.
@@ -597,18 +682,18 @@ def create_fixed_mesh_copy(ob, skinned_result, general_result):
 
     # Apply fixes if this is a skinned mesh
     if skinned_result and not skinned_result['valid']:
-        ungrouped = skinned_result.get('ungrouped_verts', set())
+        ungrouped = skinned_result.get('ungrouped_verts', np.array([], dtype=np.int64))
         unassigned = skinned_result.get('unassigned_groups', set())
         armature = skinned_result.get('armature')
 
         # Fix ungrouped vertices
-        if ungrouped and armature and armature.data.bones:
+        if len(ungrouped) and armature and armature.data.bones:
             root_bone = armature.data.bones[0].name
             if root_bone not in tempshit.vertex_groups:
                 vg = tempshit.vertex_groups.new(name=root_bone)
             else:
                 vg = tempshit.vertex_groups[root_bone]
-            vg.add(list(ungrouped), 0.01, 'ADD')
+            vg.add(ungrouped.tolist(), 0.01, 'ADD')
             fixes_applied.append(f"Assigned {len(ungrouped)} ungrouped vertices to {root_bone} (weight: 0.01)")
 
         # Remove unassigned vertex groups
@@ -648,6 +733,27 @@ def create_fixed_mesh_copy(ob, skinned_result, general_result):
 
     return tempshit, fixes_applied
 
+def run_mesh_checks(jobs, eps=1e-10, uv_eps=1e-17, workers=1):
+    """
+    Run validate_skinned_mesh and validate_mesh over gathered (name, arrays, skin) jobs.
+
+    The checks only touch arrays read beforehand and spend their time in NumPy, which releases the GIL,
+    so with workers > 1 the submeshes are checked side by side on a thread pool. skin is None for
+    unskinned exports.
+
+    Returns:
+        list: (skinned_result, general_result) per job, in job order
+    """
+    def check(job):
+        name, arrays, skin = job
+        skinned_result = validate_skinned_mesh(name, skin, arrays) if skin is not None else None
+        return skinned_result, validate_mesh(name, arrays, eps, uv_eps)
+
+    if workers <= 1 or len(jobs) <= 1:
+        return [check(job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cp77_validate') as pool:
+        return list(pool.map(check, jobs))
+
 def cp77_meshValidation(
     meshes: list[bpy.types.Object],
     *,
@@ -659,6 +765,7 @@ def cp77_meshValidation(
     """
     Validate meshes for CP77 glTF export. NEVER modifies original meshes.
 
+    Everything is read in object mode; edit mode is only entered to show problem areas.
     If try_fix=True: Creates temporary fixed copies for export, but still reports issues.
     If try_fix=False: Selects problem areas and halts with clear instructions.
 
@@ -690,17 +797,13 @@ def cp77_meshValidation(
     # Store context
     store_current_context()
 
-    # Enter edit mode for all meshes
-    select_objects(meshes, make_first_active=True)
-    if get_safe_mode() != 'EDIT':
-        safe_mode_switch('EDIT')
+    # Mesh data is only current in object mode
+    if get_safe_mode() != 'OBJECT':
+        safe_mode_switch('OBJECT')
 
-    # Get edited objects
-    c = bpy.context
-    edited = getattr(c, "objects_in_mode_unique_data", None) or [c.edit_object]
-    edited = [ob for ob in edited if ob and ob.type == 'MESH']
+    meshes = [ob for ob in meshes if ob and ob.type == 'MESH']
 
-    if not edited:
+    if not meshes:
         restore_previous_context()
         return {
             'valid': False,
@@ -718,32 +821,24 @@ def cp77_meshValidation(
     first_problem_object = None  # Track first object with issues for visual feedback
 
     try:
-        for ob in edited:
-            me = ob.data
-            bm = bmesh.from_edit_mesh(me)
-            bm.faces.ensure_lookup_table()
-            bm.verts.ensure_lookup_table()
-
-            # Validate skinned mesh requirements
-            skinned_result = None
-            if is_skinned:
-                skinned_result = validate_skinned_mesh(ob, me, bm)
-
-            # Create temp mesh for general validation
-            bm_temp = bm.copy()
-            tempshit = bpy.data.meshes.new(name=f"_temp_{ob.name}")
-
-            try:
-                bm_temp.to_mesh(tempshit)
-                tempshit.calc_loop_triangles()
-
-                # Validate general mesh requirements
-                general_result = validate_mesh(ob, tempshit, eps, uv_eps)
-
-            finally:
-                bpy.data.meshes.remove(tempshit)
-                bm_temp.free()
-
+        # Phase 1: read every mesh into arrays on the main thread
+        t0 = time.perf_counter()
+        jobs = [
+            (ob.name, MeshArrays(ob.data, weights=is_skinned), skinning_info(ob) if is_skinned else None)
+            for ob in meshes
+        ]
+
+        # Phase 2: array checks for all submeshes at once
+        t1 = time.perf_counter()
+        workers = min(len(jobs), os.cpu_count() or 1)
+        results = run_mesh_checks(jobs, eps, uv_eps, workers)
+        del jobs  # the arrays aren't needed past the checks
+        t2 = time.perf_counter()
+        print(f"Mesh validation: read {len(meshes)} meshes in {t1 - t0:.3f}s, "
+              f"checked in {t2 - t1:.3f}s on {workers} thread(s)")
+
+        # Phase 3: report and fix on the main thread
+        for ob, (skinned_result, general_result) in zip(meshes, results):
             # Collect all issues
             all_obj_issues = []
             if skinned_result:
@@ -757,18 +852,11 @@ def cp77_meshValidation(
 
                 # Track first problem object for visual feedback
                 if first_problem_object is None:
-                    first_problem_object = (ob, bm, me, general_result, skinned_result)
+                    first_problem_object = (ob, general_result, skinned_result)
 
                 # If NOT trying to fix, select problem areas and halt
                 if not try_fix:
-                    bad_faces = list(general_result.get('bad_3d_faces', np.array([])).tolist())
-                    ungrouped_verts = None
-                    if skinned_result:
-                        ungrouped_verts = skinned_result.get('ungrouped_verts')
-
-                    if bad_faces or ungrouped_verts:
-                        c.tool_settings.mesh_select_mode = (True, False, True)
-                        select_bmesh_problems(bm, me, bad_faces, ungrouped_verts)
+                    show_validation_problems(ob, general_result, skinned_result)
 
                     # Build error message
                     error_parts = [f"Validation failed for '{ob.name}':"]
@@ -790,22 +878,14 @@ def cp77_meshValidation(
                 # No issues - use original
                 export_objects.append(ob)
 
+        print(f"Mesh validation: reported and fixed in {time.perf_counter() - t2:.3f}s")
+
         # If we fixed issues, show them to the user BEFORE proceeding
         if first_problem_object and all_fixes:
-            ob, bm, me, general_result, skinned_result = first_problem_object
+            ob, general_result, skinned_result = first_problem_object
 
             # Select problem areas in the ORIGINAL mesh
-            bad_faces = list(set(
-                list(general_result.get('bad_3d_faces', [])) +
-                list(general_result.get('bad_uv_faces', []))
-            ))
-            ungrouped_verts = None
-            if skinned_result:
-                ungrouped_verts = skinned_result.get('ungrouped_verts')
-
-            if bad_faces or ungrouped_verts:
-                c.tool_settings.mesh_select_mode = (True, False, True)
-                select_bmesh_problems(bm, me, bad_faces, ungrouped_verts)
+            show_validation_problems(ob, general_result, skinned_result)
 
             # Build detailed message
             message_parts = [
@@ -880,11 +960,22 @@ def set_visible(collection, new_visibility_state):
 def export_cyberpunk_collections_glb(context, filepath, export_poses=False, is_skinned=True, try_fix=True,
     red_garment_col=False, apply_transform=True,
     action_filter=False, export_tracks=False, apply_modifiers=True,
-    only_visible=False):
+    only_visible=False, force=False):
+    """
+    Export each collection to <filepath>/<collection>.glb.
+
+    Mesh collections whose fingerprint matches their last successful export are skipped with
+    EXPORT_UNCHANGED as their status, unless force is set.
+    """
 
     user_settings = save_user_settings_and_reset_to_default()
 
     exported = []
+    records = None if export_poses else ExportRecords()
+    fingerprint_options = {
+        'is_skinned': is_skinned, 'try_fix': try_fix, 'red_garment_col': red_garment_col,
+        'apply_transform': apply_transform, 'apply_modifiers': apply_modifiers,
+    }
 
     # store_current_context()
 
@@ -907,6 +998,14 @@ def export_cyberpunk_collections_glb(context, filepath, export_poses=False, is_s
             exported.append((collection.name, f"No armatures or meshes starting with 'submesh'"))
             continue
 
+        collection_path = os.path.join(filepath, f"{collection.name}.glb")
+        if records is not None and not force:
+            if records.unchanged(collection_path, export_fingerprint(visible_objects, fingerprint_options)):
+                exported.append((collection.name, EXPORT_UNCHANGED))
+                collection.hide_viewport = oldVisible
+                collection.hide_render = oldRender
+                continue
+
         if not set_active_collection(collection, context):
             exported.append((collection.name, f"Failed to set collection as active"))
             continue
@@ -917,7 +1016,6 @@ def export_cyberpunk_collections_glb(context, filepath, export_poses=False, is_s
             exported.append((collection.name, f"Failed to set child object selection"))
             continue
 
-        collection_path = os.path.join(filepath, f"{collection.name}.glb")
         try:
             export_cyberpunk_glb(context, collection_path, export_poses=export_poses, export_visible=False,
                 limit_selected=True, is_skinned=is_skinned, try_fix=try_fix,
@@ -926,6 +1024,9 @@ def export_cyberpunk_collections_glb(context, filepath, export_poses=False, is_s
                 called_from_loop=True
             )
             exported.append((collection.name, None))
+            if records is not None:
+                # export applies transforms and garment caps, record what the next export will see
+                records.record(collection_path, export_fingerprint(visible_objects, fingerprint_options))
         except Exception as e:
             exported.append((collection.name, str(e)))
 
@@ -1194,20 +1295,44 @@ def export_meshes(
         for armature in armatures_to_hide:
             armature.hide_set(True)
 
-def ExportAll(self, context):
-    """Export all meshes with sourcePath or projPath."""
+def ExportAll(self, context, force=False):
+    """
+    Export all meshes with sourcePath or projPath, each to its projPath.
+
+    Meshes whose fingerprint matches their last successful export are skipped unless force is set.
+
+    Returns:
+        list: (object name, None or error or EXPORT_UNCHANGED) per mesh
+    """
     to_exp = [
         obj for obj in context.scene.objects
         if obj.type == 'MESH' and ('sourcePath' in obj or 'projPath' in obj)
     ]
 
-    if len(to_exp) > 0:
-        for obj in to_exp:
-            filepath = obj.get('projPath', '')
-            if filepath:
-                export_cyberpunk_glb(
-                    context, filepath=filepath, export_poses=False
-                )
+    exported = []
+    records = ExportRecords()
+    for obj in to_exp:
+        filepath = obj.get('projPath', '')
+        if not filepath:
+            continue
+        if not force and records.unchanged(filepath, export_fingerprint([obj])):
+            exported.append((obj.name, EXPORT_UNCHANGED))
+            continue
+
+        select_objects([obj], context=context)
+        try:
+            export_cyberpunk_glb(
+                context, filepath=filepath, export_poses=False
+            )
+            exported.append((obj.name, None))
+            records.record(filepath, export_fingerprint([obj]))
+        except Exception as e:
+            exported.append((obj.name, str(e)))
+
+    skipped = sum(1 for _, status in exported if status == EXPORT_UNCHANGED)
+    if skipped:
+        print(f"Skipped {skipped} of {len(exported)} meshes unchanged since their last export")
+    return exported
 
 # TESTING
 if __name__ == "__main__":
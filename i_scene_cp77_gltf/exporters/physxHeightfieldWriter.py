@@ -1,5 +1,6 @@
 import base64
 import struct
+from ..main.physx_heightfield import encode_samples
 
 class BinaryWriter:
     def __init__(self):
@@ -30,6 +31,9 @@ class BinaryWriter:
     def write_single(self, value):
         self._write_internal(struct.pack("f", float(value)))
 
+    def write_bytes(self, data: bytes):
+        self._write_internal(data)
+
 class PhysXWriter:
     @staticmethod
     def __write_header(bw: BinaryWriter, version: int = 2):
@@ -85,10 +89,7 @@ class PhysXWriter:
         bw.write_single(float(hf["max_height"]))
 
         # Heightfield samples
-        for s in samples:
-            bw.write_int16(int(s["height"]))
-            bw.write_byte(int(s["material_index_0"]))
-            bw.write_byte(int(s["material_index_1"]))
+        bw.write_bytes(encode_samples(samples))
 
     @staticmethod
     def write(heightfields):
@@ -6,6 +6,7 @@ from mathutils import Quaternion
 from ..main.common import *
 from ..cyber_props import *
 from .physxHeightfieldWriter import PhysXWriter
+from ..main.physx_heightfield import SAMPLE_DTYPE
 
 resources_dir = get_resources_dir()
 epsilon = 1e-4
@@ -19,18 +20,23 @@ class MaskCache:
         if self.data.shape[2] > 1:
             self.data = self.data[:, :, 0]
         self.data = (self.data * 255).astype(np.uint8)
-
-    def sample_region(self, x_start, x_end, y_start, y_end):
-        x_start = max(0, x_start)
-        y_start = max(0, y_start)
-        x_end = min(self.size[0], x_end)
-        y_end = min(self.size[1], y_end)
-
-        if x_start >= x_end or y_start >= y_end:
-            return None
-
-        region = self.data[y_start:y_end, x_start:x_end]
-        return region.mean()
+        # summed area table, any region sum is four lookups
+        self.integral = np.zeros((self.size[1] + 1, self.size[0] + 1), dtype=np.int64)
+        self.integral[1:, 1:] = self.data.reshape(self.size[1], self.size[0], -1)[:, :, 0].cumsum(0).cumsum(1)
+
+    def region_means(self, x_start, x_end, y_start, y_end):
+        """Mean of each data[y_start:y_end, x_start:x_end] region, arguments broadcast. NaN where the clamped region is empty."""
+        x_start = np.maximum(0, x_start)
+        y_start = np.maximum(0, y_start)
+        x_end = np.minimum(self.size[0], x_end)
+        y_end = np.minimum(self.size[1], y_end)
+        valid = (x_start < x_end) & (y_start < y_end)
+
+        x0, x1 = np.clip(x_start, 0, self.size[0]), np.clip(x_end, 0, self.size[0])
+        y0, y1 = np.clip(y_start, 0, self.size[1]), np.clip(y_end, 0, self.size[1])
+        sums = self.integral[y1, x1] - self.integral[y0, x1] - self.integral[y1, x0] + self.integral[y0, x0]
+        areas = np.where(valid, (x1 - x0) * (y1 - y0), 1)
+        return np.where(valid, sums / areas, np.nan)
 
 def getBaseSector():
     with open(os.path.join(get_resources_dir(), 'empty.streamingsector.json'), 'r') as f:
@@ -84,31 +90,104 @@ def get_masks(mat: bpy.types.Material):
 
     return sort_images_by_number(images)
 
-def generate_terrain_collision(obj, node):
+def mesh_triangles(obj):
+    """Triangles of the evaluated mesh in object space, the geometry obj.ray_cast hits, as an (n, 3, 3) array."""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    eval_obj = obj.evaluated_get(depsgraph)
+    mesh = eval_obj.to_mesh()
+    try:
+        mesh.calc_loop_triangles()
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("vertices", tris)
+    finally:
+        eval_obj.to_mesh_clear()
+    return co.reshape(-1, 3).astype(np.float64)[tris.reshape(-1, 3)]
+
+def raycast_down_grid(tris, xs, ys, chunk_size=1 << 20):
+    """
+    Cast rays straight down onto tris from every point of the grid ys x xs, both sorted ascending.
+
+    Each triangle is rasterized onto the grid points inside its xy bounds, keeping the topmost hit per
+    point like a -Z ray_cast from above the mesh. Returns hit and z arrays shaped (len(ys), len(xs)),
+    z is 0 where nothing was hit.
+    """
+    nx, ny = len(xs), len(ys)
+    z = np.full(ny * nx, -np.inf)
+
+    a, b, c = tris[:, 0], tris[:, 1], tris[:, 2]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])
+    # triangles seen edge on from above can't be hit by a vertical ray
+    tris = tris[np.abs(area) > 1e-12]
+    area = area[np.abs(area) > 1e-12]
+
+    lo = tris[:, :, :2].min(axis=1) - epsilon * 1e-3
+    hi = tris[:, :, :2].max(axis=1) + epsilon * 1e-3
+    col0 = np.searchsorted(xs, lo[:, 0], 'left')
+    col1 = np.searchsorted(xs, hi[:, 0], 'right')
+    row0 = np.searchsorted(ys, lo[:, 1], 'left')
+    row1 = np.searchsorted(ys, hi[:, 1], 'right')
+    ncols = col1 - col0
+    counts = ncols * np.maximum(row1 - row0, 0)
+    ends = np.cumsum(counts)
+
+    # walk the triangles in chunks of about chunk_size candidate points to bound memory
+    start = 0
+    while start < len(tris):
+        stop = max(int(np.searchsorted(ends, ends[start] - counts[start] + chunk_size, 'right')), start + 1)
+        cnt = counts[start:stop]
+        t = np.repeat(np.arange(start, stop), cnt)
+        k = np.arange(len(t)) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        col = col0[t] + k % ncols[t]
+        row = row0[t] + k // ncols[t]
+
+        ta, tb, tc = tris[t, 0], tris[t, 1], tris[t, 2]
+        dx = xs[col] - ta[:, 0]
+        dy = ys[row] - ta[:, 1]
+        w1 = (dx * (tc[:, 1] - ta[:, 1]) - (tc[:, 0] - ta[:, 0]) * dy) / area[t]
+        w2 = ((tb[:, 0] - ta[:, 0]) * dy - dx * (tb[:, 1] - ta[:, 1])) / area[t]
+        w0 = 1.0 - w1 - w2
+        inside = (w0 >= -1e-7) & (w1 >= -1e-7) & (w2 >= -1e-7)
+        hit_z = w0 * ta[:, 2] + w1 * tb[:, 2] + w2 * tc[:, 2]
+        np.maximum.at(z, (row * nx + col)[inside], hit_z[inside])
+        start = stop
+
+    hit = z > -np.inf
+    return hit.reshape(ny, nx), np.where(hit, z, 0.0).reshape(ny, nx)
+
+def mask_material_indices(mask_caches, x_start, x_end, y_start, y_end):
+    """
+    Material index per region, counting down from len(mask_caches) for each mask until one averages above 127.
+
+    Region bounds broadcast against each other, masks earlier in the list win.
+    """
+    mat = np.zeros(np.broadcast(x_start, x_end, y_start, y_end).shape, dtype=np.int64)
+    for i in reversed(range(len(mask_caches))):
+        means = mask_caches[i].region_means(x_start, x_end, y_start, y_end)
+        mat = np.where(means > 127, len(mask_caches) - i, mat)
+    return mat
 
-    bm = bmesh.new()
-    bm.from_mesh(obj.data)
+def generate_terrain_collision(obj, node):
 
-    verts = [v.co for v in bm.verts]
+    co = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+    obj.data.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3).astype(np.float64)
 
-    if len(verts) == 0:
+    if len(co) == 0:
         show_message(f"Error: Mesh {obj.name} has no vertices")
-        bm.free()
         return None, None
 
-    min_x = min(v.x for v in verts)
-    max_x = max(v.x for v in verts)
-    min_y = min(v.y for v in verts)
-    max_y = max(v.y for v in verts)
-    min_z = min(v.z for v in verts)
-    max_z = max(v.z for v in verts)
+    min_x, min_y, min_z = co.min(axis=0).tolist()
+    max_x, max_y, max_z = co.max(axis=0).tolist()
 
-    bm.transform(obj.matrix_world)
+    matrix_world = np.array(obj.matrix_world)
+    world_z = co @ matrix_world[2, :3] + matrix_world[2, 3]
 
-    world_min_z = min(v.z for v in verts)
-    world_max_z = max(v.z for v in verts)
+    world_min_z = world_z.min()
+    world_max_z = world_z.max()
 
-    node["Data"]["heightScale"] = (world_max_z - world_min_z) / 32767.0
+    node["Data"]["heightScale"] = float(world_max_z - world_min_z) / 32767.0
 
     # account for outermost rows and columns not being fully generated
     rows = math.ceil(((max_x - min_x) / 2)) + 2
@@ -132,7 +211,7 @@ def generate_terrain_collision(obj, node):
         "nb_samples": rows * columns,
         "min_height": 0.0,
         "max_height": 32767.0,
-        "samples": [],
+        "samples": np.zeros(rows * columns, dtype=SAMPLE_DTYPE),
     }
 
     masks = set()
@@ -157,148 +236,56 @@ def generate_terrain_collision(obj, node):
     quadQuarterStepRowWorld = quadHalfStepRowUV * 0.5 * (min_y - max_y)
     quadQuarterStepColWorld = quadHalfStepColUV * 0.5 * (max_x - min_x)
 
-    for r in range(rows):
-        for c in range(columns):
-            # sample the center of each quad, but position the outermost row and column outside the UV square
-            # and clamp to mesh edge to generate outermost terrain which cannot be fully built due to
-            # missing triangles.
-            # this avoids needing surrounding terrain tiles while being reasonably accurate
-            u = (c - 0.5) / (columns - 2)
-            v = (r - 0.5) / (rows - 2)
-
-            preClampU = u
-            preClampV = v
-
-            u = min(1.0 - epsilon, max(epsilon, u))
-            v = min(1.0 - epsilon, max(epsilon, v))
-
-            heightAvg = 0
-            hitT0 = False
-            hitT1 = False
-
-            world_x = min_x + u * (max_x - min_x)
-            world_y = min_y + v * (max_y - min_y)
-
-            ray_origin = Vector((world_x, world_y, max_z + 1.0))
-            ray_direction = Vector((0, 0, -1))
-
-            if (preClampU != u) or (preClampV != v):
-                # only sample center for edge quads
-
-                result, location, normal, index = obj.ray_cast(ray_origin, ray_direction)
-                if result:
-                    heightAvg = location.z
-                    hitT0 = True
-                    hitT1 = True
-                else:
-                    heightAvg = 0
-                    hitT0 = False
-                    hitT1 = False
-            else:
-                # sample triangle center, and quad center for inner quads
-                resultCenter, locationCenter, normalCenter, indexCenter = obj.ray_cast(ray_origin, ray_direction)
-
-                rayT0 = ray_origin.copy()
-                rayT0.y += quadQuarterStepRowWorld
-                rayT0.x -= quadQuarterStepColWorld
-                resultT0, locationT0, normalT0, indexT0 = obj.ray_cast(rayT0, ray_direction)
-
-                rayT1 = ray_origin.copy()
-                rayT1.y -= quadQuarterStepRowWorld
-                rayT1.x += quadQuarterStepColWorld
-                resultT1, locationT1, normalT1, indexT1 = obj.ray_cast(rayT1, ray_direction)
-
-                rayS0 = ray_origin.copy()
-                rayS0.y -= quadQuarterStepRowWorld
-                rayS0.x -= quadQuarterStepColWorld
-                resultS0, locationS0, normalS0, indexS0 = obj.ray_cast(rayS0, ray_direction)
-
-                rayS1 = ray_origin.copy()
-                rayS1.y += quadQuarterStepRowWorld
-                rayS1.x += quadQuarterStepColWorld
-                resultS1, locationS1, normalS1, indexS1 = obj.ray_cast(rayS0, ray_direction)
-
-
-                hits = 0
-                if resultCenter:
-                    heightAvg = locationCenter.z
-                    hits += 1
-                if resultT0:
-                    heightAvg += locationT0.z
-                    hits += 1
-                if resultT1:
-                    heightAvg += locationT1.z
-                    hits += 1
-                if resultS0:
-                    heightAvg += locationS0.z
-                    hits += 1
-                if resultS1:
-                    heightAvg += locationS1.z
-                    hits += 1
-
-                if hits > 1:
-                    heightAvg /= hits
-
-                hitT0 = resultT0
-                hitT1 = resultT1
-
-            t0Mat = len(mask_caches)
-            t1Mat = len(mask_caches)
-
-            centerU = math.ceil(sizeMask * (1 - v))
-            centerV = math.ceil(sizeMask * (1 - u))
-
-            # sample texture for t0
-            for mask_cache in mask_caches:
-                avgValue = mask_cache.sample_region(
-                    centerU - quadHalfStepColPixel,
-                    centerU,
-                    centerV,
-                    centerV + quadHalfStepRowPixel
-                )
-
-                if avgValue is None:
-                    t0Mat -= 1
-                    continue
-
-                if avgValue > 127:
-                    break
-                else:
-                    t0Mat -= 1
-
-            # sample texture for t1
-            for mask_cache in mask_caches:
-                avgValue = mask_cache.sample_region(
-                    centerU,
-                    centerU + quadHalfStepColPixel,
-                    centerV - quadHalfStepRowPixel,
-                    centerV
-                )
-
-                if avgValue is None:
-                    t1Mat -= 1
-                    continue
-
-                if avgValue > 127:
-                    break
-                else:
-                    t1Mat -= 1
-
-            # Normalize height to 0-1 range
-            if heightAvg != 0:
-                height = (heightAvg - min_z) / (max_z - min_z) if max_z != min_z else 0.5
-            else:
-                height = 0
-
-            hf["samples"].append(
-                {
-                    "height": height * 32767,
-                    "material_index_0": t0Mat if hitT0 else 127,
-                    "material_index_1": t1Mat if hitT1 else 127,
-                }
-            )
-
-    bm.free()
+    # sample the center of each quad, but position the outermost row and column outside the UV square
+    # and clamp to mesh edge to generate outermost terrain which cannot be fully built due to
+    # missing triangles.
+    # this avoids needing surrounding terrain tiles while being reasonably accurate
+    preClampU = (np.arange(columns) - 0.5) / (columns - 2)
+    preClampV = (np.arange(rows) - 0.5) / (rows - 2)
+
+    u = np.clip(preClampU, epsilon, 1.0 - epsilon)
+    v = np.clip(preClampV, epsilon, 1.0 - epsilon)
+
+    # only the center is sampled for edge quads
+    edge = (preClampV != v)[:, None] | (preClampU != u)[None, :]
+
+    world_x = min_x + u * (max_x - min_x)
+    world_y = min_y + v * (max_y - min_y)
+
+    # sample triangle centers and quad center for inner quads, all rays are cast from above the mesh
+    tris = mesh_triangles(obj)
+    hitCenter, zCenter = raycast_down_grid(tris, world_x, world_y)
+    hitT0, zT0 = raycast_down_grid(tris, world_x - quadQuarterStepColWorld, world_y + quadQuarterStepRowWorld)
+    hitT1, zT1 = raycast_down_grid(tris, world_x + quadQuarterStepColWorld, world_y - quadQuarterStepRowWorld)
+    hitS0, zS0 = raycast_down_grid(tris, world_x - quadQuarterStepColWorld, world_y - quadQuarterStepRowWorld)
+
+    # the S1 sample has always been cast from the S0 origin, so S0 counts twice
+    hits = hitCenter.astype(np.int64) + hitT0 + hitT1 + 2 * hitS0
+    heightSum = zCenter + zT0 + zT1 + zS0 + zS0
+    heightAvg = np.where(edge, zCenter, np.where(hits > 1, heightSum / np.maximum(hits, 1), heightSum))
+
+    hitT0 = np.where(edge, hitCenter, hitT0)
+    hitT1 = np.where(edge, hitCenter, hitT1)
+
+    centerU = np.ceil(sizeMask * (1 - v)).astype(np.int64)[:, None]
+    centerV = np.ceil(sizeMask * (1 - u)).astype(np.int64)[None, :]
+
+    # sample texture for t0 and t1
+    t0Mat = mask_material_indices(mask_caches,
+                                  centerU - quadHalfStepColPixel, centerU,
+                                  centerV, centerV + quadHalfStepRowPixel)
+    t1Mat = mask_material_indices(mask_caches,
+                                  centerU, centerU + quadHalfStepColPixel,
+                                  centerV - quadHalfStepRowPixel, centerV)
+
+    # Normalize height to 0-1 range
+    height = (heightAvg - min_z) / (max_z - min_z) if max_z != min_z else np.full_like(heightAvg, 0.5)
+    height = np.where(heightAvg != 0, height, 0.0)
+
+    samples = hf["samples"]
+    samples["height"] = (height * 32767).astype(np.int16).ravel()
+    samples["material_index_0"] = np.where(hitT0, t0Mat, 127).ravel()
+    samples["material_index_1"] = np.where(hitT1, t1Mat, 127).ravel()
 
     node["Data"]["heightfieldGeometry"]["Bytes"] =  PhysXWriter.write(hf)
     return None
@@ -13,6 +13,7 @@ from ..cyber_props import *
 from ..cyber_prefs import *
 from ..icons.cp77_icons import *
 from .read_rig import create_armature_from_data
+from ..main.node_group_library import clear_library
 from .npz_import import (CP77CharacterShapeProps, CP77_OT_NpzImportMesh, CP77_OT_NpzImportShapeKeys, CP77_OT_LoadBaseCharacter)
 class CP77ImportRig(Operator):
     bl_idname = "import_scene.rig"
@@ -354,6 +355,26 @@ class CP77MaterialReload(Operator):
 
         return {"FINISHED"}
 
+class CP77PurgeJSONCache(Operator):
+    bl_idname = "cp77.purge_json_cache"
+    bl_label = "Purge JSON Cache"
+    bl_description = "Delete the parsed json files cached on disk and in memory"
+
+    def execute(self, context):
+        removed = JSONTool.clear_cache(disk=True)
+        self.report({'INFO'}, f"Removed {removed} cached json files")
+        return {'FINISHED'}
+
+class CP77ClearNodeGroupLibrary(Operator):
+    bl_idname = "cp77.clear_node_group_library"
+    bl_label = "Clear Node Group Library"
+    bl_description = "Delete the saved shader node groups so they are rebuilt on next use"
+
+    def execute(self, context):
+        removed = clear_library()
+        self.report({'INFO'}, f"Removed {removed} node group libraries")
+        return {'FINISHED'}
+
 def menu_func_import(self, context):
     self.layout.operator(CP77Import.bl_idname, text="Cyberpunk GLTF (.gltf/.glb)", icon_value=get_icon('WKIT'))
     self.layout.operator(CP77EntityImport.bl_idname, text="Cyberpunk Entity (.json)", icon_value=get_icon('WKIT'))
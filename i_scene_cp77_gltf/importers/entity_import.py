@@ -129,6 +129,16 @@ def importEnt(with_materials, filepath='', appearances=[], exclude_meshes=[], in
     #print('simple collider components:', ent_simpleCollComps)
     #    presto_stash.append(ent_rigs)
 
+    # start parsing the app and rig files this import will read while the meshes are loaded
+    prefetch_jsons=[rig+'.json' for rig in ent_rigs]
+    import_all = len(appearances)==0 or len(appearances[0])==0 or any(app.upper()=='ALL' for app in appearances)
+    for a in ent_apps:
+        if import_all or a['appearanceName']['$value'] in appearances or a['name']['$value'] in appearances or a['name']['$value']==ent_default:
+            app_res = a.get('appearanceResource')
+            if isinstance(app_res, dict) and 'DepotPath' in app_res:
+                prefetch_jsons.append(os.path.join(path,app_res['DepotPath']['$value']).replace('\\',os.sep)+'.json')
+    JSONTool.prefetch(prefetch_jsons)
+
     resolved=[]
     for res_p in res:
         resolved.append(os.path.join(path,res_p['DepotPath']['$value']))
@@ -3,6 +3,7 @@ import json
 import struct
 import bpy
 import numpy as np
+from ..main.physx_heightfield import RAW_SAMPLE_DTYPE, decode_samples
 
 def load_json(filename):
     with open(filename) as json_file:
@@ -52,6 +53,10 @@ class BinaryReader:
     def read_single(self):
         return struct.unpack('f', self.__read_internal(4))[0]
 
+    def read_array(self, dtype, count):
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self.__read_internal(dtype.itemsize * count), dtype=dtype, count=count)
+
 
 class PhysX:
     @staticmethod
@@ -108,16 +113,9 @@ class PhysX:
         result["min_height"] = br.read_single()
         result["max_height"] = br.read_single()
 
-        result["samples"] = []
-
+        # structured array, index by field name for whole columns e.g. samples["height"]
         nb_verts = result["rows"] * result["columns"]
-        if nb_verts > 0:
-            for i in range(nb_verts):
-                result["samples"].append({
-                    "height": br.read_int16(),
-                    "material_index_0": br.read_byte(),
-                    "material_index_1": br.read_byte(),
-                })
+        result["samples"] = decode_samples(br.read_array(RAW_SAMPLE_DTYPE, max(nb_verts, 0)))
 
         return result
 
@@ -151,86 +149,63 @@ def create_geom_from_heightfield(heightfieldGeometry):
     rows = hf["rows"]
     cols = hf["columns"]
 
-    # Heights as 2D grid
-    heights = np.array([s["height"] for s in hf["samples"]], dtype=np.float32).reshape((rows, cols))
+    samples = hf["samples"].reshape((rows, cols))
 
     bounds = hf["min_max_bounds"]
 
     min_x, max_x = bounds["min"]["x"], bounds["max"]["x"]
     min_z, max_z = bounds["min"]["z"], bounds["max"]["z"]
 
-    size_x = max_x - min_x
-    size_z = max_z - min_z
-
-    verts = []
-    for r in range(rows):
-        for c in range(cols):
-            # normalized [0..1] across grid
-            u = c / (cols - 1)
-            v = r / (rows - 1)
-
-            # map to XZ footprint
-            x = min_x + u * size_x
-            z = min_z + v * size_z
-
-            # height directly from samples
-            y = heights[r, c] * 0.001  # <-- apply only a scale factor if needed
-
-            verts.append((x, z, y))
-
-    # === Build faces with material indices ===
-    faces = []
-    face_mats = []  # one entry per face, with material index
-
-    samples = hf["samples"]
-
-    for r in range(rows - 1):
-        for c in range(cols - 1):
-            base = r * cols + c
-            v0 = base
-            v1 = v0 + 1
-            v2 = v0 + cols
-            v3 = v2 + 1
-
-            # Index in the samples array for this grid point
-            s_idx = r * cols + c
-            s = samples[s_idx]
-
-            # Two triangles per quad
-            faces.append((v0, v2, v1))
-            face_mats.append(s["material_index_0"])
-
-            faces.append((v1, v2, v3))
-            face_mats.append(s["material_index_1"])
+    # === Vertices, row major, x across columns and z across rows ===
+    co = np.empty((rows, cols, 3), dtype=np.float32)
+    co[:, :, 0] = np.linspace(min_x, max_x, cols, dtype=np.float32)[None, :]
+    co[:, :, 1] = np.linspace(min_z, max_z, rows, dtype=np.float32)[:, None]
+    co[:, :, 2] = samples["height"] * np.float32(0.001)  # <-- apply only a scale factor if needed
+
+    # === Two triangles per quad, material index taken from the quad's first sample ===
+    # decode_samples strips the tessellation bit from material_index_0, so a tess-flagged quad gets the
+    # same Mat_<id> as an unflagged one (the raw byte used to give it a separate id of 128 and up)
+    v0 = (np.arange(rows - 1)[:, None] * cols + np.arange(cols - 1)[None, :]).ravel()
+    v1 = v0 + 1
+    v2 = v0 + cols
+    v3 = v2 + 1
+    loop_verts = np.stack((v0, v2, v1, v1, v2, v3), axis=1).astype(np.int32).ravel()
+    quad_samples = samples[:-1, :-1].ravel()
+    face_mats = np.stack((quad_samples["material_index_0"], quad_samples["material_index_1"]), axis=1).ravel()
+    nb_faces = len(face_mats)
 
     # === Create mesh ===
     mesh = bpy.data.meshes.new("HeightfieldMesh")
-    mesh.from_pydata(verts, [], faces)
-    mesh.update()
+    mesh.vertices.add(rows * cols)
+    mesh.loops.add(nb_faces * 3)
+    mesh.polygons.add(nb_faces)
+
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.loops.foreach_set("vertex_index", loop_verts)
+    mesh.polygons.foreach_set("loop_start", np.arange(0, nb_faces * 3, 3, dtype=np.int32))
+    mesh.update(calc_edges=True)
 
     # === Create object ===
     obj = bpy.data.objects.new("Heightfield", mesh)
     bpy.context.collection.objects.link(obj)
 
     # === Setup materials ===
-    unique_mats = sorted(set(face_mats))
-    mat_index_map = {m: i for i, m in enumerate(unique_mats)}
+    unique_mats, mat_indices = np.unique(face_mats, return_inverse=True)
 
     # Create dummy materials (just colored by index)
-    for m_id in unique_mats:
+    for m_id in unique_mats.tolist():
         mat = bpy.data.materials.new(name=f"Mat_{m_id}")
         mat.diffuse_color = ((m_id % 10) / 10.0, (m_id % 7) / 7.0, (m_id % 5) / 5.0, 1.0)
         obj.data.materials.append(mat)
 
     # Assign materials per face
-    for poly, mat_id in zip(mesh.polygons, face_mats):
-        poly.material_index = mat_index_map[mat_id]
+    mesh.polygons.foreach_set("material_index", mat_indices.astype(np.int32))
 
     # === Smooth shading ===
+    mesh.polygons.foreach_set("use_smooth", np.ones(nb_faces, dtype=bool))
     bpy.ops.object.select_all(action='DESELECT')
     obj.select_set(True)
     bpy.context.view_layer.objects.active = obj
-    bpy.ops.object.shade_smooth()
 
     print(f"Heightfield mesh created with {len(unique_mats)} materials")
     return obj
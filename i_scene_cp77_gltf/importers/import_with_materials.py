@@ -2,6 +2,7 @@ import bpy
 import os
 import json
 import time
+import hashlib
 from io_scene_gltf2.io.imp.gltf2_io_gltf import glTFImporter
 vers = bpy.app.version
 if vers[0] == 4 and vers[1] < 3:
@@ -14,7 +15,7 @@ from .import_from_external import *
 from .attribute_import import manage_garment_support
 from ..cyber_props import add_anim_props, add_skin_props
 from ..jsontool import JSONTool
-from ..main.common import show_message, exclusion_cache
+from ..main.common import show_message, exclusion_cache, material_cache
 from ..animtools.tracks import import_anim_tracks, fix_anim_frame_alignment
 import traceback
 
@@ -383,6 +384,14 @@ def reload_mats(self, context):
     return newmat
 
 
+def material_content_hash(rawMat, DepotPath, BasePath, image_format):
+    # everything the builder reads except the name, which only names the bpy material.
+    # textures resolve against the project folder, not the mesh, so the mesh path is left out
+    content = {k: v for k, v in rawMat.items() if k != 'Name'}
+    before, mid, after = BasePath.partition('source\\raw\\'.replace('\\', os.sep))
+    key = json.dumps(content, sort_keys=True, default=str) + '|' + str(DepotPath) + '|' + before + mid + '|' + str(image_format)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
 def import_mats(BasePath, DepotPath, exclude_unused_mats, existingMeshes, gltf_importer, image_format, mats, validmatnames,multimesh=False,generate_overrides=False):
     excluded_objects = exclusion_cache.get_excluded_objects()
     failedon = []
@@ -425,7 +434,7 @@ def import_mats(BasePath, DepotPath, exclude_unused_mats, existingMeshes, gltf_i
     mat_index_by_name = {m['Name']: i for i, m in enumerate(mats) if 'Name' in m}
     Builder = MaterialBuilder(mats, DepotPath, str(image_format), BasePath)
     counter = 0
-    bpy_mats = bpy.data.materials
+    content_hashes = {}
     excluded_mesh_names = {
         obj.data.name for obj in excluded_objects
         if getattr(obj, "type", "") == 'MESH' and obj.data
@@ -464,18 +473,35 @@ def import_mats(BasePath, DepotPath, exclude_unused_mats, existingMeshes, gltf_i
             m = validmats[matname]
             if matname == 'decal_diffuse1':
                 print('debug')
-            # Should create a list of mis that dont play nice with this and just check if the mat is using one.
-            cached = bpy_mats.get(matname)
-            if cached is not None and 'm' in cached and dict(cached['m']) == m:
-                bpy.data.meshes[name].materials.append(cached)
-                continue
-
             index = mat_index_by_name.get(matname)
             if index is None:
                 continue
+            # reuse anything already built from the same resolved material data, whatever mesh it came from
+            content_hash = content_hashes.get(matname)
+            if content_hash is None:
+                content_hash = material_content_hash(mats[index], DepotPath, BasePath, image_format)
+                content_hashes[matname] = content_hash
+            cached = material_cache.get(content_hash, matname)
+            if cached is not None:
+                if cached.get('content_name') == matname:
+                    bpy.data.meshes[name].materials.append(cached)
+                    continue
+                # same content under another name, copying the node tree is far cheaper than rebuilding it
+                bpymat = cached.copy()
+                bpymat.name = matname
+                bpymat['m'] = m
+                material_cache.add(content_hash, matname, bpymat)
+                bpy.data.meshes[name].materials.append(bpymat)
+                if bpymat.get('no_shadows'):
+                    shadow_obj = bpy.data.objects.get(name)
+                    if shadow_obj is not None:
+                        shadow_obj.visible_shadow = False
+                continue
+
             try:
                 bpymat = Builder.create(mats, index)
                 if bpymat:
+                    material_cache.add(content_hash, matname, bpymat)
                     bpymat['m'] = m
                     bpymat['BaseMaterial'] = m['BaseMaterial']
                     bpymat['GlobalNormal'] = m['GlobalNormal']
@@ -3,7 +3,6 @@ import numpy as np
 import os
 from bpy_extras.io_utils import ImportHelper
 from bpy.props import StringProperty, BoolProperty, EnumProperty, IntProperty
-from collections import defaultdict
 from ..main.common import get_char_dir
 
 MAGIC_MESH = b"MSHZ"
@@ -212,6 +211,34 @@ def _update_body_breasts(props):
 
 # MESH IMPORT
 
+def _assign_weights(groups, v_indices, g_indices, values):
+    """
+    Assign (vertex, group, weight) triplets with one add per distinct weight of each group.
+
+    A vertex listed twice for the same group keeps its last weight.
+    """
+    v_indices = np.asarray(v_indices, dtype=np.int64)
+    g_indices = np.asarray(g_indices, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float32)
+
+    valid = (g_indices >= 0) & (g_indices < len(groups))
+    v_indices, g_indices, values = v_indices[valid], g_indices[valid], values[valid]
+    if not len(values):
+        return
+
+    # last occurrence of each (group, vertex) pair
+    pair = g_indices * (int(v_indices.max()) + 1) + v_indices
+    _, last = np.unique(pair[::-1], return_index=True)
+    keep = len(pair) - 1 - last
+    v_indices, g_indices, values = v_indices[keep], g_indices[keep], values[keep]
+
+    order = np.lexsort((v_indices, values, g_indices))
+    v_indices, g_indices, values = v_indices[order], g_indices[order], values[order]
+    starts = np.flatnonzero(np.r_[True, (g_indices[1:] != g_indices[:-1]) | (values[1:] != values[:-1])])
+    ends = np.r_[starts[1:], len(values)]
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        groups[g_indices[start]].add(v_indices[start:end].tolist(), float(values[start]), 'REPLACE')
+
 def _build_mesh_object(context, data, prefix="", obj_name=None, link_to_collection=None):
     """Build a single mesh object from NPZ data. *prefix* selects sub-keys for collection format."""
     p = prefix
@@ -282,15 +309,7 @@ def _build_mesh_object(context, data, prefix="", obj_name=None, link_to_collecti
 
     if len(vg_names) > 0 and len(w_values) > 0:
         groups = [obj.vertex_groups.new(name=name) for name in vg_names]
-
-        vert_weights = defaultdict(list)
-        for v_idx, g_idx, val in zip(w_v_indices, w_g_indices, w_values):
-            vert_weights[int(v_idx)].append((int(g_idx), float(val)))
-
-        for v_idx, weights in vert_weights.items():
-            for g_idx, val in weights:
-                if g_idx < len(groups):
-                    groups[g_idx].add([v_idx], val, 'REPLACE')
+        _assign_weights(groups, w_v_indices, w_g_indices, w_values)
 
     # NORMALS
     normals = data.get(f"{p}normals")
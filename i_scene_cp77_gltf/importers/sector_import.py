@@ -217,6 +217,20 @@ def get_meshname(data):
     return meshname
 
 
+def index_node_data(t):
+    """
+    Tag each nodeData entry with its nodeDataIndex and group the entries by NodeIndex.
+
+    :param t: The sector's nodeData list.
+    :return: Dict of NodeIndex -> list of nodeData entries, in nodeData order.
+    """
+    node_instances = {}
+    for index, inst in enumerate(t):
+        inst['nodeDataIndex'] = index
+        node_instances.setdefault(inst['NodeIndex'], []).append(inst)
+    return node_instances
+
+
 def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding, with_lights):
     cp77_addon_prefs = bpy.context.preferences.addons['i_scene_cp77_gltf'].preferences
     if not cp77_addon_prefs.non_verbose:
@@ -256,6 +270,10 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
     meshes={}
     C = bpy.context
     I_want_to_break_free=False
+    # parse the sectors in the background, the first pass only waits on the one it is reading
+    JSONTool.prefetch(jsonpath)
+    raw_path = os.path.join(project,'source','raw')
+    ent_jsons=[]
     # Use object wireframe colors not theme - doesnt work need to find hte viewport as the context doesnt return that for this call
     # bpy.context.space_data.shading.wireframe_color_type = 'OBJECT'
     for filepath in jsonpath:
@@ -280,6 +298,8 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
                 match ntype:
                     case 'worldEntityNode'|'worldDeviceNode':
                         #print('worldEntityNode',i)                        
+                        if meshname:
+                            ent_jsons.append(os.path.join(raw_path,meshname)+'.json')
                         if(meshname != 0):
                             if meshname not in meshes:
                                 meshes[meshname] = {'appearances':[meshAppearance],'sector':sectorName}                        
@@ -368,6 +388,17 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
        if len(m)>0:
             add_to_list(m , meshes, meshes_w_apps)
 
+    # queue everything the mesh and entity imports will read so it parses while objects are created
+    prefetch_jsons=[]
+    if with_mats:
+        for m in meshes_w_apps:
+            stem=os.path.join(raw_path, os.path.splitext(m)[0].replace('\\', os.sep))
+            prefetch_jsons.append(os.path.splitext(stem)[0]+'.Material.json')
+    prefetch_jsons.extend(ent_jsons)
+    if ent_jsons:
+        prefetch_jsons.extend(app_path)
+    JSONTool.prefetch(prefetch_jsons)
+
     path = path[:-5]
 
     coll_scene = C.scene.collection
@@ -400,6 +431,8 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
     inst_m=Matrix.LocRotScale(inst_pos,inst_rot,inst_scale)
     roads=[]
     no_sectors=len(jsonpath)
+    index_time=0
+    create_time=0
     for fpn,filepath in enumerate(jsonpath):
         projectjson=os.path.join(path,os.path.basename(project)+'.streamingsector.json')
         if filepath==projectjson:
@@ -410,10 +443,11 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
         if VERBOSE:
             print(projectjson)
             print(filepath)
-        # add nodeDataIndex props to all the nodes in t
+        # add nodeDataIndex props to all the nodes in t and index them by NodeIndex once per sector
         t, nodes = JSONTool.jsonload(filepath)
-        for index, obj in enumerate(t):
-            obj['nodeDataIndex']=index
+        index_start = time.time()
+        node_instances = index_node_data(t)
+        index_time += time.time() - index_start
 
         numExpectedNodes = len(t)
         sectorName=os.path.basename(filepath)[:-5]
@@ -435,6 +469,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
 
         print(fpn, ' Processing ',len(nodes),' nodes for sector', sectorName, '(no ', fpn+1, ' of ', no_sectors,')')
         group=''
+        create_start = time.time()
         for i,e in enumerate(nodes):
 
             #if i % 20==0:
@@ -447,7 +482,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
             if  (limittypes and ntype in import_types) or limittypes==False: #or type=='worldCableMeshNode': # can add a filter for dev here
                 match ntype:
                     case 'worldAISpotNode':
-                        instances = [x for x in t if x['NodeIndex'] == i]
+                        instances = node_instances.get(i, [])
 
                         print('worldAISpotNode',i)
                         if instances:
@@ -488,7 +523,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
                                 print(traceback.format_exc())
                                 print(f"Failed during Entity import on {entpath} from app {app}")
                         if imported:
-                            instances = [x for x in t if x['NodeIndex'] == i]
+                            instances = node_instances.get(i, [])
                             for idx,inst in enumerate(instances):
                                 #print(inst)
                                 group=move_coll
@@ -540,7 +575,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
                     case 'worldBendedMeshNode' | 'worldCableMeshNode' :
                         #print(ntype)
                         meshname = data['mesh']['DepotPath']['$value'].replace('\\', os.sep)
-                        instances = [x for x in t if x['NodeIndex'] == i]
+                        instances = node_instances.get(i, [])
                         #if len(instances)>1:
                         #    print('Multiple Instances of node ',i)
 
@@ -567,7 +602,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
                             mesh_obj = bpy.data.objects.new(mesh_data.name, mesh_data)
                             #coll_scene.objects.link(mesh_obj)
 
-                            inst=[n for n in t if n['NodeIndex']==i][0]
+                            inst=node_instances.get(i, [])[0]
 
                             mesh_obj.rotation_mode='QUATERNION'
                             mesh_obj.rotation_quaternion=get_rot(inst)
@@ -634,7 +669,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
 
                     case 'worldInstancedMeshNode' :
                         #print('worldInstancedMeshNode')
-                        instances = [x for x in t if x['NodeIndex'] == i]
+                        instances = node_instances.get(i, [])
                         for idx,inst in enumerate(instances):
                             meshname = data['mesh']['DepotPath']['$value'].replace('\\', os.sep)
                             num=data['worldTransformsBuffer']['numElements']
@@ -692,7 +727,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
 
                     case 'worldFoliageNode' :
                         #print('worldFoliageNode')
-                        instances = [x for x in t if x['NodeIndex'] == i]
+                        instances = node_instances.get(i, [])
                         for idx,inst in enumerate(instances):
                             meshname = data['mesh']['DepotPath']['$value'].replace('\\', os.sep)
                             foliageResource=data['foliageResource']['DepotPath']['$value'].replace('\\', os.sep)+'.json'
@@ -764,7 +799,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
                     case 'worldStaticDecalNode':
                         #print('worldStaticDecalNode')
                         # decals are imported as planes tagged with the material details so you can see what they are and move them.
-                        instances = [x for x in t if x['NodeIndex'] == i]
+                        instances = node_instances.get(i, [])
                         for idx,inst in enumerate(instances):
                             #print( inst)
                             #o = bpy.data.objects.new( "empty", None )
@@ -828,7 +863,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
 
                     case 'worldSplineNode':
                         #print('worldSplineNode',i)
-                        instances = [x for x in t if x['NodeIndex'] == i]
+                        instances = node_instances.get(i, [])
                         if len(instances)>0:
                             spline_node=e
                             spline_ndata=instances[0]
@@ -878,7 +913,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
 
                                         if (imported):
                                             #print('Group found for ',groupname)
-                                            instances = [x for x in t if x['NodeIndex'] == i]
+                                            instances = node_instances.get(i, [])
                                             for inst in instances:
                                                 new=bpy.data.collections.new(groupname)
                                                 Sector_coll.children.link(new)
@@ -934,7 +969,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
                                                 rot_time=data['fullRotationTime']
                                                 reverse=data['reverseDirection']
 
-                                            instances = [x for x in t if x['NodeIndex'] == i]
+                                            instances = node_instances.get(i, [])
                                             for idx,inst in enumerate(instances):
                                                 new=bpy.data.collections.new(groupname)
                                                 Sector_coll.children.link(new)
@@ -992,7 +1027,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
 
                     case 'worldInstancedDestructibleMeshNode':
                         #print('worldInstancedDestructibleMeshNode',i)
-                        instances = [x for x in t if x['NodeIndex'] == i]
+                        instances = node_instances.get(i, [])
                         for instidx,inst in enumerate(instances):
                             if isinstance(e, dict) and 'mesh' in data.keys():
                                 meshname = data['mesh']['DepotPath']['$value'].replace('\\', os.sep)
@@ -1081,7 +1116,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
                     case 'worldStaticLightNode':
                         #print('worldStaticLightNode',i)
                         if with_lights:
-                            instances = [x for x in t if x['NodeIndex'] == i]
+                            instances = node_instances.get(i, [])
                             for inst in instances:
                                 light_node=e['Data']
                                 light_name=e['Data']['debugName']['$value']
@@ -1125,7 +1160,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
 
                     case 'worldStaticParticleNode'|'worldEffectNode'|'worldPopulationSpawnerNode':
                         #print('worldStaticParticleNode',i)
-                        instances = [x for x in t if x['NodeIndex'] == i]
+                        instances = node_instances.get(i, [])
                         for idx,inst in enumerate(instances):
                             o = bpy.data.objects.new( "empty", None )
                             o.name=ntype+'_'+e['Data']['debugName']['$value']
@@ -1157,7 +1192,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
 
                     case 'worldStaticSoundEmitterNode':
                         #print(ntype)
-                        instances = [x for x in t if x['NodeIndex'] == i]
+                        instances = node_instances.get(i, [])
                         for idx,inst in enumerate(instances):
                             o = bpy.data.objects.new( "empty", None )
                             o.empty_display_type = 'SPHERE'
@@ -1192,7 +1227,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
                             else:
                                 sector_Collisions_coll=bpy.data.collections.new(sector_Collisions)
                                 coll_scene.children.link(sector_Collisions_coll)
-                            inst = [x for x in t if x['NodeIndex'] == i][0]
+                            inst = node_instances.get(i, [])[0]
                             Actors=e['Data']['compiledData']['Data']['Actors']
                             for idx,act in enumerate(Actors):
                                 #print(len(act['Shapes']))
@@ -1310,6 +1345,7 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
                     case _:
                         #print('None of the above',i)
                         pass
+        create_time += time.time() - create_start
         print('Nodes complete, updating view layer and saving world matrices')
         # Have to do a view_layer update or the matrices are all blank
         bpy.context.view_layer.update()
@@ -1366,6 +1402,8 @@ def importSectors( filepath, with_mats, remap_depot, want_collisions, am_modding
                 # Set the points to be the same
                 nextpoint.co=endpoint.co
     JSONTool.stop_caching()
+    if not cp77_addon_prefs.non_verbose:
+        print(f"nodeData indexing took {index_time:.3f}s, node object creation took {create_time:.3f}s")
     print(f"Imported Sectors from : {wkit_proj_name} in {time.time() - start_time}")
     print('')
     print('-------------------- Finished Importing Cyberpunk 2077 Streaming Sectors --------------------')
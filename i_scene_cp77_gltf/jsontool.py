@@ -3,6 +3,10 @@ import json
 import zipfile
 import os
 import re
+import pickle
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from .main.common import show_message, load_zip
 from pathlib import Path
 
@@ -22,24 +26,254 @@ MIN_WOLVENKIT_VERSION = (8, 13)
 MIN_MATERIAL_JSON_VERSION = (1, 0)
 
 
+class JSONCache:
+    """
+    LRU cache of parsed json files keyed on the normalized absolute path.
+
+    Entries are validated against the file's (mtime, size) on every lookup so re-exports are
+    picked up, and their estimated memory is kept under a byte budget. Within an import session
+    every lookup shares one parsed object. Entries kept between sessions are held as a pickled
+    snapshot taken before anyone could modify the data, and each later session gets a fresh copy,
+    so changes one import makes to its data never leak into the next.
+    """
+    # memory of the parsed python objects relative to the json text, measured on WolvenKit exports
+    PARSED_SIZE_FACTOR = 2
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        # key -> [stamp, data or None, snapshot or None, estimated bytes]
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(filepath):
+        return os.path.normcase(os.path.abspath(filepath))
+
+    @staticmethod
+    def stamp(filepath):
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @staticmethod
+    def _size(stamp, data, snapshot):
+        size = len(snapshot) if snapshot is not None else 0
+        if data is not None:
+            size += stamp[1] * JSONCache.PARSED_SIZE_FACTOR
+        return size
+
+    def valid(self, key, stamp):
+        entry = self._entries.get(key)
+        return entry is not None and stamp is not None and entry[0] == stamp
+
+    def get(self, key, stamp):
+        entry = self._entries.get(key)
+        if entry is None or stamp is None or entry[0] != stamp:
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        if entry[1] is None:
+            # first use this session of an entry kept from an earlier one
+            entry[1] = pickle.loads(entry[2])
+            self._resize(entry)
+            self.evict()
+        return entry[1]
+
+    def put(self, key, stamp, data, snapshot=False):
+        """Caches data, pickling a snapshot of it first if the entry may outlive the session."""
+        if stamp is None:
+            return
+        if key in self._entries:
+            self._remove(key)
+        blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL) if snapshot else None
+        entry = [stamp, data, blob, self._size(stamp, data, blob)]
+        if entry[3] > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry[3]
+        self.evict()
+
+    def end_session(self, keep=False):
+        """Drops the parsed objects handed out this session, only snapshots are kept if asked to."""
+        if not keep:
+            self.clear()
+            return
+        for key in list(self._entries):
+            entry = self._entries[key]
+            if entry[2] is None:
+                self._remove(key)
+            else:
+                entry[1] = None
+                self._resize(entry)
+
+    def evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _resize(self, entry):
+        size = self._size(*entry[:3])
+        self._bytes += size - entry[3]
+        entry[3] = size
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[3]
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+class JSONDiskCache:
+    """
+    Opt-in on-disk store of parsed, path-normalized json files.
+
+    Each source file maps to one pickle named after the hash of its absolute path, holding the
+    source (mtime, size) so edits or re-exports are detected and the entry is rewritten.
+    """
+    # bump when the stored structure or the path normalization changes
+    FORMAT_VERSION = 1
+    # smaller files parse faster than the cache file can be opened
+    MIN_SIZE = 64 * 1024
+    EXTENSION = '.jsoncache'
+
+    @staticmethod
+    def directory():
+        cp77_addon_prefs = bpy.context.preferences.addons['i_scene_cp77_gltf'].preferences
+        if cp77_addon_prefs.json_disk_cache_dir:
+            return bpy.path.abspath(cp77_addon_prefs.json_disk_cache_dir)
+        return bpy.utils.user_resource('DATAFILES', path='cp77_json_cache')
+
+    @staticmethod
+    def entry_path(filepath):
+        digest = hashlib.sha1(JSONCache.key(filepath).encode('utf-8')).hexdigest()
+        return os.path.join(JSONDiskCache.directory(), digest + JSONDiskCache.EXTENSION)
+
+    # load and store only touch the file system so they can run on prefetch threads
+    @staticmethod
+    def load(entry, stamp):
+        try:
+            with open(entry, 'rb') as file:
+                version, cached_stamp, data = pickle.load(file)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+        if version != JSONDiskCache.FORMAT_VERSION or tuple(cached_stamp) != stamp:
+            return None
+        return data
+
+    @staticmethod
+    def store(entry, stamp, data):
+        tmp = entry + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            with open(tmp, 'wb') as file:
+                pickle.dump((JSONDiskCache.FORMAT_VERSION, stamp, data), file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, entry)
+        except OSError as e:
+            print(f"Could not write json cache {entry}: {e}")
+
+    @staticmethod
+    def purge():
+        directory = JSONDiskCache.directory()
+        removed = 0
+        if not os.path.isdir(directory):
+            return removed
+        for name in os.listdir(directory):
+            if name.endswith(JSONDiskCache.EXTENSION) or name.endswith(JSONDiskCache.EXTENSION + '.tmp'):
+                try:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+                except OSError as e:
+                    print(f"Could not remove {name}: {e}")
+        return removed
+
+
 class JSONTool:
-    _json_cache = {}
+    _json_cache = JSONCache()
     _use_cache = False
+    # entries outlive the caching session, read from the preferences when it starts
+    _keep_cache = False
+    # cache keys whose version errors were already reported during the current caching session
+    _reported = set()
+    # cache key -> (stamp, future) for files being parsed in the background
+    _prefetched = {}
+    # cache key -> (filepath, stamp) for files waiting for a free background slot
+    _prefetch_queue = OrderedDict()
+    _prefetch_pool = None
+    # files parsed ahead of the import at once, finished ones go to the cache and count against its budget
+    PREFETCH_WINDOW = 8
+
+    # json string values (not keys) whose text starts like a depot or drive path, escapes included.
+    # The quote must open a string: quotes inside strings are escaped, so a preceding backslash rules it out.
+    _path_string = re.compile(r'("(?<!\\")(?:base|ep1|[^"\\]:\\\\)[^"\\]*(?:\\.[^"\\]*)*")(?!\s*:)')
+    # below this the tree walk is cheaper, small material files are mostly path strings
+    TEXT_NORMALIZE_MIN_SIZE = 64 * 1024
 
     @staticmethod
     def normalize_paths(data):
-        if isinstance(data, dict):
-            for key, value in data.items():
-                data[key] = JSONTool.normalize_paths(value)
-        elif isinstance(data, list):
-            for i in range(len(data)):
-                data[i] = JSONTool.normalize_paths(data[i])
-        elif isinstance(data, str):
-            # Normalize the path if it is absolute
+        if os.sep == '\\':
+            return data
+        if isinstance(data, str):
             if data[0:4]=='base' or data[0:3]=='ep1' or data[1:3]==':\\':
                 data = data.replace('\\',os.sep)
+            return data
+        if not isinstance(data, (dict, list)):
+            return data
+        # iterative so deep documents cannot hit the recursion limit, only changed strings are reassigned
+        stack = [data]
+        while stack:
+            obj = stack.pop()
+            items = obj.items() if isinstance(obj, dict) else enumerate(obj)
+            for key, value in items:
+                if isinstance(value, str):
+                    if (value[0:4]=='base' or value[0:3]=='ep1' or value[1:3]==':\\') and '\\' in value:
+                        obj[key] = value.replace('\\',os.sep)
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
         return data
 
+    @staticmethod
+    def normalize_text(text):
+        """Normalize the depot paths in raw json text so the parsed result needs no tree walk."""
+        if os.sep == '\\':
+            return text
+        parts = JSONTool._path_string.split(text)
+        if len(parts) > 1:
+            # an escaped backslash is written as two characters in json, the separator needs no escape
+            parts[1::2] = [part.replace('\\\\', os.sep) for part in parts[1::2]]
+            text = ''.join(parts)
+        return text
+
+    @staticmethod
+    def parse(text):
+        """json.loads with depot paths normalized, on the raw text for big files and the parsed tree for small ones."""
+        if isinstance(text, (bytes, bytearray)):
+            # zipped json is read as bytes, decode it the way json.loads would
+            text = text.decode(json.detect_encoding(text), 'surrogatepass')
+        if len(text) < JSONTool.TEXT_NORMALIZE_MIN_SIZE:
+            return JSONTool.normalize_paths(json.loads(text))
+        return json.loads(JSONTool.normalize_text(text))
+
     @staticmethod
     def _version_at_least(version_string, minimum):
         components = []
@@ -69,24 +303,144 @@ class JSONTool:
             return False
         return True
     
+    @staticmethod
+    def _disk_entry(file_path, stamp=None):
+        # resolved on the main thread, the preferences can't be read from prefetch threads
+        cp77_addon_prefs = bpy.context.preferences.addons['i_scene_cp77_gltf'].preferences
+        if not cp77_addon_prefs.json_disk_cache:
+            return None, None
+        if stamp is None:
+            stamp = JSONCache.stamp(file_path)
+        if stamp is None or stamp[1] < JSONDiskCache.MIN_SIZE:
+            return None, None
+        return JSONDiskCache.entry_path(file_path), stamp
+
+    @staticmethod
+    def _read_json(file_path, entry=None, stamp=None):
+        if entry is not None:
+            data = JSONDiskCache.load(entry, stamp)
+            if data is not None:
+                return data
+        with open(file_path, 'r') as file:
+            data = JSONTool.parse(file.read())
+        if entry is not None:
+            JSONDiskCache.store(entry, stamp, data)
+        return data
+
     @staticmethod
     def load_json(file_path):
         if os.path.exists(file_path) is False:
             print(f"File not found: {file_path}")
             return None
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-            JSONTool.normalize_paths(data)
-        return data
+        entry, stamp = JSONTool._disk_entry(file_path)
+        return JSONTool._read_json(file_path, entry, stamp)
+
+    @staticmethod
+    def prefetch(filepaths):
+        """
+        Start parsing json files on background threads while caching is active.
+
+        jsonload picks the results up when the files are requested, waiting only if a file
+        is still being parsed. Files already cached or queued are skipped. At most PREFETCH_WINDOW
+        files are parsed ahead, the rest are started in order as jsonload gets to them.
+        """
+        if not JSONTool._use_cache:
+            return 0
+        if JSONTool._prefetch_pool is None:
+            JSONTool._prefetch_pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix='cp77_json')
+        queued = 0
+        for filepath in filepaths:
+            if not filepath.endswith('.json'):
+                continue
+            key = JSONCache.key(filepath)
+            if key in JSONTool._prefetched or key in JSONTool._prefetch_queue:
+                continue
+            stamp = JSONCache.stamp(filepath)
+            if stamp is None or JSONTool._json_cache.valid(key, stamp):
+                continue
+            JSONTool._prefetch_queue[key] = (filepath, stamp)
+            queued += 1
+        JSONTool._pump_prefetch()
+        return queued
+
+    @staticmethod
+    def _pump_prefetch():
+        """Move finished background parses into the cache and start queued files while the window has room."""
+        running = 0
+        for key, (stamp, future) in list(JSONTool._prefetched.items()):
+            if not future.done():
+                running += 1
+                continue
+            # cached like a file jsonload parsed itself, so the budget may evict it before it is asked for
+            del JSONTool._prefetched[key]
+            if not future.cancelled() and future.exception() is None:
+                JSONTool._json_cache.put(key, stamp, future.result(), snapshot=JSONTool._keep_cache)
+        while running < JSONTool.PREFETCH_WINDOW and JSONTool._prefetch_queue:
+            key, (filepath, stamp) = JSONTool._prefetch_queue.popitem(last=False)
+            entry, disk_stamp = JSONTool._disk_entry(filepath, stamp)
+            future = JSONTool._prefetch_pool.submit(JSONTool._read_json, filepath, entry, disk_stamp)
+            JSONTool._prefetched[key] = (stamp, future)
+            running += 1
+
+    @staticmethod
+    def _take_prefetched(key, stamp):
+        # requested before its turn came, jsonload reads it itself
+        JSONTool._prefetch_queue.pop(key, None)
+        prefetched = JSONTool._prefetched.pop(key, None)
+        if prefetched is None:
+            return None
+        prefetch_stamp, future = prefetched
+        if prefetch_stamp != stamp:
+            future.cancel()
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Background parse failed, reloading: {e}")
+            return None
+
+    @staticmethod
+    def _finish_prefetch():
+        # keep whatever finished, drop what hasn't started yet
+        for key, (stamp, future) in JSONTool._prefetched.items():
+            if future.done() and not future.cancelled() and future.exception() is None:
+                JSONTool._json_cache.put(key, stamp, future.result(), snapshot=JSONTool._keep_cache)
+            else:
+                future.cancel()
+        JSONTool._prefetched.clear()
+        JSONTool._prefetch_queue.clear()
 
     @staticmethod
     def start_caching():
+        cp77_addon_prefs = bpy.context.preferences.addons['i_scene_cp77_gltf'].preferences
         JSONTool._use_cache = True
+        JSONTool._keep_cache = cp77_addon_prefs.json_cache_keep
+        JSONTool._json_cache.max_bytes = cp77_addon_prefs.json_cache_size * 1024 * 1024
+        # an import that failed before stop_caching leaves its session open
+        JSONTool._json_cache.end_session(keep=JSONTool._keep_cache)
+        JSONTool._reported.clear()
 
     @staticmethod
     def stop_caching():
+        # callers may have modified what they were given, only untouched snapshots survive the session
+        JSONTool._finish_prefetch()
+        JSONTool._json_cache.end_session(keep=JSONTool._keep_cache)
         JSONTool._use_cache = False
+        JSONTool._reported.clear()
+        cp77_addon_prefs = bpy.context.preferences.addons['i_scene_cp77_gltf'].preferences
+        if not cp77_addon_prefs.non_verbose:
+            stats = JSONTool._json_cache.stats()
+            print(f"JSON cache: {stats['entries']} files, {stats['bytes'] / 1048576:.1f}/{stats['max_bytes'] / 1048576:.0f} MB, "
+                  f"{stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions")
+
+    @staticmethod
+    def clear_cache(disk=False):
+        JSONTool._finish_prefetch()
         JSONTool._json_cache.clear()
+        JSONTool._reported.clear()
+        if disk:
+            return JSONDiskCache.purge()
+        return 0
 
     @staticmethod
     def create_error(suppress_verbose, base_name, file_extension, specific_error, error_Messages = None):
@@ -130,11 +484,16 @@ class JSONTool:
 
         file_extension = ''.join(Path(filepath).suffixes)
 
-        isCached = JSONTool._use_cache and base_name in JSONTool._json_cache.keys()
+        data = None
+        if JSONTool._use_cache:
+            JSONTool._pump_prefetch()
+            cache_key = JSONCache.key(filepath)
+            cache_stamp = JSONCache.stamp(filepath)
+            data = JSONTool._json_cache.get(cache_key, cache_stamp)
+        isCached = data is not None
 
         # Check if it's cached
         if isCached:
-            data = JSONTool._json_cache[base_name]
             if file_extension in JSONTool.cachable_types:
                 return data
         else:
@@ -144,14 +503,22 @@ class JSONTool:
             if base_name.endswith('.refitter.zip'):
                 data=JSONTool.jsonloads(load_zip(filepath))
             else:
-                data = JSONTool.load_json(filepath)
+                if JSONTool._use_cache:
+                    data = JSONTool._take_prefetched(cache_key, cache_stamp)
+                if data is None:
+                    data = JSONTool.load_json(filepath)
 
         # do not append error messages twice
-        has_error = not isCached and JSONTool.json_ver_validate(data) == False
+        has_error = JSONTool.json_ver_validate(data) == False
+        if JSONTool._use_cache:
+            if cache_key in JSONTool._reported:
+                has_error = False
+            elif has_error:
+                JSONTool._reported.add(cache_key)
 
         # only cache items if we are not in a loop
-        if JSONTool._use_cache:
-            JSONTool._json_cache[base_name] = data
+        if JSONTool._use_cache and not isCached and data is not None:
+            JSONTool._json_cache.put(cache_key, cache_stamp, data, snapshot=JSONTool._keep_cache)
 
         match file_extension:
             case '.anims.json' | '.app.json' | '.streamingblock.json' |  '.mesh.json' | '.gradient.json' | '.rig.json' | '.cfoliage.json' | '.hp.json':
@@ -221,9 +588,7 @@ class JSONTool:
 
     @staticmethod
     def jsonloads(jsonstrings):
-        data=json.loads(jsonstrings)
-        JSONTool.normalize_paths(data)
-        return data
+        return JSONTool.parse(jsonstrings)
 
     @staticmethod
     def openJSON(path, mode='r', ProjPath='', DepotPath=''):
@@ -8,6 +8,8 @@ from mathutils import Color
 import pkg_resources
 import bmesh
 import inspect
+from bpy.app.handlers import persistent
+from .node_group_library import library_node_group, reset_library_state
 from mathutils import Vector
 import json
 scale_factor=1.0
@@ -52,6 +54,121 @@ class GLTFExclusionCache:
 exclusion_cache = GLTFExclusionCache()
 
 
+class ImageCache:
+    """Indexes bpy.data.images by (filepath, is Non-Color) so texture lookups don't scan every image."""
+
+    def __init__(self):
+        """Starts with an empty index, it is built on first use."""
+        self._index = None
+        self._count = 0
+
+    def _rebuild(self):
+        """Indexes every image, the first image found for a key wins like the old linear scans."""
+        self._index = {}
+        for img in bpy.data.images:
+            self._index.setdefault((img.filepath, img.colorspace_settings.name == 'Non-Color'), img.name)
+        self._count = len(bpy.data.images)
+
+    def _lookup(self, filepath, nonColor):
+        name = self._index.get((filepath, nonColor))
+        if name is None:
+            return None
+        img = bpy.data.images.get(name)
+        if img is None or img.filepath != filepath or (img.colorspace_settings.name == 'Non-Color') != nonColor:
+            return False
+        return img
+
+    def get(self, filepath, nonColor):
+        """Returns an image with this filepath and colorspace, or None."""
+        # images added or removed outside of this cache (gltf import, user deletes) force a rebuild
+        if self._index is None or len(bpy.data.images) != self._count:
+            self._rebuild()
+        img = self._lookup(filepath, nonColor)
+        if img is False:
+            # renamed, repathed or recolorspaced since it was indexed
+            self._rebuild()
+            img = self._lookup(filepath, nonColor)
+        return img or None
+
+    def add(self, img):
+        """Registers an image created by the importer."""
+        if self._index is None or len(bpy.data.images) != self._count + 1:
+            self._rebuild()
+            return
+        self._index.setdefault((img.filepath, img.colorspace_settings.name == 'Non-Color'), img.name)
+        self._count += 1
+
+    def clear_cache(self):
+        """Drops the index, it is rebuilt on the next lookup."""
+        self._index = None
+        self._count = 0
+
+# IMPORT THIS FOR USE, NOT THE CLASS
+image_cache = ImageCache()
+
+
+class MaterialCache:
+    """Maps a hash of the resolved material data to the bpy materials built from it, per material name."""
+
+    def __init__(self):
+        """Starts with an empty index, it is built on first use."""
+        self._index = None
+
+    def _rebuild(self):
+        """Picks up materials built in earlier sessions, they keep their hash and name as custom properties."""
+        self._index = {}
+        for mat in bpy.data.materials:
+            content_hash = mat.get('content_hash')
+            if content_hash:
+                self._index.setdefault(content_hash, {}).setdefault(mat.get('content_name', mat.name), mat.name)
+
+    def _lookup(self, content_hash, name):
+        names = self._index.get(content_hash)
+        if not names:
+            return None
+        stale = False
+        for mat_name in ([names[name]] if name in names else []) + list(names.values()):
+            mat = bpy.data.materials.get(mat_name)
+            if mat is None or mat.get('content_hash') != content_hash:
+                # renamed, deleted or rebuilt since it was indexed, try the other names first
+                stale = True
+                continue
+            return mat
+        return False if stale else None
+
+    def get(self, content_hash, name):
+        """Returns the material built from this content under this name, any material built from it, or None."""
+        if self._index is None:
+            self._rebuild()
+        mat = self._lookup(content_hash, name)
+        if mat is False:
+            self._rebuild()
+            mat = self._lookup(content_hash, name)
+        return mat or None
+
+    def add(self, content_hash, name, mat):
+        """Tags a freshly built material with its content hash and source material name."""
+        mat['content_hash'] = content_hash
+        mat['content_name'] = name
+        if self._index is None:
+            self._rebuild()
+        self._index.setdefault(content_hash, {})[name] = mat.name
+
+    def clear_cache(self):
+        """Drops the index, it is rebuilt on the next lookup."""
+        self._index = None
+
+# IMPORT THIS FOR USE, NOT THE CLASS
+material_cache = MaterialCache()
+
+@persistent
+def clear_data_caches(dummy):
+    """Blend file loads and undo steps replace bpy.data wholesale."""
+    image_cache.clear_cache()
+    material_cache.clear_cache()
+    reset_library_state()
+
+
 def found(self,tex):
     result = os.path.exists(os.path.join(self.BasePath, tex)[:-3]+ self.image_format)
     if not result:
@@ -242,27 +359,8 @@ def bsdf_socket_names():
 
 def imageFromPath(Img,image_format,isNormal = False):
     # The speedtree materials use the same name textures for different plants this code was loading the same leaves on all of them
-    Im = bpy.data.images.get(os.path.basename(Img)[:-4])
-    if Im and Im.filepath==Img[:-3]+ image_format:
-        if Im.colorspace_settings.name != 'Non-Color':
-            if isNormal:
-                Im = None
-        else:
-            if not isNormal:
-                Im = None
-    else:
-        Im=None
-    if not Im :
-        Im = bpy.data.images.get(os.path.basename(Img)[:-4] + ".001")
-        if Im and Im.filepath==Img[:-3]+ image_format:
-            if Im.colorspace_settings.name != 'Non-Color':
-                if isNormal:
-                    Im = None
-            else:
-                if not isNormal:
-                    Im = None
-        else :
-            Im = None
+    # so images are matched on their full filepath, not their name
+    Im = image_cache.get(Img[:-3]+ image_format, isNormal)
 
     if not Im:
         Im = bpy.data.images.new(os.path.basename(Img)[:-4],1,1)
@@ -271,6 +369,7 @@ def imageFromPath(Img,image_format,isNormal = False):
         Im.filepath = Img[:-3]+ image_format
         if isNormal:
             Im.colorspace_settings.name = 'Non-Color'
+        image_cache.add(Im)
     return Im
 
 def imageFromRelPath(ImgPath, image_format='png', isNormal = False, DepotPath='',ProjPath=''):
@@ -287,28 +386,9 @@ def imageFromRelPath(ImgPath, image_format='png', isNormal = False, DepotPath=''
 
     inProj=os.path.join(ProjPath,ImgPath)[:-3]+ image_format
     inDepot=os.path.join(DepotPath,ImgPath)[:-3]+ image_format
-    img_names=[k for k in bpy.data.images.keys() if bpy.data.images[k].filepath==inProj]
-    img_name=None
-    if len(img_names)>0:
-        img_name=img_names[0]
-    if not img_name:
-        img_names=[k for k in bpy.data.images.keys() if bpy.data.images[k].filepath==inDepot]
-        if len(img_names)>0:
-            img_name=img_names[0]
-    if img_name:
-        Im = bpy.data.images.get(img_name)
-    else:
-        Im = None
-
-    if Im:
-        if Im.colorspace_settings.name != 'Non-Color':
-            if isNormal:
-                Im = None
-        else:
-            if not isNormal:
-                Im = None
-    else:
-        Im=None
+    Im = image_cache.get(inProj, isNormal)
+    if not Im:
+        Im = image_cache.get(inDepot, isNormal)
 
     if not Im:
         Im = bpy.data.images.new(os.path.basename(ImgPath)[:-4],1,1)
@@ -320,6 +400,7 @@ def imageFromRelPath(ImgPath, image_format='png', isNormal = False, DepotPath=''
             Im.filepath = inDepot
         if isNormal:
             Im.colorspace_settings.name = 'Non-Color'
+        image_cache.add(Im)
     return Im
 
 def CreateShaderNodeTexImage(curMat,path = None, x = 0, y = 0, name = None, image_format = 'png', nonCol = False):
@@ -733,6 +814,7 @@ def createOverrideTable(matTemplateObj):
             Output["MetalLevelsOut"][tmpName] = [(tmpStrength0),(tmpStrength1)]
         return Output
 
+@library_node_group('CP77_Parallax')
 def createParallaxGroup():
     if 'CP77_Parallax' in bpy.data.node_groups.keys():
         return bpy.data.node_groups['CP77_Parallax']
@@ -891,6 +973,7 @@ def show_message(message):
     bpy.ops.cp77.message_box('INVOKE_DEFAULT', message=message)
 
 
+@library_node_group('hash12')
 def createHash12Group():
     if 'hash12' in bpy.data.node_groups.keys():
         return bpy.data.node_groups['hash12']
@@ -0,0 +1,129 @@
+import bpy
+import os
+import sys
+import re
+import glob
+import functools
+from contextlib import contextmanager
+
+# bump when a builder changes without an addon version bump so old libraries get rebuilt
+LIBRARY_VERSION = 1
+
+# set name -> names of groups in that set that came from the library or were built by the addon this session
+_trusted = {}
+
+
+def library_enabled():
+    cp77_addon_prefs = bpy.context.preferences.addons['i_scene_cp77_gltf'].preferences
+    return cp77_addon_prefs.node_group_library
+
+
+def library_stamp():
+    """Addon version, Blender version and library version, a library written under another stamp is ignored."""
+    addon_ver = sys.modules['i_scene_cp77_gltf'].bl_info['version']
+    return '_'.join(str(v) for v in (*addon_ver, *bpy.app.version[:2], LIBRARY_VERSION))
+
+
+def library_dir():
+    return bpy.utils.user_resource('DATAFILES', path='cp77_node_groups')
+
+
+def library_path(set_name):
+    return os.path.join(library_dir(), f"{bpy.path.clean_name(set_name)}_{library_stamp()}.blend")
+
+
+def _merge_duplicates(before):
+    # dependencies that were already in the file come in as name.001, point their users back at the originals
+    for ng in [ng for ng in bpy.data.node_groups if ng.name not in before]:
+        base, dot, suffix = ng.name.rpartition('.')
+        if dot and suffix.isdigit() and base in before:
+            ng.user_remap(bpy.data.node_groups[base])
+            bpy.data.node_groups.remove(ng)
+
+
+def load_node_groups(set_name, names):
+    """Append the groups in names that aren't in the file yet from the set's library blend."""
+    missing = [name for name in names if name not in bpy.data.node_groups]
+    if not missing or not library_enabled():
+        return
+    path = library_path(set_name)
+    if not os.path.exists(path):
+        return
+    before = set(bpy.data.node_groups.keys())
+    try:
+        with bpy.data.libraries.load(path, link=False) as (data_from, data_to):
+            data_to.node_groups = [name for name in missing if name in data_from.node_groups]
+    except (OSError, RuntimeError) as e:
+        print(f"Could not load node group library {path}: {e}")
+        return
+    _merge_duplicates(before)
+    _trusted.setdefault(set_name, set()).update(name for name in missing if name in bpy.data.node_groups)
+
+
+def save_node_groups(set_name, built):
+    """Write the set's library blend when the addon had to build any of its groups."""
+    built = [name for name in built if name in bpy.data.node_groups]
+    if not built or not library_enabled():
+        return
+    trusted = _trusted.setdefault(set_name, set())
+    trusted.update(built)
+    groups = {bpy.data.node_groups[name] for name in trusted if name in bpy.data.node_groups}
+    path = library_path(set_name)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        bpy.data.libraries.write(path, groups, fake_user=True)
+    except (OSError, RuntimeError) as e:
+        print(f"Could not write node group library {path}: {e}")
+        return
+    # libraries from older stamps are never read again
+    prefix = bpy.path.clean_name(set_name) + '_'
+    for old in glob.glob(os.path.join(glob.escape(library_dir()), glob.escape(prefix) + '*.blend')):
+        if old != path and re.fullmatch(r'[\d_]+', os.path.basename(old)[len(prefix):-len('.blend')]):
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+@contextmanager
+def node_group_set(set_name, names):
+    """
+    Wrap code that builds the groups in names inline with 'if name in bpy.data.node_groups' checks.
+
+    Missing groups are appended from the library first, anything still built inside the block is
+    written back to the library afterwards.
+    """
+    load_node_groups(set_name, names)
+    present = set(bpy.data.node_groups.keys())
+    yield
+    save_node_groups(set_name, [name for name in names if name not in present])
+
+
+def library_node_group(name):
+    """Decorator for builder functions that return the existing group called name or build it."""
+    def decorator(build):
+        @functools.wraps(build)
+        def wrapper(*args, **kwargs):
+            with node_group_set(name, [name]):
+                group = build(*args, **kwargs)
+            return group
+        return wrapper
+    return decorator
+
+
+def reset_library_state():
+    """Forget which groups are library groups, a newly loaded file may hold edited groups with the same names."""
+    _trusted.clear()
+
+
+def clear_library():
+    """Delete every library blend, groups are rebuilt and written again on next use."""
+    _trusted.clear()
+    removed = 0
+    for path in glob.glob(os.path.join(glob.escape(library_dir()), '*.blend')):
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError as e:
+            print(f"Could not remove {path}: {e}")
+    return removed
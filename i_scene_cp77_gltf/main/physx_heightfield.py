@@ -0,0 +1,53 @@
+import numpy as np
+
+# PxHeightFieldSample as stored in cooked heightfield streams, 4 bytes per sample
+RAW_SAMPLE_DTYPE = np.dtype([
+    ("height", "<i2"),
+    ("material_index_0", "u1"),
+    ("material_index_1", "u1"),
+])
+
+# decoded layout, the high bit of material_index_0 is the quad's tessellation flag
+SAMPLE_DTYPE = np.dtype([
+    ("height", "<i2"),
+    ("material_index_0", "u1"),
+    ("material_index_1", "u1"),
+    ("tess_flag", "?"),
+])
+
+TESS_FLAG_BIT = 0x80
+MATERIAL_MASK = 0x7F
+
+
+def decode_samples(buffer, count=-1, offset=0):
+    """Decode a block of raw samples (bytes or RAW_SAMPLE_DTYPE array) into a SAMPLE_DTYPE array."""
+    raw = np.frombuffer(buffer, dtype=RAW_SAMPLE_DTYPE, count=count, offset=offset)
+    samples = np.empty(len(raw), dtype=SAMPLE_DTYPE)
+    samples["height"] = raw["height"]
+    samples["material_index_0"] = raw["material_index_0"] & MATERIAL_MASK
+    # the high bit of material_index_1 is reserved, keep the byte as is so it round trips
+    samples["material_index_1"] = raw["material_index_1"]
+    samples["tess_flag"] = (raw["material_index_0"] & TESS_FLAG_BIT) != 0
+    return samples
+
+
+def encode_samples(samples):
+    """
+    Encode samples to the raw stream layout.
+
+    Takes a SAMPLE_DTYPE or RAW_SAMPLE_DTYPE array, or a list of dicts with height,
+    material_index_0, material_index_1 and optionally tess_flag.
+    """
+    if not isinstance(samples, np.ndarray):
+        samples = np.array(
+            [(int(s["height"]), int(s["material_index_0"]) | (TESS_FLAG_BIT if s.get("tess_flag") else 0), int(s["material_index_1"]))
+             for s in samples],
+            dtype=RAW_SAMPLE_DTYPE)
+    raw = np.empty(len(samples), dtype=RAW_SAMPLE_DTYPE)
+    raw["height"] = samples["height"]
+    raw["material_index_1"] = samples["material_index_1"]
+    if "tess_flag" in samples.dtype.names:
+        raw["material_index_0"] = (samples["material_index_0"] & MATERIAL_MASK) | np.where(samples["tess_flag"], TESS_FLAG_BIT, 0).astype(np.uint8)
+    else:
+        raw["material_index_0"] = samples["material_index_0"]
+    return raw.tobytes()
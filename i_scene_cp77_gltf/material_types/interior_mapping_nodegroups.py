@@ -7,7 +7,9 @@
 
 import bpy
 from ..main.common import *
+from ..main.node_group_library import library_node_group
 
+@library_node_group('CP77_AW_Plane_Interior_Mapping')
 def andrew_willmotts_plane_interior_mapping_node_group():
     if 'CP77_AW_Plane_Interior_Mapping' in bpy.data.node_groups.keys():
         return bpy.data.node_groups['CP77_AW_Plane_Interior_Mapping']
@@ -1088,6 +1090,7 @@ def andrew_willmotts_plane_interior_mapping_node_group():
 
 
 #initialize flipbook_function node group
+@library_node_group('CP77_Flipbook_Function')
 def flipbook_function_node_group():
     if 'CP77_Flipbook_Function' in bpy.data.node_groups.keys():
         return bpy.data.node_groups['CP77_Flipbook_Function']
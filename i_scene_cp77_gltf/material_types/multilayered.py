@@ -2,12 +2,14 @@ import bpy
 import os
 from ..main.common import *
 from ..jsontool import JSONTool
+from ..main.node_group_library import library_node_group
 import numpy as np
 
 def np_array_from_image(img_name):
     img = bpy.data.images[img_name]
     return np.array(img.pixels[:])
 
+@library_node_group('Mask Mixer 1.6.7')
 def mask_mixer_node_group(Mat):
     if "Mask Mixer 1.6.7" in bpy.data.node_groups:
         return bpy.data.node_groups["Mask Mixer 1.6.7"]
@@ -115,6 +117,7 @@ def mask_mixer_node_group(Mat):
 
     return mask_mixer
 
+@library_node_group('Levels 2077 1.6.7')
 def levels_node_group(Mat):
     if "Levels 2077 1.6.7" in bpy.data.node_groups:
         return bpy.data.node_groups["Levels 2077 1.6.7"]
@@ -150,6 +153,7 @@ def levels_node_group(Mat):
 
     return levels
 
+@library_node_group('Layer Blend 1.6.7')
 def _getOrCreateLayerBlend(Mat):
     if "Layer Blend 1.6.7" in bpy.data.node_groups:
         return bpy.data.node_groups["Layer Blend 1.6.7"]
@@ -239,6 +243,7 @@ def _getOrCreateLayerBlend(Mat):
 
     return NG
 
+@library_node_group('Layer Blend 1.8.0')
 def _getOrCreateLayerBlend5(Mat):
     ng_name = "Layer Blend 1.8.0"
     if ng_name in bpy.data.node_groups:
@@ -331,6 +336,7 @@ def _getOrCreateLayerBlend5(Mat):
     return NG
 
 # JATO: This function wraps a pbsdf node inside a nodegroup with bundle sockets for blender 5+
+@library_node_group('Multilayered 1.8.0')
 def ml_pbsdf_node_group(Mat):
     ng_name = "Multilayered 1.8.0"
     if ng_name in bpy.data.node_groups:
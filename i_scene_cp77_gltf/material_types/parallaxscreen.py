@@ -1,6 +1,16 @@
 import bpy
 import os
 from ..main.common import *
+from ..main.node_group_library import load_node_groups, save_node_groups
+
+# every group create() builds inline, appended from the node group library when it has them
+PARALLAX_SCREEN_GROUPS = [
+    'step', 'colorlessTex', 'scroll1', 'scrollUV1', 'scrollUV1X', 'scroll2', 'scrollUV2',
+    'scrollUV2X', 'brokenUV', 'rndColorIndex', 'rndColor', 'rndOff', 'randomOffset',
+    'newRandomOffset', 'l1', 'l2', 'l3', 'if BlinkingSpeed > 0', 'scanlineUV',
+    'parallax_screen_m2', 'parallax_screen_m3', 'finalScrollUV',
+]
+
 
 class ParallaxScreen:
     def __init__(self, BasePath,image_format,ProjPath):
@@ -88,6 +98,8 @@ class ParallaxScreen:
 
     def create(self,Data,Mat):
         CurMat = Mat.node_tree
+        load_node_groups('parallaxscreen', PARALLAX_SCREEN_GROUPS)
+        present_groups = set(bpy.data.node_groups.keys())
         pBSDF=CurMat.nodes[loc('Principled BSDF')]
         sockets=bsdf_socket_names()
         pBSDF.inputs[sockets['Specular']].default_value = 0
@@ -1469,3 +1481,5 @@ class ParallaxScreen:
 
         # roughness
         CurMat.links.new(metalness.outputs[0],pBSDF.inputs["Roughness"])
+
+        save_node_groups('parallaxscreen', [name for name in PARALLAX_SCREEN_GROUPS if name not in present_groups])
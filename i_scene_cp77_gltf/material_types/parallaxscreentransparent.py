@@ -1,6 +1,18 @@
 import bpy
 import os
 from ..main.common import *
+from ..main.node_group_library import load_node_groups, save_node_groups
+
+
+# every group create() builds inline, appended from the node group library when it has them
+PARALLAX_SCREEN_TRANSPARENT_GROUPS = [
+    'scanlines', 'n_ps_t', 'frameAdd_ps_t', 'subUV', 'newUV_ps_t', 'scroll1_ps_t',
+    'scrollUV1_ps_t', 'scrollUV1X', 'scroll2_ps_t', 'scrollUV2_ps_t', 'scrollUV2X', 'l1_ps_t',
+    'l2_ps_t', 'l3_ps_t', 'l4_ps_t', 'l1_2', 'l2_2', 'l3_2', 'l4_2', 'l1scrollspeed',
+    'l2scrollspeed', 'l3scrollspeed', 'l4scrollspeed', 'scrollMaskMask', 'finalScrollUV1',
+    'finalScrollUV2', 'finalScrollUV3', 'finalScrollUV4', 'i1_ps_t', 'i2_ps_t', 'i3_ps_t',
+    'i4_ps_t', 'm1', 'parallax_screen_trans_m2', 'parallax_screen_trans_m3', 'edgesMask', 'hsv',
+]
 
 
 class ParallaxScreenTransparent:
@@ -44,6 +56,8 @@ class ParallaxScreenTransparent:
 
     def create(self,Data,Mat):
         CurMat = Mat.node_tree
+        load_node_groups('parallaxscreentransparent', PARALLAX_SCREEN_TRANSPARENT_GROUPS)
+        present_groups = set(bpy.data.node_groups.keys())
         vers=bpy.app.version
         pBSDF=CurMat.nodes[loc('Principled BSDF')]
         sockets=bsdf_socket_names()
@@ -2153,3 +2167,5 @@ class ParallaxScreenTransparent:
         CurMat.links.new(hsv.outputs[0],pBSDF.inputs[sockets["Emission"]])
         pBSDF.inputs["Emission Strength"].default_value = 1.0
         CurMat.links.new(mul2.outputs[0],pBSDF.inputs["Alpha"])
+
+        save_node_groups('parallaxscreentransparent', [name for name in PARALLAX_SCREEN_TRANSPARENT_GROUPS if name not in present_groups])
@@ -0,0 +1,128 @@
+"""
+Imports add-on modules outside Blender.
+
+Blender's own modules (bpy, bmesh, bpy_extras, idprop, and mathutils when the standalone wheel
+isn't installed) are replaced with permissive placeholders, and the add-on's packages are
+registered without running their __init__ files, so only the module under test and its own
+imports are executed. Code paths that really touch Blender data still need Blender.
+"""
+import importlib
+import importlib.abc
+import importlib.util
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON = 'i_scene_cp77_gltf'
+
+# only exist inside Blender, these and all their submodules are stubbed
+BLENDER_MODULES = ('bpy', 'bpy_extras', 'bmesh', 'idprop', 'gpu', 'gpu_extras', 'blf')
+# also published outside Blender, the real module is used when it is installed
+STANDALONE_MODULES = ('mathutils',)
+
+
+class BlenderStub:
+    """Any attribute, call, item or base class of it is another stub, and it is falsy."""
+    def __init__(self, name='bpy'):
+        self._name = name
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return BlenderStub(f"{self._name}.{name}")
+
+    def __call__(self, *args, **kwargs):
+        # decorators such as @persistent hand back what they wrap
+        if len(args) == 1 and not kwargs and callable(args[0]):
+            return args[0]
+        return BlenderStub(f"{self._name}()")
+
+    def __getitem__(self, key):
+        return BlenderStub(f"{self._name}[{key!r}]")
+
+    def __mro_entries__(self, bases):
+        return (object,)
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return f"<stub {self._name}>"
+
+
+# attributes of these are submodules, as in Blender
+STUB_SUBMODULES = ('types', 'props', 'utils', 'path', 'app', 'handlers', 'ops', 'io_utils', 'previews')
+
+
+class _StubModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        fullname = f"{self.__name__}.{name}"
+        if fullname in sys.modules or name in STUB_SUBMODULES:
+            return importlib.import_module(fullname)
+        if self.__name__ == 'bpy.types':
+            # real classes so they can be subclassed and used with isinstance/issubclass
+            cls = type(name, (), {'__module__': 'bpy.types'})
+            setattr(self, name, cls)
+            return cls
+        return BlenderStub(fullname)
+
+
+class _StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def __init__(self, roots):
+        self.roots = roots
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname.split('.')[0] in self.roots:
+            return importlib.util.spec_from_loader(fullname, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        return _StubModule(spec.name)
+
+    def exec_module(self, module):
+        module.__path__ = []
+
+
+def _install_blender_stubs():
+    if any(isinstance(finder, _StubFinder) for finder in sys.meta_path):
+        return
+    roots = set(BLENDER_MODULES)
+    for name in STANDALONE_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            roots.add(name)
+    sys.meta_path.insert(0, _StubFinder(roots))
+
+
+def _register_packages():
+    # bare package objects, the real __init__ files register Blender classes on import
+    for directory, _, files in os.walk(os.path.join(ROOT, ADDON)):
+        if '__init__.py' not in files:
+            continue
+        rel = os.path.relpath(directory, ROOT)
+        name = rel.replace(os.sep, '.')
+        if name in sys.modules:
+            continue
+        package = types.ModuleType(name)
+        package.__path__ = [directory]
+        package.__file__ = os.path.join(directory, '__init__.py')
+        sys.modules[name] = package
+
+
+def load(module):
+    """Imports i_scene_cp77_gltf.<module>, e.g. load('collisiontools.dangles.sim.kernel')."""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    _install_blender_stubs()
+    _register_packages()
+    return importlib.import_module(f"{ADDON}.{module}")
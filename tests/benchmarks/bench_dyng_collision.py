@@ -0,0 +1,136 @@
+"""
+Dangle collision cost as the number of body shapes grows, brute-force pairs against the sweep-and-prune broad phase.
+
+    python tests/benchmarks/bench_dyng_collision.py [shapes ...]
+
+One rig of 8 chains x 8 particles with links and cone collision capsules, a spine capsule, a head sphere
+and random spheres/capsules around the chains. Each row gives the whole step and the two collision passes
+(particles, cones) per substep, best of 3 runs. Both modes are checked to give the same positions.
+"""
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from addon_loader import load  # noqa: E402
+
+kernel = load('collisiontools.dangles.sim.kernel')
+collision = load('collisiontools.dangles.sim.collision')
+transforms = load('collisiontools.dangles.sim.transforms')
+
+DT = 1 / 90.0
+CHAINS, CHAIN_LEN = 8, 8
+PASSES = ('respond_to_collisions_vectorized', 'respond_to_cone_collisions')
+
+
+def chain_bone(ang, j):
+    """Bone j of the chain hanging at angle ang, stepping out and down with its Y axis (the cone axis) along the chain."""
+    out = np.array((math.cos(ang), math.sin(ang), 0.0))
+    y = (0.02 * out - (0.0, 0.0, 0.08)) / math.hypot(0.02, 0.08)
+    x = np.cross(y, out)
+    m = np.eye(4)
+    m[:3, :3] = np.column_stack((x, y, np.cross(x, y)))
+    m[:3, 3] = (0.3 + 0.02 * j) * out + (0.0, 0.0, 1.6 - 0.08 * j)
+    return m
+
+
+def make_kernel(num_shapes, seed=0):
+    rng = np.random.default_rng(seed)
+    n = CHAINS * CHAIN_LEN
+    k = kernel.DyngKernel(n, n + 1)
+    mats = np.tile(np.eye(4), (n + 1, 1, 1))
+    for c in range(CHAINS):
+        ang = 2 * math.pi * c / CHAINS
+        for j in range(CHAIN_LEN):
+            mats[c * CHAIN_LEN + j] = chain_bone(ang, j)
+    mats[n, :3, 3] = (0.0, 0.0, 1.2)
+    k.reset_bones(mats)
+
+    j = np.arange(n) % CHAIN_LEN
+    child = np.flatnonzero(j > 0)
+    k.set_nodes([(0, n)], [3])
+    k.set_particles(is_pinned=j == 0, mass=1.0, damping=0.5, col_radius=0.015, col_height=0.02,
+                    col_axis_ls=(1.0, 0.0, 0.0), proj_type=np.where(j % 2, 1, 2))
+    k.set_links(child, child - 1, 1, 0.9, 1.1)
+    k.set_cones(child, child - 1, child % 3, 35.0, proj_type=1, col_radius=0.02)
+
+    ls_mat = np.tile(np.eye(4), (num_shapes, 1, 1))
+    for s in range(2, num_shapes):
+        q = rng.normal(size=4)
+        ls_mat[s, :3, :3] = transforms.quat_to_matrix(q / np.linalg.norm(q))
+        # a ring around the spine, where the chains hang
+        r, a = rng.uniform(0.15, 0.5), rng.uniform(0.0, 2 * math.pi)
+        ls_mat[s, :3, 3] = (r * math.cos(a), r * math.sin(a), rng.uniform(-0.7, 0.45))
+    s = np.arange(num_shapes)
+    k.set_collision_shapes(
+        np.full(num_shapes, n), (s == 0) | (s % 2 == 1),
+        np.where(s == 0, 0.15, np.where(s == 1, 0.12, rng.uniform(0.02, 0.08, num_shapes))),
+        np.where(s == 0, 0.3, np.where(s == 1, 0.0, rng.uniform(0.02, 0.1, num_shapes))),
+        ls_mat,
+    )
+    return k, mats
+
+
+def run(num_shapes, broad, reps):
+    """Best per-substep ms of the step and of each collision pass, and the positions after the last step."""
+    collision.BROAD_PHASE = broad
+    k, mats = make_kernel(num_shapes)
+    active = np.ones(k.num_tracked, dtype=bool)
+    frame = [0]
+
+    def step():
+        t = frame[0] * DT
+        m = mats.copy()
+        m[:, :3, 3] += (0.3 * math.sin(2 * t), 0.1 * math.cos(3 * t), 0.05 * math.sin(5 * t))
+        k.step(DT, DT, m, active)
+        frame[0] += 1
+
+    totals = dict.fromkeys(PASSES, 0.0)
+    originals = {name: getattr(collision, name) for name in PASSES}
+
+    def timed(name):
+        fn = originals[name]
+
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            fn(*args, **kwargs)
+            totals[name] += time.perf_counter() - t0
+        return wrapper
+
+    best = [math.inf] * (1 + len(PASSES))
+    try:
+        for name in PASSES:
+            setattr(collision, name, timed(name))
+        for _ in range(5):
+            step()
+        for _ in range(3):
+            for name in PASSES:
+                totals[name] = 0.0
+            t0 = time.perf_counter()
+            for _ in range(reps):
+                step()
+            times = [time.perf_counter() - t0] + [totals[name] for name in PASSES]
+            best = [min(b, t / reps * 1e3) for b, t in zip(best, times)]
+    finally:
+        for name, fn in originals.items():
+            setattr(collision, name, fn)
+        collision.BROAD_PHASE = True
+    return best, k.pos_ms.copy()
+
+
+def main(sizes):
+    print(f"{'shapes':>6s}  {'brute force':^32s}  {'broad phase':^32s}")
+    print(f"{'':>6s}  " + f"{'step':>10s} {'particles':>10s} {'cones':>10s}  " * 2 + " (ms/substep)")
+    for num_shapes in sizes:
+        reps = max(5, 400 // num_shapes)
+        brute, expected = run(num_shapes, False, reps)
+        broad, actual = run(num_shapes, True, reps)
+        assert np.array_equal(actual, expected), num_shapes
+        print(f'{num_shapes:6d}  ' + ' '.join(f'{t:10.2f}' for t in brute) + '  ' + ' '.join(f'{t:10.2f}' for t in broad))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [8, 32, 128, 512])
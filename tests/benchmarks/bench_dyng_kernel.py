@@ -0,0 +1,148 @@
+"""
+Per-substep cost of the dangle kernel on synthetic rigs, without Blender.
+
+    python tests/benchmarks/bench_dyng_kernel.py [particles ...]
+
+Rigs are chains of 10 particles around two body shapes (a capsule on the spine, a sphere on the head) with
+links, ellipsoids, cones and cone collision capsules. Each solver pass is timed separately, best of 3 runs.
+The last column is the whole step with every cone level solved as a NumPy batch (SMALL_CONE_LEVEL = 0),
+which is what a single chain paid before the small level fallback.
+"""
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from addon_loader import load  # noqa: E402
+
+kernel = load('collisiontools.dangles.sim.kernel')
+constraints = load('collisiontools.dangles.sim.constraints')
+collision = load('collisiontools.dangles.sim.collision')
+
+DT = 1 / 90.0
+CHAIN_LEN = 10
+PASSES = (
+    ('links', constraints, 'satisfy_dyng_links_vectorized'),
+    ('ellipsoids', constraints, 'satisfy_dyng_ellipsoids_vectorized'),
+    ('cones', constraints, 'satisfy_pendulums_vectorized'),
+    ('collisions', collision, 'respond_to_collisions_vectorized'),
+    ('cone coll.', collision, 'respond_to_cone_collisions'),
+)
+
+
+def chain_bone(ang, j):
+    """Bone j of the chain hanging at angle ang, stepping out and down with its Y axis (the cone axis) along the chain."""
+    out = np.array((math.cos(ang), math.sin(ang), 0.0))
+    y = (0.02 * out - (0.0, 0.0, 0.08)) / math.hypot(0.02, 0.08)
+    x = np.cross(y, out)
+    m = np.eye(4)
+    m[:3, :3] = np.column_stack((x, y, np.cross(x, y)))
+    m[:3, 3] = (0.3 + 0.02 * j) * out + (0.0, 0.0, 1.6 - 0.08 * j)
+    return m
+
+
+def make_kernel(num_particles):
+    chains = max(1, num_particles // CHAIN_LEN)
+    n = chains * CHAIN_LEN
+    k = kernel.DyngKernel(n, n + 2)
+    mats = np.tile(np.eye(4), (n + 2, 1, 1))
+    for c in range(chains):
+        ang = 2 * math.pi * c / chains
+        for j in range(CHAIN_LEN):
+            mats[c * CHAIN_LEN + j] = chain_bone(ang, j)
+    mats[n, :3, 3] = (0.0, 0.0, 1.2)
+    mats[n + 1, :3, 3] = (0.0, 0.0, 1.7)
+    k.reset_bones(mats)
+
+    j = np.arange(n) % CHAIN_LEN
+    child = np.flatnonzero(j > 0)
+    k.set_nodes([(0, n // 2), (n // 2, n)] if chains > 1 else [(0, n)], [4, 2] if chains > 1 else [4])
+    k.set_particles(is_pinned=j == 0, mass=1.0, damping=0.5, col_radius=0.015, col_height=0.02,
+                    col_axis_ls=(1.0, 0.0, 0.0), proj_type=np.where(j % 2, 1, 2))
+    k.set_links(child, child - 1, child % 4, 0.95, 1.1)
+    k.set_cones(child, child - 1, child % 3, 30.0, proj_type=1, col_radius=0.02)
+    ell = np.flatnonzero(j % 3 == 2)
+    k.set_ellipsoids(ell, ell - j[ell], 0.1 * j[ell], 1.0, 1.3)
+    k.set_collision_shapes([n, n + 1], [True, False], [0.15, 0.12], [0.3, 0.0])
+    return k, mats
+
+
+def stepper(k, mats):
+    active = np.ones(k.num_tracked, dtype=bool)
+    frame = [0]
+
+    def step():
+        t = frame[0] * DT
+        m = mats.copy()
+        m[:, :3, 3] += (0.3 * math.sin(2 * t), 0.1 * math.cos(3 * t), 0.0)
+        k.step(DT, DT, m, active)
+        frame[0] += 1
+    return step
+
+
+def timed(totals, name, fn):
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        result = fn(*args, **kwargs)
+        totals[name] += time.perf_counter() - t0
+        return result
+    return wrapper
+
+
+def measure(num_particles, reps):
+    """Best per-substep time of the whole step and of each pass, in ms."""
+    step = stepper(*make_kernel(num_particles))
+    for _ in range(5):
+        step()
+    best = {}
+    originals = [(name, module, attr, getattr(module, attr)) for name, module, attr in PASSES]
+    try:
+        for _ in range(3):
+            totals = dict.fromkeys([name for name, _, _ in PASSES], 0.0)
+            for name, module, attr, fn in originals:
+                setattr(module, attr, timed(totals, name, fn))
+            t0 = time.perf_counter()
+            for _ in range(reps):
+                step()
+            totals['step'] = time.perf_counter() - t0
+            for name, total in totals.items():
+                best[name] = min(best.get(name, math.inf), total / reps * 1e3)
+    finally:
+        for _, module, attr, fn in originals:
+            setattr(module, attr, fn)
+    return best
+
+
+def step_only(num_particles, reps):
+    step = stepper(*make_kernel(num_particles))
+    for _ in range(5):
+        step()
+    runs = []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            step()
+        runs.append((time.perf_counter() - t0) / reps * 1e3)
+    return min(runs)
+
+
+def main(sizes):
+    names = ['step'] + [name for name, _, _ in PASSES]
+    print(f"{'particles':>9s} " + ' '.join(f'{name:>10s}' for name in names) + f" {'batched':>10s}   (ms/substep)")
+    for num in sizes:
+        reps = max(10, 2000 // num)
+        best = measure(num, reps)
+        small = constraints.SMALL_CONE_LEVEL
+        constraints.SMALL_CONE_LEVEL = 0
+        try:
+            batched = step_only(num, reps)
+        finally:
+            constraints.SMALL_CONE_LEVEL = small
+        print(f'{num:9d} ' + ' '.join(f'{best[name]:10.3f}' for name in names) + f' {batched:10.3f}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 1000])
@@ -0,0 +1,55 @@
+"""
+JALI co-articulation rules and dominance blending over long voice lines, per-event curves against the columnar timeline.
+
+    python tests/benchmarks/bench_jali_timeline.py [phonemes ...]
+
+Random phoneme sequences with stress markers, word indices and silences, blended at 30 fps. The reference
+is the previous rule passes (quadratic pause substitution and duplicate merge) and one dense dominance curve
+per event. Both paths are checked to give identical curves, times are the best of 3 runs.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from addon_loader import load  # noqa: E402
+from test_jali_timeline import ReferenceEngine, random_events, reference_blend  # noqa: E402
+
+jali_core = load('animtools.jali_core')
+
+
+def reference(events):
+    events = ReferenceEngine().apply_rules(events)
+    return reference_blend(jali_core.DominanceBlender(30.0), events, events[-1].end + 0.5)
+
+
+def columnar(events):
+    events = jali_core.CoarticulationEngine().apply_rules(events)
+    return jali_core.DominanceBlender(30.0).blend_jali_parameters(events, events[-1].end + 0.5)
+
+
+def measure(fn, count):
+    """Best of 3, the rules edit the events in place so each run gets a fresh sequence."""
+    times = []
+    for _ in range(3):
+        events = random_events(0, count)
+        t0 = time.perf_counter()
+        result = fn(events)
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def main(sizes):
+    print(f"{'phonemes':>9s} {'frames':>8s} {'per event':>10s} {'columnar':>10s}   (s, rules + blend)")
+    for count in sizes:
+        t_old, expected = measure(reference, count)
+        t_new, actual = measure(columnar, count)
+        for e, a in zip(expected, actual):
+            assert np.array_equal(e, a), count
+        print(f'{count:9d} {len(actual[0]):8d} {t_old:10.3f} {t_new:10.3f}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [500, 3000, 10000])
@@ -0,0 +1,79 @@
+"""
+Parse + depot path normalization of json files, before and after the text pass.
+
+    python tests/benchmarks/bench_json_normalize.py [file.json ...]
+
+Times every bundled resources/*.json (or the files given) and a synthetic streaming sector
+built from resources/base.nodeData.json, best of N runs.
+"""
+import glob
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from addon_loader import ROOT, load  # noqa: E402
+
+JSONTool = load('jsontool').JSONTool
+
+
+def reference_normalize(data):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            data[key] = reference_normalize(value)
+    elif isinstance(data, list):
+        for i in range(len(data)):
+            data[i] = reference_normalize(data[i])
+    elif isinstance(data, str):
+        if data[0:4] == 'base' or data[0:3] == 'ep1' or data[1:3] == ':\\':
+            data = data.replace('\\', os.sep)
+    return data
+
+
+def synthetic_sector(nodes):
+    with open(os.path.join(ROOT, 'i_scene_cp77_gltf', 'resources', 'base.nodeData.json')) as file:
+        node_data = json.load(file)
+    sector = {
+        'Header': {'WolvenKitVersion': '8.14'},
+        'Data': {'RootChunk': {
+            'nodeData': {'Data': [dict(node_data, NodeIndex=i) for i in range(nodes * 2)]},
+            'nodes': [{
+                'HandleId': str(i),
+                'Data': {
+                    '$type': 'worldStaticMeshNode',
+                    'debugName': {'$value': f'mesh_{i} \\"base\\\\quoted\\"'},
+                    'mesh': {'DepotPath': {'$type': 'ResourcePath', '$storage': 'string',
+                                           '$value': f'base\\environment\\mesh_{i}.mesh'}},
+                    'tags': ['base\\a\\b', 'ep1\\c', ['base\\n\\x']],
+                },
+            } for i in range(nodes)],
+        }},
+    }
+    return json.dumps(sector, indent=2)
+
+
+def best(fn, text):
+    repeat = 3 if len(text) > 1 << 20 else max(5, min(200, (4 << 20) // len(text)))
+    return min(timeit.repeat(lambda: fn(text), number=1, repeat=repeat)) * 1e3
+
+
+def main(paths):
+    cases = []
+    for path in paths or sorted(glob.glob(os.path.join(ROOT, 'i_scene_cp77_gltf', 'resources', '*.json'))):
+        with open(path, 'r') as file:
+            cases.append((os.path.basename(path), file.read()))
+    for nodes in (100, 1000, 10000):
+        cases.append((f'synthetic sector, {nodes} nodes', synthetic_sector(nodes)))
+
+    print(f"{'file':42s} {'size':>9s} {'json.loads':>11s} {'before':>9s} {'after':>9s}   (ms)")
+    for name, text in cases:
+        assert JSONTool.parse(text) == reference_normalize(json.loads(text)), name
+        loads = best(json.loads, text)
+        before = best(lambda t: reference_normalize(json.loads(t)), text)
+        after = best(JSONTool.parse, text)
+        print(f"{name[:42]:42s} {len(text) / 1024:7.0f}KB {loads:11.3f} {before:9.3f} {after:9.3f}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,86 @@
+"""
+NPZ vertex group weight assignment, one add per (vertex, group) pair against one add per distinct weight of each group.
+
+    python tests/benchmarks/bench_npz_weights.py [vertices ...]
+
+The bundled character NPZs are run first, then synthetic meshes of the given vertex counts with 4
+influences per vertex over 128 groups and 8-bit weights. Vertex groups are stand-ins that record the
+weights, so add() calls are counted but cost nothing like they do in Blender, where each is a call
+into the mesh. Both paths are checked to give the same weights, times are the best of 3 runs.
+"""
+import glob
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from addon_loader import ROOT, load  # noqa: E402
+
+npz_import = load('importers.npz_import')
+
+
+class VertexGroup:
+    calls = 0
+
+    def __init__(self):
+        self.weights = {}
+
+    def add(self, index, weight, type):
+        VertexGroup.calls += 1
+        for i in index:
+            self.weights[i] = weight
+
+
+def per_vertex(groups, v_indices, g_indices, values):
+    """The previous assignment, one add per (vertex, group) pair."""
+    vert_weights = defaultdict(list)
+    for v_idx, g_idx, val in zip(v_indices, g_indices, values):
+        vert_weights[int(v_idx)].append((int(g_idx), float(val)))
+    for v_idx, weights in vert_weights.items():
+        for g_idx, val in weights:
+            if g_idx < len(groups):
+                groups[g_idx].add([v_idx], val, 'REPLACE')
+
+
+def measure(fn, num_groups, *weights):
+    times = []
+    for _ in range(3):
+        groups = [VertexGroup() for _ in range(num_groups)]
+        VertexGroup.calls = 0
+        t0 = time.perf_counter()
+        fn(groups, *weights)
+        times.append(time.perf_counter() - t0)
+    return min(times), VertexGroup.calls, [group.weights for group in groups]
+
+
+def bundled():
+    for path in sorted(glob.glob(os.path.join(ROOT, 'i_scene_cp77_gltf', 'resources', 'characters', '*.npz'))):
+        data = np.load(path)
+        for key in data.files:
+            if key.endswith('w_values'):
+                p = key[:-len('w_values')]
+                yield (os.path.basename(path)[:-4] + (f' {p.rstrip("_")}' if p else ''), len(data[f'{p}vg_names']),
+                       data[f'{p}w_v_indices'], data[f'{p}w_g_indices'], data[f'{p}w_values'])
+
+
+def synthetic(num_verts, num_groups=128, seed=0):
+    rng = np.random.default_rng(seed)
+    g_indices = np.concatenate([rng.choice(num_groups, 4, replace=False) for _ in range(num_verts)])
+    values = (rng.integers(1, 256, 4 * num_verts) / 255).astype(np.float32)
+    return f'{num_verts} vertices', num_groups, np.repeat(np.arange(num_verts), 4), g_indices, values
+
+
+def main(sizes):
+    print(f"{'mesh':>36s} {'weights':>8s} {'per vertex':>11s} {'adds':>8s} {'per weight':>11s} {'adds':>8s}   (s)")
+    for name, num_groups, *weights in [*bundled(), *map(synthetic, sizes)]:
+        t_old, calls_old, expected = measure(per_vertex, num_groups, *weights)
+        t_new, calls_new, actual = measure(npz_import._assign_weights, num_groups, *weights)
+        assert actual == expected, name
+        print(f'{name[-36:]:>36s} {len(weights[2]):8d} {t_old:11.3f} {calls_old:8d} {t_new:11.3f} {calls_new:8d}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
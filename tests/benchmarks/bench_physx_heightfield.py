@@ -0,0 +1,100 @@
+"""
+Reading and writing PhysX heightfield sample blocks, the per-sample struct loops against the NumPy codec.
+
+    python tests/benchmarks/bench_physx_heightfield.py [size ...]
+
+A synthetic size x size field (1024 by default) with random heights and every material byte value,
+tessellation and reserved bits included. Times are the best of 3 runs.
+"""
+import base64
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from addon_loader import load  # noqa: E402
+
+codec = load('main.physx_heightfield')
+PhysX = load('importers.import_heightmap').PhysX
+PhysXWriter = load('exporters.physxHeightfieldWriter').PhysXWriter
+
+
+def reference_read(data, count):
+    """BinaryReader's read_int16 / read_byte per sample, as the importer did before the codec."""
+    samples, position = [], 0
+    for _ in range(count):
+        height = struct.unpack('h', data[position:position + 2])[0]
+        m0 = struct.unpack('B', data[position + 2:position + 3])[0]
+        m1 = struct.unpack('B', data[position + 3:position + 4])[0]
+        position += 4
+        samples.append({"height": height, "material_index_0": m0, "material_index_1": m1})
+    return samples
+
+
+def reference_write(samples):
+    """BinaryWriter's write_int16 / write_byte per sample, as the exporter did before the codec."""
+    out = bytearray()
+    for s in samples:
+        out.extend(struct.pack("h", int(s["height"])))
+        out.extend(struct.pack("B", int(s["material_index_0"])))
+        out.extend(struct.pack("B", int(s["material_index_1"])))
+    return bytes(out)
+
+
+def synthetic(size):
+    rng = np.random.default_rng(0)
+    raw = np.empty(size * size, dtype=codec.RAW_SAMPLE_DTYPE)
+    raw["height"] = rng.integers(-32768, 32768, raw.size)
+    raw["material_index_0"] = rng.integers(0, 256, raw.size)
+    raw["material_index_1"] = rng.integers(0, 256, raw.size)
+    return raw.tobytes()
+
+
+def heightfield(samples, size):
+    return {
+        "version": 2, "rows": size, "columns": size, "row_limit": size - 2, "col_limit": size - 2,
+        "nb_columns": size, "thickness": -1.0, "convex_edge_threshold": 0.0, "flags": 1, "format": 1,
+        "min_max_bounds": {"min": {"x": 0.0, "y": -32768.0, "z": 0.0}, "max": {"x": size - 1.0, "y": 32767.0, "z": size - 1.0}},
+        "sample_stride": 4, "min_height": -32768.0, "max_height": 32767.0, "samples": samples,
+    }
+
+
+def best(fn, repeat=3):
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - t0)
+    return min(runs) * 1e3, result
+
+
+def main(sizes):
+    print(f"{'size':>10s} {'step':24s} {'loop':>10s} {'codec':>10s} {'speedup':>8s}   (ms)")
+    for size in sizes:
+        count = size * size
+        data = synthetic(size)
+
+        loop_read, dicts = best(lambda: reference_read(data, count))
+        codec_read, samples = best(lambda: codec.decode_samples(data))
+        loop_write, written = best(lambda: reference_write(dicts))
+        codec_write, encoded = best(lambda: codec.encode_samples(samples))
+        assert written == encoded == data
+
+        text = PhysXWriter.write([heightfield(samples, size)])
+        assert base64.b64decode(text).endswith(data)
+        file_write, _ = best(lambda: PhysXWriter.write([heightfield(samples, size)]))
+        file_read, loaded = best(lambda: PhysX.load(text))
+        assert codec.encode_samples(loaded[0]["samples"]) == data
+
+        label = f'{size}x{size}'
+        for step, loop, new in (('decode samples', loop_read, codec_read), ('encode samples', loop_write, codec_write)):
+            print(f'{label:>10s} {step:24s} {loop:10.1f} {new:10.1f} {loop / new:7.0f}x')
+        print(f"{label:>10s} {'PhysXWriter.write (b64)':24s} {'':>10s} {file_write:10.1f}")
+        print(f"{label:>10s} {'PhysX.load (b64)':24s} {'':>10s} {file_read:10.1f}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1024])
@@ -0,0 +1,131 @@
+"""
+Terrain collision export of a synthetic 512x512 heightfield tile, without Blender.
+
+    python tests/benchmarks/bench_terrain_collision.py [quads ...]
+
+A bumpy n x n quad tile (2 m quads, 2 n² triangles) gives an (n + 2) x (n + 2) heightfield, the default
+n = 510 is the 512x512 tile. The mesh and three random 2048px multilayer masks stand in for the Blender
+object. Rows are the whole generate_terrain_collision (including mask setup and PhysXWriter), one grid
+of downward rays and the material indices of one triangle over all masks. The mask column is compared
+with the previous per-sample region mean loop, which the export ran twice per sample. Ray casts can't be
+compared here, the previous code made five obj.ray_cast calls per sample inside Blender.
+Times are the best of 3 runs.
+"""
+import os
+import sys
+import time
+import types
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from addon_loader import load  # noqa: E402
+
+terrain = load('exporters.terrainCollisions_export')
+
+
+def make_terrain(n, seed=0):
+    """n x n quad grid over [0, 2n] with a bumpy height, triangulated."""
+    rng = np.random.default_rng(seed)
+    g = np.linspace(0, 2 * n, n + 1)
+    X, Y = np.meshgrid(g, g)
+    Z = 5 * np.sin(X / 7) * np.cos(Y / 5) + rng.normal(0, 0.3, X.shape) + 10
+    co = np.stack([X, Y, Z], -1).reshape(-1, 3).astype(np.float32)
+    i = (np.arange(n)[:, None] * (n + 1) + np.arange(n)[None, :]).ravel()
+    tris = np.concatenate([np.stack([i, i + 1, i + n + 2], 1), np.stack([i, i + n + 2, i + n + 1], 1)])
+    return co, tris
+
+
+class Vertices:
+    def __init__(self, co):
+        self.co = co
+
+    def __len__(self):
+        return len(self.co)
+
+    def foreach_get(self, attr, buf):
+        buf[:] = self.co.ravel()
+
+
+def make_object(n, mask_size, num_masks, seed=0):
+    co, tris = make_terrain(n, seed)
+    rng = np.random.default_rng(seed)
+    images = [types.SimpleNamespace(size=(mask_size, mask_size),
+                                    pixels=(rng.random(mask_size * mask_size * 4) > 0.5).astype(np.float32))
+              for _ in range(num_masks)]
+    obj = types.SimpleNamespace(name='terrain', data=types.SimpleNamespace(vertices=Vertices(co)),
+                                matrix_world=np.eye(4),
+                                material_slots=[types.SimpleNamespace(material=object())])
+    return obj, co.astype(np.float64)[tris], images
+
+
+def sample_region(cache, x_start, x_end, y_start, y_end):
+    """The previous MaskCache.sample_region, one NumPy mean per region."""
+    x_start, y_start = max(0, x_start), max(0, y_start)
+    x_end, y_end = min(cache.size[0], x_end), min(cache.size[1], y_end)
+    if x_start >= x_end or y_start >= y_end:
+        return None
+    return cache.data[y_start:y_end, x_start:x_end].mean()
+
+
+def per_sample_indices(caches, x_start, x_end, y_start, y_end):
+    """The previous per-sample walk, counting down until a mask averages above 127."""
+    mat = np.zeros((len(x_start), len(y_start)), dtype=np.int64)
+    for r in range(len(x_start)):
+        for c in range(len(y_start)):
+            for i, cache in enumerate(caches):
+                value = sample_region(cache, int(x_start[r]), int(x_end[r]), int(y_start[c]), int(y_end[c]))
+                if value is not None and value > 127:
+                    mat[r, c] = len(caches) - i
+                    break
+    return mat
+
+
+def best_of_3(fn, *args):
+    times = []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def export(obj, tris, images):
+    originals = terrain.get_masks, terrain.mesh_triangles
+    terrain.get_masks = lambda mat: images
+    terrain.mesh_triangles = lambda o: tris
+    try:
+        node = {"Data": {"heightfieldGeometry": {}}}
+        terrain.generate_terrain_collision(obj, node)
+    finally:
+        terrain.get_masks, terrain.mesh_triangles = originals
+    return node
+
+
+def main(sizes, mask_size=2048, num_masks=3):
+    print(f"{'quads':>6s} {'samples':>9s} {'triangles':>10s} {'export':>8s} {'ray grid':>9s} "
+          f"{'masks, per sample':>18s} {'masks, grid':>12s}   (s)")
+    for n in sizes:
+        obj, tris, images = make_object(n, mask_size, num_masks)
+        t_export, node = best_of_3(export, obj, tris, images)
+        assert node["Data"]["heightfieldGeometry"]["Bytes"]
+
+        # the center grid of the export, a ray hits the tile everywhere
+        xs = np.linspace(0.0, 2.0 * n, n + 2)
+        t_rays, (hit, z) = best_of_3(terrain.raycast_down_grid, tris, xs, xs)
+        assert hit.all() and (z > 0).all()
+
+        # t0 regions of a quad grid, as generate_terrain_collision lays them out
+        caches = [terrain.MaskCache(image) for image in images]
+        half = -(-mask_size // (2 * n))
+        center = np.ceil(mask_size * (1 - np.linspace(0.0, 1.0, n + 2))).astype(np.int64)
+        regions = center - half, center, center, center + half
+        t_old, expected = best_of_3(per_sample_indices, caches, *regions)
+        t_new, actual = best_of_3(terrain.mask_material_indices, caches, *(r[:, None] if i < 2 else r[None, :]
+                                                                            for i, r in enumerate(regions)))
+        assert np.array_equal(actual, expected)
+        print(f'{n:6d} {(n + 2) ** 2:9d} {len(tris):10d} {t_export:8.2f} {t_rays:9.3f} {t_old:18.2f} {t_new:12.3f}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [126, 254, 510])
@@ -0,0 +1,160 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from addon_loader import load
+
+kernel = load('collisiontools.dangles.sim.kernel')
+collision = load('collisiontools.dangles.sim.collision')
+transforms = load('collisiontools.dangles.sim.transforms')
+
+DT = 1 / 30.0
+CHAINS, CHAIN_LEN = 8, 8
+
+
+def random_rotation(rng):
+    q = rng.normal(size=4)
+    return transforms.quat_to_matrix(q / np.linalg.norm(q))
+
+
+def chain_bone(ang, j):
+    """Bone j of the chain hanging at angle ang, stepping out and down with its Y axis (the cone axis) along the chain."""
+    out = np.array((math.cos(ang), math.sin(ang), 0.0))
+    y = (0.02 * out - (0.0, 0.0, 0.08)) / math.hypot(0.02, 0.08)
+    x = np.cross(y, out)
+    m = np.eye(4)
+    m[:3, :3] = np.column_stack((x, y, np.cross(x, y)))
+    m[:3, 3] = (0.3 + 0.02 * j) * out + (0.0, 0.0, 1.6 - 0.08 * j)
+    return m
+
+
+def rigs_kernel(num_shapes, num_rigs=1, seed=0):
+    """
+    num_rigs rigs of 8 chains, particles first and one body bone per rig after them.
+
+    Each rig gets a spine capsule, a head sphere and num_shapes - 2 random spheres and capsules around the
+    chains, as one kernel the way DyngBatch lays several rigs out.
+    """
+    rng = np.random.default_rng(seed)
+    per_rig = CHAINS * CHAIN_LEN
+    n = per_rig * num_rigs
+    k = kernel.DyngKernel(n, n + num_rigs, num_rigs)
+    k.tracked_rig[:n] = np.repeat(np.arange(num_rigs), per_rig)
+    k.tracked_rig[n:] = np.arange(num_rigs)
+
+    mats = np.tile(np.eye(4), (n + num_rigs, 1, 1))
+    for r in range(num_rigs):
+        for c in range(CHAINS):
+            ang = 2 * math.pi * c / CHAINS
+            for j in range(CHAIN_LEN):
+                i = r * per_rig + c * CHAIN_LEN + j
+                mats[i] = chain_bone(ang, j)
+                mats[i, 0, 3] += 2.0 * r
+        mats[n + r, :3, 3] = (2.0 * r, 0.0, 1.2)
+    k.reset_bones(mats)
+
+    j = np.arange(n) % CHAIN_LEN
+    child = np.flatnonzero(j > 0)
+    k.set_nodes([(r * per_rig, (r + 1) * per_rig) for r in range(num_rigs)], [3] * num_rigs, range(num_rigs))
+    k.set_particles(is_pinned=j == 0, mass=1.0, damping=0.5, col_radius=0.015, col_height=0.02,
+                    col_axis_ls=(1.0, 0.0, 0.0), proj_type=np.where(j % 2, 1, 2))
+    k.set_links(child, child - 1, 1, 0.9, 1.1)
+    k.set_cones(child, child - 1, child % 3, 35.0, proj_type=1, col_radius=0.02)
+
+    bone, rig, capsule, radius, height, ls_mat = [], [], [], [], [], []
+    for r in range(num_rigs):
+        for s in range(num_shapes):
+            m = np.eye(4)
+            if s >= 2:
+                m[:3, :3] = random_rotation(rng)
+                # a ring around the spine, where the chains hang
+                ring, ang = rng.uniform(0.15, 0.5), rng.uniform(0.0, 2 * math.pi)
+                m[:3, 3] = (ring * math.cos(ang), ring * math.sin(ang), rng.uniform(-0.7, 0.45))
+            bone.append(n + r)
+            rig.append(r)
+            capsule.append(s == 0 or s % 2 == 1)
+            radius.append(0.15 if s == 0 else 0.12 if s == 1 else rng.uniform(0.02, 0.08))
+            height.append(0.3 if s == 0 else 0.0 if s == 1 else rng.uniform(0.02, 0.1))
+            ls_mat.append(m)
+    k.set_collision_shapes(bone, capsule, radius, height, ls_mat, rig)
+    return k, mats
+
+
+def simulate(k, mats, frames):
+    active = np.ones(k.num_tracked, dtype=bool)
+    out = []
+    for f in range(frames):
+        t = f * DT
+        turn = np.eye(4)
+        turn[:3, :3] = transforms.quat_to_matrix([math.cos(0.2 * math.sin(t)), 0.0, 0.0, math.sin(0.2 * math.sin(t))])
+        turn[:3, 3] = (0.3 * math.sin(2 * t), 0.1 * math.cos(3 * t), 0.05 * math.sin(5 * t))
+        m = turn @ mats
+        k.step(DT, DT, m, active)
+        out.append(k.pos_ms.copy())
+    return np.array(out)
+
+
+def brute_force_pairs(sim, row_rigs, row_lo, row_hi, shape_lo, shape_hi):
+    rows, shapes = collision._rig_pairs(sim, row_rigs)
+    keep = (shape_lo[shapes] <= row_hi[rows]).all(axis=1) & (row_lo[rows] <= shape_hi[shapes]).all(axis=1)
+    return rows[keep], shapes[keep]
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_candidate_pairs_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    num_rigs = int(rng.integers(1, 4))
+    num_rows, num_shapes = int(rng.integers(0, 80)), int(rng.integers(0, 60))
+    # some shapes share bounds, some are flat or far wider than the rest
+    grid = 0.25 if seed % 2 else 0.0
+    shape_lo = rng.uniform(-1.0, 1.0, (num_shapes, 3))
+    if grid:
+        shape_lo = np.round(shape_lo / grid) * grid
+    shape_hi = shape_lo + rng.choice([0.0, 0.1, 0.3, 2.0], (num_shapes, 3))
+    row_lo = rng.uniform(-1.2, 1.2, (num_rows, 3))
+    if grid:
+        row_lo = np.round(row_lo / grid) * grid
+    row_hi = row_lo + rng.choice([0.0, 0.05, 0.25], (num_rows, 3))
+    sim = SimpleNamespace(num_rigs=num_rigs, shape_rig=rng.integers(0, num_rigs, num_shapes).astype(np.int32),
+                          shape_radius=np.zeros(num_shapes, dtype=np.float32))
+    row_rigs = rng.integers(0, num_rigs, num_rows).astype(np.int32)
+
+    rows, shapes = collision._candidate_pairs(sim, row_rigs, row_lo, row_hi, shape_lo, shape_hi)
+    expected_rows, expected_shapes = brute_force_pairs(sim, row_rigs, row_lo, row_hi, shape_lo, shape_hi)
+    # same pairs in the same (shape-major) order, the pushes are summed in that order
+    assert rows.tolist() == expected_rows.tolist()
+    assert shapes.tolist() == expected_shapes.tolist()
+
+
+@pytest.mark.parametrize('num_shapes, num_rigs', [(2, 1), (16, 1), (48, 1), (16, 3), (48, 2)])
+def test_broad_phase_matches_brute_force(monkeypatch, num_shapes, num_rigs):
+    frames = 8
+    monkeypatch.setattr(collision, 'BROAD_PHASE', False)
+    expected = simulate(*rigs_kernel(num_shapes, num_rigs), frames)
+    monkeypatch.setattr(collision, 'BROAD_PHASE', True)
+    actual = simulate(*rigs_kernel(num_shapes, num_rigs), frames)
+    # bit-identical, the surviving pairs are applied in the brute-force order
+    np.testing.assert_array_equal(actual, expected)
+    assert np.isfinite(actual).all()
+
+
+def test_extra_shapes_change_the_result():
+    # the random shapes sit where the chains swing, so the comparison above exercises real contacts
+    few = simulate(*rigs_kernel(2), 8)
+    many = simulate(*rigs_kernel(48), 8)
+    assert np.abs(few - many).max() > 1e-3
+
+
+def test_rigs_only_collide_with_their_own_shapes():
+    k, mats = rigs_kernel(16, num_rigs=2)
+    alone, _ = rigs_kernel(16, num_rigs=1)
+    per_rig = CHAINS * CHAIN_LEN
+    # move rig 1 onto rig 0, each rig must still see only its own shapes
+    mats[per_rig:2 * per_rig, :3, 3] -= (2.0, 0.0, 0.0)
+    mats[-1, :3, 3] -= (2.0, 0.0, 0.0)
+    k.reset_bones(mats)
+    shared = simulate(k, mats, 12)
+    solo = simulate(alone, rigs_kernel(16, num_rigs=1)[1], 12)
+    np.testing.assert_array_equal(shared[:, :per_rig], solo[:, :per_rig])
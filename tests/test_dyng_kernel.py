@@ -0,0 +1,324 @@
+import math
+import types
+
+import numpy as np
+import pytest
+
+from addon_loader import load
+
+kernel = load('collisiontools.dangles.sim.kernel')
+constraints = load('collisiontools.dangles.sim.constraints')
+transforms = load('collisiontools.dangles.sim.transforms')
+core = load('collisiontools.dangles.sim.core')
+batch = load('collisiontools.dangles.sim.batch')
+
+DT = 1 / 90.0
+
+
+def chain_bone(ang, j):
+    """Bone j of the chain hanging at angle ang, stepping out and down with its Y axis (the cone axis) along the chain."""
+    out = np.array((math.cos(ang), math.sin(ang), 0.0))
+    y = (0.02 * out - (0.0, 0.0, 0.08)) / math.hypot(0.02, 0.08)
+    x = np.cross(y, out)
+    m = np.eye(4)
+    m[:3, :3] = np.column_stack((x, y, np.cross(x, y)))
+    m[:3, 3] = (0.3 + 0.02 * j) * out + (0.0, 0.0, 1.6 - 0.08 * j)
+    return m
+
+
+def chain_kernel(num_chains, chain_len=10, links=True, ellipsoids=True, cones=True, shapes=True, iterations=(4, 2)):
+    """num_chains hanging chains around two body bones (spine, head), pinned at their first particle."""
+    n = num_chains * chain_len
+    k = kernel.DyngKernel(n, n + 2)
+    mats = np.tile(np.eye(4), (n + 2, 1, 1))
+    for c in range(num_chains):
+        ang = 2 * math.pi * c / num_chains
+        for j in range(chain_len):
+            mats[c * chain_len + j] = chain_bone(ang, j)
+    mats[n, :3, 3] = (0.0, 0.0, 1.2)
+    mats[n + 1, :3, 3] = (0.0, 0.0, 1.7)
+    k.reset_bones(mats)
+
+    j = np.arange(n) % chain_len
+    child = np.flatnonzero(j > 0)
+    bounds = np.linspace(0, num_chains, len(iterations) + 1).astype(int) * chain_len
+    k.set_nodes(list(zip(bounds[:-1], bounds[1:])), iterations)
+    k.set_particles(is_pinned=j == 0, mass=1.0, damping=0.5, col_radius=0.015, col_height=0.02,
+                    col_axis_ls=(1.0, 0.0, 0.0), proj_type=np.where(j % 2, 1, 2))
+    if links:
+        k.set_links(child, child - 1, child % 4, 0.95, 1.1)
+    if cones:
+        k.set_cones(child, child - 1, child % 3, 30.0, proj_type=1, col_radius=0.02)
+    if ellipsoids:
+        ell = np.flatnonzero(j % 3 == 2)
+        k.set_ellipsoids(ell, ell - j[ell], 0.1 * j[ell], 1.0, 1.3)
+    if shapes:
+        k.set_collision_shapes([n, n, n + 1], [True, True, False], [0.15, 0.1, 0.12], [0.3, 0.2, 0.0])
+    return k, mats
+
+
+def animated(mats, frame):
+    m = mats.copy()
+    t = frame / 90.0
+    m[:, :3, 3] += (0.3 * math.sin(2 * t), 0.1 * math.cos(3 * t), 0.0)
+    return m
+
+
+def run(k, mats, frames, start=0, **kwargs):
+    active = np.ones(k.num_tracked, dtype=bool)
+    for f in range(start, start + frames):
+        k.step(DT, DT, animated(mats, f), active, **kwargs)
+
+
+def solve_cones(k, small_level, monkeypatch, sequential=False):
+    monkeypatch.setattr(constraints, 'SMALL_CONE_LEVEL', small_level)
+    saved = k.pos_ms.copy()
+    cs = k._all_set
+    if sequential:
+        for ci, (p, a) in enumerate(zip(cs.cone_idx.tolist(), cs.cone_attach.tolist())):
+            constraints._satisfy_pendulum(k, cs, ci, p, a, ci)
+    else:
+        constraints.satisfy_pendulums_vectorized(k, cs)
+    solved = k.pos_ms.copy()
+    k.pos_ms[:] = saved
+    return solved
+
+
+@pytest.mark.parametrize('num_chains', [1, 3, 12])
+def test_cone_paths_agree(monkeypatch, num_chains):
+    k, mats = chain_kernel(num_chains)
+    run(k, mats, 20)
+    # pull the particles off the solved pose so every cone has work to do
+    k.pos_ms[:k.num_particles] += np.random.default_rng(0).normal(0.0, 0.05, (k.num_particles, 3))
+
+    batched = solve_cones(k, 0, monkeypatch)
+    scalar = solve_cones(k, 1 << 30, monkeypatch)
+    sequential = solve_cones(k, 0, monkeypatch, sequential=True)
+    assert not np.allclose(batched, k.pos_ms)
+    np.testing.assert_allclose(scalar, batched, atol=1e-6)
+    np.testing.assert_allclose(sequential, batched, atol=1e-6)
+
+
+def test_cone_levels_follow_dependencies():
+    # a chain needs one level per link, parallel chains share them
+    idx = np.array([1, 2, 3, 11, 12, 13], dtype=np.int32)
+    levels = constraints.schedule_cone_levels(idx, idx - 1)
+    assert [sorted(level.tolist()) for level in levels] == [[0, 3], [1, 4], [2, 5]]
+    # a cone reading a particle an earlier cone writes waits for it, one writing an earlier read goes after it
+    levels = constraints.schedule_cone_levels(np.array([5, 7, 4], dtype=np.int32), np.array([4, 5, 3], dtype=np.int32))
+    assert [level.tolist() for level in levels] == [[0], [1, 2]]
+
+
+def test_pinned_particles_follow_their_bones():
+    k, mats = chain_kernel(3)
+    run(k, mats, 30)
+    pinned = ~k.is_free[:k.num_particles]
+    expected = animated(mats, 29)[:k.num_particles, :3, 3][pinned]
+    np.testing.assert_allclose(k.pos_ms[:k.num_particles][pinned], expected, atol=1e-5)
+
+
+def test_rest_pose_without_forces_is_kept():
+    k, mats = chain_kernel(3, links=False, ellipsoids=False, cones=False, shapes=False)
+    child = np.flatnonzero(np.arange(k.num_particles) % 10 > 0)
+    k.set_links(child, child - 1, 1, 0.95, 1.1)
+    rest = k.pos_ms.copy()
+    active = np.ones(k.num_tracked, dtype=bool)
+    for _ in range(30):
+        k.step(DT, DT, mats, active, gravity_ws=(0.0, 0.0, 0.0))
+    np.testing.assert_allclose(k.pos_ms, rest, atol=1e-5)
+    assert not k.vel_ms.any()
+
+
+def test_fixed_links_converge_to_their_length():
+    # links are solved all at once, a chain only settles to its rest lengths over many iterations
+    k, mats = chain_kernel(2, links=False, ellipsoids=False, cones=False, shapes=False, iterations=(128, 128))
+    child = np.flatnonzero(np.arange(k.num_particles) % 10 > 0)
+    k.set_links(child, child - 1, 0, 1.0, 1.0)
+    run(k, mats, 30)
+    length = np.linalg.norm(k.pos_ms[child] - k.pos_ms[child - 1], axis=1)
+    np.testing.assert_allclose(length, k.link_rest, rtol=2e-3)
+
+
+def test_ellipsoids_contain_their_particles():
+    k, mats = chain_kernel(2, links=False, cones=False, shapes=False)
+    run(k, mats, 60, gravity_ws=(0.0, 0.0, -30.0))
+    offset = k.pos_ms[k.ell_idx] - k.ell_center_ms
+    along = transforms.dot(offset, k.ell_z_axis_ms)
+    across = np.linalg.norm(offset - k.ell_z_axis_ms * along[:, None], axis=1)
+    scaled = np.hypot(across / k.ell_radii, along / (k.ell_radii * k.ell_s2))
+    assert (scaled <= 1.0 + 1e-4).all()
+
+
+@pytest.mark.parametrize('capsule', [True, False])
+def test_particles_end_outside_body_shapes(capsule):
+    k, mats = chain_kernel(6, links=False, ellipsoids=False, cones=False, shapes=False)
+    n = k.num_particles
+    child = np.flatnonzero(np.arange(n) % 10 > 0)
+    k.set_links(child, child - 1, 1, 0.95, 1.1)
+    # a body shape right under the chain tips, which gravity drags them onto
+    k.set_collision_shapes([n], [capsule], [0.4], [0.2 if capsule else 0.0])
+    mats[n, :3, 3] = (0.0, 0.0, 0.6)
+    run(k, mats, 90, gravity_ws=(0.0, 0.0, -30.0))
+
+    radius = k.shape_radius[0] + k.col_radius[:n]
+    free = k.is_free[:n]
+    center = k.shape_pos_ms[0]
+    if capsule:
+        half = k.shape_axis_ms[0] * k.shape_height[0]
+        t = np.clip(transforms.dot(k.pos_ms[:n] - center, k.shape_axis_ms[0]) / k.shape_height[0], -1.0, 1.0)
+        center = center + half * t[:, None]
+    dist = np.linalg.norm(k.pos_ms[:n] - center, axis=-1)
+    touching = free & (dist < radius + 0.05)
+    assert touching.any()
+    assert (dist[free] >= radius[free] - 1e-4).all()
+
+
+def rotation(axis, angle):
+    """4x4 rotation about a unit axis."""
+    x, y, z = axis
+    c, s = math.cos(angle), math.sin(angle)
+    k = np.array(((0.0, -z, y), (z, 0.0, -x), (-y, x, 0.0)))
+    m = np.eye(4)
+    m[:3, :3] = np.eye(3) + s * k + (1.0 - c) * (k @ k)
+    return m
+
+
+def translation(offset):
+    m = np.eye(4)
+    m[:3, 3] = offset
+    return m
+
+
+class PoseBones:
+    """pose.bones and data.bones of a stand-in armature, matrices are read column-major like Blender's foreach_get."""
+
+    def __init__(self, names, mats):
+        self.names = names
+        self.mats = mats
+        self.hide = np.zeros(len(names), dtype=bool)
+
+    def __len__(self):
+        return len(self.names)
+
+    def find(self, name):
+        return self.names.index(name) if name in self.names else -1
+
+    def foreach_get(self, attr, buf):
+        if attr == 'matrix':
+            buf[:] = self.mats.transpose(0, 2, 1).ravel()
+        else:
+            buf[:] = self.hide
+
+
+def dangle_rig(num_chains, chain_len, iterations, shapes=True, cross_link=False, drags=False):
+    """
+    Stand-in armature with a dangle_state: chains hanging around a spine and a head bone, links, cones
+    and ellipsoids along each chain, split over one dangle node per entry of iterations.
+    """
+    NS = types.SimpleNamespace
+    names, mats = [], []
+    chains = [[] for _ in iterations]
+    for c in range(num_chains):
+        ang = 2 * math.pi * c / num_chains
+        particles = []
+        for j in range(chain_len):
+            names.append(f'c{c}_b{j}')
+            mats.append(chain_bone(ang, j) @ rotation((1.0, 0.0, 0.0), 0.1 * j))
+            links, ells, cones = [], [], []
+            if j:
+                parent = f'c{c}_b{j - 1}'
+                links.append(NS(target_bone=parent, link_type=('FIXED', 'VARIABLE', 'GREATER', 'CLOSER')[j % 4],
+                                lower_ratio=90.0 + j, upper_ratio=110.0, explicit_rest_distance=0.08 * (j % 2 == 0),
+                                look_at_axis=(0.0, 1.0, 0.0)))
+                if cross_link and c == 1 and j == 2:
+                    links.append(NS(target_bone='c0_b3', link_type='VARIABLE', lower_ratio=80.0, upper_ratio=120.0,
+                                    explicit_rest_distance=0.0, look_at_axis=(0.0, 1.0, 0.0)))
+                cones.append(NS(target_bone=parent, constraint_type=('CONE', 'HINGE_PLANE', 'HALF_CONE')[j % 3],
+                                half_aperture_angle=20.0 + 5 * (j % 4),
+                                projection_type='SHORTEST_PATH_ROTATIONAL' if j % 2 else 'DISABLED',
+                                cone_collision_radius=0.02, cone_collision_height=0.0,
+                                cone_transform_ls_quat=(math.cos(0.15 * (j % 3)), 0.0, math.sin(0.15 * (j % 3)), 0.0)))
+                if j % 3 == 2:
+                    ells.append(NS(target_bone=f'c{c}_b0', radius=0.1 * j, scale1=0.8, scale2=1.3,
+                                   ellipsoid_transform_ls_quat=(math.cos(0.1), math.sin(0.1), 0.0, 0.0),
+                                   ellipsoid_transform_ls_offset=(0.0, 0.01, -0.02)))
+            particles.append(NS(bone_name=names[-1], is_pinned=j == 0, mass=1.0 + 0.1 * j, damping=0.5,
+                                pull_force=0.2 * (j % 2), capsule_radius=0.015, capsule_height=0.02,
+                                capsule_axis_ls=(0.0, 0.0, 0.0) if j % 4 == 0 else (1.0, 0.0, 0.0),
+                                dyng_projection_type=('NONE', 'SHORTEST_PATH', 'DIRECTED')[j % 3],
+                                link_constraints=links, ellipsoid_constraints=ells, pendulum_constraints=cones))
+        chains[c % len(iterations)].append(NS(particles=particles))
+    names += ['spine', 'head']
+    mats += [translation((0.0, 0.0, 1.2)), translation((0.0, 0.0, 1.7))]
+    body = [NS(bone_name='spine', shape_type='CAPSULE', radius=0.25, height_extent=0.3,
+               rotation_ls_quat=(math.cos(0.15), math.sin(0.15), 0.0, 0.0), offset_ls=(0.0, 0.05, 0.0)),
+            NS(bone_name='head', shape_type='SPHERE', radius=0.12, height_extent=0.0,
+               rotation_ls_quat=(1.0, 0.0, 0.0, 0.0), offset_ls=(0.0, 0.0, 0.0))]
+    drag = [NS(bone_name='c0_b2', simulation_fps=60.0, source_speed_multiplier=1.0, has_overshoot=True,
+               overshoot_detection_min_speed=0.1, overshoot_detection_max_speed=2.0, overshoot_duration=0.3),
+            NS(bone_name='c1_b1', simulation_fps=30.0, source_speed_multiplier=2.0, has_overshoot=False,
+               overshoot_detection_min_speed=0.1, overshoot_detection_max_speed=2.0, overshoot_duration=0.3)]
+    state = NS(dangle_nodes=[NS(chains=ch, solver_iterations=it, collision_shapes=[]) for ch, it in zip(chains, iterations)],
+               collision_shapes=body if shapes else [], drag_nodes=drag if drags else [], substep_time=1 / 90.0,
+               external_force_ws=(0.5, 0.1, 0.0))
+    bones = PoseBones(names, np.array(mats))
+    rig = NS(dangle_state=state, pose=NS(bones=bones), data=NS(bones=bones), matrix_world=np.eye(4))
+    rig.rest = bones.mats.copy()
+    return rig
+
+
+DANGLE_RIGS = [dict(num_chains=6, chain_len=6, iterations=(4, 2), drags=True),
+               dict(num_chains=4, chain_len=5, iterations=(3, 1), cross_link=True, drags=True),
+               dict(num_chains=3, chain_len=4, iterations=(0, 0), shapes=False),
+               dict(num_chains=5, chain_len=3, iterations=(2, 5))]
+# frame from which each rig's object jumps away, by a distance that keeps or resets its particles
+TELEPORTS = [(None, 0.0), (30, 2.0), (50, 10.0), (70, 3.0)]
+
+
+def pose_rigs(rigs, frame):
+    for r, rig in enumerate(rigs):
+        t = (frame + 7 * r) / 24.0
+        motion = translation((0.3 * math.sin(2 * t), 0.1 * math.cos(3 * t), 0.05 * math.sin(5 * t)))
+        motion = motion @ rotation((0.0, 0.0, 1.0), 0.4 * math.sin(1.5 * t)) @ rotation((1.0, 0.0, 0.0), 0.2 * math.sin(t))
+        rig.pose.bones.mats = motion @ rig.rest
+        start, jump = TELEPORTS[r]
+        x = 0.01 * frame + r + (jump if start is not None and frame >= start else 0.0)
+        rig.matrix_world = translation((x, 0.2 * r, 0.0)) @ rotation((0.0, 0.0, 1.0), 0.1 * r + 0.002 * frame)
+
+
+def simulate_rigs(batched, frames=100):
+    rigs = [dangle_rig(**cfg) for cfg in DANGLE_RIGS]
+    for r, rig in enumerate(rigs):
+        rig.dangle_state.external_force_ws = (0.5 * r, 0.1, 0.0)
+    pose_rigs(rigs, 0)
+    if batched:
+        batches = batch.build_batches(rigs)
+        assert len(batches) == 1
+        sims = batches[0].sims
+        steppers = batches
+    else:
+        sims = steppers = [core.DyngSimulator(rig) for rig in rigs]
+    positions = []
+    for f in range(frames):
+        pose_rigs(rigs, f)
+        for s in steppers:
+            s.step_simulation(1 / 60.0)
+        positions.append([sim.pos_ms.copy() for sim in sims])
+    return sims, positions
+
+
+@pytest.mark.parametrize('small_level', [0, 1 << 30])
+def test_batched_rigs_match_single_rigs(monkeypatch, small_level):
+    # different iteration counts, a rig without shapes, a cross-chain link, drags and teleports. Batching
+    # widens the cone levels, which would move them from the per-cone path to the batched one (equal to
+    # about 1e-6, test_cone_paths_agree), so each run keeps to one path and the results are bit-identical.
+    monkeypatch.setattr(constraints, 'SMALL_CONE_LEVEL', small_level)
+    singles, expected = simulate_rigs(False)
+    batched, actual = simulate_rigs(True)
+    assert [sim.num_particles for sim in batched] == [sim.num_particles for sim in singles]
+    assert sum(sim.drag_post.num_drags for sim in batched) == 4
+    for f, (e, a) in enumerate(zip(expected, actual)):
+        for r in range(len(DANGLE_RIGS)):
+            np.testing.assert_array_equal(a[r], e[r], err_msg=f'rig {r}, frame {f}')
+    moved = [np.abs(actual[-1][r] - actual[0][r]).max() for r in range(len(DANGLE_RIGS))]
+    assert min(moved) > 0.1
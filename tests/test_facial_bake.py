@@ -0,0 +1,245 @@
+import re
+import types
+
+import numpy as np
+import pytest
+
+from addon_loader import load
+from test_fused_solver import NUM_BONES, SEG, Rig, random_setup, random_tracks
+
+rig_binding = load('animtools.rig_binding')
+tracks = load('animtools.tracks')
+facial_ops = load('animtools.facial_ops')
+
+CHANNEL = re.compile(r'pose\.bones\["(.*)"\]\.(\w+)')
+
+
+class TrackRig(Rig):
+    track_names = np.array([f"track{i}" for i in range(SEG.num_tracks)], dtype=object)
+
+
+class Keyframe:
+    def __init__(self, frame=0.0, value=0.0):
+        self.co = [frame, value]
+
+
+class KeyframePoints(list):
+    """fcurve.keyframe_points, coordinates are float32 like Blender's."""
+
+    def add(self, count):
+        self.extend(Keyframe() for _ in range(count))
+
+    def remove(self, point, fast=False):
+        del self[next(i for i, p in enumerate(self) if p is point)]
+
+    def foreach_get(self, attr, buf):
+        buf[:] = np.ravel([p.co for p in self])
+
+    def foreach_set(self, attr, buf):
+        for p, co in zip(self, np.reshape(np.asarray(buf, dtype=np.float32), (-1, 2))):
+            p.co = [float(co[0]), float(co[1])]
+
+
+class FCurve:
+    """Linear between keys and constant outside them, which is all the bake has to agree on."""
+
+    def __init__(self, data_path, array_index):
+        self.data_path = data_path
+        self.array_index = array_index
+        self.keyframe_points = KeyframePoints()
+        self.mute = False
+
+    def update(self):
+        self.keyframe_points.sort(key=lambda p: p.co[0])
+
+    def evaluate(self, frame):
+        co = np.reshape([p.co for p in self.keyframe_points], (-1, 2))
+        return float(np.interp(frame, co[:, 0], co[:, 1]))
+
+    def insert(self, frame, value):
+        """What keyframe_insert does to one channel, a key already on the frame gets the value."""
+        value = float(np.float32(value))
+        for p in self.keyframe_points:
+            if p.co[0] == frame:
+                p.co[1] = value
+                return
+        self.keyframe_points.append(Keyframe(float(frame), value))
+        self.update()
+
+    def keys(self):
+        return np.reshape([p.co for p in self.keyframe_points], (-1, 2))
+
+
+class FCurves(list):
+    def find(self, data_path, index=0):
+        return next((fc for fc in self if fc.data_path == data_path and fc.array_index == index), None)
+
+    def new(self, data_path, index=0):
+        self.append(FCurve(data_path, index))
+        return self[-1]
+
+
+class Action:
+    def __init__(self):
+        self.fcurves = FCurves()
+
+    def fcurve_ensure_for_datablock(self, datablock, data_path, index=0, group_name=''):
+        return self.fcurves.find(data_path, index) or self.fcurves.new(data_path, index)
+
+    def key(self, data_path, index, frames, values):
+        fc = self.fcurve_ensure_for_datablock(None, data_path, index)
+        for frame, value in zip(frames, values):
+            fc.insert(frame, value)
+
+
+class PoseBone:
+    def __init__(self, obj, name):
+        self.id_data = obj
+        self.name = name
+        self.rotation_mode = 'QUATERNION'
+        self.location = (0.0, 0.0, 0.0)
+        self.rotation_quaternion = (1.0, 0.0, 0.0, 0.0)
+        self.scale = (1.0, 1.0, 1.0)
+
+    def path_from_id(self, prop):
+        return f'pose.bones["{self.name}"].{prop}'
+
+    def keyframe_insert(self, data_path, frame):
+        action = self.id_data.animation_data.action
+        for c, value in enumerate(getattr(self, data_path)):
+            action.fcurve_ensure_for_datablock(self.id_data, self.path_from_id(data_path), index=c).insert(frame, value)
+
+
+class PoseBones(list):
+    """armature.pose.bones, iterated in order and looked up by name."""
+
+    def find(self, name):
+        return next((i for i, bone in enumerate(self) if bone.name == name), -1)
+
+    def __contains__(self, name):
+        return self.find(name) >= 0
+
+    def __getitem__(self, key):
+        return super().__getitem__(self.find(key) if isinstance(key, str) else key)
+
+    def foreach_get(self, attr, buf):
+        buf[:] = np.ravel([getattr(bone, attr) for bone in self])
+
+
+class Armature(dict):
+    """Armature object, its items are the custom properties the tracks live in."""
+
+    def __init__(self, names, nla=False):
+        super().__init__()
+        self.pose = types.SimpleNamespace(bones=PoseBones(PoseBone(self, name) for name in names))
+        self.animation_data = types.SimpleNamespace(
+            action=Action(), drivers=[], nla_tracks=[types.SimpleNamespace(mute=False)] if nla else [])
+
+
+class Scene:
+    """frame_set evaluates the action onto the armature, the bake's solves stand in for the frame handler."""
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def frame_set(self, frame):
+        for fc in self.obj.animation_data.action.fcurves:
+            if fc.mute or not fc.keyframe_points:
+                continue
+            value = fc.evaluate(frame)
+            if fc.data_path.startswith('["'):
+                self.obj[fc.data_path[2:-2]] = value
+                continue
+            name, prop = CHANNEL.match(fc.data_path).groups()
+            bone = self.obj.pose.bones[name]
+            channel = list(getattr(bone, prop))
+            channel[fc.array_index] = value
+            setattr(bone, prop, tuple(channel))
+
+
+def keyed_armature(seed=0, nla=False):
+    """
+    A bound armature with keyed and static input tracks, a bone the rig doesn't drive with keyed
+    location, and earlier keys on a driven bone, at frames inside and outside the baked range.
+    """
+    setup, rig = random_setup(seed), TrackRig()
+    cache = rig_binding.BindingCache(setup=setup, rig=rig, used_bone_names=list(rig.bone_names),
+                                     track_segments=SEG, setup_path='', rig_path='', bind_time=0.0)
+    obj = Armature([str(name) for name in rig.bone_names[1:]] + ['root'], nla=nla)
+    rng = np.random.default_rng(seed)
+    static, *keyed = (random_tracks(rng, active=0.5) for _ in range(4))
+    action = obj.animation_data.action
+    animated = rng.random(SEG.num_tracks) < 0.5
+    animated[SEG.lipsync_out_start:] = False
+    for i, name in enumerate(rig.track_names):
+        obj[name] = float(static[i])
+        if animated[i]:
+            action.key(f'["{name}"]', 0, [0, 6, 13], [k[i] for k in keyed])
+    for c in range(3):
+        action.key('pose.bones["root"].location', c, [0, 20], rng.normal(0.0, 1.0, 2))
+    for c in range(4):
+        action.key('pose.bones["bone7"].rotation_quaternion', c, [0, 3, 20], rng.normal(0.0, 1.0, 3))
+    return obj, cache
+
+
+def bake(frames, batch, nla=False):
+    obj, cache = keyed_armature(nla=nla)
+    context = types.SimpleNamespace(scene=Scene(obj))
+    if batch:
+        facial_ops._bake_range(context, obj, cache, frames)
+    else:
+        facial_ops.CP77_OT_BakeFacialAnimation._bake_frames(None, context, obj, cache, frames)
+    return obj
+
+
+@pytest.mark.parametrize('nla', [False, True], ids=['fcurves', 'frame_set'])
+@pytest.mark.parametrize('frames', [range(1, 13), range(2, 16, 3)], ids=['every', 'step'])
+def test_batch_bake_matches_frame_by_frame(frames, nla):
+    expected = bake(frames, batch=False, nla=nla)
+    actual = bake(frames, batch=True, nla=nla)
+    curves = {(fc.data_path, fc.array_index): fc.keys() for fc in expected.animation_data.action.fcurves}
+    assert {(fc.data_path, fc.array_index) for fc in actual.animation_data.action.fcurves} == curves.keys()
+    # three channels of every pose bone, the input tracks keep their own curves
+    assert sum(path.startswith('pose.') for path, _ in curves) == 10 * NUM_BONES
+    for fc in actual.animation_data.action.fcurves:
+        keys = curves[fc.data_path, fc.array_index]
+        np.testing.assert_array_equal(fc.keys()[:, 0], keys[:, 0], err_msg=fc.data_path)
+        np.testing.assert_allclose(fc.keys()[:, 1], keys[:, 1], atol=1e-6, err_msg=fc.data_path)
+
+    # left on the last frame, posed and with its output tracks
+    assert actual.keys() == expected.keys()
+    np.testing.assert_allclose([actual[k] for k in actual], [expected[k] for k in actual], atol=1e-6)
+    for a, e in zip(actual.pose.bones, expected.pose.bones):
+        np.testing.assert_allclose(a.rotation_quaternion, e.rotation_quaternion, atol=1e-6)
+        np.testing.assert_allclose(a.location, e.location, atol=1e-6)
+
+
+def test_earlier_keys_are_replaced_inside_the_range_and_kept_outside():
+    frames = range(1, 13)
+    before = keyed_armature()[0].animation_data.action.fcurves
+    after = bake(frames, batch=True).animation_data.action.fcurves
+    path = 'pose.bones["bone7"].rotation_quaternion'
+    old, new = before.find(path, 0).keys(), after.find(path, 0).keys()
+    assert new[:, 0].tolist() == [0.0, *frames, 20.0]
+    assert new[[0, -1], 1].tolist() == old[[0, 2], 1].tolist()
+    assert new[3, 1] != old[1, 1]
+
+    # the bone the rig doesn't drive is keyed with what its curve gave it
+    path = 'pose.bones["root"].location'
+    old, new = before.find(path, 1), after.find(path, 1).keys()
+    assert new[:, 0].tolist() == [0.0, *frames, 20.0]
+    np.testing.assert_allclose(new[1:-1, 1], [old.evaluate(frame) for frame in frames], atol=1e-6)
+
+
+@pytest.mark.parametrize('existing', [[], [0.0, 4.0, 9.0], [2.0, 3.0]])
+def test_bulk_replace_matches_inserting_each_key(existing):
+    frames = np.array([2.0, 3.0, 4.0, 5.0], dtype=np.float32)
+    values = np.array([0.5, -1.0, 2.0, 0.25], dtype=np.float32)
+    expected, actual = FCurve('x', 0), FCurve('x', 0)
+    for fc in expected, actual:
+        for frame in existing:
+            fc.insert(frame, frame * 10.0)
+    for frame, value in zip(frames, values):
+        expected.insert(frame, value)
+    tracks._bulk_replace_keyframes(actual, frames, values)
+    np.testing.assert_array_equal(actual.keys(), expected.keys())
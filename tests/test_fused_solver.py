@@ -0,0 +1,257 @@
+import numpy as np
+import pytest
+
+from addon_loader import load
+
+loader = load('animtools.facial_setup_loader')
+rig_binding = load('animtools.rig_binding')
+solver = load('animtools.solver')
+fused_solver = load('animtools.fused_solver')
+
+NUM_ENVELOPES, NUM_MAIN, NUM_OVERRIDES, NUM_WRINKLES = 13, 141, 86, 33
+NUM_BONES = 160
+SEG = rig_binding.TrackSegments.from_tracks_mapping(
+    {"numEnvelopes": NUM_ENVELOPES, "numMainPoses": NUM_MAIN,
+     "numLipsyncOverrides": NUM_OVERRIDES, "numWrinkles": NUM_WRINKLES},
+    NUM_ENVELOPES + NUM_MAIN + NUM_OVERRIDES + NUM_MAIN + NUM_WRINKLES,
+)
+
+
+class Rig:
+    num_bones = NUM_BONES
+    num_tracks = SEG.num_tracks
+    bone_names = np.array([f"bone{i}" for i in range(NUM_BONES)], dtype=object)
+
+
+def csr(counts):
+    row_ptr = np.zeros(len(counts) + 1, dtype=np.int32)
+    np.cumsum(counts, out=row_ptr[1:])
+    return row_ptr
+
+
+def random_quats(rng, n):
+    q = np.concatenate([rng.normal(0.0, 0.3, (n, 3)), np.ones((n, 1))], axis=1)
+    # some negative w for the sign flip
+    q[rng.random(n) < 0.1, 3] *= -1
+    return (q / np.linalg.norm(q, axis=1, keepdims=True)).astype(np.float32)
+
+
+def pose_arrays(rng, n, lo=3, hi=15):
+    counts = rng.integers(lo, hi, n)
+    bones = [rng.choice(NUM_BONES, c, replace=False) for c in counts]
+    bones = np.concatenate(bones).astype(np.int16) if n else np.zeros(0, np.int16)
+    total = len(bones)
+    return loader.PoseArrays(num_poses=n, row_ptr=csr(counts), pose_bones=bones, pose_quats=random_quats(rng, total),
+                             pose_trans=rng.normal(0.0, 0.01, (total, 3)).astype(np.float32))
+
+
+def random_part(rng, name, tracks, num_correctives, num_wrinkles):
+    """A facialPartData over tracks with inbetweens, repeated influence/limit targets and LOD-gated correctives."""
+    nm = len(tracks)
+    tracks = np.asarray(tracks, dtype=np.int16)
+    ib_counts = rng.choice([1, 1, 1, 2, 3], nm).astype(np.int32)
+    ib_row_ptr = csr(ib_counts)
+    thresholds = np.concatenate([np.sort(rng.uniform(0.1, 1.0, k)) if k > 1 else [1.0] for k in ib_counts])
+    thresholds = thresholds.astype(np.float32)
+    gaps = ib_counts - 1
+    scope_mults = [
+        np.concatenate([[1.0 / t[0]], 1.0 / np.maximum(np.diff(t), 1e-3)])[:g]
+        for g, t in ((gaps[m], thresholds[ib_row_ptr[m]:ib_row_ptr[m + 1]]) for m in range(nm))
+    ]
+    num_ib = int(ib_row_ptr[-1])
+
+    n_infl = nm // 3
+    infl_counts = rng.integers(1, 5, n_infl)
+    g_counts = rng.integers(1, 4, num_correctives)
+    i_counts = rng.integers(0, 3, num_correctives)
+    n_ci = num_correctives // 4
+    ci_counts = rng.integers(1, 4, n_ci)
+    n_limits = nm // 5
+    n_lps = nm // 3
+    return loader.facialPartData(
+        part_name=name,
+        env_num=nm, env_tracks=tracks.copy(), env_lods=rng.integers(0, 3, nm).astype(np.uint8),
+        env_types=rng.integers(0, 6, nm).astype(np.uint8),
+        limit_num=n_limits, limit_tracks=rng.choice(tracks, n_limits).astype(np.int16),
+        limit_envelope=rng.integers(0, 3, n_limits).astype(np.uint8),
+        limit_min=rng.uniform(0.0, 0.3, n_limits).astype(np.float32),
+        limit_mid=rng.uniform(0.2, 0.8, n_limits).astype(np.float32),
+        limit_max=rng.uniform(0.5, 1.0, n_limits).astype(np.float32),
+        infl_num=n_infl, infl_tracks=rng.choice(tracks, n_infl).astype(np.int16),
+        infl_types=rng.integers(0, 3, n_infl).astype(np.uint8), infl_row_ptr=csr(infl_counts),
+        infl_indices=rng.choice(tracks, int(infl_counts.sum())).astype(np.int16),
+        ulf_num=nm, ulf_tracks=tracks.copy(), ulf_parts=rng.integers(0, 3, nm).astype(np.uint8),
+        lps_num=n_lps, lps_tracks=rng.choice(tracks, n_lps, replace=False).astype(np.int16),
+        lps_sides=rng.integers(0, 3, n_lps).astype(np.uint8),
+        num_main_poses=nm, num_ib_poses=num_ib, main_tracks=tracks.copy(), ib_row_ptr=ib_row_ptr,
+        ib_thresholds=thresholds, sm_row_ptr=csr(gaps),
+        ib_scope_mults=np.concatenate(scope_mults).astype(np.float32),
+        num_correctives=num_correctives, gcorr_row_ptr=csr(g_counts),
+        gcorr_tracks=rng.choice(tracks, int(g_counts.sum())).astype(np.int16),
+        gcorr_flags=rng.choice([0, 0, 0, 0, 1, 2], int(g_counts.sum())).astype(np.uint8),
+        icorr_row_ptr=csr(i_counts),
+        # some references past the last inbetween, which read as 0
+        icorr_tracks=rng.integers(0, num_ib + 3, int(i_counts.sum())).astype(np.int16),
+        icorr_flags=rng.choice([0, 0, 0, 1], int(i_counts.sum())).astype(np.uint8),
+        num_corr_infl=n_ci, corr_infl_pose_idx=rng.integers(0, max(num_correctives, 1), n_ci).astype(np.int32),
+        corr_infl_types=rng.integers(0, 4, n_ci).astype(np.uint8), corr_infl_row_ptr=csr(ci_counts),
+        corr_infl_influencers=rng.integers(0, max(num_correctives, 1), int(ci_counts.sum())).astype(np.int32),
+        main_poses=pose_arrays(rng, num_ib), corrective_poses=pose_arrays(rng, num_correctives, 2, 8),
+        wrinkle_count=num_wrinkles, wrinkle_source_tracks=rng.choice(tracks, num_wrinkles).astype(np.int16),
+        wrinkle_start_track=SEG.wrinkle_start,
+    )
+
+
+def random_setup(seed):
+    rng = np.random.default_rng(seed)
+    main = np.arange(SEG.main_start, SEG.main_end)
+    return loader.FacialSetupData(
+        version=8,
+        tongue=random_part(rng, 'tongue', main[:8], 6, 0),
+        eyes=random_part(rng, 'eyes', main[8:20], 10, 0),
+        face=random_part(rng, 'face', main[20:], 255, NUM_WRINKLES),
+        used_bone_indices=np.arange(NUM_BONES, dtype=np.int16),
+        lipsync_override_idx_map=rng.choice(main, NUM_OVERRIDES).astype(np.int16),
+        joint_regions=np.zeros(NUM_BONES, np.uint8),
+        num_envelope_tracks=NUM_ENVELOPES, num_lipsync_overrides=NUM_OVERRIDES,
+        num_main_poses=NUM_MAIN, num_wrinkle_tracks=NUM_WRINKLES,
+    )
+
+
+def random_tracks(rng, active=0.2):
+    tracks = np.zeros(SEG.num_tracks, dtype=np.float32)
+    tracks[:NUM_ENVELOPES] = rng.uniform(0.0, 1.0, NUM_ENVELOPES)
+    for i in (1, 2, 7, 8):
+        tracks[i] = rng.uniform(0.0, 2.0)
+    if rng.random() < 0.3:
+        # lipsync envelope off, stages 4 and 7 skipped
+        tracks[4] = 0.0
+    on = rng.random(NUM_MAIN) < active
+    tracks[SEG.main_start:SEG.main_end] = np.where(on, rng.uniform(0.0, 1.05, NUM_MAIN), 0.0)
+    tracks[SEG.lipsync_ovr_start:SEG.lipsync_ovr_end] = rng.uniform(0.0, 1.0, NUM_OVERRIDES)
+    on = rng.random(NUM_MAIN) < active / 2
+    tracks[SEG.lipsync_out_start:SEG.lipsync_out_end] = np.where(on, rng.uniform(0.0, 1.0, NUM_MAIN), 0.0)
+    return tracks
+
+
+def assert_solves_match(expected, actual):
+    quats, trans, tracks = expected
+    np.testing.assert_allclose(actual[0], quats, atol=1e-5)
+    np.testing.assert_allclose(actual[1], trans, atol=1e-6)
+    np.testing.assert_allclose(actual[2], tracks, atol=1e-6)
+
+
+@pytest.mark.parametrize('use_jit', [False, True], ids=['numpy', 'kernels'])
+@pytest.mark.parametrize('seed', range(30))
+def test_fused_matches_reference(seed, use_jit):
+    # without numba the kernels run as plain Python, the same loops
+    setup, rig = random_setup(seed), Rig()
+    fs = fused_solver.compile_setup(setup, rig, SEG)
+    rng = np.random.default_rng(100 + seed)
+    for k in range(6):
+        tracks = random_tracks(rng, active=[0.05, 0.2, 0.6, 1.0][k % 4])
+        lod, lod_weight = (seed + k) % 3, [0.0, 0.3][k % 2]
+        expected = solver.facial_solve_numpy(setup, rig, SEG, tracks, lod=lod, lod_weight=lod_weight)
+        assert_solves_match(expected, fused_solver.facial_solve_fused(fs, tracks, lod, lod_weight, use_jit=use_jit))
+
+
+@pytest.mark.parametrize('use_jit', [False, True], ids=['numpy', 'kernels'])
+def test_repeated_pose_bones_keep_the_last_entry(use_jit):
+    setup, rig = random_setup(0), Rig()
+    # list bones twice inside poses, with different deltas
+    for poses in (setup.face.main_poses, setup.face.corrective_poses):
+        rng = np.random.default_rng(1)
+        starts = poses.row_ptr[:-1][np.diff(poses.row_ptr) >= 2]
+        poses.pose_bones[starts + 1] = poses.pose_bones[starts]
+        poses.pose_quats[starts] = random_quats(rng, len(starts))
+    fs = fused_solver.compile_setup(setup, rig, SEG)
+    row_ptr, bones = fs.parts[2].main_poses[:2]
+    rows = np.repeat(np.arange(len(row_ptr) - 1), np.diff(row_ptr))
+    assert len(np.unique(rows * NUM_BONES + bones)) == len(bones) < len(setup.face.main_poses.pose_bones)
+
+    rng = np.random.default_rng(2)
+    for k in range(8):
+        tracks = random_tracks(rng, active=0.6)
+        expected = solver.facial_solve_numpy(setup, rig, SEG, tracks, lod=k % 3)
+        assert_solves_match(expected, fused_solver.facial_solve_fused(fs, tracks, k % 3, use_jit=use_jit))
+
+
+def changed_frames(fs, rng, num_frames):
+    """Frames that alternate between repeats, one part's inputs moving, unread tracks moving and new poses."""
+    reads = np.unique(np.concatenate([np.concatenate((p.in_reads, p.out_reads)) for p in fs.parts]))
+    unread = np.setdiff1d(np.arange(SEG.num_tracks), reads)
+    tracks = random_tracks(rng)
+    for k in range(num_frames):
+        tracks = tracks.copy()
+        kind = k % 5
+        if kind == 1:
+            part = fs.parts[rng.integers(len(fs.parts))]
+            tracks[rng.choice(part.in_reads, 5)] = rng.random(5)
+        elif kind == 2 and len(unread):
+            tracks[rng.choice(unread)] += 0.5
+        elif kind == 3:
+            tracks = random_tracks(rng)
+        elif kind == 4 and k % 10 == 4:
+            tracks[1] = rng.random()
+        yield tracks, (k // 20) % 3
+
+
+@pytest.mark.parametrize('use_jit', [False, True], ids=['numpy', 'kernels'])
+@pytest.mark.parametrize('seed', range(4))
+def test_incremental_solves_equal_full_solves(seed, use_jit):
+    fs = fused_solver.compile_setup(random_setup(seed), Rig(), SEG)
+    state = fused_solver.SolveState()
+    statuses = set()
+    for tracks, lod in changed_frames(fs, np.random.default_rng(7 + seed), 60):
+        actual = fused_solver.facial_solve_fused(fs, tracks, lod, use_jit=use_jit, state=state)
+        expected = fused_solver.facial_solve_fused(fs, tracks, lod, use_jit=use_jit)
+        statuses.add(state.status)
+        for a, e in zip(actual, expected):
+            np.testing.assert_array_equal(a, e)
+    assert statuses == {'skipped', 'partial', 'solved'}
+
+
+class PoseBone:
+    def __init__(self):
+        self.rotation_mode = 'QUATERNION'
+        self.rotation_quaternion = (1.0, 0.0, 0.0, 0.0)
+        self.location = (0.0, 0.0, 0.0)
+
+
+class PoseBones(dict):
+    """armature.pose.bones with the foreach_get pose_changed reads, keys() is a list as in Blender."""
+
+    def keys(self):
+        return list(super().keys())
+
+    def foreach_get(self, attr, buf):
+        buf[:] = np.ravel([getattr(bone, attr) for bone in self.values()])
+
+
+def bound_armature(seed=0):
+    setup, rig = random_setup(seed), Rig()
+    cache = rig_binding.BindingCache(setup=setup, rig=rig, used_bone_names=list(rig.bone_names),
+                                     track_segments=SEG, setup_path='', rig_path='', bind_time=0.0)
+    # the armature has a bone the rig doesn't drive, and misses one it does
+    names = [str(name) for name in rig.bone_names[1:]] + ['root']
+    arm = type('Armature', (), {})()
+    arm.pose = type('Pose', (), {})()
+    arm.pose.bones = PoseBones((name, PoseBone()) for name in names)
+    return arm, cache
+
+
+def test_pose_changed_catches_edited_and_euler_bones():
+    arm, cache = bound_armature()
+    quats, trans, _ = solver.facial_solve(cache, random_tracks(np.random.default_rng(3), active=0.6))
+    assert solver.pose_changed(arm, cache, quats, trans)[1:].all()
+    solver.write_bones(arm, cache, quats, trans)
+    assert not solver.pose_changed(arm, cache, quats, trans).any()
+
+    bones = arm.pose.bones
+    bones['bone5'].rotation_mode = 'XYZ'
+    bones['bone9'].location = (1.0, 2.0, 3.0)
+    changed = solver.pose_changed(arm, cache, quats, trans)
+    assert np.flatnonzero(changed).tolist() == [5, 9]
+    assert solver.write_bones(arm, cache, quats, trans, changed) == 2
+    assert bones['bone5'].rotation_mode == 'QUATERNION'
+    assert not solver.pose_changed(arm, cache, quats, trans).any()
@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from addon_loader import load
+
+glb_export = load('exporters.glb_export')
+count_per_vertex = glb_export.count_per_vertex
+count_per_vertex_hashed = glb_export.count_per_vertex_hashed
+
+
+def both(vertex_col, attr_cols, n_verts):
+    expected = count_per_vertex(vertex_col, list(attr_cols), n_verts)
+    actual = count_per_vertex_hashed(vertex_col, iter(attr_cols), n_verts)
+    assert actual.shape == (n_verts,)
+    np.testing.assert_array_equal(actual, expected)
+    return actual
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_matches_unique_rows_on_small_ranges(seed):
+    # tiny value ranges, most corners share their tuple with another corner
+    rng = np.random.default_rng(seed)
+    n_loops = int(rng.integers(0, 400))
+    n_verts = int(rng.integers(1, 60))
+    vertex_col = rng.integers(0, n_verts, n_loops).astype(np.int32)
+    attr_cols = [rng.integers(-2, 3, n_loops).astype(np.int64) for _ in range(int(rng.integers(0, 9)))]
+    both(vertex_col, attr_cols, n_verts)
+
+
+def test_many_distinct_keys():
+    # a million distinct tuples over the full int64 range, a weak mix would merge some of them
+    rng = np.random.default_rng(0)
+    n_loops, n_verts = 1 << 20, 1 << 16
+    vertex_col = rng.integers(0, n_verts, n_loops).astype(np.int32)
+    attr_cols = [rng.integers(np.iinfo(np.int64).min, np.iinfo(np.int64).max, n_loops, dtype=np.int64) for _ in range(3)]
+    # every second corner repeats its predecessor, those must not count again
+    vertex_col[1::2] = vertex_col[::2]
+    for col in attr_cols:
+        col[1::2] = col[::2]
+    counts = both(vertex_col, attr_cols, n_verts)
+    assert counts.sum() == n_loops // 2
+
+
+def test_structured_keys_do_not_collide():
+    """Inputs a plain xor or sum of the columns would fold onto each other."""
+    n = 1 << 16
+    a = np.arange(n, dtype=np.int64)
+    b = (a * 7919) % n
+    vertex_col = np.zeros(4 * n, dtype=np.int32)
+    cases = [
+        # swapped columns and columns moved between corners
+        [np.concatenate([a, b, a, b]), np.concatenate([b, a, a ^ b, np.zeros(n, np.int64)])],
+        # values only differing in the sign bit or the high bits
+        [np.concatenate([a, a | np.int64(-2 ** 63), a << 40, -a])],
+        # the same tuple offset between columns, (x, y) against (x + 1, y - 1)
+        [np.concatenate([a, a + 1, a + 2, a + 3]), np.concatenate([b, b - 1, b - 2, b - 3])],
+    ]
+    for attr_cols in cases:
+        rows = np.column_stack(attr_cols)
+        assert both(vertex_col, attr_cols, 1)[0] == len(np.unique(rows, axis=0))
+    # the vertex takes part in the key too, (v, x) against (x, v)
+    vertex_col = np.concatenate([a, b]).astype(np.int32)
+    both(vertex_col, [np.concatenate([b, a])], n)
+
+
+def test_empty_inputs():
+    assert count_per_vertex_hashed(np.zeros(0, dtype=np.int32), [np.zeros(0, dtype=np.int64)], 5).tolist() == [0] * 5
+    assert count_per_vertex_hashed(np.arange(4, dtype=np.int32), [], 5).tolist() == [0] * 5
+    assert count_per_vertex_hashed(np.arange(4, dtype=np.int32), iter([]), 5).tolist() == [0] * 5
+
+
+def test_calc_vert_splits_matches_stacked_columns():
+    rng = np.random.default_rng(3)
+    n_verts, n_loops = 500, 2000
+    loop_verts = rng.integers(0, n_verts - 20, n_loops).astype(np.int32)
+    uvs = [rng.integers(0, 4, (n_loops, 2)).astype(np.float32) / 4 for _ in range(2)]
+    normals = rng.integers(-1, 2, (n_loops, 3)).astype(np.float32)
+    colors = [rng.integers(0, 2, (n_loops, 3)).astype(np.float32)]
+    arrays = SimpleNamespace(n_verts=n_verts, n_tris=1, loop_verts=loop_verts, uvs=uvs,
+                             loop_normals=normals, colors=colors)
+
+    # the column set before the hashed count: every layer quantized and stacked
+    cols = [q[:, i] for layer in uvs + [normals] + colors
+            for q in [glb_export._quantize(layer)] for i in range(layer.shape[1])]
+    counts = count_per_vertex(loop_verts.astype(np.int64), cols, n_verts)
+    used, export = int((counts > 0).sum()), int(counts.sum())
+    expected = (used, export, int((counts > 1).sum()), export - used)
+
+    assert glb_export.calc_vert_splits(arrays) == expected
+    assert expected[0] < n_verts and expected[3] > 0
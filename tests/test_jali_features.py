@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from addon_loader import load
+
+parselmouth = pytest.importorskip('parselmouth')
+from parselmouth.praat import call  # noqa: E402
+
+jali_core = load('animtools.jali_core')
+
+
+@pytest.fixture(scope='module')
+def sound_path(tmp_path_factory):
+    """Two seconds of voiced vowels, a hiss and silence, so every analysis has defined and undefined frames."""
+    rate = 16000
+    t = np.arange(int(2.0 * rate)) / rate
+    f0 = 120 + 40 * np.sin(2 * np.pi * 0.7 * t)
+    voiced = sum(np.sin(2 * np.pi * k * np.cumsum(f0) / rate) / k for k in range(1, 12))
+    envelope = np.clip(np.sin(2 * np.pi * 1.3 * t), 0, None) ** 0.5
+    rng = np.random.default_rng(0)
+    hiss = rng.standard_normal(t.size) * ((t > 1.2) & (t < 1.5))
+    samples = 0.3 * voiced * envelope * (t < 1.2) + 0.05 * hiss
+    samples[t > 1.8] = 0.0
+    path = tmp_path_factory.mktemp('jali') / 'line.wav'
+    parselmouth.Sound(samples, sampling_frequency=rate).save(str(path), 'WAV')
+    return str(path)
+
+
+@pytest.fixture
+def features(sound_path, tmp_path):
+    return jali_core.AudioFeatures(sound_path, 'test', str(tmp_path))
+
+
+def query_times(sound, obj):
+    xs = np.asarray(obj.xs())
+    rng = np.random.default_rng(1)
+    return np.concatenate([
+        rng.uniform(sound.xmin - 0.05, sound.xmax + 0.05, 1500), xs, xs + obj.dx / 2,
+        [sound.xmin, sound.xmax, obj.x1 - obj.dx / 2, obj.x1 + (obj.nx - 0.5) * obj.dx],
+    ])
+
+
+def assert_same(expected, actual):
+    expected = np.asarray(expected, dtype=np.float64)
+    assert np.array_equal(np.isnan(expected), np.isnan(actual))
+    assert np.array_equal(expected[~np.isnan(expected)], actual[~np.isnan(actual)])
+
+
+@pytest.mark.parametrize('time_step', [0.0, 0.01])
+def test_intensity_and_pitch_match_praat(sound_path, features, time_step):
+    sound = parselmouth.Sound(sound_path)
+    intensity = sound.to_intensity(time_step=time_step or None)
+    pitch = sound.to_pitch(time_step=time_step or None)
+
+    times = query_times(sound, intensity)
+    assert_same([intensity.get_value(float(t)) for t in times], features.intensity(times, time_step=time_step))
+    times = query_times(sound, pitch)
+    assert_same([pitch.get_value_at_time(float(t)) for t in times], features.pitch(times, time_step=time_step))
+
+
+def test_bands_and_formants_match_praat(sound_path, features):
+    sound = parselmouth.Sound(sound_path)
+    hf = call(sound, "Filter (pass Hann band)", 8000, 20000, 100).to_intensity()
+    times = query_times(sound, hf)
+    assert_same([hf.get_value(float(t)) for t in times], features.hf_intensity(times))
+
+    fricative = call(sound, "Filter (pass Hann band)", 4000, 20000, 100).to_intensity(minimum_pitch=50, time_step=0.001)
+    times = query_times(sound, fricative)[::4]
+    assert_same([call(fricative, "Get value at time", float(t), "Cubic") for t in times],
+                features.fricative_intensity(times))
+
+    formant = sound.to_formant_burg()
+    times = query_times(sound, formant)
+    f1, f2 = features.formants(times)
+    for number, values in ((1, f1), (2, f2)):
+        assert_same([call(formant, "Get value at time", number, float(t), 'Hertz', 'Linear') for t in times], values)
+
+
+def test_scalar_lookup_and_disk_cache(sound_path, features, tmp_path):
+    t = float(features.intensity_frames()[0][5]) + 0.003
+    value = features.intensity(t)
+    assert np.ndim(value) == 0
+    reloaded = jali_core.AudioFeatures(sound_path, 'test', str(tmp_path))
+    assert 'done_intensity' in reloaded._arrays
+    assert reloaded.intensity(t) == value
@@ -0,0 +1,131 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from addon_loader import load
+
+jali_core = load('animtools.jali_core')
+
+PHONEMES = sorted(jali_core.ARPABET_JALI_MAP) + ['SIL', 'SP', ',']
+
+
+def random_events(seed, count):
+    """count back to back phonemes with stress markers, word indices and ~8% extra silences."""
+    rng = np.random.default_rng(seed)
+    events, t, word = [], 0.0, 0
+    for _ in range(count):
+        phoneme = PHONEMES[rng.integers(len(PHONEMES))] if rng.random() > 0.08 else 'SIL'
+        if phoneme in jali_core.VOWELS:
+            phoneme += '012'[rng.integers(3)]
+        duration = float(rng.uniform(0.02, 0.25))
+        if rng.random() < 0.2:
+            word += 1
+        event = jali_core.create_phoneme_event(phoneme, t, t + duration)
+        event.word_index = word if rng.random() > 0.05 else -1
+        events.append(event)
+        t += duration
+    return events
+
+
+class ReferenceEngine(jali_core.CoarticulationEngine):
+    """The rule passes as they were before the columnar timeline."""
+
+    @staticmethod
+    def _substitute_pauses(events):
+        n = len(events)
+        for i, event in enumerate(events):
+            if event.phoneme not in jali_core.PAUSES:
+                continue
+            has_prev_speech = any(events[j].phoneme not in jali_core.PAUSES for j in range(i))
+            has_next_speech = any(events[j].phoneme not in jali_core.PAUSES for j in range(i + 1, n))
+            if has_prev_speech and has_next_speech:
+                if i > 0 and events[i - 1].phoneme not in jali_core.PAUSES:
+                    event.jaw = events[i - 1].jaw
+                elif i < n - 1 and events[i + 1].phoneme not in jali_core.PAUSES:
+                    event.jaw = events[i + 1].jaw
+                event.lip = 0.0
+                event.jaw = max(event.jaw * 0.7, 0.15)
+                event.dominance = 0.05
+            else:
+                event.jaw = 0.0
+                event.lip = 0.0
+                event.dominance = 0.05
+
+    @staticmethod
+    def _merge_duplicates(events):
+        i = 0
+        while i < len(events) - 1:
+            if jali_core._get_viseme(events[i].phoneme) == jali_core._get_viseme(events[i + 1].phoneme):
+                events[i].end = events[i + 1].end
+                events[i].original_end = events[i + 1].original_end
+                events.pop(i + 1)
+            else:
+                i += 1
+
+
+def reference_blend(blender, events, duration):
+    """blend_jali_parameters accumulating one dense curve per event."""
+    num_frames = int(duration * blender.fps) + 1
+    times = np.linspace(0, duration, num_frames, dtype=np.float32)
+    jaw_weighted = np.zeros(num_frames, dtype=np.float64)
+    lip_weighted = np.zeros(num_frames, dtype=np.float64)
+    dominance_sum = np.zeros(num_frames, dtype=np.float64)
+    for event in events:
+        D = blender.compute_dominance_curve(event, times)
+        jaw_weighted += event.jaw * D
+        lip_weighted += event.lip * D
+        dominance_sum += D
+    jaw_curve = jaw_weighted / (dominance_sum + 1e-8)
+    lip_curve = lip_weighted / (dominance_sum + 1e-8)
+    no_influence = dominance_sum < 1e-6
+    jaw_curve[no_influence] = 0.0
+    lip_curve[no_influence] = 0.0
+    return times, jaw_curve.astype(np.float32), lip_curve.astype(np.float32)
+
+
+@pytest.mark.parametrize('seed', range(12))
+def test_rules_match_reference(seed):
+    count = [1, 5, 40, 300, 2000][seed % 5]
+    expected = ReferenceEngine().apply_rules(random_events(seed, count))
+    actual = jali_core.CoarticulationEngine().apply_rules(random_events(seed, count))
+    assert [dataclasses.asdict(e) for e in actual] == [dataclasses.asdict(e) for e in expected]
+
+
+@pytest.mark.parametrize('seed', range(12))
+def test_blend_matches_reference(seed):
+    count = [1, 5, 40, 300, 2000][seed % 5]
+    fps = [24.0, 30.0, 60.0][seed % 3]
+    events = jali_core.CoarticulationEngine().apply_rules(random_events(seed, count))
+    blender = jali_core.DominanceBlender(fps)
+    duration = events[-1].end + 0.5
+    for expected, actual in zip(reference_blend(blender, events, duration),
+                                blender.blend_jali_parameters(events, duration)):
+        assert actual.dtype == expected.dtype
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_sparse_curves_match_dense_curves():
+    events = jali_core.CoarticulationEngine().apply_rules(random_events(3, 300))
+    blender = jali_core.DominanceBlender(30.0)
+    times = np.linspace(0, events[-1].end + 0.5, int((events[-1].end + 0.5) * 30) + 1, dtype=np.float32)
+    event, frame, values = blender.compute_dominance_curves(jali_core.PhonemeTimeline.from_events(events), times)
+    assert (np.diff(event) >= 0).all()
+    for i, e in enumerate(events):
+        dense = np.zeros(len(times), dtype=np.float32)
+        mine = event == i
+        dense[frame[mine]] = values[mine]
+        # everything outside the sparse entries is zero in the dense curve
+        np.testing.assert_array_equal(dense, blender.compute_dominance_curve(e, times))
+
+
+def test_timeline_columns():
+    events = jali_core.CoarticulationEngine().apply_rules(random_events(4, 40))
+    timeline = jali_core.PhonemeTimeline.from_events(events)
+    assert len(timeline) == len(events)
+    for i, e in enumerate(events):
+        viseme = timeline.viseme[i]
+        assert (jali_core.VISEMES[viseme] if viseme >= 0 else e.phoneme) == jali_core._get_viseme(e.phoneme)
+        assert (timeline.apex[i], timeline.sustain_end[i]) == (e.apex, e.sustain_end)
+        assert (timeline.jaw[i], timeline.lip[i], timeline.dominance[i]) == (e.jaw, e.lip, e.dominance)
+        assert timeline.onset[i] <= timeline.apex[i] or timeline.onset[i] == e.prev_pause_end
@@ -0,0 +1,155 @@
+import json
+from collections import OrderedDict
+from concurrent.futures import wait
+
+import pytest
+
+from addon_loader import load
+
+jsontool = load('jsontool')
+JSONCache = jsontool.JSONCache
+JSONTool = jsontool.JSONTool
+
+STAMP = (1, 1000)
+
+
+def document():
+    return {'Header': {'WolvenKitVersion': '8.14'}, 'Data': {'RootChunk': {'list': [1, 2, {'path': 'base\\a'}]}}}
+
+
+def test_session_shares_one_object():
+    cache = JSONCache()
+    data = document()
+    cache.put('a', STAMP, data)
+    assert cache.get('a', STAMP) is data
+    assert cache.get('a', STAMP) is data
+
+
+def test_entries_end_with_the_session_by_default():
+    cache = JSONCache()
+    cache.put('a', STAMP, document())
+    cache.end_session()
+    assert len(cache) == 0
+    assert cache.stats()['bytes'] == 0
+    assert cache.get('a', STAMP) is None
+
+
+@pytest.mark.parametrize('keep', [False, True])
+def test_changes_do_not_leak_into_the_next_session(keep):
+    cache = JSONCache()
+    cache.put('a', STAMP, document(), snapshot=keep)
+    data = cache.get('a', STAMP)
+    data['Data']['RootChunk']['list'][2]['path'] = 'changed'
+    data['Header'].clear()
+    cache.end_session(keep=keep)
+
+    kept = cache.get('a', STAMP)
+    if keep:
+        assert kept == document()
+        assert kept is not data
+        assert cache.get('a', STAMP) is kept
+    else:
+        assert kept is None
+
+
+def test_kept_entries_need_a_snapshot():
+    cache = JSONCache()
+    cache.put('live', STAMP, document())
+    cache.put('kept', STAMP, document(), snapshot=True)
+    cache.end_session(keep=True)
+    assert 'live' not in cache
+    assert 'kept' in cache
+
+
+def test_budget_counts_estimated_memory():
+    cache = JSONCache(max_bytes=10 * STAMP[1] * JSONCache.PARSED_SIZE_FACTOR)
+    for i in range(12):
+        cache.put(i, STAMP, document())
+    stats = cache.stats()
+    assert len(cache) == 10
+    assert stats['evictions'] == 2
+    assert stats['bytes'] == 10 * STAMP[1] * JSONCache.PARSED_SIZE_FACTOR
+    assert 0 not in cache and 1 not in cache and 11 in cache
+
+
+def test_kept_snapshots_are_budgeted_by_their_size():
+    cache = JSONCache()
+    cache.put('a', STAMP, document(), snapshot=True)
+    live = cache.stats()['bytes']
+    cache.end_session(keep=True)
+    kept = cache.stats()['bytes']
+    assert 0 < kept < live
+    cache.get('a', STAMP)
+    assert cache.stats()['bytes'] == live
+
+
+def test_changed_file_is_a_miss():
+    cache = JSONCache()
+    cache.put('a', STAMP, document(), snapshot=True)
+    assert cache.get('a', (2, STAMP[1])) is None
+    assert 'a' not in cache
+    assert cache.stats()['bytes'] == 0
+
+
+@pytest.fixture
+def prefetching(monkeypatch):
+    """A caching session of its own, parsing two files ahead."""
+    monkeypatch.setattr(JSONTool, '_json_cache', JSONCache())
+    monkeypatch.setattr(JSONTool, '_use_cache', True)
+    monkeypatch.setattr(JSONTool, '_prefetched', {})
+    monkeypatch.setattr(JSONTool, '_prefetch_queue', OrderedDict())
+    monkeypatch.setattr(JSONTool, '_prefetch_pool', None)
+    monkeypatch.setattr(JSONTool, 'PREFETCH_WINDOW', 2)
+    yield
+    if JSONTool._prefetch_pool is not None:
+        JSONTool._prefetch_pool.shutdown(cancel_futures=True)
+
+
+def write_documents(directory, count):
+    """count mesh jsons of the same size, each with its index."""
+    paths = []
+    for i in range(count):
+        path = directory / f'm{i:02d}.mesh.json'
+        path.write_text(json.dumps(dict(document(), index=i)))
+        paths.append(str(path))
+    return paths
+
+
+def drain_prefetch():
+    while JSONTool._prefetched or JSONTool._prefetch_queue:
+        wait([future for _, future in JSONTool._prefetched.values()])
+        JSONTool._pump_prefetch()
+
+
+def test_prefetch_runs_a_window_ahead(prefetching, tmp_path):
+    paths = write_documents(tmp_path, 6)
+    assert JSONTool.prefetch(paths) == 6
+    assert len(JSONTool._prefetched) == 2
+    assert len(JSONTool._prefetch_queue) == 4
+
+    # finished parses go to the cache and free their slots for the next files
+    wait([future for _, future in JSONTool._prefetched.values()])
+    JSONTool._pump_prefetch()
+    assert len(JSONTool._json_cache) == 2
+    assert len(JSONTool._prefetched) == 2
+    assert len(JSONTool._prefetch_queue) == 2
+
+    # a file asked for before its turn is read right away and leaves the queue
+    assert JSONTool.jsonload(paths[5])['index'] == 5
+    assert len(JSONTool._prefetch_queue) == 1
+    for i, path in enumerate(paths):
+        assert JSONTool.jsonload(path)['index'] == i
+    assert not JSONTool._prefetched and not JSONTool._prefetch_queue
+
+
+def test_finished_prefetches_count_against_the_cache_budget(prefetching, tmp_path):
+    paths = write_documents(tmp_path, 6)
+    JSONTool._json_cache.max_bytes = 3 * JSONCache.stamp(paths[0])[1] * JSONCache.PARSED_SIZE_FACTOR
+    JSONTool.prefetch(paths)
+    drain_prefetch()
+    stats = JSONTool._json_cache.stats()
+    assert len(JSONTool._json_cache) == 3
+    assert stats['evictions'] == 3
+    assert stats['bytes'] <= stats['max_bytes']
+    for i, path in enumerate(paths):
+        assert JSONTool.jsonload(path)['index'] == i
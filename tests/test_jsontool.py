@@ -0,0 +1,74 @@
+import glob
+import json
+import os
+
+import pytest
+
+from addon_loader import ROOT, load
+
+JSONTool = load('jsontool').JSONTool
+
+RESOURCES = sorted(glob.glob(os.path.join(ROOT, 'i_scene_cp77_gltf', 'resources', '**', '*.json'), recursive=True))
+
+pytestmark = pytest.mark.skipif(os.sep == '\\', reason="paths are only rewritten where the separator isn't a backslash")
+
+
+def reference_normalize(data):
+    """normalize_paths as it was before the text pass, the expected output."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            data[key] = reference_normalize(value)
+    elif isinstance(data, list):
+        for i in range(len(data)):
+            data[i] = reference_normalize(data[i])
+    elif isinstance(data, str):
+        if data[0:4] == 'base' or data[0:3] == 'ep1' or data[1:3] == ':\\':
+            data = data.replace('\\', os.sep)
+    return data
+
+
+TRICKY = {
+    'depot': 'base\\characters\\mesh.mesh',
+    'quoted': 'foo \\"base\\x\\y" bar',
+    'inner': 'see "ep1\\q\\r" here',
+    'after_comma': 'x, "base\\k"',
+    'after_colon': 'x: "base\\z"',
+    'after_bracket': '["base\\w"]',
+    'escaped_backslash_end': 'engine\\x\\\\',
+    'base\\key': 'C:\\depot\\file',
+    'unc': '\\\\?\\Z:\\depot',
+    'list': ['base\\a', ['ep1\\b', 'engine\\c'], 'D:\\e\\"f'],
+    'empty': '',
+    'nested': {'ep1\\k': {'$value': 'ep1\\v\\w'}},
+}
+
+
+@pytest.mark.parametrize('text', [json.dumps(TRICKY), json.dumps(TRICKY, indent=2)], ids=['compact', 'indented'])
+def test_normalize_text_matches_tree_walk(text):
+    expected = reference_normalize(json.loads(text))
+    assert json.loads(JSONTool.normalize_text(text)) == expected
+    assert JSONTool.normalize_paths(json.loads(text)) == expected
+
+
+def test_quote_inside_value_is_not_a_string_start():
+    text = json.dumps({'a': 'foo "base\\x" bar'})
+    assert json.loads(JSONTool.normalize_text(text)) == {'a': 'foo "base\\x" bar'}
+
+
+@pytest.mark.parametrize('threshold', [0, 1 << 30], ids=['text', 'tree'])
+def test_parse_both_paths(monkeypatch, threshold):
+    monkeypatch.setattr(JSONTool, 'TEXT_NORMALIZE_MIN_SIZE', threshold)
+    text = json.dumps(TRICKY, indent=2)
+    expected = reference_normalize(json.loads(text))
+    assert JSONTool.parse(text) == expected
+    assert JSONTool.parse(text.encode('utf-8')) == expected
+    assert JSONTool.parse(text.encode('utf-8-sig')) == expected
+
+
+@pytest.mark.parametrize('path', RESOURCES, ids=os.path.basename)
+def test_bundled_resources(path):
+    with open(path, 'r') as file:
+        text = file.read()
+    expected = reference_normalize(json.loads(text))
+    assert JSONTool.parse(text) == expected
+    assert json.loads(JSONTool.normalize_text(text)) == expected
@@ -0,0 +1,107 @@
+import struct
+
+import numpy as np
+import pytest
+
+from addon_loader import load
+
+codec = load('main.physx_heightfield')
+PhysX = load('importers.import_heightmap').PhysX
+PhysXWriter = load('exporters.physxHeightfieldWriter').PhysXWriter
+
+
+def reference_read(data, count):
+    """The sample loop of the reader before the codec, one dict per sample with the raw bytes."""
+    samples, position = [], 0
+    for _ in range(count):
+        height, m0, m1 = struct.unpack('hBB', data[position:position + 4])
+        samples.append({"height": height, "material_index_0": m0, "material_index_1": m1})
+        position += 4
+    return samples
+
+
+def reference_write(samples):
+    """The sample loop of the writer before the codec."""
+    out = bytearray()
+    for s in samples:
+        out += struct.pack("h", int(s["height"]))
+        out += struct.pack("B", int(s["material_index_0"]))
+        out += struct.pack("B", int(s["material_index_1"]))
+    return bytes(out)
+
+
+def random_block(count, seed=0):
+    """Random heights over the full int16 range and every material byte value, tessellation and reserved bits included."""
+    rng = np.random.default_rng(seed)
+    raw = np.empty(count, dtype=codec.RAW_SAMPLE_DTYPE)
+    raw["height"] = rng.integers(-32768, 32768, count)
+    raw["material_index_0"] = rng.integers(0, 256, count)
+    raw["material_index_1"] = rng.integers(0, 256, count)
+    every = np.arange(min(count, 256))
+    raw["material_index_0"][every] = every
+    raw["material_index_1"][every] = 255 - every
+    return raw.tobytes()
+
+
+def heightfield(samples, rows, columns, version=2):
+    return {
+        "version": version, "rows": rows, "columns": columns, "row_limit": rows - 2, "col_limit": columns - 2,
+        "nb_columns": columns, "thickness": -1.0, "convex_edge_threshold": 0.0, "flags": 1, "format": 1,
+        "min_max_bounds": {"min": {"x": 0.0, "y": -32768.0, "z": 0.0}, "max": {"x": rows - 1.0, "y": 32767.0, "z": columns - 1.0}},
+        "sample_stride": 4, "min_height": -32768.0, "max_height": 32767.0, "samples": samples,
+    }
+
+
+@pytest.mark.parametrize('count', [0, 1, 256, 64 * 64])
+def test_decode_matches_reference_reader(count):
+    data = random_block(count)
+    expected = reference_read(data, count)
+    samples = codec.decode_samples(data)
+    assert samples.dtype == codec.SAMPLE_DTYPE and len(samples) == count
+
+    assert samples["height"].tolist() == [s["height"] for s in expected]
+    assert samples["material_index_0"].tolist() == [s["material_index_0"] & 0x7F for s in expected]
+    assert samples["tess_flag"].tolist() == [bool(s["material_index_0"] & 0x80) for s in expected]
+    # the reserved high bit of material_index_1 is kept
+    assert samples["material_index_1"].tolist() == [s["material_index_1"] for s in expected]
+
+
+def test_decode_encode_round_trips_every_byte():
+    data = random_block(64 * 64)
+    assert codec.encode_samples(codec.decode_samples(data)) == data
+    assert codec.encode_samples(np.frombuffer(data, dtype=codec.RAW_SAMPLE_DTYPE)) == data
+    assert codec.decode_samples(data + b'\0' * 8, count=10, offset=8)["height"].tolist() == \
+        codec.decode_samples(data)["height"][2:12].tolist()
+
+
+def test_encode_matches_reference_writer():
+    samples = reference_read(random_block(64 * 64), 64 * 64)
+    expected = reference_write(samples)
+    assert codec.encode_samples(samples) == expected
+
+    # the tessellation flag of a dict is merged into the high bit
+    split = [dict(s, material_index_0=s["material_index_0"] & 0x7F, tess_flag=bool(s["material_index_0"] & 0x80))
+             for s in samples]
+    assert codec.encode_samples(split) == expected
+
+
+def test_flag_outside_material_byte_wins_over_high_bit():
+    samples = np.zeros(2, dtype=codec.SAMPLE_DTYPE)
+    samples["material_index_0"] = [0x85, 0x05]
+    samples["tess_flag"] = [False, True]
+    raw = np.frombuffer(codec.encode_samples(samples), dtype=codec.RAW_SAMPLE_DTYPE)
+    assert raw["material_index_0"].tolist() == [0x05, 0x85]
+
+
+@pytest.mark.parametrize('version', [1, 2])
+def test_writer_and_reader_round_trip(version):
+    rows, columns = 16, 12
+    data = random_block(rows * columns, seed=version)
+    samples = reference_read(data, rows * columns)
+
+    text = PhysXWriter.write([heightfield(samples, rows, columns, version)])
+    assert text == PhysXWriter.write([heightfield(codec.decode_samples(data), rows, columns, version)])
+
+    loaded, = PhysX.load(text)
+    assert (loaded["rows"], loaded["columns"], loaded["nb_samples"]) == (rows, columns, rows * columns)
+    assert codec.encode_samples(loaded["samples"]) == data